@@ -20,7 +20,7 @@ from config import ConfigManager, get_config
 from database import Database, get_database
 from models import SourceType
 from sources import SkillslmSource, LocalSource, FortyTwoPluginSource, GitHubSource
-from evaluation import EvaluationEngine
+from evaluation import EvaluationEngine, EvaluationRunner
 from adapt import AutoAdaptOrchestrator, adapt_skill_from_metadata
 
 
@@ -58,26 +58,33 @@ def get_sources():
     return sources
 
 
-def _evaluate_results(results, config_obj, db_obj, requirement):
-    """辅助函数：评估搜索结果"""
+def _evaluate_results(results, config_obj, db_obj, requirement, sources=None):
+    """辅助函数：评估搜索结果
+
+    并发评估（上限为 evaluation.concurrency），本地 skill 元数据与评估报告均缓存在数据库中。
+    sources 中的数据源用于补全缺少元数据的结果。
+    """
     async def do_evaluate():
-        # 获取本地 skills
-        local_source = LocalSource(config_obj)
+        # 获取本地 skills（SKILL.md 未变化的直接使用缓存）
+        local_source = LocalSource(config_obj, db=db_obj)
         local_skills = await local_source.list()
         local_metadata = [r.metadata for r in local_skills if r.metadata]
 
         # 创建评估引擎
         engine = EvaluationEngine(config_obj)
+        runner = EvaluationRunner(engine, db_obj, concurrency=config_obj.evaluation.concurrency)
+
+        source_map = {s.source_type: s for s in sources or []}
+        try:
+            await runner.evaluate_all(results, local_metadata, requirement or "", source_map)
+        finally:
+            for source in source_map.values():
+                if hasattr(source, 'aclose'):
+                    await source.aclose()
 
-        # 评估每个结果
-        for result in results:
-            if result.metadata:
-                report = await engine.evaluate(
-                    result.metadata,
-                    local_metadata,
-                    requirement or ""
-                )
-                result.evaluation = report
+        stats = runner.stats
+        click.echo(f"[EVALUATE] {stats['evaluated']} evaluated, {stats['cached']} from cache, "
+                   f"{stats['fetched']} metadata fetched, {stats['failed']} failed\n")
 
     asyncio.run(do_evaluate())
 
@@ -157,7 +164,13 @@ if HAS_CLICK:
                 click.echo("[ERROR] No available sources")
                 return []
 
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                # HTTP 客户端绑定当前事件循环，评估阶段会重新创建
+                for s in sources_to_search:
+                    if hasattr(s, 'aclose'):
+                        await s.aclose()
 
             for r in results:
                 if isinstance(r, Exception):
@@ -199,7 +212,7 @@ if HAS_CLICK:
         # 可选：进行评估
         if evaluate and results:
             click.echo("Pre-assessing...\n")
-            _evaluate_results(results, config_obj, db_obj, requirement)
+            _evaluate_results(results, config_obj, db_obj, requirement, sources_to_search)
 
 
     @cli.command()
@@ -25,6 +25,7 @@ class EvaluationConfig:
     overlap_threshold: float = 0.8      # 重复度阈值
     quality_threshold: float = 0.6       # 质量阈值 (0-1)
     auto_adapt: bool = True             # 自动适配
+    concurrency: int = 8                # 并发评估数（含远程元数据获取）
 
 
 @dataclass
@@ -74,6 +75,11 @@ class Config:
             # 默认使用 MindSymphony skills 目录
             self.integration.skills_path = os.path.expanduser("~/.claude/skills")
 
+    @property
+    def similarity_cache_path(self) -> str:
+        """本地 skills 相似度特征（TF-IDF 矩阵等）的缓存文件，位于数据库旁"""
+        return os.path.join(os.path.dirname(self.db_path) or ".", "local_similarity.json")
+
 
 class ConfigManager:
     """配置管理器"""
@@ -131,7 +137,8 @@ class ConfigManager:
             config.evaluation = EvaluationConfig(
                 overlap_threshold=eval_data.get('overlap_threshold', 0.8),
                 quality_threshold=eval_data.get('quality_threshold', 0.6),
-                auto_adapt=eval_data.get('auto_adapt', True)
+                auto_adapt=eval_data.get('auto_adapt', True),
+                concurrency=eval_data.get('concurrency', 8)
             )
 
         # 解析集成配置
@@ -194,6 +201,7 @@ class ConfigManager:
                 'overlap_threshold': self.config.evaluation.overlap_threshold,
                 'quality_threshold': self.config.evaluation.quality_threshold,
                 'auto_adapt': self.config.evaluation.auto_adapt,
+                'concurrency': self.config.evaluation.concurrency,
             },
             'integration': {
                 'mindsymphony': {
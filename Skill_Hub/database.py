@@ -75,6 +75,26 @@ class Database:
                 )
             """)
 
+            # 评估报告缓存表（键: skill 内容指纹 + 需求 + 本地语料指纹）
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS evaluation_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    skill_name TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    report_json TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # 本地 skill 元数据缓存表（SKILL.md 未变化时无需重新解析）
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS local_metadata_cache (
+                    path TEXT PRIMARY KEY,
+                    signature TEXT NOT NULL,
+                    metadata_json TEXT NOT NULL
+                )
+            """)
+
             # 创建索引
             conn.execute("CREATE INDEX IF NOT EXISTS idx_remote_name ON remote_skills(name)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_remote_source ON remote_skills(source)")
@@ -220,6 +240,52 @@ class Database:
         ).fetchall()
         return [dict(row) for row in rows]
 
+    def get_cached_local_metadata(self, path: str, signature: str) -> Optional[SkillMetadata]:
+        """获取缓存的本地 skill 元数据（签名不符视为未命中）"""
+        row = self.conn.execute(
+            "SELECT metadata_json FROM local_metadata_cache WHERE path = ? AND signature = ?",
+            (path, signature)
+        ).fetchone()
+
+        return SkillMetadata.from_dict(json.loads(row['metadata_json'])) if row else None
+
+    def save_cached_local_metadata(self, path: str, signature: str, metadata: SkillMetadata) -> None:
+        """缓存本地 skill 元数据"""
+        with self.conn as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO local_metadata_cache (path, signature, metadata_json)
+                VALUES (?, ?, ?)
+            """, (path, signature, json.dumps(metadata.to_dict(), default=str)))
+            conn.commit()
+
+    # ===== 评估报告缓存 =====
+
+    def get_evaluation(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """获取缓存的评估报告（PreEvaluationReport.to_dict() 的结果）"""
+        row = self.conn.execute(
+            "SELECT report_json FROM evaluation_cache WHERE cache_key = ?",
+            (cache_key,)
+        ).fetchone()
+
+        return json.loads(row['report_json']) if row else None
+
+    def save_evaluation(self, cache_key: str, skill_name: str, source: str,
+                        report: Dict[str, Any]) -> None:
+        """保存评估报告"""
+        with self.conn as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO evaluation_cache
+                (cache_key, skill_name, source, report_json, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (
+                cache_key,
+                skill_name,
+                source,
+                json.dumps(report, ensure_ascii=False),
+                datetime.now().isoformat()
+            ))
+            conn.commit()
+
     # ===== 搜索历史 =====
 
     def save_search(self, query: str, sources: List[str], result_count: int) -> None:
@@ -251,8 +317,13 @@ class Database:
                 "DELETE FROM remote_skills WHERE cached_at < ?",
                 (cutoff,)
             )
+            removed = cursor.rowcount
+            cursor = conn.execute(
+                "DELETE FROM evaluation_cache WHERE created_at < ?",
+                (cutoff,)
+            )
             conn.commit()
-            return cursor.rowcount
+            return removed + cursor.rowcount
 
     def get_stats(self) -> Dict[str, int]:
         """获取统计信息"""
@@ -270,6 +341,10 @@ class Database:
             "SELECT COUNT(*) FROM search_history"
         ).fetchone()[0]
 
+        stats['cached_evaluations'] = self.conn.execute(
+            "SELECT COUNT(*) FROM evaluation_cache"
+        ).fetchone()[0]
+
         # 按来源统计
         for source in ['skillslm', '42plugin', 'github']:
             count = self.conn.execute(
@@ -7,9 +7,12 @@ Skill Hub - Evaluation Engine
 import os
 import re
 import math
-from typing import List, Optional, Tuple, Dict
+import json
+import asyncio
+import hashlib
+from typing import List, Optional, Tuple, Dict, Iterable, Set
 from datetime import datetime, timedelta
-from collections import Counter
+from collections import Counter, defaultdict
 
 
 def _score_by_thresholds(
@@ -39,8 +42,11 @@ def _score_by_thresholds(
     return 0.0
 
 try:
+    import numpy as np
     from sklearn.feature_extraction.text import TfidfVectorizer
     from sklearn.metrics.pairwise import cosine_similarity
+    from sklearn.preprocessing import normalize
+    from scipy.sparse import csr_matrix
     HAS_SKLEARN = True
 except ImportError:
     HAS_SKLEARN = False
@@ -59,10 +65,258 @@ from models import (
 )
 
 
+def _jaccard_scores(query: Set[str], postings: Dict[str, List[int]],
+                    sizes: List[int]) -> Dict[int, float]:
+    """通过倒排表一次计算 query 与所有集合的 Jaccard 相似度
+
+    只返回有交集的集合（其余为 0）: {集合下标: 相似度}
+    """
+    if not query:
+        return {}
+
+    intersections: Dict[int, int] = defaultdict(int)
+    for token in query:
+        for i in postings.get(token, ()):
+            intersections[i] += 1
+
+    return {
+        i: count / (len(query) + sizes[i] - count)
+        for i, count in intersections.items()
+    }
+
+
+class LocalSkillCorpus:
+    """本地 skills 的预计算特征
+
+    - 描述: TF-IDF 稀疏矩阵（行已 L2 归一化），远程描述与所有本地描述的
+      余弦相似度由一次稀疏矩阵乘法得到；无 sklearn 时退化为词汇 Jaccard
+    - 名称/触发词/标签/文件结构: 规范化后的集合与倒排表
+
+    特征以 JSON 写入数据库旁的缓存文件（不使用 pickle，读取缓存不会执行代码），
+    本地 skills 的指纹变化时重建。
+    """
+
+    VERSION = 2
+
+    # 缓存中的集合特征: (倒排表, 集合大小)
+    _SET_FEATURES = ('triggers', 'files', 'tags', 'words')
+
+    def __init__(self, local_skills: List[SkillMetadata], fingerprint: str = ""):
+        self.fingerprint = fingerprint or self.compute_fingerprint(local_skills)
+        self.size = len(local_skills)
+
+        # 名称（小写去空白）及其前缀
+        self.names = [(s.name or "").lower().strip() for s in local_skills]
+        self.has_name = [bool(s.name) for s in local_skills]
+        self.name_index: Dict[str, List[int]] = defaultdict(list)
+        self.prefix_index: Dict[str, List[int]] = defaultdict(list)
+        for i, name in enumerate(self.names):
+            if self.has_name[i]:
+                self.name_index[name].append(i)
+                self.prefix_index[name.split('-')[0]].append(i)
+
+        # 集合特征: 触发词 / 文件结构 / 标签 / 描述词汇
+        self.triggers = self._build_postings([set(_flatten_triggers(s.triggers)) for s in local_skills])
+        self.files = self._build_postings([set(s.file_list or []) for s in local_skills])
+        self.tags = self._build_postings([set(t.lower() for t in s.tags or []) for s in local_skills])
+        self.has_description = [bool(s.description) for s in local_skills]
+        self.words = self._build_postings([
+            set(s.description.lower().split()) if s.description else set()
+            for s in local_skills
+        ])
+
+        self.vectorizer = None
+        self.matrix = None
+        if HAS_SKLEARN and any(self.has_description):
+            # 不在拟合时归一化: 远程描述中语料外的词也要计入其向量长度
+            vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=1, analyzer='word', norm=None)
+            try:
+                matrix = vectorizer.fit_transform([s.description or "" for s in local_skills])
+            except ValueError:
+                # 词表为空（如描述全部是单字符），退化为词汇 Jaccard
+                matrix = None
+            if matrix is not None:
+                self.vectorizer = vectorizer
+                self.matrix = normalize(matrix, norm='l2', copy=False).tocsr()
+                # 语料外词的 idf（文档频率为 0，smooth_idf 公式）
+                self.unseen_idf = math.log(1 + self.size) + 1
+
+    @staticmethod
+    def _build_postings(sets: List[Set[str]]) -> Tuple[Dict[str, List[int]], List[int]]:
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for i, items in enumerate(sets):
+            for item in items:
+                postings[item].append(i)
+        return dict(postings), [len(items) for items in sets]
+
+    @staticmethod
+    def compute_fingerprint(local_skills: Iterable[SkillMetadata]) -> str:
+        """本地 skills 参与重叠度计算的字段的指纹"""
+        digest = hashlib.sha1()
+        for skill in local_skills:
+            digest.update(json.dumps([
+                skill.name, skill.description, skill.triggers, skill.tags, skill.file_list
+            ], sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def save(self, path: str):
+        """写入缓存文件（先写临时文件再替换）"""
+        state = {
+            'version': self.VERSION,
+            'fingerprint': self.fingerprint,
+            'size': self.size,
+            'names': self.names,
+            'has_name': self.has_name,
+            'name_index': self.name_index,
+            'prefix_index': self.prefix_index,
+            'has_description': self.has_description,
+            'tfidf': None,
+        }
+        for feature in self._SET_FEATURES:
+            state[feature] = getattr(self, feature)
+        if self.matrix is not None:
+            state['tfidf'] = {
+                'vocabulary': {term: int(i) for term, i in self.vectorizer.vocabulary_.items()},
+                'idf': self.vectorizer.idf_.tolist(),
+                'data': self.matrix.data.tolist(),
+                'indices': self.matrix.indices.tolist(),
+                'indptr': self.matrix.indptr.tolist(),
+                'shape': list(self.matrix.shape),
+                'unseen_idf': self.unseen_idf,
+            }
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, fingerprint: str) -> Optional['LocalSkillCorpus']:
+        """读取缓存文件；不存在、损坏、版本或指纹不符时返回 None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') != cls.VERSION or state.get('fingerprint') != fingerprint:
+                return None
+            tfidf = state['tfidf']
+            if (tfidf is not None) != HAS_SKLEARN and any(state['has_description']):
+                # 缓存与当前环境是否安装 sklearn 不一致
+                return None
+
+            corpus = cls.__new__(cls)
+            for key in ('fingerprint', 'size', 'names', 'has_name', 'name_index',
+                        'prefix_index', 'has_description'):
+                setattr(corpus, key, state[key])
+            for feature in cls._SET_FEATURES:
+                postings, sizes = state[feature]
+                setattr(corpus, feature, (postings, sizes))
+
+            corpus.vectorizer = None
+            corpus.matrix = None
+            if tfidf is not None:
+                vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=1, analyzer='word', norm=None)
+                vectorizer.vocabulary_ = tfidf['vocabulary']
+                vectorizer.idf_ = np.asarray(tfidf['idf'], dtype=np.float64)
+                corpus.vectorizer = vectorizer
+                corpus.matrix = csr_matrix(
+                    (tfidf['data'], tfidf['indices'], tfidf['indptr']), shape=tuple(tfidf['shape'])
+                )
+                corpus.unseen_idf = tfidf['unseen_idf']
+            return corpus
+        except Exception:
+            return None
+
+    def name_scores(self, name: str) -> List[float]:
+        """名称相似度（规则同 SimilarityDetector._name_similarity）"""
+        scores = [0.0] * self.size
+        if not name:
+            return scores
+
+        n1 = name.lower().strip()
+        for i, n2 in enumerate(self.names):
+            if self.has_name[i] and (n1 in n2 or n2 in n1):
+                scores[i] = 0.7
+        for i in self.prefix_index.get(n1.split('-')[0], ()):
+            if scores[i] == 0.0:
+                scores[i] = 0.5
+        for i in self.name_index.get(n1, ()):
+            scores[i] = 1.0
+        return scores
+
+    def description_scores(self, description: str) -> List[float]:
+        """描述语义相似度（与所有本地描述）"""
+        scores = [0.0] * self.size
+        if not description:
+            return scores
+
+        if self.matrix is not None:
+            vector = self.vectorizer.transform([description])
+            vocabulary = self.vectorizer.vocabulary_
+            unseen = sum(
+                (count * self.unseen_idf) ** 2
+                for term, count in Counter(self.vectorizer.build_analyzer()(description)).items()
+                if term not in vocabulary
+            )
+            norm = math.sqrt(vector.multiply(vector).sum() + unseen)
+            if norm == 0:
+                return scores
+            scores = (self.matrix @ vector.T).toarray().ravel() / norm
+            scores = scores.tolist()
+        else:
+            words, sizes = self.words
+            for i, score in _jaccard_scores(set(description.lower().split()), words, sizes).items():
+                scores[i] = score
+
+        for i, has_description in enumerate(self.has_description):
+            if not has_description:
+                scores[i] = 0.0
+        return scores
+
+    @staticmethod
+    def set_scores(query: Set[str], feature: Tuple[Dict[str, List[int]], List[int]], size: int) -> List[float]:
+        postings, sizes = feature
+        scores = [0.0] * size
+        for i, score in _jaccard_scores(query, postings, sizes).items():
+            scores[i] = score
+        return scores
+
+
+def _flatten_triggers(triggers: Dict[str, List[str]]) -> List[str]:
+    """展平触发词字典"""
+    result = []
+    for lang, words in (triggers or {}).items():
+        if isinstance(words, list):
+            result.extend([w.lower().strip() for w in words])
+        elif isinstance(words, str):
+            result.append(words.lower().strip())
+    return result
+
+
 class SimilarityDetector:
-    """相似度检测器"""
+    """相似度检测器
+
+    本地 skills 的特征（含描述的 TF-IDF 矩阵）只计算一次，
+    每个远程 skill 与所有本地 skills 的各项相似度批量计算。
+    """
+
+    # 综合重叠度权重
+    WEIGHTS = {
+        'name': 0.15,
+        'description': 0.35,
+        'triggers': 0.25,
+        'structure': 0.15,
+        'tags': 0.10,
+    }
 
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = None):
+        """
+        Args:
+            cache_path: 本地语料特征的缓存文件（通常位于数据库旁）；为空时只缓存在内存中
+        """
+        self.cache_path = cache_path
+        self._corpus: Optional[LocalSkillCorpus] = None
         if HAS_SKLEARN:
             self.vectorizer = TfidfVectorizer(
                 ngram_range=(1, 2),
@@ -72,28 +326,83 @@ class SimilarityDetector:
         else:
             self.vectorizer = None
 
+    def get_corpus(self, local_skills: List[SkillMetadata]) -> LocalSkillCorpus:
+        """获取本地语料特征: 内存 -> 缓存文件 -> 重新计算并写入缓存"""
+        fingerprint = LocalSkillCorpus.compute_fingerprint(local_skills)
+        if self._corpus is not None and self._corpus.fingerprint == fingerprint:
+            return self._corpus
+
+        corpus = LocalSkillCorpus.load(self.cache_path, fingerprint) if self.cache_path else None
+        if corpus is None:
+            corpus = LocalSkillCorpus(local_skills, fingerprint)
+            if self.cache_path:
+                try:
+                    corpus.save(self.cache_path)
+                except OSError as e:
+                    print(f"[WARN] Failed to save similarity cache: {e}")
+
+        self._corpus = corpus
+        return corpus
+
     def calculate_overlap(
-        self, remote: SkillMetadata, local_skills: List[SkillMetadata]
+        self, remote: SkillMetadata, local_skills: List[SkillMetadata],
+        corpus: Optional[LocalSkillCorpus] = None
     ) -> Tuple[float, Optional[SkillMetadata], OverlapDetails]:
         """计算与本地 skills 的重叠度
 
+        Args:
+            corpus: 预先由 get_corpus(local_skills) 取得的语料特征；批量评估时
+                传入以避免每个远程 skill 都重新计算本地指纹
+
         返回: (最高重叠度, 最相似的skill, 详细信息)
         """
         if not local_skills:
             return 0.0, None, OverlapDetails()
 
-        max_overlap = 0.0
-        most_similar = None
-        best_details = OverlapDetails()
+        if corpus is None:
+            corpus = self.get_corpus(local_skills)
+        size = corpus.size
 
-        for local in local_skills:
-            overlap, details = self._calculate_single(remote, local)
-            if overlap > max_overlap:
-                max_overlap = overlap
-                most_similar = local
-                best_details = details
+        name_sims = corpus.name_scores(remote.name)
+        desc_sims = corpus.description_scores(remote.description)
+        trigger_sims = corpus.set_scores(set(_flatten_triggers(remote.triggers)), corpus.triggers, size)
+        struct_sims = corpus.set_scores(set(remote.file_list or []), corpus.files, size)
+        tag_sims = corpus.set_scores(set(t.lower() for t in remote.tags or []), corpus.tags, size)
+
+        weights = self.WEIGHTS
+        if HAS_SKLEARN:
+            totals = (
+                np.asarray(name_sims) * weights['name'] +
+                np.asarray(desc_sims) * weights['description'] +
+                np.asarray(trigger_sims) * weights['triggers'] +
+                np.asarray(struct_sims) * weights['structure'] +
+                np.asarray(tag_sims) * weights['tags']
+            )
+            best = int(np.argmax(totals))
+            max_overlap = float(totals[best])
+        else:
+            totals = [
+                name_sims[i] * weights['name'] +
+                desc_sims[i] * weights['description'] +
+                trigger_sims[i] * weights['triggers'] +
+                struct_sims[i] * weights['structure'] +
+                tag_sims[i] * weights['tags']
+                for i in range(size)
+            ]
+            best = max(range(size), key=totals.__getitem__)
+            max_overlap = totals[best]
+
+        if max_overlap <= 0:
+            return 0.0, None, OverlapDetails()
 
-        return max_overlap, most_similar, best_details
+        details = OverlapDetails(
+            name=name_sims[best],
+            description=desc_sims[best],
+            triggers=trigger_sims[best],
+            structure=struct_sims[best],
+            tags=tag_sims[best],
+        )
+        return max_overlap, local_skills[best], details
 
     def _calculate_single(
         self, remote: SkillMetadata, local: SkillMetadata
@@ -117,11 +426,11 @@ class SimilarityDetector:
 
         # 加权总分
         total = (
-            name_sim * 0.15 +
-            desc_sim * 0.35 +
-            trigger_sim * 0.25 +
-            struct_sim * 0.15 +
-            tag_sim * 0.10
+            name_sim * self.WEIGHTS['name'] +
+            desc_sim * self.WEIGHTS['description'] +
+            trigger_sim * self.WEIGHTS['triggers'] +
+            struct_sim * self.WEIGHTS['structure'] +
+            tag_sim * self.WEIGHTS['tags']
         )
 
         details = OverlapDetails(
@@ -197,13 +506,7 @@ class SimilarityDetector:
 
     def _flatten_triggers(self, triggers: Dict[str, List[str]]) -> List[str]:
         """展平触发词字典"""
-        result = []
-        for lang, words in triggers.items():
-            if isinstance(words, list):
-                result.extend([w.lower().strip() for w in words])
-            elif isinstance(words, str):
-                result.append(words.lower().strip())
-        return result
+        return _flatten_triggers(triggers)
 
     def _structure_similarity(self, files1: List[str], files2: List[str]) -> float:
         """文件结构相似度"""
@@ -731,7 +1034,9 @@ class EvaluationEngine:
     """综合评估引擎（融合 skill-curator 标准）"""
 
     def __init__(self, config=None):
-        self.similarity_detector = SimilarityDetector()
+        self.similarity_detector = SimilarityDetector(
+            cache_path=config.similarity_cache_path if config else None
+        )
         self.functional_matcher = FunctionalMatcher()  # 新增：功能匹配评估器
         self.quality_scorer = QualityScorer()
         self.security_scanner = SecurityPreScanner()
@@ -743,7 +1048,8 @@ class EvaluationEngine:
         self,
         remote: SkillMetadata,
         local_skills: List[SkillMetadata],
-        user_requirement: str = ""
+        user_requirement: str = "",
+        corpus: Optional[LocalSkillCorpus] = None
     ) -> PreEvaluationReport:
         """综合评估一个 skill
 
@@ -751,6 +1057,7 @@ class EvaluationEngine:
             remote: 远程 skill 元数据
             local_skills: 本地 skills 列表（用于重复度检测）
             user_requirement: 用户需求描述（用于功能匹配评估）
+            corpus: local_skills 的语料特征（见 SimilarityDetector.calculate_overlap）
         """
 
         report = PreEvaluationReport(
@@ -762,7 +1069,7 @@ class EvaluationEngine:
 
         # 1. 重复度检测
         overlap_score, most_similar, overlap_details = self.similarity_detector.calculate_overlap(
-            remote, local_skills
+            remote, local_skills, corpus
         )
         report.overlap.score = overlap_score
         report.overlap.most_similar = most_similar.name if most_similar else None
@@ -849,3 +1156,108 @@ class EvaluationEngine:
             Recommendation.INSPECT: "质量较低，建议人工审查",
         }
         return reasons.get(report.recommendation, "")
+
+
+class EvaluationRunner:
+    """并发评估执行器
+
+    - 用 asyncio.Semaphore 限制同时进行的评估数（含远程元数据获取）
+    - 本地语料特征在所有评估间共享（SimilarityDetector 只计算一次）
+    - 评估报告按 (skill 内容指纹, 需求, 本地语料指纹, 评估阈值) 缓存到数据库，
+      重复搜索时直接复用
+
+    示例:
+        runner = EvaluationRunner(engine, db, concurrency=8)
+        reports = await runner.evaluate_all(results, local_metadata, requirement,
+                                            sources={SourceType.GITHUB: github_source})
+    """
+
+    # 报告格式或评估规则变化时递增，使旧缓存失效
+    CACHE_VERSION = 1
+
+    def __init__(self, engine: EvaluationEngine, db=None, concurrency: int = 8):
+        self.engine = engine
+        self.db = db
+        self.concurrency = max(1, concurrency)
+        self.stats = {'evaluated': 0, 'cached': 0, 'fetched': 0, 'failed': 0}
+
+    def cache_key(self, metadata: SkillMetadata, requirement: str, local_fingerprint: str) -> str:
+        """评估报告缓存键"""
+        config = self.engine.config
+        thresholds = (
+            [config.evaluation.overlap_threshold, config.evaluation.quality_threshold]
+            if config else None
+        )
+        payload = json.dumps([
+            self.CACHE_VERSION,
+            metadata.content_hash(),
+            requirement,
+            local_fingerprint,
+            thresholds,
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def evaluate_all(
+        self,
+        results: List[SearchResult],
+        local_skills: List[SkillMetadata],
+        requirement: str = "",
+        sources: Optional[Dict] = None
+    ) -> List[Optional[PreEvaluationReport]]:
+        """评估所有搜索结果，报告写回 result.evaluation 并按顺序返回
+
+        Args:
+            results: 搜索结果；没有 metadata 的结果通过 sources 中对应的数据源获取
+            local_skills: 本地 skills（用于重复度检测）
+            requirement: 用户需求描述
+            sources: {SourceType: 数据源}，用于补全元数据
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # 本地语料（及其指纹）每次批量评估只取一次
+        corpus = self.engine.similarity_detector.get_corpus(local_skills) if local_skills else None
+        local_fingerprint = corpus.fingerprint if corpus else ""
+
+        async def run(result: SearchResult) -> Optional[PreEvaluationReport]:
+            async with semaphore:
+                try:
+                    return await self._evaluate_one(
+                        result, local_skills, requirement, corpus, local_fingerprint, sources or {}
+                    )
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    print(f"[WARN] Evaluation failed for {result.name}: {e}")
+                    return None
+
+        return await asyncio.gather(*(run(result) for result in results))
+
+    async def _evaluate_one(
+        self,
+        result: SearchResult,
+        local_skills: List[SkillMetadata],
+        requirement: str,
+        corpus: Optional[LocalSkillCorpus],
+        local_fingerprint: str,
+        sources: Dict
+    ) -> Optional[PreEvaluationReport]:
+        if result.metadata is None:
+            source = sources.get(result.source)
+            if source is None:
+                return None
+            result.metadata = await source.get_metadata(result.name, result.url)
+            if result.metadata is None:
+                return None
+            self.stats['fetched'] += 1
+
+        key = self.cache_key(result.metadata, requirement, local_fingerprint)
+        cached = self.db.get_evaluation(key) if self.db else None
+        if cached is not None:
+            report = PreEvaluationReport.from_dict(cached, result.metadata)
+            self.stats['cached'] += 1
+        else:
+            report = await self.engine.evaluate(result.metadata, local_skills, requirement, corpus)
+            self.stats['evaluated'] += 1
+            if self.db:
+                self.db.save_evaluation(key, report.skill_name, report.source.value, report.to_dict())
+
+        result.evaluation = report
+        return report
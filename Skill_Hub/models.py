@@ -3,8 +3,10 @@ Skill Hub - Core Data Models
 定义所有数据结构
 """
 
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Literal
+import hashlib
+import json
+from dataclasses import dataclass, field, asdict
+from typing import Any, List, Dict, Optional, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -29,6 +31,7 @@ class Recommendation(Enum):
     ADOPT = "ADOPT"       # 直接使用
     ADAPT = "ADAPT"       # 改造适配
     ABSORB = "ABSORB"     # 增强吸收
+    ENHANCE = "ENHANCE"   # 补充增强
     SKIP = "SKIP"         # 跳过
     REJECT = "REJECT"     # 拒绝
     INSPECT = "INSPECT"   # 人工审查
@@ -141,6 +144,33 @@ class SkillMetadata:
     # 缓存时间
     cached_at: Optional[datetime] = None
 
+    def to_dict(self) -> Dict[str, Any]:
+        """转为可 JSON 序列化的字典（不含 cached_at）"""
+        data = asdict(self)
+        data['source'] = self.source.value
+        data.pop('cached_at')
+        if self.github_stats and self.github_stats.last_commit:
+            data['github_stats']['last_commit'] = self.github_stats.last_commit.isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SkillMetadata':
+        """从 to_dict() 的结果恢复"""
+        data = dict(data)
+        data['source'] = SourceType(data['source'])
+        stats = data.get('github_stats')
+        if stats:
+            stats = dict(stats)
+            if stats.get('last_commit'):
+                stats['last_commit'] = datetime.fromisoformat(stats['last_commit'])
+            data['github_stats'] = GitHubStats(**stats)
+        return cls(**data)
+
+    def content_hash(self) -> str:
+        """内容指纹: 参与评估的所有字段的 SHA-256"""
+        payload = json.dumps(self.to_dict(), sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
 
 @dataclass
 class SecurityReport:
@@ -204,6 +234,46 @@ class PreEvaluationReport:
     # 用户需求描述（用于功能匹配）
     user_requirement: str = ""
 
+    def to_dict(self) -> Dict[str, Any]:
+        """转为可 JSON 序列化的字典（不含 metadata 引用）"""
+        data = asdict(self)
+        data.pop('metadata')
+        data['source'] = self.source.value
+        data['security']['risk_level'] = self.security.risk_level.value
+        data['recommendation'] = self.recommendation.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], metadata: Optional[SkillMetadata] = None) -> 'PreEvaluationReport':
+        """从 to_dict() 的结果恢复，metadata 由调用方重新关联"""
+        overlap = dict(data['overlap'])
+        overlap['details'] = OverlapDetails(**overlap['details'])
+        quality = dict(data['quality'])
+        quality['breakdown'] = QualityBreakdown(**quality['breakdown'])
+        security = dict(data['security'])
+        security['risk_level'] = RiskLevel(security['risk_level'])
+
+        return cls(
+            skill_name=data['skill_name'],
+            source=SourceType(data['source']),
+            overlap=OverlapReport(**overlap),
+            functional_match=(
+                FunctionalMatchBreakdown(**data['functional_match'])
+                if data.get('functional_match') else None
+            ),
+            quality=QualityReport(**quality),
+            security=SecurityReport(**security),
+            quality_anchors=(
+                QualityAnchorReport(**data['quality_anchors'])
+                if data.get('quality_anchors') else None
+            ),
+            recommendation=Recommendation(data['recommendation']),
+            confidence=data['confidence'],
+            reason=data['reason'],
+            metadata=metadata,
+            user_requirement=data.get('user_requirement', ""),
+        )
+
     def display(self) -> str:
         """终端友好的报告输出"""
         risk_icons = {"LOW": "✅", "MEDIUM": "⚠️", "HIGH": "🚨"}
@@ -211,6 +281,7 @@ class PreEvaluationReport:
             "ADOPT": "✅",
             "ADAPT": "🔧",
             "ABSORB": "🔄",
+            "ENHANCE": "➕",
             "SKIP": "⏭️",
             "REJECT": "🚫",
             "INSPECT": "👀"
@@ -21,15 +21,44 @@ from sources.base import BaseSource
 class GitHubSource(BaseSource):
     """GitHub 数据源适配器
 
-    直接从 GitHub 搜索 skill 仓库
+    直接从 GitHub 搜索 skill 仓库。所有请求共用一个带连接池的
+    httpx.AsyncClient（首次请求时创建），用完后调用 aclose() 释放。
     """
 
     API_BASE = "https://api.github.com"
     SEARCH_QUERY = "claude skill in:readme filename:SKILL.md"
 
+    # 连接池上限
+    MAX_CONNECTIONS = 10
+    MAX_KEEPALIVE_CONNECTIONS = 5
+
     def __init__(self, config=None):
         super().__init__(config)
         self.enabled = HAS_HTTPX
+        self._client: Optional['httpx.AsyncClient'] = None
+
+    def _get_client(self) -> 'httpx.AsyncClient':
+        """获取共享的 HTTP 客户端（懒加载）"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.MAX_CONNECTIONS,
+                    max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+        return self._client
+
+    async def aclose(self):
+        """关闭共享的 HTTP 客户端"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> 'GitHubSource':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
 
     def _get_cli_name(self) -> str:
         """GitHub 数据源需要 git 工具"""
@@ -48,19 +77,18 @@ class GitHubSource(BaseSource):
         search_query = f"{query} {self.SEARCH_QUERY}"
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.API_BASE}/search/repositories",
-                    params={"q": search_query, "per_page": 30},
-                    timeout=30.0
-                )
+            response = await self._get_client().get(
+                f"{self.API_BASE}/search/repositories",
+                params={"q": search_query, "per_page": 30},
+                timeout=30.0
+            )
 
-                if response.status_code == 200:
-                    data = response.json()
-                    return self._parse_search_results(data.get('items', []))
-                else:
-                    print(f"GitHub API 错误: {response.status_code}")
-                    return []
+            if response.status_code == 200:
+                data = response.json()
+                return self._parse_search_results(data.get('items', []))
+            else:
+                print(f"GitHub API 错误: {response.status_code}")
+                return []
 
         except Exception as e:
             print(f"搜索错误: {e}")
@@ -97,42 +125,32 @@ class GitHubSource(BaseSource):
         repo = repo.replace('.git', '')
 
         try:
-            async with httpx.AsyncClient() as client:
-                # 获取仓库信息
-                repo_response = await client.get(
-                    f"{self.API_BASE}/repos/{owner}/{repo}",
-                    timeout=10.0
-                )
-
-                if repo_response.status_code != 200:
-                    return None
+            client = self._get_client()
 
-                repo_data = repo_response.json()
-
-                # 尝试获取 SKILL.md
-                skill_content = await self._fetch_file_content(
-                    client, owner, repo, "SKILL.md"
-                )
+            # 仓库信息、SKILL.md、README 并发获取
+            repo_response, skill_content, readme_content = await asyncio.gather(
+                client.get(f"{self.API_BASE}/repos/{owner}/{repo}", timeout=10.0),
+                self._fetch_file_content(client, owner, repo, "SKILL.md"),
+                self._fetch_file_content(client, owner, repo, "README.md"),
+            )
 
-                # 尝试获取 README
-                readme_content = await self._fetch_file_content(
-                    client, owner, repo, "README.md"
-                )
+            if repo_response.status_code != 200:
+                return None
 
-                return self._build_metadata(
-                    name,
-                    url,
-                    repo_data,
-                    skill_content,
-                    readme_content
-                )
+            return self._build_metadata(
+                name,
+                url,
+                repo_response.json(),
+                skill_content,
+                readme_content
+            )
 
         except Exception as e:
             print(f"获取元数据错误: {e}")
             return None
 
     async def _fetch_file_content(
-        self, client: httpx.AsyncClient,
+        self, client: 'httpx.AsyncClient',
         owner: str, repo: str, path: str
     ) -> Optional[str]:
         """获取文件内容"""
@@ -16,11 +16,13 @@ from sources.base import BaseSource
 class LocalSource(BaseSource):
     """本地数据源适配器
 
-    扫描本地 skills 目录
+    扫描本地 skills 目录；传入 Database 时，SKILL.md 未变化的 skill
+    直接使用数据库中缓存的元数据，不再重新读取和解析
     """
 
-    def __init__(self, config=None):
+    def __init__(self, config=None, db=None):
         super().__init__(config)
+        self.db = db
         self.skills_path = config.integration.skills_path if config else None
         if not self.skills_path:
             self.skills_path = os.path.expanduser("~/.claude/skills")
@@ -76,7 +78,7 @@ class LocalSource(BaseSource):
         results = []
 
         for skill_path in self._iter_skill_dirs():
-            metadata = await self._load_skill_from_path(skill_path)
+            metadata = await self._load_skill_cached(skill_path)
             if metadata:
                 results.append(SearchResult(
                     name=metadata.name,
@@ -98,6 +100,32 @@ class LocalSource(BaseSource):
             if os.path.isdir(path) and not entry.startswith('.'):
                 yield path
 
+    def _skill_file_signature(self, path: str) -> Optional[str]:
+        """SKILL.md 的 (文件名, mtime_ns, 大小) 签名；不存在时返回 None"""
+        for filename in ("SKILL.md", "skill.md"):
+            try:
+                stat = os.stat(os.path.join(path, filename))
+            except OSError:
+                continue
+            return f"{filename}:{stat.st_mtime_ns}:{stat.st_size}"
+        return None
+
+    async def _load_skill_cached(self, path: str) -> Optional[SkillMetadata]:
+        """优先使用数据库缓存的元数据（文件列表总是重新扫描）"""
+        signature = self._skill_file_signature(path) if self.db else None
+        if signature is None:
+            return await self._load_skill_from_path(path)
+
+        metadata = self.db.get_cached_local_metadata(path, signature)
+        if metadata is not None:
+            metadata.file_list = self._list_files(path)
+            return metadata
+
+        metadata = await self._load_skill_from_path(path)
+        if metadata is not None:
+            self.db.save_cached_local_metadata(path, signature, metadata)
+        return metadata
+
     async def _load_skill_from_path(self, path: str) -> Optional[SkillMetadata]:
         """从路径加载 skill 元数据"""
         skill_name = os.path.basename(path)
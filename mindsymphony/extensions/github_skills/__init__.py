@@ -36,7 +36,7 @@ __mindsymphony_version__ = "v21.4"
 __author__ = "MindSymphony Team"
 
 # 核心类
-from .github_skill_distiller import GitHubSkillDistiller, DistillationResult, ExtractedPattern
+from .github_skill_distiller import GitHubSkillDistiller, DistillationResult, ExtractedPattern, GitHubAPIError
 from .skill_knowledge_graph import (
     SkillKnowledgeGraph,
     SkillNode,
@@ -81,6 +81,7 @@ __all__ = [
     "GitHubSkillDistiller",
     "DistillationResult",
     "ExtractedPattern",
+    "GitHubAPIError",
 
     # 知识图谱
     "SkillKnowledgeGraph",
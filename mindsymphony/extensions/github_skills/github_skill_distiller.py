@@ -7,13 +7,21 @@ GitHub Skill Distiller
 - 代码结构分析
 - 最佳实践识别
 - 生成标准SKILL.md格式
+- 并发批量蒸馏（连接池 + 令牌桶限速 + ETag 条件请求缓存）
 """
 
 import re
 import json
+import time
+import queue
 import hashlib
+import threading
+import http.client
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any, Tuple
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from datetime import datetime
 from urllib.parse import urlparse
 import os
@@ -41,6 +49,217 @@ class ExtractedPattern:
     confidence: float
 
 
+class GitHubAPIError(Exception):
+    """GitHub API 返回非成功状态"""
+
+    def __init__(self, status: int, path: str, message: str = ''):
+        super().__init__(f"GitHub API {status} {path}: {message}".rstrip(': '))
+        self.status = status
+        self.path = path
+
+
+class TokenBucket:
+    """
+    令牌桶限速器（线程安全）
+
+    以 rate 个/秒的速度补充令牌，最多积累 capacity 个；acquire() 在没有令牌时阻塞。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                # 归还令牌时会被提前唤醒
+                self._condition.wait(wait)
+
+    def refund(self):
+        """归还一个令牌（请求未计入服务端配额时，如 304 响应）"""
+        with self._condition:
+            self._tokens = min(self.capacity, self._tokens + 1)
+            self._condition.notify()
+
+    def pause(self, seconds: float):
+        """在 seconds 秒内不再发放令牌（服务端配额耗尽）"""
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class ConditionalCache:
+    """
+    HTTP 条件请求的磁盘缓存
+
+    每个 URL 一个 JSON 文件，保存 ETag / Last-Modified 与响应体；
+    先写临时文件再 os.replace，并发写入和中途崩溃都不会留下损坏的缓存。
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir).expanduser()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, etag: Optional[str], last_modified: Optional[str], body: str):
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'etag': etag, 'last_modified': last_modified, 'body': body}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[Distiller] 缓存写入失败: {e}")
+
+
+class GitHubAPIClient:
+    """
+    GitHub REST API 客户端（线程安全）
+
+    - 复用 keep-alive 连接: 空闲连接放在连接池中，连接数不超过并发请求数
+    - 每个请求先从令牌桶取令牌；默认速率为 GitHub 的主配额
+      （有 token 5000 次/小时，匿名 60 次/小时），配额耗尽或收到
+      Retry-After 时暂停发放令牌直到重置
+    - GET 带上缓存的 ETag / Last-Modified；304 直接使用缓存内容，
+      且不计入 GitHub 配额（归还令牌），重复蒸馏几乎不消耗配额
+    """
+
+    MAX_RETRIES = 3
+
+    def __init__(
+        self,
+        api_url: str = 'https://api.github.com',
+        token: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        requests_per_hour: Optional[float] = None,
+        burst: Optional[float] = None,
+        timeout: float = 30.0
+    ):
+        parsed = urlparse(api_url)
+        self._connection_class = (
+            http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        )
+        self._host = parsed.netloc
+        self._base_path = parsed.path.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+
+        requests_per_hour = requests_per_hour or (5000 if token else 60)
+        burst = burst or min(requests_per_hour, 100)
+        self.rate_limiter = TokenBucket(requests_per_hour / 3600.0, burst)
+        self.cache = ConditionalCache(cache_dir) if cache_dir else None
+
+        self._pool: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.stats['connections'] += 1
+            return self._connection_class(self._host, timeout=self.timeout)
+
+    def _send(self, path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """发送一次 GET；复用的连接已被服务端关闭时换新连接重试一次"""
+        for attempt in range(2):
+            conn = self._connect()
+            try:
+                conn.request('GET', self._base_path + path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if attempt:
+                    raise
+                continue
+            if response.will_close:
+                conn.close()
+            else:
+                self._pool.put(conn)
+            return response.status, {k.lower(): v for k, v in response.getheaders()}, body
+
+    def get(self, path: str, accept: str = 'application/vnd.github+json') -> str:
+        """
+        GET 请求，返回响应体文本
+
+        Raises:
+            GitHubAPIError: 非 2xx/304 响应（限速重试用尽后也会抛出）
+        """
+        cache_key = f"{accept} {self._host}{self._base_path}{path}"
+        cached = self.cache.get(cache_key) if self.cache else None
+
+        headers = {'Accept': accept, 'User-Agent': 'mindsymphony-github-skills'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        for _ in range(self.MAX_RETRIES + 1):
+            self.rate_limiter.acquire()
+            status, response_headers, body = self._send(path, headers)
+            with self._lock:
+                self.stats['requests'] += 1
+                self.stats[status] += 1
+
+            if status == 304 and cached:
+                self.rate_limiter.refund()
+                return cached['body']
+
+            if response_headers.get('x-ratelimit-remaining') == '0':
+                reset = float(response_headers.get('x-ratelimit-reset', time.time() + 60))
+                self.rate_limiter.pause(max(reset - time.time(), 0))
+            if status in (403, 429) and (
+                'retry-after' in response_headers or response_headers.get('x-ratelimit-remaining') == '0'
+            ):
+                if 'retry-after' in response_headers:
+                    self.rate_limiter.pause(float(response_headers['retry-after']))
+                continue
+
+            text = body.decode('utf-8', errors='replace')
+            if status >= 300:
+                raise GitHubAPIError(status, path, text[:200])
+            if self.cache and (response_headers.get('etag') or response_headers.get('last-modified')):
+                self.cache.put(cache_key, response_headers.get('etag'),
+                               response_headers.get('last-modified'), text)
+            return text
+
+        raise GitHubAPIError(status, path, 'rate limit retries exhausted')
+
+    def close(self):
+        """关闭连接池中的空闲连接"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
 class GitHubSkillDistiller:
     """
     GitHub技能蒸馏器
@@ -55,17 +274,56 @@ class GitHubSkillDistiller:
         Args:
             config: 配置选项
                 - github_token: GitHub API token
-                - cache_dir: 缓存目录
+                - cache_dir: 缓存目录（API 响应缓存在其下的 http/ 目录）
                 - min_confidence: 最小置信度阈值
+                - api_url: GitHub API 地址，默认 https://api.github.com
+                - use_github_api: 是否调用 GitHub API 获取仓库数据，
+                  默认只在 config 中显式给出 github_token 或 api_url 时启用，否则使用模拟数据
+                  （环境变量 GITHUB_TOKEN 只用于认证，不会单独开启网络调用）
+                - max_workers: 批量蒸馏的并发数，默认 8
+                - requests_per_hour / rate_burst: 令牌桶速率和容量，默认按 GitHub 配额
         """
         self.config = config or {}
         self.github_token = self.config.get('github_token') or os.getenv('GITHUB_TOKEN')
         self.cache_dir = self.config.get('cache_dir', '~/.mindsymphony/github_skills_cache')
         self.min_confidence = self.config.get('min_confidence', 0.6)
+        self.api_url = self.config.get('api_url', 'https://api.github.com')
+        self.use_github_api = self.config.get(
+            'use_github_api', bool(self.config.get('github_token') or 'api_url' in self.config)
+        )
+        self.max_workers = self.config.get('max_workers', 8)
+        self._client: Optional[GitHubAPIClient] = None
+        self._client_lock = threading.Lock()
 
         # 编译正则表达式模式
         self._compile_patterns()
 
+    @property
+    def client(self) -> GitHubAPIClient:
+        """共享的 API 客户端（首次使用时创建，所有线程复用同一个连接池和限速器）"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = GitHubAPIClient(
+                        api_url=self.api_url,
+                        token=self.github_token,
+                        cache_dir=str(Path(self.cache_dir).expanduser() / 'http'),
+                        requests_per_hour=self.config.get('requests_per_hour'),
+                        burst=self.config.get('rate_burst'),
+                    )
+        return self._client
+
+    def close(self):
+        """关闭 API 客户端的连接"""
+        if self._client is not None:
+            self._client.close()
+
+    def __enter__(self) -> 'GitHubSkillDistiller':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     def _compile_patterns(self):
         """编译用于提取的正则表达式"""
         # README章节标题
@@ -112,7 +370,7 @@ class GitHubSkillDistiller:
         # 1. 解析仓库信息
         owner, repo = self._parse_repo_identifier(repo_identifier)
 
-        # 2. 获取仓库数据 (模拟API调用)
+        # 2. 获取仓库数据
         repo_data = self._fetch_repo_data(owner, repo)
 
         # 3. 解析README
@@ -200,11 +458,29 @@ class GitHubSkillDistiller:
         """
         获取仓库数据
 
-        实际实现中会调用GitHub API
-        这里使用模拟数据演示
+        启用 use_github_api 时调用 GitHub API（仓库元数据 + README 原文），
+        否则返回模拟数据演示
         """
+        if self.use_github_api:
+            info = json.loads(self.client.get(f"/repos/{owner}/{repo}"))
+            try:
+                readme = self.client.get(f"/repos/{owner}/{repo}/readme", accept='application/vnd.github.raw')
+            except GitHubAPIError as e:
+                if e.status != 404:
+                    raise
+                readme = ''
+            return {
+                'name': info.get('name') or repo,
+                'owner': (info.get('owner') or {}).get('login') or owner,
+                'description': info.get('description') or '',
+                'stars': info.get('stargazers_count', 0),
+                'language': info.get('language') or 'Unknown',
+                'license': (info.get('license') or {}).get('spdx_id') or 'Unknown',
+                'readme': readme,
+                'topics': info.get('topics') or [],
+            }
+
         # 模拟仓库数据
-        # 实际实现中应该使用 requests 调用 GitHub API
         return {
             'name': repo,
             'owner': owner,
@@ -555,9 +831,49 @@ skill = result.skill_content
 
         return min(sum(scores), 1.0)
 
+    def iter_distill(
+        self,
+        repo_list: List[str],
+        max_workers: Optional[int] = None,
+        **kwargs
+    ) -> Iterator[Tuple[str, Optional[DistillationResult], Optional[Exception]]]:
+        """
+        并发蒸馏多个仓库，按完成顺序逐个产出结果
+
+        所有线程共享同一个 API 客户端（连接池、令牌桶限速、条件请求缓存）。
+        提前停止迭代时取消尚未开始的任务。
+
+        Args:
+            repo_list: 仓库标识符列表
+            max_workers: 并发数，默认为配置中的 max_workers
+            **kwargs: 传递给distill的参数
+
+        Yields:
+            (仓库标识符, DistillationResult 或 None, 异常或 None)
+        """
+        for _, repo, result, error in self._iter_distill_indexed(repo_list, max_workers, kwargs):
+            yield repo, result, error
+
+    def _iter_distill_indexed(self, repo_list: List[str], max_workers: Optional[int], kwargs: Dict):
+        executor = ThreadPoolExecutor(max_workers=max_workers or self.max_workers)
+        try:
+            futures = {
+                executor.submit(self.distill, repo, **kwargs): (index, repo)
+                for index, repo in enumerate(repo_list)
+            }
+            for future in as_completed(futures):
+                index, repo = futures[future]
+                try:
+                    yield index, repo, future.result(), None
+                except Exception as e:
+                    yield index, repo, None, e
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
     def batch_distill(
         self,
         repo_list: List[str],
+        max_workers: Optional[int] = None,
         **kwargs
     ) -> List[DistillationResult]:
         """
@@ -565,16 +881,16 @@ skill = result.skill_content
 
         Args:
             repo_list: 仓库标识符列表
+            max_workers: 并发数，默认为配置中的 max_workers
             **kwargs: 传递给distill的参数
 
         Returns:
-            DistillationResult列表
+            DistillationResult列表（按 repo_list 的顺序，失败的仓库被跳过）
         """
-        results = []
-        for repo in repo_list:
-            try:
-                result = self.distill(repo, **kwargs)
-                results.append(result)
-            except Exception as e:
-                print(f"❌ 蒸馏失败 {repo}: {e}")
-        return results
+        results = {}
+        for index, repo, result, error in self._iter_distill_indexed(repo_list, max_workers, kwargs):
+            if error is not None:
+                print(f"❌ 蒸馏失败 {repo}: {error}")
+            else:
+                results[index] = result
+        return [results[index] for index in sorted(results)]
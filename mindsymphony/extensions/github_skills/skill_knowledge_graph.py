@@ -9,10 +9,20 @@ Skill Knowledge Graph
 - 推荐引擎
 """
 
+import os
+import re
 import json
+import zlib
+import heapq
+import atexit
+import bisect
+import random
 import hashlib
+import threading
+import weakref
+from collections import Counter, defaultdict
 from dataclasses import dataclass, field, asdict
-from typing import Dict, List, Optional, Set, Any, Tuple
+from typing import Callable, Dict, List, Optional, Set, Any, Tuple
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
@@ -88,24 +98,365 @@ class SkillRelation:
         return cls(**data)
 
 
+class GraphStore:
+    """
+    知识图谱持久化: 快照 + 追加日志
+
+    - 快照: storage_path（与旧版相同的 JSON 结构，可直接读取）
+    - 日志: storage_path + '.log'，每行一条变更 {"op": "node"|"relation", "data": {...}}
+    - 变更先缓存在内存中，达到 batch_size 条或距第一条未写入变更 flush_interval 秒后
+      批量追加到日志（write-behind）；进程退出时自动写入
+    - 日志条数超过 max(compact_min_ops, (当前节点数 + 关系数) / 2) 时写新快照并清空日志，
+      快照大小按几何级数增长，总 I/O 与变更数成线性关系
+    - 快照先写临时文件、fsync 后 os.replace；日志中的变更均为幂等的 upsert，
+      快照替换后、日志清空前崩溃也能正确回放
+    """
+
+    def __init__(
+        self,
+        storage_path: str,
+        snapshot_fn: Callable[[], Dict],
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        compact_min_ops: int = 1000
+    ):
+        self.snapshot_path = Path(storage_path)
+        self.log_path = Path(f"{storage_path}.log")
+        self.snapshot_fn = snapshot_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_min_ops = compact_min_ops
+
+        self._pending: List[str] = []
+        self._log_ops = 0
+        self._live_objects = 0
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+
+        # 进程退出时写入未落盘的变更（弱引用，不延长图谱的生命周期）
+        finalizer = weakref.WeakMethod(self.flush)
+        atexit.register(lambda: finalizer() and finalizer()())
+
+    def load(self) -> Tuple[Dict, List[Dict]]:
+        """读取快照和日志: (快照数据, 日志变更列表)"""
+        data = {}
+        if self.snapshot_path.exists() and self.snapshot_path.stat().st_size > 0:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+        ops = []
+        if self.log_path.exists():
+            good_offset = 0
+            with open(self.log_path, 'rb') as f:
+                for line in f:
+                    # 崩溃时写了一半的最后一行: 没有换行符或无法解析
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        ops.append(json.loads(line))
+                    except ValueError:
+                        break
+                    good_offset += len(line)
+                torn = f.seek(0, os.SEEK_END) > good_offset
+            if torn:
+                # 截掉残行，之后追加的变更才能被正确回放
+                with open(self.log_path, 'r+b') as f:
+                    f.truncate(good_offset)
+                    f.flush()
+                    os.fsync(f.fileno())
+        self._log_ops = len(ops)
+        return data, ops
+
+    def record(self, op: str, data: Dict, live_objects: int):
+        """记录一条变更（写入被推迟并合并）"""
+        with self._lock:
+            self._pending.append(json.dumps({'op': op, 'data': data}, ensure_ascii=False))
+            self._live_objects = live_objects
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._timer is None and self.flush_interval is not None:
+                self._timer = threading.Timer(self.flush_interval, self.flush, kwargs={'compact': False})
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self, compact: bool = True):
+        """把缓存的变更追加到日志；日志过长时压缩为快照
+
+        Args:
+            compact: 是否允许压缩（后台定时写入时为 False，压缩需要读取图谱，
+                只在调用方线程中进行）
+        """
+        with self._lock:
+            # 无论是否由定时器触发都要清除，下一条变更才会重新启动定时器
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+
+            pending, self._pending = self._pending, []
+            try:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(pending) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._log_ops += len(pending)
+            except OSError as e:
+                self._pending = pending + self._pending
+                print(f"[SkillGraph] 保存失败: {e}")
+                return
+
+            if compact and self._log_ops > max(self.compact_min_ops, self._live_objects // 2):
+                self.compact()
+
+    def compact(self):
+        """写入完整快照并清空日志"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = []
+
+            try:
+                self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + '.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.snapshot_fn(), f, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.snapshot_path)
+
+                # 快照已包含所有变更，日志可以清空
+                with open(self.log_path, 'w', encoding='utf-8'):
+                    pass
+                self._log_ops = 0
+            except OSError as e:
+                print(f"[SkillGraph] 保存失败: {e}")
+
+
+class TagLSH:
+    """
+    标签集合的 MinHash LSH 分桶索引
+
+    签名长度为 bands × rows；标签 Jaccard 相似度为 s 的两个技能至少在一个分桶中
+    相撞的概率为 1 - (1 - s^rows)^bands（默认参数下 s > 0.7 的漏检率约 2e-5）。
+    每个标签的哈希值只计算一次，节点的加入/移除为 O(bands)。
+    """
+
+    _MASK64 = (1 << 64) - 1
+
+    def __init__(self, bands: int = 24, rows: int = 3, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        num_perm = bands * rows
+        # multiply-shift 哈希族: h(x) = ((a·x + b) mod 2^64) >> 32，a 为奇数
+        self._params = [(rng.randrange(1 << 64) | 1, rng.randrange(1 << 64)) for _ in range(num_perm)]
+        self._tag_hashes: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: Dict[Tuple, Set[str]] = defaultdict(set)
+        self._keys: Dict[str, List[Tuple]] = {}
+
+    def _hashes(self, tag: str) -> Tuple[int, ...]:
+        hashes = self._tag_hashes.get(tag)
+        if hashes is None:
+            x = zlib.crc32(tag.encode('utf-8'))
+            hashes = tuple(((a * x + b) & self._MASK64) >> 32 for a, b in self._params)
+            self._tag_hashes[tag] = hashes
+        return hashes
+
+    def add(self, skill_id: str, tags: Set[str]):
+        """加入（或替换）节点的标签集合"""
+        self.remove(skill_id)
+        if not tags:
+            return
+        signature = [min(column) for column in zip(*(self._hashes(t) for t in tags))]
+        rows = self.rows
+        keys = [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+        for key in keys:
+            self._buckets[key].add(skill_id)
+        self._keys[skill_id] = keys
+
+    def remove(self, skill_id: str):
+        for key in self._keys.pop(skill_id, ()):
+            bucket = self._buckets[key]
+            bucket.discard(skill_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def candidates(self, skill_id: str) -> Set[str]:
+        """与节点至少在一个分桶中相撞的其他节点"""
+        result = set()
+        for key in self._keys.get(skill_id, ()):
+            result |= self._buckets[key]
+        result.discard(skill_id)
+        return result
+
+
+class SearchIndex:
+    """
+    技能搜索倒排索引
+
+    - 名称、描述、标签、来源分词后建立 词项 -> {技能ID: 权重} 的倒排表，
+      权重为各字段权重之和（标签按每个包含该词的标签计一次）
+    - 分词规则与 skills/skill_discovery/text_index.tokenize 一致: 英文/数字按连续
+      字母数字切词并去停用词，连续中文切成相邻二元组（单字保留为一元）
+    - 查询词（长度 >= 2，或单个中文字）同时匹配以它为前缀的词项（在有序词表上
+      二分查找），前缀匹配按 PREFIX_WEIGHT 折算；每个查询词对每个技能只取最高的一次得分
+    - 只访问查询词命中的倒排表，用堆选出前 k 个结果
+    """
+
+    FIELD_WEIGHTS = {'name': 2.0, 'tags': 1.5, 'description': 1.0, 'source': 0.5}
+    PREFIX_WEIGHT = 0.8
+    _TOKEN_RE = re.compile(r'[a-z0-9]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+    _STOPWORDS = frozenset({
+        'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+        'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with',
+    })
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._terms: Dict[str, Dict[str, float]] = {}
+        self._vocabulary: List[str] = []  # 有序词表，用于前缀查找
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """
+        分词
+
+        示例:
+            SearchIndex.tokenize('React 前端组件') -> ['react', '前端', '端组', '组件']
+        """
+        tokens = []
+        for run in cls._TOKEN_RE.findall(text.lower()):
+            if run[0].isascii():
+                if run not in cls._STOPWORDS:
+                    tokens.append(run)
+            elif len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        return tokens
+
+    def add(self, skill: SkillNode):
+        """加入（或替换）技能的索引词项"""
+        self.remove(skill.id)
+        terms: Dict[str, float] = defaultdict(float)
+        for field_name, texts in (
+            ('name', [skill.name]),
+            ('tags', skill.tags),
+            ('description', [skill.description]),
+            ('source', [skill.source]),
+        ):
+            weight = self.FIELD_WEIGHTS[field_name]
+            for text in texts:
+                for term in set(self.tokenize(text or '')):
+                    terms[term] += weight
+
+        for term, weight in terms.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                bisect.insort(self._vocabulary, term)
+            posting[skill.id] = weight
+        self._terms[skill.id] = terms
+
+    def remove(self, skill_id: str):
+        for term in self._terms.pop(skill_id, ()):
+            posting = self._postings[term]
+            del posting[skill_id]
+            if not posting:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """查询词 -> 命中的 (词项, 折算系数)"""
+        matches = [(token, 1.0)] if token in self._postings else []
+        if len(token) >= 2 or not token.isascii():
+            start = bisect.bisect_left(self._vocabulary, token)
+            for term in self._vocabulary[start:]:
+                if not term.startswith(token):
+                    break
+                if term != token:
+                    matches.append((term, self.PREFIX_WEIGHT))
+        return matches
+
+    def search(self, query: str, limit: int, rank_key: Callable[[str], Any]) -> List[Tuple[str, float]]:
+        """
+        返回得分最高的 limit 个 (技能ID, 得分)
+
+        rank_key 用于同分时排序（越小越靠前）；查询没有可用词项（空串、
+        纯标点或只有停用词）时不做筛选，返回 rank_key 最小的 limit 个，得分为 0
+        """
+        tokens = dict.fromkeys(self.tokenize(query))
+        if not tokens:
+            return [(skill_id, 0.0) for skill_id in heapq.nsmallest(limit, self._terms, key=rank_key)]
+
+        scores: Dict[str, float] = defaultdict(float)
+        for token in tokens:
+            best: Dict[str, float] = {}
+            for term, factor in self._expand(token):
+                for skill_id, weight in self._postings[term].items():
+                    score = weight * factor
+                    if score > best.get(skill_id, 0.0):
+                        best[skill_id] = score
+            for skill_id, score in best.items():
+                scores[skill_id] += score
+
+        top = heapq.nsmallest(limit, scores, key=lambda sid: (-scores[sid], rank_key(sid)))
+        return [(skill_id, scores[skill_id]) for skill_id in top]
+
+
+# 邻接表: 节点ID -> 关系类型 -> 关系列表（按添加顺序）
+Adjacency = Dict[str, Dict[RelationType, List[SkillRelation]]]
+
+
 class SkillKnowledgeGraph:
     """
     技能知识图谱
 
     管理技能的节点和关系，支持查询、推荐和演化追踪
+
+    关系除按添加顺序保存在 relations 中外，还维护:
+    - 正向/反向邻接表（按节点和关系类型），邻域查询为 O(度数)
+    - 边去重索引 (源, 目标, 类型) -> relations 中的位置
     """
 
-    def __init__(self, storage_path: Optional[str] = None):
+    def __init__(
+        self,
+        storage_path: Optional[str] = None,
+        flush_interval: Optional[float] = 1.0,
+        batch_size: int = 256
+    ):
         """
         初始化知识图谱
 
         Args:
             storage_path: 存储路径，默认为 ~/.mindsymphony/skill_graph.json
+                （变更日志为同目录下的 skill_graph.json.log）
+            flush_interval: 变更延迟写入的最长时间（秒），None 表示只在凑满一批或显式 flush() 时写入
+            batch_size: 累积多少条变更后立即写入
         """
         self.storage_path = storage_path or Path.home() / '.mindsymphony' / 'skill_graph.json'
         self.nodes: Dict[str, SkillNode] = {}
         self.relations: List[SkillRelation] = []
         self._index = {}  # 倒排索引
+        self._search_index = SearchIndex()
+        self._out: Adjacency = defaultdict(lambda: defaultdict(list))
+        self._in: Adjacency = defaultdict(lambda: defaultdict(list))
+        self._edges: Dict[Tuple[str, str, RelationType], int] = {}
+        self._relation_counts: Counter = Counter()
+        # 自动建立关系用: 节点加入顺序、标签 LSH 与来源分组（首次调用时构建）、待链接节点
+        self._node_order: Dict[str, int] = {}
+        self._tag_lsh: Optional[TagLSH] = None
+        self._source_groups: Dict[str, Set[str]] = defaultdict(set)
+        self._unlinked: Dict[str, None] = {}
+        self._store = GraphStore(
+            str(self.storage_path),
+            self._snapshot_data,
+            batch_size=batch_size,
+            flush_interval=flush_interval
+        )
 
         # 加载已有数据
         self._load()
@@ -120,9 +471,10 @@ class SkillKnowledgeGraph:
         Returns:
             技能ID
         """
-        self.nodes[skill.id] = skill
         self._update_index(skill)
-        self._save()
+        self.nodes[skill.id] = skill
+        self._unlinked[skill.id] = None
+        self._record_node(skill)
         return skill.id
 
     def add_relation(
@@ -151,14 +503,14 @@ class SkillKnowledgeGraph:
             return False
 
         # 检查是否已存在相同关系
-        for rel in self.relations:
-            if (rel.source_id == source_id and
-                rel.target_id == target_id and
-                rel.relation_type == relation_type):
-                # 更新强度
-                rel.strength = max(rel.strength, strength)
-                self._save()
-                return True
+        position = self._edges.get((source_id, target_id, relation_type))
+        if position is not None:
+            # 更新强度
+            rel = self.relations[position]
+            if strength > rel.strength:
+                rel.strength = strength
+                self._record_relation(rel)
+            return True
 
         relation = SkillRelation(
             source_id=source_id,
@@ -167,10 +519,46 @@ class SkillKnowledgeGraph:
             strength=strength,
             metadata=metadata or {}
         )
+        self._index_relation(relation)
+        self._record_relation(relation)
+        return True
+
+    def _index_relation(self, relation: SkillRelation) -> bool:
+        """追加关系并更新邻接表；已存在相同关系时只取较大的强度"""
+        key = (relation.source_id, relation.target_id, relation.relation_type)
+        position = self._edges.get(key)
+        if position is not None:
+            existing = self.relations[position]
+            existing.strength = max(existing.strength, relation.strength)
+            return False
+
+        self._edges[key] = len(self.relations)
         self.relations.append(relation)
-        self._save()
+        self._out[relation.source_id][relation.relation_type].append(relation)
+        self._in[relation.target_id][relation.relation_type].append(relation)
+        self._relation_counts[relation.relation_type] += 1
         return True
 
+    def _outgoing(self, skill_id: str, relation_type: Optional[RelationType] = None) -> List[SkillRelation]:
+        """skill_id 的出边（按添加顺序），不存在时不创建邻接表项"""
+        by_type = self._out.get(skill_id)
+        if not by_type:
+            return []
+        if relation_type is not None:
+            return by_type.get(relation_type, [])
+        if len(by_type) == 1:
+            return next(iter(by_type.values()))
+        edges = self._edges
+        return sorted(
+            (rel for rels in by_type.values() for rel in rels),
+            key=lambda rel: edges[(rel.source_id, rel.target_id, rel.relation_type)]
+        )
+
+    def _incoming(self, skill_id: str, relation_type: RelationType) -> List[SkillRelation]:
+        """skill_id 的某类入边（按添加顺序）"""
+        by_type = self._in.get(skill_id)
+        return by_type.get(relation_type, []) if by_type else []
+
     def get_skill(self, skill_id: str) -> Optional[SkillNode]:
         """获取技能节点"""
         return self.nodes.get(skill_id)
@@ -201,12 +589,11 @@ class SkillKnowledgeGraph:
         """
         results = []
 
-        for rel in self.relations:
-            if rel.source_id == skill_id and rel.strength >= min_strength:
-                if relation_type is None or rel.relation_type == relation_type:
-                    target = self.nodes.get(rel.target_id)
-                    if target:
-                        results.append((target, rel))
+        for rel in self._outgoing(skill_id, relation_type):
+            if rel.strength >= min_strength:
+                target = self.nodes.get(rel.target_id)
+                if target:
+                    results.append((target, rel))
 
         return sorted(results, key=lambda x: x[1].strength, reverse=True)
 
@@ -214,6 +601,14 @@ class SkillKnowledgeGraph:
         """
         搜索技能
 
+        查询分词后在名称/标签/描述/来源的倒排索引中查找，按字段加权得分返回
+        前 limit 个，代价只与命中的倒排表大小有关
+
+        匹配以词为单位: 查询词与词项相同或是其前缀即命中（"analy" 命中
+        "analysis"），不再像旧实现那样按整个查询做子串匹配（"alysis" 不再命中
+        "analysis"）；多词查询按各词得分累加。中文按二元组匹配。
+        空查询返回按加入顺序的前 limit 个技能
+
         Args:
             query: 搜索查询
             limit: 返回数量限制
@@ -221,35 +616,10 @@ class SkillKnowledgeGraph:
         Returns:
             匹配的技能列表
         """
-        query_lower = query.lower()
-        results = []
-
-        for skill in self.nodes.values():
-            score = 0.0
-
-            # 名称匹配
-            if query_lower in skill.name.lower():
-                score += 2.0
-
-            # 描述匹配
-            if skill.description and query_lower in skill.description.lower():
-                score += 1.0
-
-            # 标签匹配
-            for tag in skill.tags:
-                if query_lower in tag.lower():
-                    score += 1.5
-
-            # 来源匹配
-            if query_lower in skill.source.lower():
-                score += 0.5
-
-            if score > 0:
-                results.append((skill, score))
-
-        # 按分数排序
-        results.sort(key=lambda x: x[1], reverse=True)
-        return [r[0] for r in results[:limit]]
+        return [
+            self.nodes[skill_id]
+            for skill_id, _ in self._search_index.search(query, limit, self._node_order.__getitem__)
+        ]
 
     def recommend_skills(
         self,
@@ -270,6 +640,7 @@ class SkillKnowledgeGraph:
         """
         context = context or {}
         scores = {}  # skill_id -> score
+        current = set(skill_ids)
 
         for skill_id in skill_ids:
             skill = self.nodes.get(skill_id)
@@ -280,7 +651,7 @@ class SkillKnowledgeGraph:
             related = self.get_related_skills(skill_id)
 
             for related_skill, relation in related:
-                if related_skill.id in skill_ids:
+                if related_skill.id in current:
                     continue  # 跳过已有技能
 
                 # 计算推荐分数
@@ -322,12 +693,10 @@ class SkillKnowledgeGraph:
         compositions = []
 
         # 查找所有组合关系
-        for rel in self.relations:
-            if (rel.target_id == target_skill_id and
-                rel.relation_type == RelationType.COMPOSES):
-                source = self.nodes.get(rel.source_id)
-                if source:
-                    compositions.append([source])
+        for rel in self._incoming(target_skill_id, RelationType.COMPOSES):
+            source = self.nodes.get(rel.source_id)
+            if source:
+                compositions.append([source])
 
         return compositions
 
@@ -352,21 +721,20 @@ class SkillKnowledgeGraph:
             'learned_from': []
         }
 
-        for rel in self.relations:
-            # 学习自
-            if rel.source_id == skill_id and rel.relation_type == RelationType.LEARNED_FROM:
-                source = self.nodes.get(rel.target_id)
-                if source:
-                    lineage['learned_from'].append({
-                        'skill': source.to_dict(),
-                        'strength': rel.strength
-                    })
-
-            # 演化为
-            if rel.source_id == skill_id and rel.relation_type == RelationType.EVOLVES_TO:
-                target = self.nodes.get(rel.target_id)
-                if target:
-                    lineage['descendants'].append(target.to_dict())
+        # 学习自
+        for rel in self._outgoing(skill_id, RelationType.LEARNED_FROM):
+            source = self.nodes.get(rel.target_id)
+            if source:
+                lineage['learned_from'].append({
+                    'skill': source.to_dict(),
+                    'strength': rel.strength
+                })
+
+        # 演化为
+        for rel in self._outgoing(skill_id, RelationType.EVOLVES_TO):
+            target = self.nodes.get(rel.target_id)
+            if target:
+                lineage['descendants'].append(target.to_dict())
 
         return lineage
 
@@ -390,43 +758,73 @@ class SkillKnowledgeGraph:
         skill.success_rate = (1 - alpha) * skill.success_rate + alpha * success_val
 
         skill.updated_at = datetime.now().isoformat()
-        self._save()
+        self._record_node(skill)
 
-    def auto_create_relations(self):
+    def auto_create_relations(self, incremental: bool = False) -> int:
         """
         自动创建技能关系
 
-        基于技能标签、来源等自动推断关系
-        """
-        skills = list(self.nodes.values())
-        new_relations = 0
+        基于技能标签、来源等自动推断关系:
+        - 标签 Jaccard 相似度 > 0.7 的技能之间建立 RELATED 关系（强度为相似度）
+        - 同一来源（非 manual）的技能之间建立 RELATED 关系（强度 0.5，metadata 标记 same_repo）
+
+        候选对由标签 MinHash LSH 分桶和来源分组产生，不再两两比较所有节点；
+        关系方向为先加入的节点 -> 后加入的节点。已存在的关系不会重复创建，重复运行是幂等的。
 
-        for i, skill1 in enumerate(skills):
-            for skill2 in skills[i+1:]:
-                # 计算相似度
-                similarity = self._calculate_similarity(skill1, skill2)
+        候选不取自标签倒排索引 _index: 共享任一标签的节点对大多远低于 0.7 的阈值，
+        热门标签的倒排表又很长，按 _index 取候选的比较次数是 LSH 的数倍；
+        LSH 只让高相似度的节点对相撞，漏检率见 TagLSH。
 
+        Args:
+            incremental: 只为上次调用之后通过 add_skill 加入/更新的节点建立关系，
+                代价与新节点数（及其候选数）成正比
+
+        Returns:
+            新创建的关系数
+        """
+        if self._tag_lsh is None:
+            self._tag_lsh = TagLSH()
+            self._source_groups.clear()
+            for skill in self.nodes.values():
+                self._index_for_linking(skill)
+
+        pending = self._unlinked if incremental else self.nodes
+        order = self._node_order
+        before = len(self.relations)
+
+        for skill_id in sorted(pending, key=order.__getitem__):
+            skill = self.nodes[skill_id]
+            position = order[skill_id]
+
+            # 只与先加入的节点或不在本轮待处理集合中的节点配对，保证每对只处理一次
+            def earlier_or_linked(other_id: str) -> bool:
+                return order[other_id] < position or other_id not in pending
+
+            def pair(other_id: str) -> Tuple[str, str]:
+                return (other_id, skill_id) if order[other_id] < position else (skill_id, other_id)
+
+            for other_id in sorted(filter(earlier_or_linked, self._tag_lsh.candidates(skill_id)),
+                                   key=order.__getitem__):
+                similarity = self._calculate_similarity(skill, self.nodes[other_id])
                 if similarity > 0.7:
-                    # 创建相关关系
-                    self.add_relation(
-                        skill1.id,
-                        skill2.id,
-                        RelationType.RELATED,
-                        strength=similarity
-                    )
-                    new_relations += 1
+                    self.add_relation(*pair(other_id), RelationType.RELATED, strength=similarity)
 
-                # 检查来源关系
-                if skill1.source == skill2.source and skill1.source != 'manual':
+            if skill.source != 'manual':
+                for other_id in sorted(filter(earlier_or_linked, self._source_groups[skill.source] - {skill_id}),
+                                       key=order.__getitem__):
                     self.add_relation(
-                        skill1.id,
-                        skill2.id,
+                        *pair(other_id),
                         RelationType.RELATED,
                         strength=0.5,
                         metadata={'source': 'same_repo'}
                     )
 
-        return new_relations
+        self._unlinked.clear()
+        return len(self.relations) - before
+
+    def _index_for_linking(self, skill: SkillNode):
+        self._tag_lsh.add(skill.id, {t.lower() for t in skill.tags})
+        self._source_groups[skill.source].add(skill.id)
 
     def _calculate_similarity(self, skill1: SkillNode, skill2: SkillNode) -> float:
         """计算两个技能的相似度"""
@@ -482,7 +880,7 @@ class SkillKnowledgeGraph:
             'total_nodes': len(self.nodes),
             'total_relations': len(self.relations),
             'relation_types': {
-                rt.value: len([r for r in self.relations if r.relation_type == rt])
+                rt.value: self._relation_counts[rt]
                 for rt in RelationType
             },
             'sources': list(set(s.source for s in self.nodes.values())),
@@ -490,7 +888,25 @@ class SkillKnowledgeGraph:
         }
 
     def _update_index(self, skill: SkillNode):
-        """更新倒排索引"""
+        """更新倒排索引（在 skill 写入 self.nodes 之前调用）"""
+        self._node_order.setdefault(skill.id, len(self._node_order))
+
+        # 替换已有节点时先移除旧标签
+        previous = self.nodes.get(skill.id)
+        if previous is not None:
+            for tag in previous.tags:
+                skill_ids = self._index.get(tag.lower())
+                if skill_ids is not None:
+                    skill_ids.discard(skill.id)
+                    if not skill_ids:
+                        del self._index[tag.lower()]
+            if self._tag_lsh is not None:
+                self._source_groups[previous.source].discard(skill.id)
+
+        self._search_index.add(skill)
+        if self._tag_lsh is not None:
+            self._index_for_linking(skill)
+
         # 为标签创建索引
         for tag in skill.tags:
             tag_lower = tag.lower()
@@ -499,41 +915,54 @@ class SkillKnowledgeGraph:
             self._index[tag_lower].add(skill.id)
 
     def _load(self):
-        """从存储加载数据"""
-        if not Path(self.storage_path).exists():
+        """从存储加载数据: 快照 + 回放变更日志"""
+        try:
+            data, ops = self._store.load()
+        except Exception as e:
+            print(f"[SkillGraph] 加载失败: {e}")
             return
 
         try:
-            with open(self.storage_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
             # 加载节点
             for skill_data in data.get('nodes', []):
-                skill = SkillNode.from_dict(skill_data)
-                self.nodes[skill.id] = skill
-                self._update_index(skill)
+                self._load_node(skill_data)
 
             # 加载关系
             for rel_data in data.get('relations', []):
-                self.relations.append(SkillRelation.from_dict(rel_data))
+                self._index_relation(SkillRelation.from_dict(rel_data))
+
+            # 回放快照之后的变更
+            for op in ops:
+                if op.get('op') == 'node':
+                    self._load_node(op['data'])
+                elif op.get('op') == 'relation':
+                    self._index_relation(SkillRelation.from_dict(op['data']))
 
         except Exception as e:
             print(f"[SkillGraph] 加载失败: {e}")
 
-    def _save(self):
-        """保存到存储"""
-        try:
-            # 确保目录存在
-            Path(self.storage_path).parent.mkdir(parents=True, exist_ok=True)
+    def _load_node(self, skill_data: Dict):
+        skill = SkillNode.from_dict(skill_data)
+        self._update_index(skill)
+        self.nodes[skill.id] = skill
 
-            data = {
-                'nodes': [s.to_dict() for s in self.nodes.values()],
-                'relations': [r.to_dict() for r in self.relations],
-                'updated_at': datetime.now().isoformat()
-            }
+    def _snapshot_data(self) -> Dict:
+        return {
+            'nodes': [s.to_dict() for s in self.nodes.values()],
+            'relations': [r.to_dict() for r in self.relations],
+            'updated_at': datetime.now().isoformat()
+        }
 
-            with open(self.storage_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+    def _record_node(self, skill: SkillNode):
+        self._store.record('node', skill.to_dict(), len(self.nodes) + len(self.relations))
 
-        except Exception as e:
-            print(f"[SkillGraph] 保存失败: {e}")
+    def _record_relation(self, relation: SkillRelation):
+        self._store.record('relation', relation.to_dict(), len(self.nodes) + len(self.relations))
+
+    def flush(self):
+        """立即写入所有未落盘的变更"""
+        self._store.flush()
+
+    def _save(self):
+        """保存完整快照（并清空变更日志）"""
+        self._store.compact()
@@ -1,4 +1,5 @@
 """Lightning APO Pipeline 模块"""
 from .pipeline import APOPipeline, PromptCandidate, OptimizationStrategy
+from .scheduler import APOScheduler
 
-__all__ = ['APOPipeline', 'PromptCandidate', 'OptimizationStrategy']
+__all__ = ['APOPipeline', 'PromptCandidate', 'OptimizationStrategy', 'APOScheduler']
@@ -22,6 +22,7 @@ APO Pipeline - 自动提示词优化管道
 import re
 import json
 import time
+import heapq
 import random
 from typing import Any, Dict, List, Optional, Callable, Tuple
 from dataclasses import dataclass
@@ -86,9 +87,23 @@ class APOPipeline:
             "significance_level": self.config.get('significance_level', 0.05)
         }
 
+        # 优化周期配置
+        self.cycle_config = {
+            "top_k": self.config.get('cycle_top_k', 10),
+            "time_budget_s": self.config.get('cycle_time_budget', 300.0),
+            "window_days": self.config.get('cycle_window_days', 7)
+        }
+
+        # 调度配置
+        self.scheduler_config = {
+            "max_workers": self.config.get('max_workers', 2),
+            "min_check_interval": self.config.get('min_check_interval', 60.0)
+        }
+
         # 存储后端（延迟初始化）
         self._store = None
         self._tracer = None
+        self._scheduler = None
 
         # 优化策略注册
         self._strategies: Dict[OptimizationStrategy, Callable] = {
@@ -102,11 +117,14 @@ class APOPipeline:
         # 活跃测试
         self._active_ab_tests: Dict[str, Dict] = {}
 
+        # A/B 测试版本戳: skill_name -> generation（启动/结束测试时递增）
+        self._ab_generations: Dict[str, int] = {}
+
     def _get_store(self):
         """获取存储实例"""
         if self._store is None:
             from ..store.core import LightningStore
-            self._store = LightningStore()
+            self._store = LightningStore(self.config.get('db_path'))
         return self._store
 
     def _get_tracer(self):
@@ -116,6 +134,13 @@ class APOPipeline:
             self._tracer = LightningTracer()
         return self._tracer
 
+    def get_scheduler(self):
+        """获取调度器实例（有界线程池 + 单飞 + 去抖）"""
+        if self._scheduler is None:
+            from .scheduler import APOScheduler
+            self._scheduler = APOScheduler(self, self.scheduler_config)
+        return self._scheduler
+
     def check_optimization_trigger(self, skill_name: str) -> Tuple[bool, str]:
         """检查是否需要优化
 
@@ -339,13 +364,9 @@ Before responding, please think through this step by step:
         store = self._get_store()
 
         # 获取候选版本
-        candidates = store.get_prompt_candidates(skill_name)
-        candidate = next(
-            (c for c in candidates if c['version_id'] == candidate_version_id),
-            None
-        )
+        candidate = store.get_prompt_version(candidate_version_id)
 
-        if not candidate:
+        if not candidate or candidate['skill_name'] != skill_name or not candidate['is_candidate']:
             return False
 
         # 记录测试开始
@@ -357,32 +378,46 @@ Before responding, please think through this step by step:
             "control_success": 0,
             "treatment_success": 0
         }
+        self._bump_ab_generation(skill_name)
 
         return True
 
+    def get_ab_test_generation(self, skill_name: str) -> int:
+        """获取 A/B 测试版本戳（启动或结束测试后递增）"""
+        return self._ab_generations.get(skill_name, 0)
+
+    def _bump_ab_generation(self, skill_name: str):
+        self._ab_generations[skill_name] = self._ab_generations.get(skill_name, 0) + 1
+
+    def assign_ab_group(self, skill_name: str) -> Tuple[Optional[str], str]:
+        """仅做流量分配，不访问存储
+
+        Returns:
+            (candidate_version_id, 'treatment') 或 (None, 'control')
+        """
+        test = self._active_ab_tests.get(skill_name)
+
+        if test and random.random() < self.ab_test_config['traffic_split']:
+            # 治疗组
+            return test['candidate_version'], 'treatment'
+
+        # 对照组
+        return None, 'control'
+
     def get_ab_test_assignment(self, skill_name: str) -> Tuple[str, str]:
         """获取 A/B 测试分组
 
         Returns:
             (version_id, group) - group is 'control' or 'treatment'
         """
-        if skill_name not in self._active_ab_tests:
-            # 未在测试中，返回当前活跃版本
-            store = self._get_store()
-            current = store.get_active_prompt(skill_name)
-            return current['version_id'] if current else None, 'control'
+        candidate_version, group = self.assign_ab_group(skill_name)
+        if group == 'treatment':
+            return candidate_version, group
 
-        test = self._active_ab_tests[skill_name]
-
-        # 流量分配
-        if random.random() < self.ab_test_config['traffic_split']:
-            # 治疗组
-            return test['candidate_version'], 'treatment'
-        else:
-            # 对照组
-            store = self._get_store()
-            current = store.get_active_prompt(skill_name)
-            return current['version_id'], 'control'
+        # 对照组 / 未在测试中，返回当前活跃版本
+        store = self._get_store()
+        current = store.get_active_prompt(skill_name)
+        return current['version_id'] if current else None, 'control'
 
     def evaluate_ab_test(self, skill_name: str) -> Optional[Dict]:
         """评估 A/B 测试结果"""
@@ -430,69 +465,111 @@ Before responding, please think through this step by step:
         if success and skill_name in self._active_ab_tests:
             # 结束 A/B 测试
             del self._active_ab_tests[skill_name]
+            self._bump_ab_generation(skill_name)
 
         return success
 
-    def run_optimization_cycle(self) -> List[Dict]:
-        """运行完整的优化周期"""
-        results = []
+    def select_active_skills(self) -> List[Dict]:
+        """从存储中选出最值得优化的 top-K 技能
+
+        一次聚合查询取得各技能的流量 × 错误率 × 奖励缺口，用堆选出
+        优先级最高的 top_k 个；样本不足 min_samples 的技能直接排除。
 
-        # 1. 扫描所有技能
+        Returns:
+            按优先级降序排列的技能统计
+        """
         store = self._get_store()
-        metrics = store.get_metrics_summary(days=7)
-
-        # 获取活跃技能列表
-        active_skills = [
-            "cognitive-architect",
-            "knowledge-explorer",
-            "concept-singularity",
-            "brand-alchemist",
-            "official-writer"
-        ]
+        priorities = store.get_skill_priorities(
+            days=self.cycle_config['window_days'],
+            min_invocations=self.trigger_config['min_samples']
+        )
 
-        for skill_name in active_skills:
-            try:
-                # 2. 检查触发条件
-                should_optimize, reason = self.check_optimization_trigger(skill_name)
-
-                if not should_optimize:
-                    results.append({
-                        "skill": skill_name,
-                        "action": "skip",
-                        "reason": reason
-                    })
-                    continue
+        return heapq.nlargest(
+            self.cycle_config['top_k'],
+            priorities,
+            key=lambda p: p['priority']
+        )
 
-                # 3. 生成候选
-                candidates = self.optimize_skill(skill_name)
+    def run_optimization_cycle(self) -> List[Dict]:
+        """运行完整的优化周期
 
-                if not candidates:
-                    results.append({
-                        "skill": skill_name,
-                        "action": "no_candidates",
-                        "reason": "所有策略未产生新候选"
-                    })
-                    continue
+        1. 按优先级选出 top-K 活跃技能
+        2. 通过调度器按优先级顺序并行处理（已有优化在执行的技能直接跳过）
+        3. 超出周期时间预算后不再等待: 尚未开始的技能取消，仍在执行的技能
+           在后台继续完成，二者结果均记为 timeout
+        """
+        # 1. 选出活跃技能
+        selected = self.select_active_skills()
+        priorities = {p['skill_name']: p['priority'] for p in selected}
+        deadline = time.monotonic() + self.cycle_config['time_budget_s']
+
+        results = self.get_scheduler().run_all(
+            [p['skill_name'] for p in selected],
+            lambda skill_name: self._run_cycle_for_skill(skill_name, deadline),
+            busy_result=lambda skill_name: {
+                "skill": skill_name,
+                "action": "skip",
+                "reason": "优化进行中"
+            },
+            deadline=deadline,
+            timeout_result=lambda skill_name: {
+                "skill": skill_name,
+                "action": "timeout",
+                "reason": "超出周期时间预算"
+            }
+        )
+
+        for result in results:
+            result["priority"] = priorities.get(result["skill"])
 
-                # 4. 启动 A/B 测试
-                if candidates:
-                    self.start_ab_test(skill_name, candidates[0].version_id)
+        return results
 
-                results.append({
+    def _run_cycle_for_skill(self, skill_name: str, deadline: Optional[float] = None) -> Dict:
+        """对单个技能执行一次优化周期"""
+        if deadline is not None and time.monotonic() > deadline:
+            return {
+                "skill": skill_name,
+                "action": "skip",
+                "reason": "超出周期时间预算"
+            }
+
+        try:
+            # 2. 检查触发条件
+            should_optimize, reason = self.check_optimization_trigger(skill_name)
+
+            if not should_optimize:
+                return {
                     "skill": skill_name,
-                    "action": "ab_test_started",
-                    "candidate_count": len(candidates),
-                    "test_version": candidates[0].version_id
-                })
+                    "action": "skip",
+                    "reason": reason
+                }
 
-            except Exception as e:
-                results.append({
+            # 3. 生成候选
+            candidates = self.optimize_skill(skill_name)
+
+            if not candidates:
+                return {
                     "skill": skill_name,
-                    "action": "error",
-                    "error": str(e)
-                })
+                    "action": "no_candidates",
+                    "reason": "所有策略未产生新候选"
+                }
 
-        return results
+            # 4. 启动 A/B 测试
+            self.start_ab_test(skill_name, candidates[0].version_id)
+
+            return {
+                "skill": skill_name,
+                "action": "ab_test_started",
+                "candidate_count": len(candidates),
+                "test_version": candidates[0].version_id
+            }
+
+        except Exception as e:
+            return {
+                "skill": skill_name,
+                "action": "error",
+                "error": str(e)
+            }
 
     def get_candidates(self, skill_name: str) -> List[Dict]:
         """获取技能的候选提示词"""
@@ -0,0 +1,210 @@
+"""
+APO Scheduler - 有界的优化任务调度
+
+每次技能调用都同步检查触发条件、并为优化启动新线程，会让热门技能
+同时跑几十个优化。APOScheduler 提供:
+
+1. 固定大小的线程池 - 限制并发优化数
+2. 按技能单飞 (single-flight) - 同一技能同时最多一个任务
+3. 触发检查去抖 - 同一技能两次检查之间至少间隔 min_check_interval 秒
+4. 队列深度等统计指标
+
+线程池的工作线程不是守护线程，解释器退出时会等待它们把队列中的任务
+全部执行完。模块在 concurrent.futures 的退出钩子之前注册了自己的钩子，
+退出时取消所有调度器中尚未开始的任务；已在执行的任务仍会执行完毕。
+"""
+
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# 存活的调度器（退出时取消其排队任务）
+_schedulers: 'weakref.WeakSet[APOScheduler]' = weakref.WeakSet()
+
+
+def _cancel_pending_at_exit():
+    for scheduler in list(_schedulers):
+        scheduler.shutdown(wait=False, cancel_futures=True)
+
+
+# threading 的退出钩子按注册的逆序执行，且早于等待非守护线程；
+# concurrent.futures.thread 已在上面导入时注册了等待工作线程的钩子，这里的钩子先于它执行。
+# atexit 的钩子在等待线程之后才执行，来不及取消排队任务。
+if hasattr(threading, '_register_atexit'):
+    threading._register_atexit(_cancel_pending_at_exit)
+
+
+class APOScheduler:
+    """APO 优化任务调度器
+
+    示例:
+        scheduler = APOScheduler(apo, {'max_workers': 2, 'min_check_interval': 60})
+
+        # 技能调用后（非阻塞、去抖、单飞）
+        scheduler.maybe_trigger("knowledge-explorer")
+
+        # 并行执行一组任务
+        results = scheduler.run_all(skills, apo._run_cycle_for_skill)
+    """
+
+    def __init__(self, apo, config: Optional[Dict] = None):
+        self.apo = apo
+        self.config = config or {}
+        self.max_workers = self.config.get('max_workers', 2)
+        self.min_check_interval = self.config.get('min_check_interval', 60.0)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="apo"
+        )
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._last_check: Dict[str, float] = {}
+        self._pending = 0
+
+        _schedulers.add(self)
+
+        self._stats = {
+            "checks_debounced": 0,
+            "tasks_submitted": 0,
+            "tasks_deduplicated": 0,
+            "tasks_completed": 0,
+            "tasks_failed": 0,
+            "tasks_timed_out": 0,
+            "optimizations_triggered": 0,
+        }
+
+    def submit(self, skill_name: str, fn: Callable[..., Any], *args) -> Tuple[Future, bool]:
+        """提交技能任务（单飞）
+
+        Returns:
+            (future, is_new) - 若该技能已有任务在执行，返回已有 future 且 is_new=False
+        """
+        with self._lock:
+            existing = self._inflight.get(skill_name)
+            if existing is not None and not existing.done():
+                self._stats["tasks_deduplicated"] += 1
+                return existing, False
+
+            self._pending += 1
+            self._stats["tasks_submitted"] += 1
+            future = self._executor.submit(self._run, skill_name, fn, *args)
+            self._inflight[skill_name] = future
+            return future, True
+
+    def _run(self, skill_name: str, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            self._pending -= 1
+
+        try:
+            result = fn(*args)
+            with self._lock:
+                self._stats["tasks_completed"] += 1
+            return result
+        except Exception:
+            with self._lock:
+                self._stats["tasks_failed"] += 1
+            raise
+        finally:
+            # 单飞保证执行期间不会有同名新任务登记，可直接移除
+            with self._lock:
+                self._inflight.pop(skill_name, None)
+
+    def maybe_trigger(self, skill_name: str) -> Optional[Future]:
+        """去抖后在后台检查触发条件，满足时执行 optimize_skill
+
+        Returns:
+            Future（已提交或已在执行），被去抖时返回 None
+        """
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_check.get(skill_name)
+            if last is not None and now - last < self.min_check_interval:
+                self._stats["checks_debounced"] += 1
+                return None
+            self._last_check[skill_name] = now
+
+        future, _ = self.submit(skill_name, self._check_and_optimize, skill_name)
+        return future
+
+    def _check_and_optimize(self, skill_name: str) -> List:
+        should_optimize, reason = self.apo.check_optimization_trigger(skill_name)
+        if not should_optimize:
+            return []
+
+        print(f"[Lightning] Triggering APO for {skill_name}: {reason}")
+        with self._lock:
+            self._stats["optimizations_triggered"] += 1
+        return self.apo.optimize_skill(skill_name)
+
+    def run_all(
+        self,
+        skill_names: List[str],
+        fn: Callable[[str], Any],
+        busy_result: Optional[Callable[[str], Any]] = None,
+        deadline: Optional[float] = None,
+        timeout_result: Optional[Callable[[str], Any]] = None
+    ) -> List[Any]:
+        """并行地对每个技能执行 fn(skill_name)，按输入顺序返回结果
+
+        Args:
+            skill_names: 技能列表
+            fn: 任务函数
+            busy_result: 技能已有任务在执行时的结果生成函数（默认等待已有任务）
+            deadline: 等待结果的截止时间（time.monotonic() 时间点），
+                None 表示一直等待
+            timeout_result: 截止时仍未完成的技能的结果生成函数（默认 None）；
+                尚未开始的任务被取消，已在执行的任务不会被中断，仍在后台执行完毕
+        """
+        submitted = []
+        for skill_name in skill_names:
+            future, is_new = self.submit(skill_name, fn, skill_name)
+            submitted.append((skill_name, future, is_new))
+
+        results = []
+        for skill_name, future, is_new in submitted:
+            if not is_new and busy_result is not None:
+                results.append(busy_result(skill_name))
+                continue
+
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                results.append(future.result(timeout))
+            except FutureTimeoutError:
+                with self._lock:
+                    self._stats["tasks_timed_out"] += 1
+                    # 仍在队列中的任务直接取消（_run 不会执行，在此处完成记账）
+                    if is_new and future.cancel():
+                        self._pending -= 1
+                        if self._inflight.get(skill_name) is future:
+                            del self._inflight[skill_name]
+                results.append(timeout_result(skill_name) if timeout_result is not None else None)
+        return results
+
+    def get_stats(self) -> Dict:
+        """获取调度统计（含队列深度与在途任务数）"""
+        with self._lock:
+            stats = self._stats.copy()
+            stats["queue_depth"] = self._pending
+            stats["inflight"] = sum(1 for f in self._inflight.values() if not f.done())
+        stats["max_workers"] = self.max_workers
+        return stats
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """关闭线程池
+
+        Args:
+            wait: 是否等待任务执行完毕
+            cancel_futures: 是否取消尚未开始的任务（已在执行的任务不受影响）
+        """
+        if cancel_futures:
+            with self._lock:
+                for skill_name, future in list(self._inflight.items()):
+                    if future.cancel():
+                        self._pending -= 1
+                        del self._inflight[skill_name]
+        _schedulers.discard(self)
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
@@ -19,7 +19,7 @@ from functools import wraps
 # 确保能导入 MindSymphony 核心
 sys.path.insert(0, os.path.expanduser('~/.claude/skills/mindsymphony'))
 
-from ..tracer.core import LightningTracer, SpanType
+from ..tracer.core import LightningTracer, SpanType, get_tracer
 from ..rewards.engine import RewardEngine, get_reward_engine
 from ..apo.pipeline import APOPipeline
 from ..store.core import LightningStore
@@ -51,13 +51,21 @@ class MindSymphonyAdapter:
 
         # 初始化 Lightning 组件
         self.tracer = get_tracer()
-        self.reward_engine = get_reward_engine()
-        self.store = LightningStore()
-        self.apo = APOPipeline()
+        self.reward_engine = get_reward_engine({
+            'db_path': self.config.get('db_path'),
+            'persist_history': self.config.get('persist_reward_history', True)
+        })
+        self.store = LightningStore(self.config.get('db_path'))
+        self.apo = APOPipeline({'db_path': self.config.get('db_path')})
 
         # 追踪状态
         self._current_trace = None
         self._skill_stack = []
+        # 最近完成的技能调用 span，反馈默认归属于它
+        self._last_skill_span_id: Optional[str] = None
+
+        # 提示词缓存: skill_name -> {'stamp', 'active', 'versions'}
+        self._prompt_cache: Dict[str, Dict[str, Any]] = {}
 
     def trace_skill(self, skill_name: Optional[str] = None):
         """装饰器 - 自动追踪技能调用
@@ -112,6 +120,8 @@ class MindSymphonyAdapter:
 
                 finally:
                     self._skill_stack.pop()
+                    if span:
+                        self._last_skill_span_id = span.span_id
 
             return wrapper
         return decorator
@@ -152,15 +162,19 @@ class MindSymphonyAdapter:
         feedback_type: str,
         value: Optional[float] = None,
         text: Optional[str] = None,
-        context: Optional[Dict] = None
+        context: Optional[Dict] = None,
+        span_id: Optional[str] = None
     ):
         """记录用户反馈
 
+        奖励通过 span_id 关联到技能调用（APO 按技能汇总奖励时依赖该关联）。
+
         Args:
             feedback_type: 'thumbs_up', 'thumbs_down', 'rating', 'text'
             value: 数值反馈（如评分）
             text: 文本反馈
             context: 额外上下文
+            span_id: 反馈针对的技能调用 span，默认为最近完成的技能调用
         """
         if not self.enabled:
             return
@@ -175,6 +189,7 @@ class MindSymphonyAdapter:
 
         # 存储到 Store
         self.store.store_reward({
+            'span_id': span_id or self._last_skill_span_id,
             'reward_type': reward.reward_type.value,
             'reward_value': reward.value,
             'confidence': reward.confidence,
@@ -208,42 +223,63 @@ class MindSymphonyAdapter:
     def get_optimized_prompt(self, skill_name: str) -> Optional[str]:
         """获取优化后的提示词
 
-        检查是否有 A/B 测试候选，返回适当的提示词
+        检查是否有 A/B 测试候选，返回适当的提示词。
+        提示词按技能缓存在进程内，以 (存储版本戳, A/B 测试版本戳) 判断失效；
+        set_active_prompt / deploy_candidate / start_ab_test 都会使缓存失效。
         """
         if not self.enabled:
             return None
 
-        # 检查是否有活跃的 A/B 测试
-        version_id, group = self.apo.get_ab_test_assignment(skill_name)
+        entry = self._get_prompt_entry(skill_name)
+
+        # 流量分配（纯内存）
+        candidate_version, group = self.apo.assign_ab_group(skill_name)
 
-        if version_id and group == 'treatment':
+        if candidate_version and group == 'treatment':
             # 使用候选版本
-            candidates = self.store.get_prompt_candidates(skill_name)
-            candidate = next(
-                (c for c in candidates if c['version_id'] == version_id),
-                None
-            )
-            if candidate:
-                return candidate['prompt_template']
+            versions = entry['versions']
+            if candidate_version not in versions:
+                candidate = self.store.get_prompt_version(candidate_version)
+                versions[candidate_version] = candidate['prompt_template'] if candidate else None
+            if versions[candidate_version]:
+                return versions[candidate_version]
 
         # 返回当前活跃版本
-        active = self.store.get_active_prompt(skill_name)
-        return active['prompt_template'] if active else None
+        return entry['active']
+
+    def _get_prompt_entry(self, skill_name: str) -> Dict[str, Any]:
+        """获取技能的缓存条目，版本戳变化时重新加载"""
+        stamp = (
+            self.store.get_prompt_generation(skill_name),
+            self.apo.get_ab_test_generation(skill_name)
+        )
+
+        entry = self._prompt_cache.get(skill_name)
+        if entry is None or entry['stamp'] != stamp:
+            active = self.store.get_active_prompt(skill_name)
+            entry = {
+                'stamp': stamp,
+                'active': active['prompt_template'] if active else None,
+                'versions': {}
+            }
+            self._prompt_cache[skill_name] = entry
+
+        return entry
+
+    def invalidate_prompt_cache(self, skill_name: Optional[str] = None):
+        """手动清除提示词缓存（skill_name 为空时清除全部）"""
+        if skill_name is None:
+            self._prompt_cache.clear()
+        else:
+            self._prompt_cache.pop(skill_name, None)
 
     def _check_apo_trigger(self, skill_name: str):
-        """检查是否需要触发 APO"""
-        # 避免过于频繁的检查
-        should_optimize, reason = self.apo.check_optimization_trigger(skill_name)
-
-        if should_optimize:
-            print(f"[Lightning] Triggering APO for {skill_name}: {reason}")
-            # 异步触发优化
-            import threading
-            threading.Thread(
-                target=self.apo.optimize_skill,
-                args=(skill_name,),
-                daemon=True
-            ).start()
+        """检查是否需要触发 APO
+
+        交给 APO 调度器在后台执行：同一技能的检查有最小间隔，
+        同时最多一个优化任务，线程池大小固定。
+        """
+        self.apo.get_scheduler().maybe_trigger(skill_name)
 
     def get_skill_insights(self, skill_name: str, days: int = 7) -> Dict:
         """获取技能洞察"""
@@ -288,6 +324,7 @@ class MindSymphonyAdapter:
             'tracer': self.tracer.get_stats(),
             'store': self.store.get_metrics_summary(),
             'apo_tests': self.apo.get_active_tests(),
+            'apo_scheduler': self.apo.get_scheduler().get_stats(),
             'enabled': self.enabled
         }
 
@@ -6,6 +6,7 @@ Reward Engine - 奖励信号工程
 2. 隐式信号提取 - 从交互模式推断
 3. 计算奖励生成 - 跨任务聚合
 4. 奖励归一化和验证
+5. 批量计算 - 离线回填/APO 评估时一次处理大量 episode（可选 NumPy 加速）
 
 受 Agent Lightning 启发，自动将交互转化为奖励信号
 """
@@ -13,11 +14,23 @@ Reward Engine - 奖励信号工程
 import re
 import json
 import time
-from typing import Any, Dict, List, Optional, Callable
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Callable
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
 
 class RewardType(Enum):
     """奖励类型"""
@@ -37,6 +50,10 @@ class RewardSignal:
     timestamp: float
 
 
+# 批量计算中奖励类型的列顺序
+_TYPE_ORDER = (RewardType.EXPLICIT, RewardType.IMPLICIT, RewardType.COMPUTED)
+
+
 class RewardEngine:
     """奖励信号引擎
 
@@ -60,8 +77,18 @@ class RewardEngine:
 
         # 计算综合奖励
         total_reward = engine.compute_total_reward(episode_data)
+
+        # 批量计算（离线回填）
+        results = engine.compute_total_rewards(episodes)
+        novelty = engine.compute_novelty_rewards(patterns)
     """
 
+    # 新颖性比较的历史窗口
+    NOVELTY_WINDOW = 100
+
+    # 批量新颖性计算时每块处理的模式数（限制相似度矩阵大小）
+    NOVELTY_CHUNK = 512
+
     def __init__(self, config: Optional[Dict] = None):
         self.config = config or {}
 
@@ -72,6 +99,9 @@ class RewardEngine:
             RewardType.COMPUTED: self.config.get('computed_weight', 0.4)
         }
 
+        # 批量计算是否使用 NumPy（未安装时自动回退到逐条计算）
+        self.use_numpy = NUMPY_AVAILABLE and self.config.get('use_numpy', True)
+
         # 隐式信号提取器
         self._implicit_extractors: List[Callable] = [
             self._extract_task_completion_signals,
@@ -80,9 +110,89 @@ class RewardEngine:
             self._extract_efficiency_signals
         ]
 
-        # 历史记录（用于计算奖励）
-        self._interaction_history: List[Dict] = []
-        self._max_history = 1000
+        # 历史记录（用于计算奖励）: 定长环形缓冲 + 会话轮数计数
+        self._max_history = self.config.get('max_history', 1000)
+        self._interaction_history: Deque[Dict] = deque(maxlen=self._max_history)
+        self._session_turns: Dict[str, int] = {}
+
+        # 摘要时间桶索引: bucket_start -> [交互数, 信号数]
+        self._bucket_seconds = self.config.get('summary_bucket_seconds', 60)
+        self._summary_horizon = self.config.get('summary_horizon_hours', 168) * 3600
+        self._summary_buckets: Dict[int, List[int]] = {}
+        # 保护环形缓冲、会话轮数与时间桶（记录与摘要可能来自不同线程）
+        self._lock = threading.Lock()
+
+        # 持久化到 Lightning Store（重启后恢复）
+        self.persist_history = self.config.get('persist_history', False)
+        self._store = None
+        if self.persist_history:
+            self._load_history()
+
+    def _get_store(self):
+        """获取存储实例"""
+        if self._store is None:
+            from ..store.core import LightningStore
+            self._store = LightningStore(self.config.get('db_path'))
+        return self._store
+
+    def _load_history(self):
+        """从存储恢复环形缓冲与时间桶（只读取最近 max_history 条和持久化的桶聚合）"""
+        store = self._get_store()
+
+        for entry in store.get_recent_interactions(self._max_history):
+            self._append_history(entry)
+
+        self._summary_buckets = {
+            bucket: [count, signals]
+            for bucket, count, signals in store.get_interaction_buckets(
+                time.time() - self._summary_horizon, self._bucket_seconds
+            )
+        }
+
+    def _append_history(self, entry: Dict):
+        """写入环形缓冲，维护会话轮数"""
+        if len(self._interaction_history) == self._max_history:
+            evicted = self._interaction_history[0]
+            session_id = evicted['context'].get('session_id')
+            if session_id is not None:
+                remaining = self._session_turns.get(session_id, 1) - 1
+                if remaining > 0:
+                    self._session_turns[session_id] = remaining
+                else:
+                    self._session_turns.pop(session_id, None)
+
+        self._interaction_history.append(entry)
+
+        session_id = entry['context'].get('session_id')
+        if session_id is not None:
+            self._session_turns[session_id] = self._session_turns.get(session_id, 0) + 1
+
+    def _record_interaction(self, entry: Dict):
+        """记录一次交互: 环形缓冲、时间桶索引与持久化"""
+        with self._lock:
+            self._append_history(entry)
+
+            bucket = int(entry['timestamp'] // self._bucket_seconds) * self._bucket_seconds
+            counts = self._summary_buckets.get(bucket)
+            if counts is None:
+                counts = self._summary_buckets[bucket] = [0, 0]
+                # 新桶出现时淘汰超出保留期的旧桶
+                self._prune_buckets(entry['timestamp'] - self._summary_horizon)
+            counts[0] += 1
+            counts[1] += len(entry['signals'])
+
+        if self.persist_history:
+            self._get_store().store_interaction(entry, bucket_seconds=self._bucket_seconds)
+
+    def _prune_buckets(self, cutoff: float):
+        """淘汰早于 cutoff 的时间桶（持久化时同时清理存储中的旧记录；调用方持有 _lock）"""
+        expired = [bucket for bucket in self._summary_buckets
+                   if bucket + self._bucket_seconds <= cutoff]
+        for bucket in expired:
+            del self._summary_buckets[bucket]
+
+        if expired and self.persist_history:
+            self._get_store().trim_interactions(cutoff, self._bucket_seconds)
 
     def record_explicit_feedback(
         self,
@@ -191,17 +301,13 @@ class RewardEngine:
                 print(f"[RewardEngine] Extractor error: {e}")
 
         # 保存到历史
-        self._interaction_history.append({
+        self._record_interaction({
             'message': user_message,
             'context': context,
             'signals': [s.source for s in signals],
             'timestamp': time.time()
         })
 
-        # 限制历史大小
-        if len(self._interaction_history) > self._max_history:
-            self._interaction_history = self._interaction_history[-self._max_history:]
-
         return signals
 
     def _extract_task_completion_signals(
@@ -259,13 +365,8 @@ class RewardEngine:
         if not session_id:
             return None
 
-        # 统计当前会话的交互轮数
-        session_messages = [
-            h for h in self._interaction_history
-            if h['context'].get('session_id') == session_id
-        ]
-
-        turn_count = len(session_messages)
+        # 当前会话在历史中的交互轮数
+        turn_count = self._session_turns.get(session_id, 0)
 
         # 多轮交互 = 高参与度
         if turn_count >= 5:
@@ -377,7 +478,7 @@ class RewardEngine:
         for signal in signals:
             if isinstance(signal, dict):
                 signal = RewardSignal(**signal)
-            by_type[signal.reward_type].append(signal)
+            by_type[RewardType(signal.reward_type)].append(signal)
 
         # 计算各类型加权奖励
         weighted_rewards = {}
@@ -474,13 +575,15 @@ class RewardEngine:
             )
 
         # 计算与历史模式的相似度
-        similarities = []
-        for pattern in historical_patterns[-100:]:  # 最近100个
-            sim = self._pattern_similarity(current_pattern, pattern)
-            similarities.append(sim)
+        similarities = [
+            self._pattern_similarity(current_pattern, pattern)
+            for pattern in historical_patterns[-self.NOVELTY_WINDOW:]
+        ]
 
-        max_similarity = max(similarities) if similarities else 0
+        return self._novelty_signal(max(similarities))
 
+    def _novelty_signal(self, max_similarity: float) -> RewardSignal:
+        """根据与历史模式的最大相似度生成新颖性奖励"""
         # 新颖度 = 1 - 最大相似度
         novelty = 1.0 - max_similarity
 
@@ -520,23 +623,174 @@ class RewardEngine:
 
         return intersection / union if union > 0 else 0.0
 
-    def get_reward_summary(self, hours: int = 24) -> Dict:
-        """获取奖励信号摘要"""
-        since = time.time() - hours * 3600
+    @staticmethod
+    def _signal_fields(signal) -> tuple:
+        """取出信号的 (类型, 值, 置信度)，兼容 RewardSignal 与 dict"""
+        if isinstance(signal, dict):
+            return RewardType(signal['reward_type']), signal['value'], signal['confidence']
+        return RewardType(signal.reward_type), signal.value, signal.confidence
+
+    def compute_total_rewards(
+        self,
+        episodes: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """批量计算综合奖励
+
+        结果与逐条调用 compute_total_reward 一致。NumPy 可用时将所有信号
+        展平为数组，按 (episode, 类型) 用 bincount 一次完成置信度加权。
+        """
+        if not episodes:
+            return []
+        if not self.use_numpy:
+            return [self.compute_total_reward(episode) for episode in episodes]
+
+        episode_idx, type_idx, values, confidences = [], [], [], []
+        for i, episode in enumerate(episodes):
+            for signal in episode.get('signals', []):
+                rtype, value, confidence = self._signal_fields(signal)
+                episode_idx.append(i)
+                type_idx.append(_TYPE_ORDER.index(rtype))
+                values.append(value)
+                confidences.append(confidence)
+
+        n, k = len(episodes), len(_TYPE_ORDER)
+        cells = np.asarray(episode_idx, dtype=np.int64) * k + np.asarray(type_idx, dtype=np.int64)
+        confidences = np.asarray(confidences, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+
+        conf_sum = np.bincount(cells, weights=confidences, minlength=n * k).reshape(n, k)
+        value_sum = np.bincount(cells, weights=values * confidences, minlength=n * k).reshape(n, k)
+        counts = np.bincount(cells, minlength=n * k).reshape(n, k)
+
+        # 按置信度加权平均，再乘以类型权重
+        weights = np.array([self.weights[rtype] for rtype in _TYPE_ORDER], dtype=np.float64)
+        safe_conf = np.where(conf_sum != 0, conf_sum, 1.0)
+        weighted = np.where(conf_sum != 0, value_sum / safe_conf, 0.0) * weights
+
+        total = weighted.sum(axis=1)
+        weight_sum = weights.sum()
+        if weight_sum > 0:
+            total = total / weight_sum
+        total = np.clip(total, -1.0, 1.0)
+
+        confidence = np.minimum(1.0, conf_sum.sum(axis=1) / np.maximum(counts.sum(axis=1), 1))
+
+        now = time.time()
+        return [
+            {
+                "total_reward": float(total[i]),
+                "by_type": {
+                    rtype.value: float(weighted[i, j]) for j, rtype in enumerate(_TYPE_ORDER)
+                },
+                "signal_counts": {
+                    rtype.value: int(counts[i, j]) for j, rtype in enumerate(_TYPE_ORDER)
+                },
+                "confidence": float(confidence[i]),
+                "timestamp": now
+            }
+            for i in range(n)
+        ]
 
-        recent = [
-            h for h in self._interaction_history
-            if h['timestamp'] > since
+    def compute_novelty_rewards(
+        self,
+        patterns: List[Dict],
+        historical_patterns: Optional[List[Dict]] = None
+    ) -> List[RewardSignal]:
+        """批量计算新颖性奖励
+
+        第 i 个模式与它之前的 NOVELTY_WINDOW 个模式（historical_patterns
+        之后接 patterns[:i]）比较，结果与按顺序逐条调用 compute_novelty_reward
+        一致。NumPy 可用时用技能成员矩阵的矩阵乘法分块计算 Jaccard。
+        """
+        if not patterns:
+            return []
+
+        history = list(historical_patterns or [])[-self.NOVELTY_WINDOW:]
+
+        if not self.use_numpy:
+            pool = history + list(patterns)
+            offset = len(history)
+            return [
+                self.compute_novelty_reward(
+                    pattern,
+                    pool[max(0, offset + i - self.NOVELTY_WINDOW):offset + i]
+                )
+                for i, pattern in enumerate(patterns)
+            ]
+
+        max_similarities = self._max_similarities_numpy(history, patterns)
+        return [
+            self.compute_novelty_reward(pattern, [])
+            if np.isnan(similarity) else self._novelty_signal(float(similarity))
+            for pattern, similarity in zip(patterns, max_similarities)
         ]
 
+    def _max_similarities_numpy(self, history: List[Dict], patterns: List[Dict]):
+        """每个模式与其前 NOVELTY_WINDOW 个模式的最大 Jaccard 相似度（无前驱为 NaN）"""
+        pool = history + list(patterns)
+        offset = len(history)
+        window = self.NOVELTY_WINDOW
+
+        # 技能成员矩阵: 行 = 模式，列 = 技能
+        vocab: Dict[str, int] = {}
+        rows, cols = [], []
+        for i, pattern in enumerate(pool):
+            for skill in set(pattern.get('skills', [])):
+                rows.append(i)
+                cols.append(vocab.setdefault(skill, len(vocab)))
+
+        membership = np.zeros((len(pool), max(len(vocab), 1)), dtype=np.float64)
+        membership[rows, cols] = 1.0
+        sizes = membership.sum(axis=1)
+
+        result = np.full(len(patterns), np.nan)
+        for start in range(0, len(patterns), self.NOVELTY_CHUNK):
+            stop = min(start + self.NOVELTY_CHUNK, len(patterns))
+            lo = max(0, offset + start - window)
+            hi = offset + stop - 1
+            if hi <= lo:
+                continue
+
+            current = slice(offset + start, offset + stop)
+            intersection = membership[current] @ membership[lo:hi].T
+            union = sizes[current, None] + sizes[None, lo:hi] - intersection
+            # 两个空集相似度为 1，一空一非空为 0
+            similarity = np.where(union > 0, intersection / np.maximum(union, 1.0), 1.0)
+
+            # 仅保留每行自己的历史窗口 [g - window, g)
+            g = np.arange(offset + start, offset + stop)[:, None]
+            c = np.arange(lo, hi)[None, :]
+            similarity = np.where((c < g) & (c >= g - window), similarity, -1.0)
+
+            best = similarity.max(axis=1)
+            result[start:stop] = np.where(best >= 0, best, np.nan)
+
+        return result
+
+    def get_reward_summary(self, hours: int = 24) -> Dict:
+        """获取奖励信号摘要
+
+        从时间桶索引汇总，只遍历已有记录的桶（复杂度 O(非空桶数)，与时间跨度无关）；
+        窗口边界精度为 summary_bucket_seconds，最长覆盖 summary_horizon_hours。
+        """
+        now = time.time()
+        since = now - min(hours * 3600, self._summary_horizon)
+        first = int(since // self._bucket_seconds) * self._bucket_seconds
+        last = int(now // self._bucket_seconds) * self._bucket_seconds
+
+        interactions = 0
+        signals = 0
+        with self._lock:
+            for bucket, counts in self._summary_buckets.items():
+                if first <= bucket <= last:
+                    interactions += counts[0]
+                    signals += counts[1]
+
         return {
             "period_hours": hours,
-            "total_interactions": len(recent),
-            "signals_extracted": sum(len(h.get('signals', [])) for h in recent),
-            "avg_signals_per_interaction": (
-                sum(len(h.get('signals', [])) for h in recent) / len(recent)
-                if recent else 0
-            )
+            "total_interactions": interactions,
+            "signals_extracted": signals,
+            "avg_signals_per_interaction": signals / interactions if interactions else 0
         }
 
 
@@ -545,8 +799,20 @@ _default_reward_engine: Optional[RewardEngine] = None
 
 
 def get_reward_engine(config: Optional[Dict] = None) -> RewardEngine:
-    """获取全局 RewardEngine 实例"""
+    """获取全局 RewardEngine 实例
+
+    config 只在首次调用创建实例时生效；之后传入与现有实例不同的配置
+    （如 persist_history、db_path）会记录警告，返回的仍是原实例。
+    """
     global _default_reward_engine
     if _default_reward_engine is None:
         _default_reward_engine = RewardEngine(config)
+    elif config:
+        current = _default_reward_engine.config
+        ignored = sorted(key for key, value in config.items() if current.get(key) != value)
+        if ignored:
+            logger.warning(
+                "get_reward_engine: 全局实例已创建，忽略不一致的配置项 %s",
+                ", ".join(f"{key}={config[key]!r} (当前 {current.get(key)!r})" for key in ignored)
+            )
     return _default_reward_engine
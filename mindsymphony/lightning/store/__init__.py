@@ -1,4 +1,7 @@
 """Lightning Store 模块"""
 from .core import LightningStore
+from .rollup import RollupEngine
+from .retention import RetentionManager
+from .sketch import QuantileSketch
 
-__all__ = ['LightningStore']
+__all__ = ['LightningStore', 'RollupEngine', 'RetentionManager', 'QuantileSketch']
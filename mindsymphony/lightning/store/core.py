@@ -23,6 +23,8 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import hashlib
 
+from .rollup import DAY, RollupEngine, _bucket_label, _parse_bucket_label
+
 
 class LightningStore:
     """Lightning 数据存储中心
@@ -50,6 +52,11 @@ class LightningStore:
         store.store_prompt_version("knowledge-explorer", prompt_template, performance_score)
     """
 
+    # 进程内提示词版本戳: (db_path, skill_name) -> generation
+    # 提示词写入/切换时递增，供上层缓存判断是否失效（跨实例共享）
+    _prompt_generations: Dict[tuple, int] = {}
+    _prompt_generations_lock = threading.Lock()
+
     def __init__(self, db_path: Optional[str] = None):
         # 默认存储路径
         if db_path is None:
@@ -59,6 +66,7 @@ class LightningStore:
 
         self.db_path = str(db_path)
         self._local = threading.local()
+        self.rollups = RollupEngine()
         self._init_database()
 
     def _get_connection(self) -> sqlite3.Connection:
@@ -66,6 +74,9 @@ class LightningStore:
         if not hasattr(self._local, 'conn') or self._local.conn is None:
             self._local.conn = sqlite3.connect(self.db_path)
             self._local.conn.row_factory = sqlite3.Row
+            # WAL: 读写不互斥；NORMAL: 每个事务不再强制 fsync
+            self._local.conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn.execute("PRAGMA synchronous=NORMAL")
         return self._local.conn
 
     def _init_database(self):
@@ -169,17 +180,68 @@ class LightningStore:
             )
         """)
 
+        # Interactions 表 - RewardEngine 交互历史
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS interactions (
+                interaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT,
+                message TEXT,
+                context TEXT,
+                signals TEXT,  -- JSON array of signal sources
+                signal_count INTEGER DEFAULT 0,
+                timestamp REAL NOT NULL
+            )
+        """)
+
         # 创建索引
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_spans_trace ON spans(trace_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_spans_type ON spans(span_type)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_spans_name ON spans(name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_spans_time ON spans(start_time)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_rewards_episode ON rewards(episode_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rewards_span ON rewards(span_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_prompts_skill ON prompt_versions(skill_name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_prompts_active ON prompt_versions(is_active)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_window ON metrics(time_window, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_interactions_time ON interactions(timestamp)")
 
         conn.commit()
 
+    _SPAN_INSERT_SQL = """
+        INSERT OR REPLACE INTO spans (
+            span_id, trace_id, parent_id, span_type, name,
+            start_time, end_time, duration_ms,
+            input_hash, input_data, output_hash, output_data,
+            latency_ms, token_count, metadata, tags, status, error_message
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    @staticmethod
+    def _span_row(span) -> tuple:
+        """将 Span (或其字典形式) 转换为 spans 表的一行"""
+        span_dict = span.to_dict() if hasattr(span, 'to_dict') else span
+
+        return (
+            span_dict.get('span_id'),
+            span_dict.get('trace_id'),
+            span_dict.get('parent_id'),
+            span_dict.get('span_type'),
+            span_dict.get('name'),
+            span_dict.get('start_time'),
+            span_dict.get('end_time'),
+            span_dict.get('duration_ms'),
+            span_dict.get('input_hash'),
+            span_dict.get('input_data'),
+            span_dict.get('output_hash'),
+            span_dict.get('output_data'),
+            span_dict.get('latency_ms'),
+            span_dict.get('token_count'),
+            json.dumps(span_dict.get('metadata', {})),
+            json.dumps(span_dict.get('tags', [])),
+            span_dict.get('status', 'ok'),
+            span_dict.get('error_message')
+        )
+
     def store_span(self, span) -> bool:
         """存储追踪事件
 
@@ -189,46 +251,36 @@ class LightningStore:
         Returns:
             bool: 是否成功
         """
+        return self.store_spans([span]) == 1
+
+    def store_spans(self, spans: List) -> int:
+        """批量存储追踪事件
+
+        所有 span 在同一个事务中通过 executemany 写入，并同步推进
+        metrics 表的 hourly/daily 汇总；失败时整批回滚。
+
+        Args:
+            spans: Span 对象或字典列表
+
+        Returns:
+            int: 成功写入的数量
+        """
+        if not spans:
+            return 0
+
         try:
             conn = self._get_connection()
-            cursor = conn.cursor()
-
-            span_dict = span.to_dict() if hasattr(span, 'to_dict') else span
+            rows = [self._span_row(span) for span in spans]
 
-            cursor.execute("""
-                INSERT OR REPLACE INTO spans (
-                    span_id, trace_id, parent_id, span_type, name,
-                    start_time, end_time, duration_ms,
-                    input_hash, input_data, output_hash, output_data,
-                    latency_ms, token_count, metadata, tags, status, error_message
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                span_dict.get('span_id'),
-                span_dict.get('trace_id'),
-                span_dict.get('parent_id'),
-                span_dict.get('span_type'),
-                span_dict.get('name'),
-                span_dict.get('start_time'),
-                span_dict.get('end_time'),
-                span_dict.get('duration_ms'),
-                span_dict.get('input_hash'),
-                span_dict.get('input_data'),
-                span_dict.get('output_hash'),
-                span_dict.get('output_data'),
-                span_dict.get('latency_ms'),
-                span_dict.get('token_count'),
-                json.dumps(span_dict.get('metadata', {})),
-                json.dumps(span_dict.get('tags', [])),
-                span_dict.get('status', 'ok'),
-                span_dict.get('error_message')
-            ))
+            with conn:
+                conn.executemany(self._SPAN_INSERT_SQL, rows)
+                self.rollups.roll_up(conn)
 
-            conn.commit()
-            return True
+            return len(rows)
 
         except Exception as e:
-            print(f"[Store] Error storing span: {e}")
-            return False
+            print(f"[Store] Error storing spans: {e}")
+            return 0
 
     def store_episode(self, episode_data: Dict) -> bool:
         """存储任务序列 (Episode)
@@ -294,6 +346,142 @@ class LightningStore:
             print(f"[Store] Error storing reward: {e}")
             return False
 
+    # 交互时间桶聚合在 metrics 表中的位置（time_window 为 "<桶秒数>s"）
+    INTERACTION_METRIC = "interactions"
+    INTERACTION_TARGET = "reward_engine"
+
+    def store_interaction(self, interaction: Dict, bucket_seconds: Optional[int] = None) -> bool:
+        """存储一条交互历史（RewardEngine）
+
+        Args:
+            interaction: 交互记录
+            bucket_seconds: 同时在同一事务中累加该粒度的时间桶聚合
+                （value = 交互数，count = 信号数），供 get_interaction_buckets 读取
+        """
+        try:
+            conn = self._get_connection()
+            signals = interaction.get('signals', [])
+            context = interaction.get('context') or {}
+            timestamp = interaction.get('timestamp', datetime.now().timestamp())
+
+            with conn:
+                conn.execute("""
+                    INSERT INTO interactions (
+                        session_id, message, context, signals, signal_count, timestamp
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                """, (
+                    context.get('session_id'),
+                    interaction.get('message'),
+                    json.dumps(context, default=str),
+                    json.dumps(signals),
+                    len(signals),
+                    timestamp
+                ))
+                if bucket_seconds:
+                    self._add_interaction_bucket(
+                        conn, bucket_seconds, int(timestamp // bucket_seconds) * bucket_seconds, 1, len(signals)
+                    )
+            return True
+
+        except Exception as e:
+            print(f"[Store] Error storing interaction: {e}")
+            return False
+
+    def get_recent_interactions(self, limit: int = 1000) -> List[Dict]:
+        """获取最近的交互历史（按时间升序）"""
+        try:
+            conn = self._get_connection()
+            cursor = conn.execute("""
+                SELECT message, context, signals, timestamp FROM (
+                    SELECT interaction_id, message, context, signals, timestamp
+                    FROM interactions
+                    ORDER BY interaction_id DESC
+                    LIMIT ?
+                ) ORDER BY interaction_id
+            """, (limit,))
+
+            return [
+                {
+                    'message': message,
+                    'context': json.loads(context) if context else {},
+                    'signals': json.loads(signals) if signals else [],
+                    'timestamp': timestamp
+                }
+                for message, context, signals, timestamp in cursor.fetchall()
+            ]
+
+        except Exception as e:
+            print(f"[Store] Error getting interactions: {e}")
+            return []
+
+    def _add_interaction_bucket(self, conn, bucket_seconds: int, bucket: int, count: int, signals: int):
+        conn.execute("""
+            INSERT INTO metrics (
+                metric_name, metric_type, target_name, time_window, timestamp, value, count
+            ) VALUES (?, 'system', ?, ?, ?, ?, ?)
+            ON CONFLICT(metric_name, target_name, time_window, timestamp) DO UPDATE SET
+                value = value + excluded.value,
+                count = count + excluded.count
+        """, (self.INTERACTION_METRIC, self.INTERACTION_TARGET, f"{bucket_seconds}s",
+              _bucket_label(bucket), count, signals))
+
+    def get_interaction_buckets(self, since: float, bucket_seconds: int = 60) -> List[tuple]:
+        """按时间桶聚合交互数与信号数
+
+        读取 store_interaction 维护的桶聚合，代价与桶数成正比；该粒度尚无
+        聚合时（旧数据库）从原始交互表汇总一次并写回。
+
+        Returns:
+            [(bucket_start, interaction_count, signal_count), ...]
+        """
+        try:
+            conn = self._get_connection()
+            window = f"{bucket_seconds}s"
+            first = _bucket_label(since - since % bucket_seconds)
+
+            with conn:
+                exists = conn.execute("""
+                    SELECT 1 FROM metrics WHERE metric_name = ? AND target_name = ? AND time_window = ? LIMIT 1
+                """, (self.INTERACTION_METRIC, self.INTERACTION_TARGET, window)).fetchone()
+                if exists is None:
+                    for bucket, count, signals in conn.execute("""
+                        SELECT CAST(timestamp / ? AS INTEGER) * ? AS bucket,
+                               COUNT(*), SUM(signal_count)
+                        FROM interactions
+                        GROUP BY bucket
+                    """, (bucket_seconds, bucket_seconds)).fetchall():
+                        self._add_interaction_bucket(conn, bucket_seconds, int(bucket), count, signals or 0)
+
+            cursor = conn.execute("""
+                SELECT timestamp, value, count FROM metrics
+                WHERE metric_name = ? AND target_name = ? AND time_window = ? AND timestamp >= ?
+            """, (self.INTERACTION_METRIC, self.INTERACTION_TARGET, window, first))
+            return [(int(_parse_bucket_label(label)), int(count), int(signals or 0))
+                    for label, count, signals in cursor.fetchall()]
+
+        except Exception as e:
+            print(f"[Store] Error getting interaction buckets: {e}")
+            return []
+
+    def trim_interactions(self, before: float, bucket_seconds: Optional[int] = None) -> int:
+        """删除早于 before 的交互历史，以及给定粒度下整体早于 before 的时间桶聚合"""
+        try:
+            conn = self._get_connection()
+            with conn:
+                cursor = conn.execute("DELETE FROM interactions WHERE timestamp < ?", (before,))
+                deleted = cursor.rowcount
+                if bucket_seconds:
+                    conn.execute("""
+                        DELETE FROM metrics
+                        WHERE metric_name = ? AND target_name = ? AND time_window = ? AND timestamp < ?
+                    """, (self.INTERACTION_METRIC, self.INTERACTION_TARGET, f"{bucket_seconds}s",
+                          _bucket_label(before - before % bucket_seconds)))
+            return deleted
+
+        except Exception as e:
+            print(f"[Store] Error trimming interactions: {e}")
+            return 0
+
     def store_prompt_version(
         self,
         skill_name: str,
@@ -329,45 +517,58 @@ class LightningStore:
             ))
 
             conn.commit()
+            self._bump_prompt_generation(skill_name)
             return version_id
 
         except Exception as e:
             print(f"[Store] Error storing prompt version: {e}")
             return None
 
+    def get_prompt_generation(self, skill_name: str) -> int:
+        """获取技能提示词的版本戳（每次写入或切换提示词后递增）"""
+        return self._prompt_generations.get((self.db_path, skill_name), 0)
+
+    def _bump_prompt_generation(self, skill_name: str):
+        """使该技能的提示词缓存失效"""
+        key = (self.db_path, skill_name)
+        with self._prompt_generations_lock:
+            self._prompt_generations[key] = self._prompt_generations.get(key, 0) + 1
+
     def get_skill_stats(self, skill_name: str, days: int = 7) -> Dict:
-        """获取技能性能统计"""
+        """获取技能性能统计
+
+        读取 metrics 表中的 hourly/daily 汇总桶，只扫描窗口边缘和
+        尚未汇总的原始尾部。p50/p95/p99 由各桶的分位数 sketch 合并得出。
+        """
         try:
             conn = self._get_connection()
-            cursor = conn.cursor()
 
             since = (datetime.now() - timedelta(days=days)).timestamp()
 
-            cursor.execute("""
-                SELECT
-                    COUNT(*) as total_invocations,
-                    SUM(CASE WHEN status = 'ok' THEN 1 ELSE 0 END) as success_count,
-                    AVG(duration_ms) as avg_duration_ms,
-                    AVG(latency_ms) as avg_latency_ms,
-                    AVG(token_count) as avg_token_count
-                FROM spans
-                WHERE name = ? AND start_time > ? AND span_type = 'skill_invocation'
-            """, (skill_name, since))
-
-            row = cursor.fetchone()
+            aggregates = self.rollups.aggregate(
+                conn, since, span_type='skill_invocation', name=skill_name,
+                with_sketch=True
+            )
+            acc = aggregates.get(('skill_invocation', skill_name))
 
-            if row and row[0] > 0:
-                total = row[0]
-                success = row[1]
+            if acc and acc.count > 0:
+                total = acc.count
+                success = total - acc.errors
+                percentiles = acc.sketch.percentiles() if acc.sketch else {}
                 return {
                     "skill_name": skill_name,
                     "total_invocations": total,
                     "success_count": success,
-                    "error_count": total - success,
+                    "error_count": acc.errors,
                     "success_rate": success / total if total > 0 else 0,
-                    "avg_duration_ms": row[2] or 0,
-                    "avg_latency_ms": row[3] or 0,
-                    "avg_token_count": row[4] or 0,
+                    "avg_duration_ms": acc.avg('duration_ms'),
+                    "avg_latency_ms": acc.avg('latency_ms'),
+                    "min_latency_ms": acc.latency_min or 0,
+                    "max_latency_ms": acc.latency_max or 0,
+                    "p50_latency_ms": percentiles.get("p50") or 0,
+                    "p95_latency_ms": percentiles.get("p95") or 0,
+                    "p99_latency_ms": percentiles.get("p99") or 0,
+                    "avg_token_count": acc.avg('token_count'),
                     "period_days": days
                 }
 
@@ -416,6 +617,38 @@ class LightningStore:
             print(f"[Store] Error getting active prompt: {e}")
             return None
 
+    def get_prompt_version(self, version_id: str) -> Optional[Dict]:
+        """按版本ID获取提示词（主键查询）"""
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT version_id, skill_name, prompt_template, performance_score,
+                       is_active, is_candidate, optimization_strategy
+                FROM prompt_versions
+                WHERE version_id = ?
+            """, (version_id,))
+
+            row = cursor.fetchone()
+
+            if row:
+                return {
+                    "version_id": row[0],
+                    "skill_name": row[1],
+                    "prompt_template": row[2],
+                    "performance_score": row[3],
+                    "is_active": bool(row[4]),
+                    "is_candidate": bool(row[5]),
+                    "optimization_strategy": row[6]
+                }
+
+            return None
+
+        except Exception as e:
+            print(f"[Store] Error getting prompt version: {e}")
+            return None
+
     def get_prompt_candidates(self, skill_name: str, limit: int = 5) -> List[Dict]:
         """获取 A/B 测试候选提示词"""
         try:
@@ -475,6 +708,7 @@ class LightningStore:
             """, (version_id,))
 
             conn.commit()
+            self._bump_prompt_generation(skill_name)
             return True
 
         except Exception as e:
@@ -542,36 +776,28 @@ class LightningStore:
             return []
 
     def get_metrics_summary(self, days: int = 7) -> Dict:
-        """获取整体指标摘要"""
+        """获取整体指标摘要（基于 metrics 汇总桶）"""
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
 
             since = (datetime.now() - timedelta(days=days)).timestamp()
 
-            # 总追踪数
-            cursor.execute("SELECT COUNT(*) FROM spans WHERE start_time > ?", (since,))
-            total_spans = cursor.fetchone()[0]
-
-            # 成功率
-            cursor.execute("""
-                SELECT
-                    SUM(CASE WHEN status = 'ok' THEN 1 ELSE 0 END),
-                    COUNT(*)
-                FROM spans
-                WHERE start_time > ? AND span_type = 'skill_invocation'
-            """, (since,))
+            aggregates = self.rollups.aggregate(conn, since)
 
-            row = cursor.fetchone()
-            success_rate = (row[0] / row[1]) if row and row[1] > 0 else 0
+            # 总追踪数
+            total_spans = sum(acc.count for acc in aggregates.values())
 
-            # 活跃技能数
-            cursor.execute("""
-                SELECT COUNT(DISTINCT name) FROM spans
-                WHERE start_time > ? AND span_type = 'skill_invocation'
-            """, (since,))
+            # 成功率 / 活跃技能数
+            skill_aggregates = [
+                acc for (span_type, _), acc in aggregates.items()
+                if span_type == 'skill_invocation' and acc.count > 0
+            ]
+            skill_total = sum(acc.count for acc in skill_aggregates)
+            skill_errors = sum(acc.errors for acc in skill_aggregates)
+            success_rate = (skill_total - skill_errors) / skill_total if skill_total > 0 else 0
 
-            active_skills = cursor.fetchone()[0]
+            active_skills = len(skill_aggregates)
 
             # 提示词版本数
             cursor.execute("SELECT COUNT(*) FROM prompt_versions")
@@ -589,6 +815,76 @@ class LightningStore:
             print(f"[Store] Error getting metrics summary: {e}")
             return {}
 
+    def get_skill_priorities(self, days: int = 7, min_invocations: int = 1) -> List[Dict]:
+        """按技能聚合流量、错误率与奖励，用于 APO 选择优化目标
+
+        一次聚合查询完成: 流量/错误数来自 metrics 表的 daily 汇总桶
+        （窗口按 UTC 天对齐，可能多包含起始日的部分数据），平均奖励来自
+        通过 span_id 关联到技能的 rewards。
+
+        priority = 调用量 × 错误率 × 奖励缺口
+        - 错误率做拉普拉斯平滑 (errors + 1) / (calls + 2)，避免零错误时优先级为 0
+        - 奖励缺口 = (1 - avg_reward) / 2 ∈ [0, 1]，无奖励数据时取 0.5
+
+        Returns:
+            每个技能一项（未排序），包含 skill_name / invocations / error_count /
+            error_rate / avg_reward / reward_deficit / priority
+        """
+        try:
+            conn = self._get_connection()
+
+            # 先将未汇总的尾部并入汇总桶
+            with conn:
+                self.rollups.roll_up(conn)
+
+            since = (datetime.now() - timedelta(days=days)).timestamp()
+            since_day = _bucket_label(since - since % DAY)
+
+            cursor = conn.execute("""
+                WITH traffic AS (
+                    SELECT target_name AS skill_name,
+                           SUM(CASE WHEN metric_name = 'skill_invocation.count' THEN value ELSE 0 END) AS calls,
+                           SUM(CASE WHEN metric_name = 'skill_invocation.errors' THEN value ELSE 0 END) AS errors
+                    FROM metrics
+                    WHERE metric_type = 'span' AND time_window = 'daily' AND timestamp >= ?
+                      AND metric_name IN ('skill_invocation.count', 'skill_invocation.errors')
+                    GROUP BY target_name
+                    HAVING calls >= ?
+                ),
+                skill_rewards AS (
+                    SELECT s.name AS skill_name, AVG(r.reward_value) AS avg_reward
+                    FROM rewards r
+                    JOIN spans s ON s.span_id = r.span_id
+                    WHERE r.timestamp > ? AND s.span_type = 'skill_invocation'
+                    GROUP BY s.name
+                )
+                SELECT t.skill_name, t.calls, t.errors, sr.avg_reward
+                FROM traffic t
+                LEFT JOIN skill_rewards sr ON sr.skill_name = t.skill_name
+            """, (since_day, min_invocations, since))
+
+            priorities = []
+            for skill_name, calls, errors, avg_reward in cursor.fetchall():
+                calls = int(calls)
+                errors = int(errors)
+                error_rate = (errors + 1) / (calls + 2)
+                reward_deficit = 0.5 if avg_reward is None else max(0.0, min(1.0, (1 - avg_reward) / 2))
+                priorities.append({
+                    "skill_name": skill_name,
+                    "invocations": calls,
+                    "error_count": errors,
+                    "error_rate": error_rate,
+                    "avg_reward": avg_reward,
+                    "reward_deficit": reward_deficit,
+                    "priority": calls * error_rate * reward_deficit
+                })
+
+            return priorities
+
+        except Exception as e:
+            print(f"[Store] Error getting skill priorities: {e}")
+            return []
+
     def close(self):
         """关闭数据库连接"""
         if hasattr(self._local, 'conn') and self._local.conn:
@@ -0,0 +1,326 @@
+"""
+Retention Manager - Span 保留、压缩与归档
+
+spans 表中的 input_data/output_data 保存完整 JSON 负载，且从不删除，
+数据库会无限增长。RetentionManager 负责:
+
+1. 负载剥离 - 超过 payload_ttl_days 的 span 清空 input/output，只保留哈希
+2. 过期删除 - 按 span_type 配置 TTL，删除过期 span
+3. 归档导出 - 删除前按 (span_type, 日期) 分区导出为 gzip 压缩文件
+   - jsonl: 每行一个 span
+   - columnar: 按列存储的 JSON (列名 -> 值数组)，压缩率更高
+4. 定期维护 - 按间隔执行 VACUUM / ANALYZE，并报告回收的字节数
+
+metrics 表中的汇总桶不受影响，删除原始 span 前会先完成汇总，历史统计仍然可用。
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+_SPAN_COLUMNS = [
+    "span_id", "trace_id", "parent_id", "span_type", "name",
+    "start_time", "end_time", "duration_ms",
+    "input_hash", "input_data", "output_hash", "output_data",
+    "latency_ms", "token_count", "metadata", "tags", "status", "error_message",
+]
+
+
+class RetentionManager:
+    """Lightning Store 保留策略管理器
+
+    配置:
+        ttl_days: {span_type: 天数}，未列出的类型使用 default_ttl_days
+        default_ttl_days: 默认 TTL（None 表示永不删除）
+        payload_ttl_days: 负载剥离天数（None 表示不剥离）
+        archive_dir: 归档目录（None 表示删除前不导出）
+        archive_format: 'jsonl' 或 'columnar'
+        vacuum_interval_hours: VACUUM 间隔
+        analyze_interval_hours: ANALYZE 间隔
+
+    示例:
+        store = LightningStore()
+        retention = RetentionManager(store, {
+            'ttl_days': {'tool_execution': 30},
+            'default_ttl_days': 90,
+            'payload_ttl_days': 7,
+            'archive_dir': '~/.claude/mindsymphony-v21/lightning/archive',
+        })
+
+        report = retention.run()
+        print(report['reclaimed_bytes'])
+
+        # 后台定期执行
+        retention.start(interval_hours=6)
+    """
+
+    STATE_TARGET = "retention"
+
+    def __init__(self, store, config: Optional[Dict] = None):
+        self.store = store
+        self.config = config or {}
+
+        self.ttl_days: Dict[str, float] = self.config.get('ttl_days', {})
+        self.default_ttl_days: Optional[float] = self.config.get('default_ttl_days', 90)
+        self.payload_ttl_days: Optional[float] = self.config.get('payload_ttl_days', 14)
+
+        archive_dir = self.config.get('archive_dir')
+        self.archive_dir = Path(archive_dir).expanduser() if archive_dir else None
+        self.archive_format = self.config.get('archive_format', 'jsonl')
+        if self.archive_format not in ('jsonl', 'columnar'):
+            raise ValueError(f"Unknown archive format: {self.archive_format}")
+
+        self.vacuum_interval_hours = self.config.get('vacuum_interval_hours', 24 * 7)
+        self.analyze_interval_hours = self.config.get('analyze_interval_hours', 24)
+
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 调度状态（保存在 metrics 表中，与 rollup 水位线同一方式）
+    # ------------------------------------------------------------------
+
+    def _get_state(self, conn, key: str) -> float:
+        row = conn.execute("""
+            SELECT value FROM metrics
+            WHERE metric_name = ? AND target_name = ?
+              AND time_window = 'all' AND timestamp = ''
+        """, (key, self.STATE_TARGET)).fetchone()
+        return row[0] if row else 0.0
+
+    def _set_state(self, conn, key: str, value: float) -> None:
+        with conn:
+            conn.execute("""
+                INSERT INTO metrics (
+                    metric_name, metric_type, target_name, time_window, timestamp, value
+                ) VALUES (?, 'system', ?, 'all', '', ?)
+                ON CONFLICT(metric_name, target_name, time_window, timestamp)
+                DO UPDATE SET value = excluded.value
+            """, (key, self.STATE_TARGET, value))
+
+    # ------------------------------------------------------------------
+    # 保留策略
+    # ------------------------------------------------------------------
+
+    def database_size(self) -> int:
+        """数据库占用字节数（主文件 + WAL）"""
+        conn = self.store._get_connection()
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        wal_path = self.store.db_path + "-wal"
+        wal_size = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        return page_count * page_size + wal_size
+
+    def strip_payloads(self, now: Optional[float] = None) -> int:
+        """清空过期 span 的 input/output 负载，保留哈希
+
+        Returns:
+            int: 被剥离的 span 数
+        """
+        if self.payload_ttl_days is None:
+            return 0
+
+        now = now or time.time()
+        cutoff = now - self.payload_ttl_days * 86400
+        conn = self.store._get_connection()
+
+        with conn:
+            cursor = conn.execute("""
+                UPDATE spans SET input_data = NULL, output_data = NULL
+                WHERE start_time < ?
+                  AND (input_data IS NOT NULL OR output_data IS NOT NULL)
+            """, (cutoff,))
+
+        return cursor.rowcount
+
+    def _expiry_conditions(self, now: float):
+        """生成 (SQL 条件, 参数) - 每个 span_type 一个 TTL"""
+        conditions: List[str] = []
+        params: List[Any] = []
+
+        for span_type, days in self.ttl_days.items():
+            if days is not None:
+                conditions.append("(span_type = ? AND start_time < ?)")
+                params.extend([span_type, now - days * 86400])
+
+        if self.default_ttl_days is not None:
+            explicit = list(self.ttl_days.keys())
+            placeholders = ", ".join("?" * len(explicit))
+            type_filter = f"span_type NOT IN ({placeholders}) AND " if explicit else ""
+            conditions.append(f"({type_filter}start_time < ?)")
+            params.extend(explicit + [now - self.default_ttl_days * 86400])
+
+        return conditions, params
+
+    def expire_spans(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """删除超过 TTL 的 span（配置 archive_dir 时先导出）
+
+        汇总、导出与删除在同一个 BEGIN IMMEDIATE 事务中进行: 先将水位线之后
+        尚未汇总的 span 并入 metrics 桶（否则删除后其统计永久丢失），导出的行
+        即为随后删除的行。
+
+        Returns:
+            {'deleted_spans': int, 'archived_files': [路径, ...]}
+        """
+        now = now or time.time()
+        conditions, params = self._expiry_conditions(now)
+        if not conditions:
+            return {"deleted_spans": 0, "archived_files": []}
+
+        where = " OR ".join(conditions)
+        conn = self.store._get_connection()
+
+        archived_files = []
+        with conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            self.store.rollups.roll_up(conn)
+            if self.archive_dir is not None:
+                archived_files = self._export(conn, where, params, now)
+
+            cursor = conn.execute(f"DELETE FROM spans WHERE {where}", params)
+            deleted = cursor.rowcount
+            # 删除可能降低 MAX(rowid)，避免新写入的行落在水位线之下
+            self.store.rollups.clamp_watermark(conn)
+
+        return {"deleted_spans": deleted, "archived_files": archived_files}
+
+    def _export(self, conn, where: str, params: List[Any], now: float) -> List[str]:
+        """按 (span_type, UTC 日期) 分区导出过期 span"""
+        cursor = conn.execute(f"""
+            SELECT {', '.join(_SPAN_COLUMNS)} FROM spans
+            WHERE {where}
+            ORDER BY span_type, start_time
+        """, params)
+
+        files = []
+        partition_key = None
+        partition_rows: List[tuple] = []
+
+        for row in cursor:
+            day = datetime.fromtimestamp(row[5], timezone.utc).strftime('%Y-%m-%d')
+            key = (row[3], day)
+            if key != partition_key and partition_rows:
+                files.append(self._write_partition(partition_key, partition_rows, now))
+                partition_rows = []
+            partition_key = key
+            partition_rows.append(row)
+
+        if partition_rows:
+            files.append(self._write_partition(partition_key, partition_rows, now))
+
+        return files
+
+    def _write_partition(self, key, rows: List[tuple], now: float) -> str:
+        """写入单个分区文件（临时文件 + 原子重命名）"""
+        span_type, day = key
+        directory = self.archive_dir / span_type
+        directory.mkdir(parents=True, exist_ok=True)
+
+        suffix = "jsonl.gz" if self.archive_format == 'jsonl' else "columns.json.gz"
+        path = directory / f"{day}-{int(now)}.{suffix}"
+        tmp_path = path.with_name(path.name + ".tmp")
+
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            if self.archive_format == 'jsonl':
+                for row in rows:
+                    f.write(json.dumps(dict(zip(_SPAN_COLUMNS, row)), ensure_ascii=False))
+                    f.write("\n")
+            else:
+                columns = {name: [row[i] for row in rows] for i, name in enumerate(_SPAN_COLUMNS)}
+                json.dump({"row_count": len(rows), "columns": columns}, f, ensure_ascii=False)
+
+        os.replace(tmp_path, path)
+        return str(path)
+
+    # ------------------------------------------------------------------
+    # 维护
+    # ------------------------------------------------------------------
+
+    def maintain(self, now: Optional[float] = None, force: bool = False) -> Dict[str, bool]:
+        """按间隔执行 ANALYZE / VACUUM
+
+        Returns:
+            {'analyzed': bool, 'vacuumed': bool}
+        """
+        now = now or time.time()
+        conn = self.store._get_connection()
+        result = {"analyzed": False, "vacuumed": False}
+
+        if force or now - self._get_state(conn, "retention.last_vacuum") >= self.vacuum_interval_hours * 3600:
+            conn.commit()
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._set_state(conn, "retention.last_vacuum", now)
+            result["vacuumed"] = True
+
+        if force or now - self._get_state(conn, "retention.last_analyze") >= self.analyze_interval_hours * 3600:
+            with conn:
+                conn.execute("ANALYZE")
+            self._set_state(conn, "retention.last_analyze", now)
+            result["analyzed"] = True
+
+        return result
+
+    def run(self, now: Optional[float] = None, force_maintenance: bool = False) -> Dict[str, Any]:
+        """执行完整保留周期: 剥离 -> 导出/删除 -> 维护
+
+        Returns:
+            报告，包含 stripped_spans / deleted_spans / archived_files /
+            bytes_before / bytes_after / reclaimed_bytes / vacuumed / analyzed
+        """
+        with self._lock:
+            now = now or time.time()
+            bytes_before = self.database_size()
+
+            stripped = self.strip_payloads(now)
+            expired = self.expire_spans(now)
+            maintenance = self.maintain(now, force=force_maintenance)
+
+            bytes_after = self.database_size()
+
+            return {
+                "stripped_spans": stripped,
+                "deleted_spans": expired["deleted_spans"],
+                "archived_files": expired["archived_files"],
+                "bytes_before": bytes_before,
+                "bytes_after": bytes_after,
+                "reclaimed_bytes": max(0, bytes_before - bytes_after),
+                **maintenance,
+            }
+
+    # ------------------------------------------------------------------
+    # 定期调度
+    # ------------------------------------------------------------------
+
+    def start(self, interval_hours: float = 6):
+        """在后台线程中定期执行 run()"""
+        def _tick():
+            try:
+                report = self.run()
+                if report["reclaimed_bytes"]:
+                    print(f"[Retention] Reclaimed {report['reclaimed_bytes']} bytes")
+            except Exception as e:
+                print(f"[Retention] Error during retention run: {e}")
+            finally:
+                if self._timer is not None:
+                    self._schedule(interval_hours, _tick)
+
+        self._schedule(interval_hours, _tick)
+
+    def _schedule(self, interval_hours: float, callback):
+        self._timer = threading.Timer(interval_hours * 3600, callback)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def stop(self):
+        """停止后台调度"""
+        timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
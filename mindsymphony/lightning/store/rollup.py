@@ -0,0 +1,453 @@
+"""
+Rollup Engine - 增量指标汇总
+
+将 spans 表按 (span_type, name, 时间桶) 预聚合到 metrics 表:
+- hourly: 按小时 (UTC) 汇总
+- daily:  按天 (UTC) 汇总
+
+每个桶记录以下指标 (metric_name = "<span_type>.<field>"):
+- count / errors: 调用数与错误数
+- duration_ms / latency_ms / token_count: 求和，count 列为非空样本数
+- latency_min / latency_max: 最小/最大延迟
+- latency_sketch: 延迟分位数 sketch (metadata 列存 JSON，见 sketch.py)，
+  样本取 COALESCE(latency_ms, duration_ms)
+
+增量机制:
+- 水位线 (watermark) 记录已汇总的最大 spans.rowid
+- roll_up() 只聚合水位线之后的新行，与 span 写入在同一事务中执行
+- 查询 = 窗口内的桶 + 窗口起始不足一小时的边缘 + 水位线之后的原始尾部，
+  在同一个读事务中完成
+
+注意: 假设每个 span 只写入一次；同一 span_id 被 INSERT OR REPLACE
+重写时，旧行的贡献会保留在桶中。
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from .sketch import QuantileSketch
+
+HOUR = 3600
+DAY = 86400
+
+# 求和类字段 (与 spans 列同名)
+_SUM_FIELDS = ("duration_ms", "latency_ms", "token_count")
+
+# 每个桶的全部指标字段
+_FIELDS = ("count", "errors") + _SUM_FIELDS + ("latency_min", "latency_max")
+
+# 聚合 SELECT 片段，rollup 与原始尾部扫描共用
+_AGGREGATE_COLUMNS = """
+    COUNT(*),
+    SUM(CASE WHEN status = 'ok' THEN 0 ELSE 1 END),
+    SUM(duration_ms), COUNT(duration_ms),
+    SUM(latency_ms), COUNT(latency_ms),
+    SUM(token_count), COUNT(token_count),
+    MIN(latency_ms), MAX(latency_ms)
+"""
+
+_UPSERT_SQL = """
+    INSERT INTO metrics (
+        metric_name, metric_type, target_name, time_window, timestamp, value, count
+    ) VALUES (?, 'span', ?, ?, ?, ?, ?)
+    ON CONFLICT(metric_name, target_name, time_window, timestamp) DO UPDATE SET
+        value = {merge},
+        count = count + excluded.count
+"""
+
+_SKETCH_UPSERT_SQL = """
+    INSERT INTO metrics (
+        metric_name, metric_type, target_name, time_window, timestamp, value, count, metadata
+    ) VALUES (?, 'span', ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(metric_name, target_name, time_window, timestamp) DO UPDATE SET
+        value = excluded.value,
+        count = excluded.count,
+        metadata = excluded.metadata
+"""
+
+# 延迟样本: 显式 latency_ms 优先，否则使用 span 自身耗时
+_LATENCY_SAMPLE = "COALESCE(latency_ms, duration_ms)"
+
+_MERGE = {
+    "sum": "value + excluded.value",
+    "min": "MIN(value, excluded.value)",
+    "max": "MAX(value, excluded.value)",
+}
+
+
+def _bucket_label(ts: float) -> str:
+    """桶起始时间 -> metrics.timestamp (UTC ISO，可按字典序比较)"""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def _parse_bucket_label(label: str) -> float:
+    """_bucket_label 的逆运算"""
+    return datetime.strptime(label, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc).timestamp()
+
+
+def _raw_ranges(since: float, edge: float, watermark: int) -> Tuple[Tuple[str, str, list], ...]:
+    """需要扫描原始 spans 的两段范围: (表名及索引提示, 条件, 参数)
+
+    分成两条各自可走索引的区间查询（而不是 start_time < edge OR rowid > watermark，
+    OR 条件会让 SQLite 放弃范围索引退化为全表扫描）:
+    - 边缘: since < start_time < edge，走 idx_spans_time
+    - 尾部: rowid > watermark 且 start_time >= edge，按 rowid 区间查找
+    """
+    return (
+        ("spans INDEXED BY idx_spans_time", "start_time > ? AND start_time < ?", [since, edge]),
+        ("spans NOT INDEXED", "rowid > ? AND start_time >= ?", [watermark, edge]),
+    )
+
+
+class _Accumulator:
+    """单个 (span_type, name) 的聚合结果"""
+
+    __slots__ = ("count", "errors", "sums", "latency_min", "latency_max", "sketch")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.sums = {field: [0.0, 0] for field in _SUM_FIELDS}
+        self.latency_min: Optional[float] = None
+        self.latency_max: Optional[float] = None
+        self.sketch: Optional[QuantileSketch] = None
+
+    def merge_sketch(self, sketch: QuantileSketch) -> None:
+        if self.sketch is None:
+            self.sketch = QuantileSketch(sketch.relative_accuracy)
+        self.sketch.merge(sketch)
+
+    def add_raw(self, row) -> None:
+        """合并一行 _AGGREGATE_COLUMNS 查询结果"""
+        count, errors, d_sum, d_n, l_sum, l_n, t_sum, t_n, l_min, l_max = row
+        self.count += count or 0
+        self.errors += errors or 0
+        for field, total, n in zip(_SUM_FIELDS, (d_sum, l_sum, t_sum), (d_n, l_n, t_n)):
+            if n:
+                self.sums[field][0] += total
+                self.sums[field][1] += n
+        self._merge_extremes(l_min, l_max)
+
+    def add_metric(self, field: str, total: float, n: int, lo: float, hi: float) -> None:
+        """合并一组 metrics 桶 (已按 metric_name 分组)"""
+        if field == "count":
+            self.count += int(total)
+        elif field == "errors":
+            self.errors += int(total)
+        elif field in self.sums:
+            self.sums[field][0] += total
+            self.sums[field][1] += n
+        elif field == "latency_min":
+            self._merge_extremes(lo, None)
+        elif field == "latency_max":
+            self._merge_extremes(None, hi)
+
+    def _merge_extremes(self, lo: Optional[float], hi: Optional[float]) -> None:
+        if lo is not None:
+            self.latency_min = lo if self.latency_min is None else min(self.latency_min, lo)
+        if hi is not None:
+            self.latency_max = hi if self.latency_max is None else max(self.latency_max, hi)
+
+    def avg(self, field: str) -> float:
+        total, n = self.sums[field]
+        return total / n if n else 0
+
+
+class RollupEngine:
+    """spans -> metrics 增量汇总引擎
+
+    示例:
+        engine = RollupEngine()
+
+        # 在写入事务内推进汇总
+        with conn:
+            conn.executemany(...)
+            engine.roll_up(conn)
+
+        # 查询窗口统计 (O(桶数) + 边缘/尾部扫描)
+        aggregates = engine.aggregate(conn, since, span_type='skill_invocation')
+    """
+
+    WATERMARK_METRIC = "rollup.watermark"
+
+    def get_watermark(self, conn: sqlite3.Connection) -> int:
+        """已汇总的最大 spans.rowid"""
+        row = conn.execute("""
+            SELECT value FROM metrics
+            WHERE metric_name = ? AND target_name = 'spans'
+              AND time_window = 'all' AND timestamp = ''
+        """, (self.WATERMARK_METRIC,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def _set_watermark(self, conn: sqlite3.Connection, rowid: int) -> None:
+        conn.execute("""
+            INSERT INTO metrics (
+                metric_name, metric_type, target_name, time_window, timestamp, value
+            ) VALUES (?, 'system', 'spans', 'all', '', ?)
+            ON CONFLICT(metric_name, target_name, time_window, timestamp)
+            DO UPDATE SET value = excluded.value
+        """, (self.WATERMARK_METRIC, rowid))
+
+    def clamp_watermark(self, conn: sqlite3.Connection) -> None:
+        """删除 span 后将水位线降到当前 MAX(rowid)
+
+        SQLite 会复用被删除的最大 rowid；若水位线高于现存最大行，
+        之后写入的行会被误认为已汇总。
+        """
+        max_rowid = conn.execute("SELECT MAX(rowid) FROM spans").fetchone()[0] or 0
+        if max_rowid < self.get_watermark(conn):
+            self._set_watermark(conn, max_rowid)
+
+    def roll_up(self, conn: sqlite3.Connection) -> int:
+        """将水位线之后的新 span 汇总进 hourly/daily 桶
+
+        调用方负责提交（通常与 span 写入在同一事务内）。尚未开启事务时
+        先执行 BEGIN IMMEDIATE 取得写锁，保证读取水位线到写回之间没有其他
+        连接并发汇总同一批行（否则会重复计入桶中）。
+
+        Returns:
+            int: 本次汇总的 span 数
+        """
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        watermark = self.get_watermark(conn)
+        max_rowid = conn.execute("SELECT MAX(rowid) FROM spans").fetchone()[0]
+        if max_rowid is None or max_rowid <= watermark:
+            return 0
+
+        rows = conn.execute(f"""
+            SELECT span_type, name, CAST(start_time / {HOUR} AS INTEGER) * {HOUR},
+                {_AGGREGATE_COLUMNS}
+            FROM spans
+            WHERE rowid > ? AND rowid <= ?
+            GROUP BY 1, 2, 3
+        """, (watermark, max_rowid)).fetchall()
+
+        # (span_type, name, window, bucket_ts) -> _Accumulator
+        buckets: Dict[Tuple[str, str, str, int], _Accumulator] = {}
+        rolled = 0
+        for span_type, name, hour_ts, *aggregates in rows:
+            day_ts = hour_ts - hour_ts % DAY
+            for key in ((span_type, name, 'hourly', hour_ts),
+                        (span_type, name, 'daily', day_ts)):
+                buckets.setdefault(key, _Accumulator()).add_raw(aggregates)
+            rolled += aggregates[0]
+
+        params = {"sum": [], "min": [], "max": []}
+        for (span_type, name, window, bucket_ts), acc in buckets.items():
+            label = _bucket_label(bucket_ts)
+            prefix = f"{span_type}."
+            params["sum"].append((prefix + "count", name, window, label, acc.count, acc.count))
+            params["sum"].append((prefix + "errors", name, window, label, acc.errors, acc.count))
+            for field, (total, n) in acc.sums.items():
+                if n:
+                    params["sum"].append((prefix + field, name, window, label, total, n))
+            n_latency = acc.sums["latency_ms"][1]
+            if acc.latency_min is not None:
+                params["min"].append((prefix + "latency_min", name, window, label,
+                                      acc.latency_min, n_latency))
+                params["max"].append((prefix + "latency_max", name, window, label,
+                                      acc.latency_max, n_latency))
+
+        for kind, rows_to_write in params.items():
+            if rows_to_write:
+                conn.executemany(_UPSERT_SQL.format(merge=_MERGE[kind]), rows_to_write)
+
+        self._roll_up_sketches(conn, watermark, max_rowid)
+
+        self._set_watermark(conn, max_rowid)
+        return rolled
+
+    def _roll_up_sketches(self, conn: sqlite3.Connection, watermark: int, max_rowid: int) -> None:
+        """将新 span 的延迟样本合并进各桶的分位数 sketch"""
+        cursor = conn.execute(f"""
+            SELECT span_type, name, CAST(start_time / {HOUR} AS INTEGER) * {HOUR},
+                {_LATENCY_SAMPLE}
+            FROM spans
+            WHERE rowid > ? AND rowid <= ? AND {_LATENCY_SAMPLE} IS NOT NULL
+        """, (watermark, max_rowid))
+
+        sketches: Dict[Tuple[str, str, str, int], QuantileSketch] = {}
+        for span_type, name, hour_ts, latency in cursor:
+            day_ts = hour_ts - hour_ts % DAY
+            for key in ((span_type, name, 'hourly', hour_ts),
+                        (span_type, name, 'daily', day_ts)):
+                if key not in sketches:
+                    sketches[key] = QuantileSketch()
+                sketches[key].add(latency)
+
+        rows_to_write = []
+        for (span_type, name, window, bucket_ts), sketch in sketches.items():
+            metric_name = f"{span_type}.latency_sketch"
+            label = _bucket_label(bucket_ts)
+            existing = conn.execute("""
+                SELECT metadata FROM metrics
+                WHERE metric_name = ? AND target_name = ? AND time_window = ? AND timestamp = ?
+            """, (metric_name, name, window, label)).fetchone()
+            if existing and existing[0]:
+                sketch.merge(QuantileSketch.from_dict(json.loads(existing[0])))
+            rows_to_write.append((
+                metric_name, name, window, label,
+                sketch.count, sketch.count, json.dumps(sketch.to_dict())
+            ))
+
+        if rows_to_write:
+            conn.executemany(_SKETCH_UPSERT_SQL, rows_to_write)
+
+    def aggregate(
+        self,
+        conn: sqlite3.Connection,
+        since: float,
+        span_type: Optional[str] = None,
+        name: Optional[str] = None,
+        with_sketch: bool = False
+    ) -> Dict[Tuple[str, str], _Accumulator]:
+        """聚合 start_time > since 的所有 span
+
+        窗口拆分为:
+        - (since, edge): 不足一小时的边缘，扫描原始 spans
+        - [edge, day_edge): hourly 桶
+        - [day_edge, ...): daily 桶
+        - rowid > watermark: 尚未汇总的原始尾部
+
+        with_sketch=True 时同时合并延迟分位数 sketch (_Accumulator.sketch)。
+
+        水位线、桶与原始尾部在同一个读事务中读取（调用方未开启事务时由此处
+        BEGIN/COMMIT），期间其他连接执行 roll_up 不会使尾部被重复计入。
+
+        Returns:
+            (span_type, name) -> _Accumulator
+        """
+        if conn.in_transaction:
+            return self._aggregate(conn, since, span_type, name, with_sketch)
+
+        conn.execute("BEGIN")
+        try:
+            return self._aggregate(conn, since, span_type, name, with_sketch)
+        finally:
+            conn.commit()
+
+    def _aggregate(
+        self,
+        conn: sqlite3.Connection,
+        since: float,
+        span_type: Optional[str],
+        name: Optional[str],
+        with_sketch: bool
+    ) -> Dict[Tuple[str, str], _Accumulator]:
+        watermark = self.get_watermark(conn)
+        edge = since - since % HOUR + HOUR
+        day_edge = edge if edge % DAY == 0 else edge - edge % DAY + DAY
+
+        results: Dict[Tuple[str, str], _Accumulator] = {}
+
+        # 1. 桶
+        conditions = ["metric_type = 'span'"]
+        params = [_bucket_label(edge), _bucket_label(day_edge), _bucket_label(day_edge)]
+        if span_type:
+            conditions.append(f"metric_name IN ({', '.join('?' * len(_FIELDS))})")
+            params.extend(f"{span_type}.{field}" for field in _FIELDS)
+        if name:
+            conditions.append("target_name = ?")
+            params.append(name)
+
+        cursor = conn.execute(f"""
+            SELECT metric_name, target_name, SUM(value), SUM(count), MIN(value), MAX(value)
+            FROM metrics
+            WHERE ((time_window = 'hourly' AND timestamp >= ? AND timestamp < ?)
+                OR (time_window = 'daily' AND timestamp >= ?))
+              AND {' AND '.join(conditions)}
+            GROUP BY metric_name, target_name
+        """, params)
+
+        for metric_name, target_name, total, n, lo, hi in cursor.fetchall():
+            metric_span_type, _, field = metric_name.rpartition('.')
+            key = (metric_span_type, target_name)
+            results.setdefault(key, _Accumulator()).add_metric(field, total, n, lo, hi)
+
+        # 2. 边缘 + 尾部
+        for table, condition, params in _raw_ranges(since, edge, watermark):
+            conditions = [condition]
+            if span_type:
+                conditions.append("span_type = ?")
+                params.append(span_type)
+            if name:
+                conditions.append("name = ?")
+                params.append(name)
+
+            cursor = conn.execute(f"""
+                SELECT span_type, name, {_AGGREGATE_COLUMNS}
+                FROM {table}
+                WHERE {' AND '.join(conditions)}
+                GROUP BY span_type, name
+            """, params)
+
+            for row_span_type, row_name, *aggregates in cursor.fetchall():
+                results.setdefault((row_span_type, row_name), _Accumulator()).add_raw(aggregates)
+
+        if with_sketch:
+            self._aggregate_sketches(conn, results, since, edge, day_edge, watermark, span_type, name)
+
+        return results
+
+    def _aggregate_sketches(
+        self,
+        conn: sqlite3.Connection,
+        results: Dict[Tuple[str, str], _Accumulator],
+        since: float,
+        edge: float,
+        day_edge: float,
+        watermark: int,
+        span_type: Optional[str],
+        name: Optional[str]
+    ) -> None:
+        """合并窗口内的 sketch 桶，以及边缘/尾部的原始延迟样本"""
+        conditions = ["metric_type = 'span'"]
+        params = [_bucket_label(edge), _bucket_label(day_edge), _bucket_label(day_edge)]
+        if span_type:
+            conditions.append("metric_name = ?")
+            params.append(f"{span_type}.latency_sketch")
+        else:
+            conditions.append("metric_name GLOB '*.latency_sketch'")
+        if name:
+            conditions.append("target_name = ?")
+            params.append(name)
+
+        cursor = conn.execute(f"""
+            SELECT metric_name, target_name, metadata
+            FROM metrics
+            WHERE ((time_window = 'hourly' AND timestamp >= ? AND timestamp < ?)
+                OR (time_window = 'daily' AND timestamp >= ?))
+              AND {' AND '.join(conditions)}
+        """, params)
+
+        for metric_name, target_name, metadata in cursor:
+            if not metadata:
+                continue
+            key = (metric_name.rpartition('.')[0], target_name)
+            results.setdefault(key, _Accumulator()).merge_sketch(
+                QuantileSketch.from_dict(json.loads(metadata))
+            )
+
+        raw: Dict[Tuple[str, str], QuantileSketch] = {}
+        for table, condition, params in _raw_ranges(since, edge, watermark):
+            conditions = [condition, f"{_LATENCY_SAMPLE} IS NOT NULL"]
+            if span_type:
+                conditions.append("span_type = ?")
+                params.append(span_type)
+            if name:
+                conditions.append("name = ?")
+                params.append(name)
+
+            cursor = conn.execute(f"""
+                SELECT span_type, name, {_LATENCY_SAMPLE}
+                FROM {table}
+                WHERE {' AND '.join(conditions)}
+            """, params)
+            for row_span_type, row_name, latency in cursor:
+                raw.setdefault((row_span_type, row_name), QuantileSketch()).add(latency)
+
+        for key, sketch in raw.items():
+            results.setdefault(key, _Accumulator()).merge_sketch(sketch)
@@ -0,0 +1,147 @@
+"""
+Quantile Sketch - 可合并的流式分位数估计
+
+DDSketch 风格的对数分桶直方图:
+- 值 v 落入桶 ceil(log_gamma(v))，gamma = (1 + α) / (1 - α)
+- 任意分位数的相对误差不超过 α（默认 1%）
+- 两个 sketch 合并 = 桶计数相加，因此可以按小时/天存储后任意组合
+
+用于在不回读原始 span 的情况下计算 p50/p95/p99 延迟。
+"""
+
+import math
+from typing import Dict, Iterable, Optional
+
+
+class QuantileSketch:
+    """可合并的分位数 sketch
+
+    示例:
+        sketch = QuantileSketch()
+        for latency in latencies:
+            sketch.add(latency)
+
+        p99 = sketch.quantile(0.99)
+
+        # 合并另一个时间桶
+        sketch.merge(QuantileSketch.from_dict(stored))
+    """
+
+    # 小于该值的样本计入零桶
+    MIN_INDEXABLE = 1e-6
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float, weight: int = 1) -> None:
+        """添加一个样本"""
+        if value is None or weight <= 0:
+            return
+
+        if value < self.MIN_INDEXABLE:
+            self.zero_count += weight
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + weight
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+
+        self.count += weight
+        self.sum += value * weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def update(self, values: Iterable[float]) -> None:
+        """批量添加样本"""
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """合并另一个 sketch（需相同精度）"""
+        if other.count == 0:
+            return
+        if not math.isclose(other.gamma, self.gamma):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def _collapse(self) -> None:
+        """桶数超限时，将最小的桶合并到保留的最小桶中（牺牲低分位精度）"""
+        keys = sorted(self.bins)
+        overflow = keys[:len(keys) - self.max_bins + 1]
+        target = keys[len(overflow)]
+        self.bins[target] += sum(self.bins.pop(key) for key in overflow)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """估计分位数 q ∈ [0, 1]"""
+        if self.count == 0:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("quantile must be in [0, 1]")
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        running = self.zero_count
+        for key in sorted(self.bins):
+            running += self.bins[key]
+            if running > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return max(self.min, min(self.max, value))
+
+        return self.max
+
+    def percentiles(self) -> Dict[str, Optional[float]]:
+        """常用分位数 p50/p95/p99"""
+        return {
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+    def to_dict(self) -> Dict:
+        """序列化（用于持久化到 metrics.metadata）"""
+        return {
+            "alpha": self.relative_accuracy,
+            "bins": {str(key): count for key, count in self.bins.items()},
+            "zero": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuantileSketch":
+        """反序列化"""
+        sketch = cls(relative_accuracy=data.get("alpha", 0.01))
+        sketch.bins = {int(key): count for key, count in data.get("bins", {}).items()}
+        sketch.zero_count = data.get("zero", 0)
+        sketch.count = data.get("count", 0)
+        sketch.sum = data.get("sum", 0.0)
+        sketch.min = data.get("min")
+        sketch.max = data.get("max")
+        return sketch
@@ -4,7 +4,7 @@ Lightning Tracer - 非侵入式事件追踪器
 受 Microsoft Agent Lightning 启发，实现 emit_xxx 风格的追踪接口
 核心特性:
 1. 零代码侵入（通过装饰器和运行时钩子）
-2. 低开销（异步写入，采样控制）
+2. 低开销（先做采样决策，序列化与哈希延迟到后台线程）
 3. 丰富的上下文捕获
 4. 与现有 MindSymphony 无缝集成
 """
@@ -12,16 +12,20 @@ Lightning Tracer - 非侵入式事件追踪器
 import time
 import uuid
 import json
+import random
 import hashlib
 import functools
+from contextlib import contextmanager
 from typing import Any, Dict, Optional, Callable, List
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from datetime import datetime
 from contextvars import ContextVar
 from enum import Enum
 import threading
 import queue
 
+from ..store.sketch import QuantileSketch
+
 
 class SpanType(Enum):
     """追踪事件类型"""
@@ -68,6 +72,18 @@ class Span:
     status: str = "ok"  # ok, error, cancelled
     error_message: Optional[str] = None
 
+    # 尚未序列化的原始输入/输出（由后台写入线程调用 materialize 处理）
+    _input_payload: Any = field(default=None, repr=False, compare=False)
+    _output_payload: Any = field(default=None, repr=False, compare=False)
+    # 所属 tracer 的存储设置（materialize 未显式传参时使用）
+    _store_full_data: bool = field(default=True, repr=False, compare=False)
+    _max_payload_bytes: Optional[int] = field(default=None, repr=False, compare=False)
+    # 后台写入线程与调用方的 to_dict() 可能同时序列化
+    _materialize_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    # 载荷截断后追加的标记
+    TRUNCATION_MARKER = "...[truncated]"
+
     def __post_init__(self):
         if self.metadata is None:
             self.metadata = {}
@@ -80,15 +96,53 @@ class Span:
         self.duration_ms = (self.end_time - self.start_time) * 1000
 
         if output is not None:
-            self.output_data = self._serialize(output)
-            self.output_hash = self._hash(self.output_data)
+            with self._materialize_lock:
+                self._output_payload = output
 
         if error is not None:
             self.status = "error"
             self.error_message = str(error)
 
+    def materialize(self, store_full_data: Optional[bool] = None, max_payload_bytes: Optional[int] = None):
+        """序列化并哈希延迟的输入/输出载荷（幂等，线程安全）
+
+        哈希始终基于完整序列化结果；超过 max_payload_bytes 的存储内容被截断，
+        并在 metadata['truncated'] 中记录被截断的字段。
+        未传参数时使用创建该 span 的 tracer 的 store_full_data / max_payload_bytes。
+        """
+        if store_full_data is None:
+            store_full_data = self._store_full_data
+        if max_payload_bytes is None:
+            max_payload_bytes = self._max_payload_bytes
+
+        with self._materialize_lock:
+            if self._input_payload is not None:
+                data = self._serialize(self._input_payload)
+                self._input_payload = None
+                self.input_hash = self._hash(data)
+                self.input_data = self._truncate(data, max_payload_bytes, "input") if store_full_data else None
+
+            if self._output_payload is not None:
+                data = self._serialize(self._output_payload)
+                self._output_payload = None
+                self.output_hash = self._hash(data)
+                self.output_data = self._truncate(data, max_payload_bytes, "output")
+
+    def _truncate(self, data: str, max_bytes: Optional[int], field_name: str) -> str:
+        """按 UTF-8 字节数截断"""
+        if max_bytes is None or len(data) * 4 <= max_bytes:
+            return data
+
+        encoded = data.encode('utf-8')
+        if len(encoded) <= max_bytes:
+            return data
+
+        self.metadata.setdefault("truncated", []).append(field_name)
+        return encoded[:max_bytes].decode('utf-8', errors='ignore') + self.TRUNCATION_MARKER
+
     def to_dict(self) -> Dict:
-        """序列化为字典"""
+        """序列化为字典（按所属 tracer 的存储设置序列化载荷）"""
+        self.materialize()
         return {
             "span_id": self.span_id,
             "trace_id": self.trace_id,
@@ -160,8 +214,16 @@ class LightningTracer:
         self.enabled = self.config.get('enabled', True)
         self.sampling_rate = self.config.get('sampling_rate', 1.0)
         self.store_full_data = self.config.get('store_full_data', True)
+        # 单个载荷的最大存储字节数（None 表示不截断）
+        self.max_payload_bytes = self.config.get('max_payload_bytes')
+        # 在后台线程中序列化（关闭后在调用线程立即序列化，避免载荷被调用方修改）
+        self.lazy_serialization = self.config.get('lazy_serialization', True)
         self.max_queue_size = self.config.get('max_queue_size', 10000)
 
+        # 批量写入: 每批最多 batch_size 个 span，或等待 flush_interval_ms 后写入
+        self.batch_size = max(1, self.config.get('batch_size', 200))
+        self.flush_interval_ms = self.config.get('flush_interval_ms', 50)
+
         # 异步写入队列
         self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue_size)
         self._worker_thread: Optional[threading.Thread] = None
@@ -175,8 +237,18 @@ class LightningTracer:
             "spans_emitted": 0,
             "spans_dropped": 0,
             "spans_stored": 0,
+            "batches_flushed": 0,
+            "spans_batched": 0,
+            "max_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
         }
 
+        # 进程内延迟分位数（按 span 名称），由后台写入线程更新
+        self._latency_sketches: Dict[str, QuantileSketch] = {}
+        self._sketch_lock = threading.Lock()
+
         if self.enabled:
             self._start_worker()
 
@@ -186,36 +258,124 @@ class LightningTracer:
         self._worker_thread.start()
 
     def _worker_loop(self):
-        """后台写入循环"""
-        while not self._shutdown:
+        """后台写入循环
+
+        阻塞等待第一个 span，随后在 flush_interval_ms 内继续收集，
+        直到凑满 batch_size，再整批写入。关闭时先排空队列再退出。
+        """
+        while not self._shutdown or not self._queue.empty():
             try:
-                span = self._queue.get(timeout=1.0)
-                self._store_span(span)
+                batch = [self._queue.get(timeout=1.0)]
             except queue.Empty:
                 continue
+
+            deadline = time.monotonic() + self.flush_interval_ms / 1000
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        batch.append(self._queue.get(timeout=remaining))
+                    else:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._store_batch(batch)
             except Exception as e:
-                print(f"[Tracer] Error storing span: {e}")
+                print(f"[Tracer] Error storing spans: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
 
-    def _store_span(self, span: Span):
-        """存储 span 到后端"""
-        # 延迟初始化存储
+    def _get_store(self):
+        """获取存储实例（延迟初始化）"""
         if self._store is None:
             from ..store.core import LightningStore
-            self._store = LightningStore()
+            self._store = LightningStore(self.config.get('db_path'))
+        return self._store
 
+    def _store_batch(self, batch: List[Span]):
+        """在单个事务中批量存储 span"""
+        start = time.perf_counter()
         try:
-            self._store.store_span(span)
-            self._stats["spans_stored"] += 1
+            for span in batch:
+                span.materialize(self.store_full_data, self.max_payload_bytes)
+
+            stored = self._get_store().store_spans(batch)
         except Exception as e:
-            print(f"[Tracer] Failed to store span: {e}")
-            self._stats["spans_dropped"] += 1
+            print(f"[Tracer] Failed to store spans: {e}")
+            stored = 0
+        flush_ms = (time.perf_counter() - start) * 1000
+
+        self._stats["spans_stored"] += stored
+        self._stats["spans_dropped"] += len(batch) - stored
+        self._stats["batches_flushed"] += 1
+        self._stats["spans_batched"] += len(batch)
+        self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+        self._stats["last_flush_ms"] = flush_ms
+        self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], flush_ms)
+        self._stats["total_flush_ms"] += flush_ms
+
+        self._record_latencies(batch)
+
+    def _record_latencies(self, batch: List[Span]):
+        """更新进程内延迟 sketch（latency_ms 优先，否则使用 duration_ms）"""
+        with self._sketch_lock:
+            for span in batch:
+                latency = span.latency_ms if span.latency_ms is not None else span.duration_ms
+                if latency is None:
+                    continue
+                sketch = self._latency_sketches.get(span.name)
+                if sketch is None:
+                    sketch = self._latency_sketches[span.name] = QuantileSketch()
+                sketch.add(latency)
+
+    def _store_span(self, span: Span):
+        """存储单个 span 到后端"""
+        self._store_batch([span])
 
-    def _should_sample(self) -> bool:
-        """采样决策"""
-        if self.sampling_rate >= 1.0:
-            return True
-        import random
-        return random.random() < self.sampling_rate
+    def _sample_trace(self) -> Optional[str]:
+        """采样决策，在创建 span 之前进行
+
+        处于 trace() 上下文内时沿用该 trace 开始时的决策（头部采样，
+        整条 trace 要么全部保留要么全部丢弃）；否则按 span 独立采样。
+
+        Returns:
+            采样时返回 trace_id，否则返回 None
+        """
+        current_trace = _current_trace.get()
+        if current_trace is not None:
+            return current_trace["trace_id"] if current_trace["sampled"] else None
+
+        if self.sampling_rate >= 1.0 or random.random() < self.sampling_rate:
+            return str(uuid.uuid4())
+        return None
+
+    @contextmanager
+    def trace(self, trace_id: Optional[str] = None):
+        """开启一条 trace，并在开始时一次性做出采样决策
+
+        示例:
+            with tracer.trace():
+                tracer.emit_skill_invocation("a", data)   # 与下面的 span 同属一条 trace
+                tracer.emit_tool_execution("search", params)
+        """
+        current_trace = _current_trace.get()
+        if current_trace is not None and trace_id is None:
+            # 嵌套调用加入外层 trace
+            yield current_trace
+            return
+
+        context = {
+            "trace_id": trace_id or str(uuid.uuid4()),
+            "sampled": self.sampling_rate >= 1.0 or random.random() < self.sampling_rate
+        }
+        token = _current_trace.set(context)
+        try:
+            yield context
+        finally:
+            _current_trace.reset(token)
 
     def _create_span(
         self,
@@ -223,33 +383,37 @@ class LightningTracer:
         span_type: SpanType,
         parent_id: Optional[str] = None,
         input_data: Any = None,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        trace_id: Optional[str] = None
     ) -> Span:
-        """创建新的 span"""
-        # 获取当前 trace 上下文
-        current_trace = _current_trace.get()
-        trace_id = current_trace["trace_id"] if current_trace else str(uuid.uuid4())
-
-        # 序列化输入
-        input_str = None
-        input_hash = None
-        if input_data is not None:
-            input_str = Span._serialize(input_data) if self.store_full_data else None
-            input_hash = Span._hash(Span._serialize(input_data))
+        """创建新的 span（输入载荷留待后台线程序列化）"""
+        if trace_id is None:
+            current_trace = _current_trace.get()
+            trace_id = current_trace["trace_id"] if current_trace else str(uuid.uuid4())
 
-        span = Span(
+        return Span(
             span_id=str(uuid.uuid4()),
             trace_id=trace_id,
             parent_id=parent_id,
             span_type=span_type,
             name=name,
             start_time=time.time(),
-            input_hash=input_hash,
-            input_data=input_str,
             metadata=metadata or {},
+            _input_payload=input_data,
+            _store_full_data=self.store_full_data,
+            _max_payload_bytes=self.max_payload_bytes,
         )
 
-        return span
+    def _enqueue(self, span: Span):
+        """将 span 放入写入队列（队列满时丢弃）"""
+        if not self.lazy_serialization:
+            span.materialize(self.store_full_data, self.max_payload_bytes)
+
+        try:
+            self._queue.put_nowait(span)
+            self._stats["spans_emitted"] += 1
+        except queue.Full:
+            self._stats["spans_dropped"] += 1
 
     def emit_skill_invocation(
         self,
@@ -273,7 +437,10 @@ class LightningTracer:
         Returns:
             Span 对象（如果被采样）
         """
-        if not self.enabled or not self._should_sample():
+        if not self.enabled:
+            return None
+        trace_id = self._sample_trace()
+        if trace_id is None:
             return None
 
         span = self._create_span(
@@ -281,7 +448,8 @@ class LightningTracer:
             span_type=SpanType.SKILL_INVOCATION,
             parent_id=parent_span_id,
             input_data=input_data,
-            metadata=metadata
+            metadata=metadata,
+            trace_id=trace_id
         )
 
         span.latency_ms = latency_ms
@@ -290,11 +458,7 @@ class LightningTracer:
             span.finish(output=output_data)
 
         # 异步写入队列
-        try:
-            self._queue.put_nowait(span)
-            self._stats["spans_emitted"] += 1
-        except queue.Full:
-            self._stats["spans_dropped"] += 1
+        self._enqueue(span)
 
         return span
 
@@ -308,14 +472,18 @@ class LightningTracer:
         metadata: Optional[Dict] = None
     ) -> Optional[Span]:
         """发射工具执行事件"""
-        if not self.enabled or not self._should_sample():
+        if not self.enabled:
+            return None
+        trace_id = self._sample_trace()
+        if trace_id is None:
             return None
 
         span = self._create_span(
             name=tool_name,
             span_type=SpanType.TOOL_EXECUTION,
             input_data=params,
-            metadata=metadata
+            metadata=metadata,
+            trace_id=trace_id
         )
 
         span.latency_ms = latency_ms
@@ -323,11 +491,7 @@ class LightningTracer:
         if result is not None or error is not None:
             span.finish(output=result, error=error)
 
-        try:
-            self._queue.put_nowait(span)
-            self._stats["spans_emitted"] += 1
-        except queue.Full:
-            self._stats["spans_dropped"] += 1
+        self._enqueue(span)
 
         return span
 
@@ -342,7 +506,10 @@ class LightningTracer:
 
         用于捕获用户反馈、满意度信号
         """
-        if not self.enabled or not self._should_sample():
+        if not self.enabled:
+            return None
+        trace_id = self._sample_trace()
+        if trace_id is None:
             return None
 
         meta = metadata or {}
@@ -354,16 +521,13 @@ class LightningTracer:
             name=f"user_{interaction_type}",
             span_type=SpanType.USER_INTERACTION,
             input_data=content,
-            metadata=meta
+            metadata=meta,
+            trace_id=trace_id
         )
 
         span.finish(output={"captured": True})
 
-        try:
-            self._queue.put_nowait(span)
-            self._stats["spans_emitted"] += 1
-        except queue.Full:
-            self._stats["spans_dropped"] += 1
+        self._enqueue(span)
 
         return span
 
@@ -378,7 +542,10 @@ class LightningTracer:
 
         用于追踪多技能协作流程
         """
-        if not self.enabled or not self._should_sample():
+        if not self.enabled:
+            return None
+        trace_id = self._sample_trace()
+        if trace_id is None:
             return None
 
         meta = metadata or {}
@@ -389,16 +556,13 @@ class LightningTracer:
             name=f"{from_skill}_to_{to_skill}",
             span_type=SpanType.CROSS_SKILL_HANDOFF,
             input_data=handoff_context,
-            metadata=meta
+            metadata=meta,
+            trace_id=trace_id
         )
 
         span.finish()
 
-        try:
-            self._queue.put_nowait(span)
-            self._stats["spans_emitted"] += 1
-        except queue.Full:
-            self._stats["spans_dropped"] += 1
+        self._enqueue(span)
 
         return span
 
@@ -426,7 +590,8 @@ class LightningTracer:
 
             @functools.wraps(func)
             def wrapper(*args, **kwargs):
-                if not self.enabled or not self._should_sample():
+                trace_id = self._sample_trace() if self.enabled else None
+                if trace_id is None:
                     return func(*args, **kwargs)
 
                 # 准备输入数据
@@ -441,7 +606,8 @@ class LightningTracer:
                 span = self._create_span(
                     name=span_name,
                     span_type=span_type,
-                    input_data=input_data
+                    input_data=input_data,
+                    trace_id=trace_id
                 )
 
                 # 执行函数
@@ -455,22 +621,14 @@ class LightningTracer:
                         span.finish()
 
                     # 写入队列
-                    try:
-                        self._queue.put_nowait(span)
-                        self._stats["spans_emitted"] += 1
-                    except queue.Full:
-                        self._stats["spans_dropped"] += 1
+                    self._enqueue(span)
 
                     return result
 
                 except Exception as e:
                     # 记录异常
                     span.finish(error=e)
-                    try:
-                        self._queue.put_nowait(span)
-                        self._stats["spans_emitted"] += 1
-                    except queue.Full:
-                        self._stats["spans_dropped"] += 1
+                    self._enqueue(span)
                     raise
 
             return wrapper
@@ -492,8 +650,31 @@ class LightningTracer:
         return _SpanContext(self, name, span_type, metadata)
 
     def get_stats(self) -> Dict:
-        """获取统计信息"""
-        return self._stats.copy()
+        """获取统计信息（含批量写入的批大小与刷新延迟）"""
+        stats = self._stats.copy()
+        batches = stats["batches_flushed"]
+        stats["avg_batch_size"] = stats["spans_batched"] / batches if batches else 0.0
+        stats["avg_flush_ms"] = stats["total_flush_ms"] / batches if batches else 0.0
+        stats["queue_depth"] = self._queue.qsize()
+        return stats
+
+    def get_latency_percentiles(self, name: Optional[str] = None) -> Dict:
+        """获取本进程记录的延迟分位数
+
+        Args:
+            name: span 名称（如技能名）；为空时返回所有名称
+
+        Returns:
+            {'count', 'p50', 'p95', 'p99'}，或 name -> 该结构的映射
+        """
+        def _summary(sketch: QuantileSketch) -> Dict:
+            return {"count": sketch.count, **sketch.percentiles()}
+
+        with self._sketch_lock:
+            if name is not None:
+                sketch = self._latency_sketches.get(name)
+                return _summary(sketch) if sketch else {"count": 0}
+            return {key: _summary(sketch) for key, sketch in self._latency_sketches.items()}
 
     def flush(self):
         """刷新队列，等待所有 span 写入"""
@@ -508,7 +689,11 @@ class LightningTracer:
 
 
 class _SpanContext:
-    """Span 上下文管理器"""
+    """Span 上下文管理器
+
+    进入时做与 emit_* 相同的采样决策；未采样（或 tracer 已禁用）时仍返回
+    一个 span 供调用方使用，但退出时不写入队列。
+    """
 
     def __init__(
         self,
@@ -522,23 +707,24 @@ class _SpanContext:
         self.span_type = span_type
         self.metadata = metadata
         self.span: Optional[Span] = None
+        self.sampled = False
 
     def __enter__(self) -> Span:
+        trace_id = self.tracer._sample_trace() if self.tracer.enabled else None
+        self.sampled = trace_id is not None
         self.span = self.tracer._create_span(
             name=self.name,
             span_type=self.span_type,
-            metadata=self.metadata
+            metadata=self.metadata,
+            trace_id=trace_id
         )
         return self.span
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.span:
             self.span.finish(error=exc_val)
-            try:
-                self.tracer._queue.put_nowait(self.span)
-                self.tracer._stats["spans_emitted"] += 1
-            except queue.Full:
-                self.tracer._stats["spans_dropped"] += 1
+            if self.sampled:
+                self.tracer._enqueue(self.span)
 
 
 # 全局 tracer 实例
@@ -39,8 +39,10 @@ def main():
     # 加载所有技能
     print("\n📚 加载技能元数据...")
     try:
-        skills = load_all_skills(str(skills_root))
+        timings = {}
+        skills = load_all_skills(str(skills_root), timings=timings)
         print(f"✅ 成功加载 {len(skills)} 个技能")
+        print("   耗时: " + ", ".join(f"{phase} {seconds * 1000:.1f}ms" for phase, seconds in timings.items()))
     except Exception as e:
         print(f"❌ 加载技能失败: {e}")
         return 1
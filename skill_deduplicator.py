@@ -8,10 +8,182 @@ Skill Deduplication and Merging Tool
 import yaml
 import os
 import re
+import random
+import zlib
 import Levenshtein
-from typing import Dict, List, Any, Optional
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Iterable, Set, Tuple
 import argparse
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# 综合相似度权重: 名称 / 描述 / 触发词
+NAME_WEIGHT, DESC_WEIGHT, TRIGGER_WEIGHT = 0.5, 0.3, 0.2
+
+# 候选对少于该值时在当前进程中精确评分（进程池启动开销大于收益）
+PARALLEL_MIN_PAIRS = 20000
+
+# LSH 分桶参数（签名长度 = bands × rows）
+NAME_LSH_BANDS, NAME_LSH_ROWS = 32, 4
+CONTENT_LSH_BANDS, CONTENT_LSH_ROWS = 16, 6
+
+# LSH 参数按阈值 70-80 调校（与穷举结果一致）；低于该阈值时相似技能对的
+# 名称/内容 Jaccard 可能很低，召回无法保证，改为穷举比较
+LSH_MIN_THRESHOLD = 70
+
+_MASK64 = (1 << 64) - 1
+
+
+def _char_ngrams(text: str, n: int) -> Set[str]:
+    """字符 n-gram（文本短于 n 时返回整个文本）"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _normalize_triggers(triggers: Any) -> Set[str]:
+    """合并中英文触发词（小写、去空白）"""
+    result = set()
+    if not isinstance(triggers, dict):
+        return result
+    for lang in ('zh', 'en'):
+        if isinstance(triggers.get(lang), list):
+            result.update(t.lower().strip() for t in triggers[lang] if t)
+    return result
+
+
+def _text_similarity(text1: str, text2: str) -> float:
+    """归一化编辑距离相似度（0-100），输入已小写并去空白"""
+    max_len = max(len(text1), len(text2))
+    if max_len == 0:
+        return 0.0
+    return (1 - Levenshtein.distance(text1, text2) / max_len) * 100
+
+
+def _length_bound(text1: str, text2: str) -> float:
+    """编辑距离相似度的上界: 距离至少为长度差"""
+    max_len = max(len(text1), len(text2))
+    if max_len == 0:
+        return 0.0
+    return (1 - abs(len(text1) - len(text2)) / max_len) * 100
+
+
+def _score_pair(record1: Tuple, record2: Tuple, threshold: float) -> Optional[Tuple[float, float, float, float]]:
+    """
+    精确计算一对技能的相似度，低于阈值返回 None
+
+    record: (名称, 描述, 触发词集合)，均已规范化
+    先用长度差给出的上界剪枝，只有可能达到阈值时才计算编辑距离。
+    """
+    name1, desc1, triggers1 = record1
+    name2, desc2, triggers2 = record2
+
+    if triggers1 and triggers2:
+        trigger_sim = len(triggers1 & triggers2) / len(triggers1 | triggers2) * 100
+    else:
+        trigger_sim = 0.0
+
+    has_desc = bool(desc1) and bool(desc2)
+    desc_bound = _length_bound(desc1, desc2) if has_desc else 0.0
+    upper = (_length_bound(name1, name2) * NAME_WEIGHT + desc_bound * DESC_WEIGHT
+             + trigger_sim * TRIGGER_WEIGHT)
+    if upper < threshold:
+        return None
+
+    name_sim = _text_similarity(name1, name2)
+    if name_sim * NAME_WEIGHT + desc_bound * DESC_WEIGHT + trigger_sim * TRIGGER_WEIGHT < threshold:
+        return None
+
+    desc_sim = _text_similarity(desc1, desc2) if has_desc else 0.0
+    total_sim = name_sim * NAME_WEIGHT + desc_sim * DESC_WEIGHT + trigger_sim * TRIGGER_WEIGHT
+    if total_sim < threshold:
+        return None
+    return name_sim, desc_sim, trigger_sim, total_sim
+
+
+# 进程池工作进程中的技能记录（通过 initializer 传入一次，避免每批重复序列化）
+_worker_records: List[Tuple] = []
+
+
+def _init_score_worker(records: List[Tuple]):
+    global _worker_records
+    _worker_records = records
+
+
+def _score_chunk(args: Tuple[List[Tuple[int, int]], float]) -> List[Tuple[int, int, Tuple]]:
+    pairs, threshold = args
+    results = []
+    for i, j in pairs:
+        scores = _score_pair(_worker_records[i], _worker_records[j], threshold)
+        if scores is not None:
+            results.append((i, j, scores))
+    return results
+
+
+class MinHashLSH:
+    """MinHash 签名 + LSH 分桶
+
+    签名长度为 bands × rows；两个集合的 Jaccard 相似度为 s 时，
+    至少在一个分桶中相撞（成为候选对）的概率为 1 - (1 - s^rows)^bands。
+
+    示例:
+        lsh = MinHashLSH(bands=32, rows=2)
+        pairs = lsh.candidate_pairs([{'ab', 'bc'}, {'ab', 'bd'}, set()])
+    """
+
+    def __init__(self, bands: int = 32, rows: int = 2, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        num_perm = bands * rows
+        # multiply-shift 哈希族: h(x) = ((a·x + b) mod 2^64) >> 32，a 为奇数
+        self._a = [rng.randrange(1 << 64) | 1 for _ in range(num_perm)]
+        self._b = [rng.randrange(1 << 64) for _ in range(num_perm)]
+        if NUMPY_AVAILABLE:
+            self._a_np = np.array(self._a, dtype=np.uint64)
+            self._b_np = np.array(self._b, dtype=np.uint64)
+
+    def signature(self, shingles: Iterable[str]) -> Optional[Tuple[int, ...]]:
+        """集合的 MinHash 签名（空集合返回 None）"""
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles]
+        if not hashes:
+            return None
+
+        if NUMPY_AVAILABLE:
+            x = np.array(hashes, dtype=np.uint64)[:, None]
+            # uint64 乘加按 2^64 回绕，正好是所需的取模
+            with np.errstate(over='ignore'):
+                return tuple(((x * self._a_np + self._b_np) >> np.uint64(32)).min(axis=0).tolist())
+
+        return tuple(
+            min(((a * x + b) & _MASK64) >> 32 for x in hashes)
+            for a, b in zip(self._a, self._b)
+        )
+
+    def candidate_pairs(self, shingle_sets: List[Set[str]]) -> Set[Tuple[int, int]]:
+        """返回至少在一个分桶中相撞的下标对 (i, j)，i < j"""
+        buckets = defaultdict(list)
+        rows = self.rows
+        for index, shingles in enumerate(shingle_sets):
+            signature = self.signature(shingles)
+            if signature is None:
+                continue
+            for band in range(self.bands):
+                buckets[(band, signature[band * rows:(band + 1) * rows])].append(index)
+
+        pairs = set()
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+        return pairs
+
 
 class SkillDeduplicator:
     """技能去重与合并器"""
@@ -87,62 +259,107 @@ class SkillDeduplicator:
 
         return (intersection / union) * 100
 
-    def find_similar_skills(self, similarity_threshold: float = 80) -> List[Dict]:
-        """查找相似技能"""
-        similar_skills = []
-        all_skills = []
-
-        # 收集所有技能
-        if 'internal_skills' in self.registry:
-            for skill_name, skill_config in self.registry['internal_skills'].items():
-                all_skills.append({
-                    'name': skill_name,
-                    'config': skill_config,
-                    'type': 'internal'
-                })
-
-        if 'external_skills' in self.registry:
-            for skill_name, skill_config in self.registry['external_skills'].items():
-                all_skills.append({
-                    'name': skill_name,
-                    'config': skill_config,
-                    'type': 'external'
-                })
+    def find_similar_skills(
+        self,
+        similarity_threshold: float = 80,
+        use_lsh: bool = True,
+        max_workers: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        查找相似技能
+
+        Args:
+            similarity_threshold: 综合相似度阈值 (0-100)
+            use_lsh: 先用 MinHash/LSH 生成候选对，只对候选对精确评分；
+                为 False 或阈值低于 LSH_MIN_THRESHOLD 时比较所有技能对
+                （O(n²)，结果与旧版完全一致）
+            max_workers: 精确评分的进程数（默认 CPU 数，1 表示单进程）
+
+        Performance:
+            - 旧版本: 双重循环比较所有技能对，每对都计算完整描述的编辑距离
+            - 新版本: 名称/内容 LSH 分桶生成候选对，长度上界剪枝后再算编辑距离，
+              候选对较多时分块交给进程池
+        """
+        all_skills = self._get_all_skills()
+        records = [self._skill_record(skill) for skill in all_skills]
+
+        if use_lsh and similarity_threshold >= LSH_MIN_THRESHOLD:
+            pairs = sorted(self._candidate_pairs(records))
+        else:
+            count = len(records)
+            pairs = [(i, j) for i in range(count) for j in range(i + 1, count)]
 
-        # 比较所有技能组合
-        for i, skill1 in enumerate(all_skills):
-            for j, skill2 in enumerate(all_skills):
-                if i < j:
-                    # 计算综合相似度
-                    name_sim = self._calculate_name_similarity(skill1['name'], skill2['name'])
-                    desc_sim = self._calculate_description_similarity(
-                        skill1['config'].get('description', ''),
-                        skill2['config'].get('description', '')
-                    )
-                    trigger_sim = self._calculate_trigger_similarity(
-                        skill1['config'].get('triggers', {}),
-                        skill2['config'].get('triggers', {})
-                    )
-
-                    # 综合相似度（加权平均）
-                    total_sim = (name_sim * 0.5 + desc_sim * 0.3 + trigger_sim * 0.2)
-
-                    if total_sim >= similarity_threshold:
-                        similar_skills.append({
-                            'skill1': skill1['name'],
-                            'skill1_type': skill1['type'],
-                            'skill2': skill2['name'],
-                            'skill2_type': skill2['type'],
-                            'name_similarity': round(name_sim, 1),
-                            'desc_similarity': round(desc_sim, 1),
-                            'trigger_similarity': round(trigger_sim, 1),
-                            'total_similarity': round(total_sim, 1),
-                            'suggestion': self._determine_suggestion(skill1, skill2)
-                        })
+        similar_skills = []
+        for i, j, scores in self._score_pairs(records, pairs, similarity_threshold, max_workers):
+            skill1, skill2 = all_skills[i], all_skills[j]
+            name_sim, desc_sim, trigger_sim, total_sim = scores
+            similar_skills.append({
+                'skill1': skill1['name'],
+                'skill1_type': skill1['type'],
+                'skill2': skill2['name'],
+                'skill2_type': skill2['type'],
+                'name_similarity': round(name_sim, 1),
+                'desc_similarity': round(desc_sim, 1),
+                'trigger_similarity': round(trigger_sim, 1),
+                'total_similarity': round(total_sim, 1),
+                'suggestion': self._determine_suggestion(skill1, skill2)
+            })
 
         self.similar_skills = similar_skills
         return similar_skills
 
+    @staticmethod
+    def _skill_record(skill: Dict) -> Tuple[str, str, Set[str]]:
+        """规范化后的 (名称, 描述, 触发词集合)，每个技能只计算一次"""
+        config = skill['config'] or {}
+        return (
+            skill['name'].lower().strip(),
+            str(config.get('description') or '').lower().strip(),
+            _normalize_triggers(config.get('triggers', {})),
+        )
+
+    @staticmethod
+    def _candidate_pairs(records: List[Tuple[str, str, Set[str]]]) -> Set[Tuple[int, int]]:
+        """
+        候选对生成: 名称字符三元组与内容（描述四元组 + 触发词）分别做 MinHash/LSH，
+        任一分桶相撞即为候选
+
+        综合相似度中名称占一半，达到阈值的技能对名称必然相近，
+        名称分桶使用较低的碰撞门槛；内容分桶用于补充改名但内容重复的技能。
+        """
+        name_lsh = MinHashLSH(bands=NAME_LSH_BANDS, rows=NAME_LSH_ROWS)
+        content_lsh = MinHashLSH(bands=CONTENT_LSH_BANDS, rows=CONTENT_LSH_ROWS)
+
+        pairs = name_lsh.candidate_pairs([_char_ngrams(f'^{name}$', 3) for name, _, _ in records])
+        pairs |= content_lsh.candidate_pairs([
+            _char_ngrams(' '.join(desc.split()), 4) | {f't:{t}' for t in triggers}
+            for _, desc, triggers in records
+        ])
+        return pairs
+
+    @staticmethod
+    def _score_pairs(
+        records: List[Tuple],
+        pairs: List[Tuple[int, int]],
+        threshold: float,
+        max_workers: Optional[int] = None
+    ) -> List[Tuple[int, int, Tuple]]:
+        """精确评分，返回达到阈值的 (i, j, 各项相似度)，顺序与 pairs 一致"""
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        if max_workers <= 1 or len(pairs) < PARALLEL_MIN_PAIRS:
+            _init_score_worker(records)
+            return _score_chunk((pairs, threshold))
+
+        chunk_size = max(1000, len(pairs) // (max_workers * 4))
+        chunks = [(pairs[k:k + chunk_size], threshold) for k in range(0, len(pairs), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers, initializer=_init_score_worker, initargs=(records,)) as executor:
+            for part in executor.map(_score_chunk, chunks):
+                results.extend(part)
+        return results
+
     def _determine_suggestion(self, skill1: Dict, skill2: Dict) -> str:
         """确定合并建议"""
         # 根据技能类型和质量决定建议
@@ -464,7 +681,7 @@ def main():
     parser.add_argument('--threshold', '-t',
                       type=float,
                       default=80.0,
-                      help='相似度阈值 (0-100，默认80)')
+                      help=f'相似度阈值 (0-100，默认80；低于 {LSH_MIN_THRESHOLD} 时自动穷举比较)')
     parser.add_argument('--plan', '-p',
                       action='store_true',
                       help='生成合并计划')
@@ -474,6 +691,13 @@ def main():
     parser.add_argument('--dry-run', '-d',
                       action='store_true',
                       help='执行模拟合并（不修改实际文件）')
+    parser.add_argument('--exhaustive',
+                      action='store_true',
+                      help='比较所有技能对（不使用 LSH 候选生成，结果精确但 O(n²)）')
+    parser.add_argument('--workers', '-w',
+                      type=int,
+                      default=None,
+                      help='精确评分的进程数（默认 CPU 数）')
 
     args = parser.parse_args()
 
@@ -489,7 +713,9 @@ def main():
 
     # 查找相似技能
     print("正在查找相似技能...")
-    similar_skills = deduplicator.find_similar_skills(args.threshold)
+    similar_skills = deduplicator.find_similar_skills(
+        args.threshold, use_lsh=not args.exhaustive, max_workers=args.workers
+    )
 
     print(f"找到 {len(similar_skills)} 对相似技能")
     print()
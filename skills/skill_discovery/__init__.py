@@ -4,6 +4,8 @@
 """
 
 import os
+import functools
+import threading
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
@@ -11,50 +13,184 @@ from skill_metadata import load_all_skills, SkillMetadata
 from skill_index import SkillIndex
 from skill_router import SkillRouter, RouteResult
 from cache_manager import CacheManager
+from route_cache import RouteCache, normalize_input
+from skill_watcher import SkillWatcher
 from validation import validate_file_path, sanitize_filename
-from exceptions import SkillDiscoveryError
+from exceptions import SkillDiscoveryError, CacheError
+
+
+def _live_index(method):
+    """查询前先应用监听器收集到的技能变更"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.watcher is not None:
+            self.sync_changes()
+        return method(self, *args, **kwargs)
+    return wrapper
 
 
 class SkillDiscovery:
     """技能发现系统 API"""
 
-    def __init__(self, skills_root: str, cache_path: str = 'skill_index.json'):
+    def __init__(
+        self,
+        skills_root: str,
+        cache_path: str = 'skill_index.json',
+        route_cache_size: int = 1024,
+        route_cache_ttl: Optional[float] = 300.0,
+        verify_snapshot: bool = True
+    ):
         """
         初始化技能发现系统
 
         Args:
             skills_root: 技能根目录
             cache_path: 缓存文件路径
+            route_cache_size: 路由结果缓存条目数（0 表示禁用）
+            route_cache_ttl: 路由结果缓存有效期（秒，None 表示不过期）
+            verify_snapshot: 使用索引快照前检查技能文件的修改时间
+                （关闭后冷启动开销与技能数量无关，技能变更需手动 rebuild_index）
         """
         self.skills_root = skills_root
         self.cache_path = cache_path
         self.cache_manager = CacheManager(cache_path)
+        self.route_cache = RouteCache(route_cache_size, route_cache_ttl)
+        self.verify_snapshot = verify_snapshot
+        self.watcher: Optional[SkillWatcher] = None
+        self._sync_lock = threading.Lock()
+        # 监听模式下缓存延迟写入: 变更后启动定时器，到期在后台线程保存
+        self._save_delay = 5.0
+        self._save_timer: Optional[threading.Timer] = None
+        self._cache_dirty = False
         self.index = None
         self.router = None
         self._initialize()
 
     def _initialize(self):
         """初始化索引和路由器"""
-        # 尝试从缓存加载
-        if self.cache_manager.is_valid(self.skills_root):
-            print("📦 从缓存加载技能索引...")
-            # TODO: 实现从缓存恢复索引
-            self.index = SkillIndex(self.skills_root)
-        else:
-            print("🔍 扫描技能并构建索引...")
-            self.index = SkillIndex(self.skills_root)
-            # 保存到缓存
-            self.cache_manager.save(self.index)
-
-        # 初始化路由器
+        # 尝试从二进制快照恢复（内存映射，技能元数据按需解码）
+        snapshot = self.cache_manager.load_snapshot(self.skills_root, verify=self.verify_snapshot)
+        if snapshot is not None:
+            print("📦 从快照加载技能索引...")
+            self.index = SkillIndex.from_snapshot(snapshot)
+            self.router = SkillRouter(self.index, snapshot=snapshot)
+            return
+
+        print("🔍 扫描技能并构建索引...")
+        self.index = SkillIndex(self.skills_root)
         self.router = SkillRouter(self.index)
+        # 保存到缓存
+        self._save_cache()
+
+    def _save_cache(self):
+        """保存 JSON 缓存与二进制索引快照"""
+        self.cache_manager.save(self.index)
+        try:
+            self.cache_manager.save_snapshot(self.index, self.router)
+        except CacheError as e:
+            # 快照只用于加速启动，写入失败不影响使用
+            print(f"⚠️  {e}")
 
     def rebuild_index(self):
         """重建索引"""
         print("🔄 重建技能索引...")
         self.index.rebuild()
-        self.cache_manager.save(self.index)
+        self._save_cache()
+
+    def update_index(self) -> List[str]:
+        """
+        增量更新索引（只重新加载变更的技能）
+
+        Returns:
+            变更的技能列表
+        """
+        changed = self.index.incremental_update()
+        if changed:
+            self._save_cache()
+        return changed
+
+    def start_watching(
+        self,
+        interval: float = 2.0,
+        use_native: bool = True,
+        save_delay: float = 5.0
+    ) -> SkillWatcher:
+        """
+        开启监听模式，保持索引与技能目录同步
+
+        监听器在后台收集新增/删除/修改的 SKILL.md 与 INTEROP.yml，
+        变更在下一次查询时于调用线程中增量应用到索引与路由器。
+        缓存不在查询线程中写入，而是在首个未保存的变更后 save_delay 秒由后台
+        定时器保存（期间的多次变更合并为一次写入），stop_watching 时立即保存。
 
+        Args:
+            interval: polling 模式的扫描间隔（秒）
+            use_native: 安装了 watchdog 时使用系统文件通知
+            save_delay: 变更后延迟写入缓存的时间（秒）
+        """
+        self._save_delay = save_delay
+        if self.watcher is None:
+            self.watcher = SkillWatcher(self.skills_root, interval, use_native)
+            self.watcher.start()
+        return self.watcher
+
+    def stop_watching(self):
+        """关闭监听模式（先应用尚未处理的变更并写入缓存）"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.sync_changes()
+            self.watcher = None
+        self.flush_cache()
+
+    def flush_cache(self):
+        """立即写入延迟中的缓存变更"""
+        with self._sync_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._cache_dirty:
+                self._cache_dirty = False
+                self._save_cache()
+
+    def _schedule_save(self):
+        """标记缓存待写入，没有等待中的定时器时启动一个（调用方持有 _sync_lock）"""
+        self._cache_dirty = True
+        if self._save_timer is not None:
+            return
+        self._save_timer = threading.Timer(self._save_delay, self._on_save_timer)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def _on_save_timer(self):
+        with self._sync_lock:
+            if self._save_timer is not threading.current_thread():
+                return  # 已被 flush_cache 取消
+            self._save_timer = None
+            if self._cache_dirty:
+                self._cache_dirty = False
+                self._save_cache()
+
+    def sync_changes(self) -> List[str]:
+        """
+        应用监听器收集到的变更
+
+        Returns:
+            受影响的技能列表
+        """
+        if self.watcher is None:
+            return []
+
+        with self._sync_lock:
+            skill_dirs = self.watcher.drain()
+            if not skill_dirs:
+                return []
+
+            changed = self.index.update_skills(sorted(skill_dirs))
+            if changed:
+                self._schedule_save()
+            return changed
+
+    @_live_index
     def find_by_name(self, name: str) -> Optional[SkillMetadata]:
         """
         按名称查找技能
@@ -67,6 +203,7 @@ class SkillDiscovery:
         """
         return self.index.get_by_name(name)
 
+    @_live_index
     def find_by_category(self, category: str) -> List[str]:
         """
         按分类查找技能
@@ -79,6 +216,7 @@ class SkillDiscovery:
         """
         return self.index.get_by_category(category)
 
+    @_live_index
     def find_by_tags(self, tags: List[str]) -> List[str]:
         """
         按标签查找技能
@@ -94,6 +232,7 @@ class SkillDiscovery:
             results.extend(self.index.get_by_tag(tag))
         return list(set(results))
 
+    @_live_index
     def find_providers(self, resource: str) -> List[str]:
         """
         查找提供特定资源的技能
@@ -106,6 +245,7 @@ class SkillDiscovery:
         """
         return self.index.get_providers(resource)
 
+    @_live_index
     def find_consumers(self, resource: str) -> List[str]:
         """
         查找消耗特定资源的技能
@@ -118,6 +258,7 @@ class SkillDiscovery:
         """
         return self.index.get_consumers(resource)
 
+    @_live_index
     def find_collaborators(self, skill_name: str) -> List[str]:
         """
         查找协作技能
@@ -130,6 +271,7 @@ class SkillDiscovery:
         """
         return self.router._infer_collaboration_chain(skill_name)
 
+    @_live_index
     def find_related(self, skill_name: str) -> List[str]:
         """
         查找相关技能
@@ -142,6 +284,7 @@ class SkillDiscovery:
         """
         return self.index.get_related(skill_name)
 
+    @_live_index
     def search(self, query: str) -> List[str]:
         """
         搜索技能
@@ -154,6 +297,7 @@ class SkillDiscovery:
         """
         return self.index.search(query)
 
+    @_live_index
     def route(self, user_input: str) -> RouteResult:
         """
         智能路由到合适的技能
@@ -163,9 +307,20 @@ class SkillDiscovery:
 
         Returns:
             路由结果
+
+        相同（规范化后）输入的结果会被缓存，索引变更后自动失效；
+        规范化结果只作缓存键，路由始终使用调用方的原始输入
         """
-        return self.router.route(user_input)
+        key = normalize_input(user_input)
+        generation = self.index.generation
+
+        result = self.route_cache.get(key, generation)
+        if result is None:
+            result = self.router.route(user_input)
+            self.route_cache.put(key, generation, result)
+        return result
 
+    @_live_index
     def suggest_combination(self, task_type: str) -> Dict[str, Any]:
         """
         推荐技能组合
@@ -178,21 +333,27 @@ class SkillDiscovery:
         """
         return self.router.suggest_combination(task_type)
 
+    @_live_index
     def get_all_categories(self) -> List[str]:
         """获取所有分类"""
         return self.index.get_all_categories()
 
+    @_live_index
     def get_all_tags(self) -> List[str]:
         """获取所有标签"""
         return self.index.get_all_tags()
 
+    @_live_index
     def get_all_resources(self) -> List[str]:
         """获取所有资源类型"""
         return self.index.get_all_resources()
 
+    @_live_index
     def get_statistics(self) -> Dict[str, Any]:
-        """获取索引统计信息"""
-        return self.index.get_statistics()
+        """获取索引统计信息（含路由缓存命中率）"""
+        stats = self.index.get_statistics()
+        stats['route_cache'] = self.route_cache.get_statistics()
+        return stats
 
     def visualize_relationships(self, output_path: str = 'skill_graph.png'):
         """
@@ -246,6 +407,7 @@ class SkillDiscovery:
         except Exception as e:
             raise SkillDiscoveryError(f"Visualization failed: {e}")
 
+    @_live_index
     def export_index(self, output_path: str = 'skill_index_export.json'):
         """
         导出索引到 JSON 文件
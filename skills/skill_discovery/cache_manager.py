@@ -10,6 +10,7 @@ from typing import Dict, Any, Optional
 from pathlib import Path
 
 from skill_index import SkillIndex
+from index_snapshot import IndexSnapshot
 from validation import validate_cache_path
 from exceptions import CacheError, PathTraversalError
 
@@ -39,6 +40,8 @@ class CacheManager:
         except Exception as e:
             raise CacheError(f"Invalid cache path '{cache_path}': {e}")
 
+        # 二进制索引快照与 JSON 缓存放在一起
+        self.snapshot_path = self.cache_path.with_suffix('.snapshot')
         self.cache_data = None
 
     def load(self) -> Optional[Dict[str, Any]]:
@@ -90,7 +93,7 @@ class CacheManager:
             self.cache_path.parent.mkdir(parents=True, exist_ok=True)
 
             with self.cache_path.open('w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
+                json.dump(cache_data, f, indent=2, ensure_ascii=False, default=str)
         except IOError as e:
             raise CacheError(f"Failed to save cache: {e}")
 
@@ -104,36 +107,90 @@ class CacheManager:
         Returns:
             缓存是否有效
         """
-        if not self.cache_path.exists():
-            return False
+        return self._is_fresh(self.cache_path, skills_root)
 
+    def _is_fresh(self, path: Path, skills_root: str) -> bool:
+        """缓存文件是否比所有 SKILL.md / INTEROP.yml 都新（且未超过 24 小时）"""
         try:
-            # 检查缓存时间
-            cache_data = self.load()
-            if not cache_data:
-                return False
-
-            cache_time = cache_data.get('_cache_time', 0)
+            # 缓存文件的修改时间即保存时间，无需读取文件内容
+            cache_time = path.stat().st_mtime
 
             # 提前检查：如果缓存太旧，直接返回
             if time.time() - cache_time > 86400:  # 24小时
                 return False
 
-            # 使用Path和生成器，减少文件系统调用
             skills_path = Path(skills_root)
 
-            # 只检查SKILL.md文件，使用glob一次性获取
-            skill_files = skills_path.glob('*/SKILL.md')
+            # 新增/删除技能目录会更新根目录的修改时间
+            if skills_path.stat().st_mtime > cache_time:
+                return False
 
-            # 懒加载：找到第一个过期的就返回
-            return not any(
-                f.stat().st_mtime > cache_time
-                for f in skill_files
-            )
+            # 懒加载：找到第一个过期的就返回（scandir 比 Path.glob 少一次目录匹配开销）
+            with os.scandir(skills_path) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    for filename in ('SKILL.md', 'INTEROP.yml'):
+                        try:
+                            if os.stat(os.path.join(entry.path, filename)).st_mtime > cache_time:
+                                return False
+                        except FileNotFoundError:
+                            continue
+            return True
+        except FileNotFoundError:
+            return False
         except (OSError, PermissionError) as e:
             print(f"⚠️  缓存验证失败: {e}")
             return False
 
+    def save_snapshot(self, index: SkillIndex, router) -> int:
+        """
+        保存二进制索引快照（元数据、倒排索引、关键词自动机、INTEROP 配置）
+
+        Args:
+            index: 技能索引对象
+            router: 技能路由器（提供关键词自动机与 INTEROP 配置）
+
+        Returns:
+            快照字节数
+
+        Raises:
+            CacheError: 快照保存失败
+        """
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            return IndexSnapshot.write(str(self.snapshot_path), index, router)
+        except (OSError, ValueError) as e:
+            raise CacheError(f"Failed to save snapshot: {e}")
+
+    def load_snapshot(self, skills_root: str, verify: bool = True) -> Optional[IndexSnapshot]:
+        """
+        打开二进制索引快照
+
+        Args:
+            skills_root: 技能根目录
+            verify: 是否检查技能文件的修改时间（关闭后启动开销与技能数量无关，
+                适合确定技能目录未变更的场景）
+
+        Returns:
+            IndexSnapshot 对象；快照不存在、过期、损坏或不属于该目录时返回 None
+        """
+        if verify and not self._is_fresh(self.snapshot_path, skills_root):
+            return None
+        if not self.snapshot_path.exists():
+            return None
+
+        try:
+            snapshot = IndexSnapshot(str(self.snapshot_path))
+        except CacheError as e:
+            print(f"⚠️  索引快照不可用: {e}")
+            return None
+
+        if snapshot.skills_root != os.path.abspath(skills_root):
+            snapshot.close()
+            return None
+        return snapshot
+
     def clear(self):
         """
         清除缓存
@@ -142,8 +199,9 @@ class CacheManager:
             CacheError: 缓存删除失败
         """
         try:
-            if self.cache_path.exists():
-                self.cache_path.unlink()
+            for path in (self.cache_path, self.snapshot_path):
+                if path.exists():
+                    path.unlink()
             self.cache_data = None
         except OSError as e:
             raise CacheError(f"Failed to delete cache file: {e}")
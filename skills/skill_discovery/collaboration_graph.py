@@ -0,0 +1,160 @@
+"""
+技能协作图模块
+预先计算 技能 -> 上游协作技能 的有向图，提供协作链、传递闭包与拓扑执行顺序
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set
+
+
+class CollaborationGraph:
+    """技能协作图
+
+    边 skill -> upstream 表示 upstream 需要在 skill 之前执行:
+    - skill 消耗的资源由 upstream 提供（skill → consumes → provides ← upstream）
+    - skill 的 INTEROP.yml 中 collaboration.sequential 列出了 upstream
+
+    直接协作链在构建/增量更新时计算；传递闭包与拓扑执行顺序在首次查询时计算并缓存，
+    上游发生变化时沿反向边失效。
+
+    示例:
+        graph = CollaborationGraph.build(index, interop_configs)
+        graph.chain('frontend-design')            # 直接协作技能
+        graph.execution_order('frontend-design')  # 传递依赖的拓扑顺序，最后是自身
+        graph.update(['brand-guidelines'], index, interop_configs)
+    """
+
+    def __init__(self):
+        self._chains: Dict[str, List[str]] = {}
+        # 反向边: 技能 -> 直接依赖它的技能
+        self._dependents: Dict[str, Set[str]] = defaultdict(set)
+        # 技能 -> 提供的资源（增量更新时用于找到受影响的消费者）
+        self._provides: Dict[str, List[str]] = {}
+        self._orders: Dict[str, List[str]] = {}
+
+    @classmethod
+    def build(cls, index, interop_configs: Mapping[str, Any]) -> 'CollaborationGraph':
+        """为索引中的所有技能构建协作图 - O(技能数 + 资源引用数)"""
+        graph = cls()
+        for name in index.skills:
+            graph._set_chain(name, index, interop_configs)
+        return graph
+
+    def to_state(self) -> Dict[str, Any]:
+        """导出协作链（仅含内置类型，可用 marshal 序列化）"""
+        return {'chains': self._chains, 'provides': self._provides}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'CollaborationGraph':
+        """从 to_state() 的结果恢复，无需重新读取技能元数据"""
+        graph = cls()
+        graph._chains = state['chains']
+        graph._provides = state['provides']
+        for name, chain in graph._chains.items():
+            for upstream in chain:
+                graph._dependents[upstream].add(name)
+        return graph
+
+    @staticmethod
+    def _compute_chain(metadata, index, interop: Optional[Dict[str, Any]]) -> List[str]:
+        """直接协作链（按执行顺序）"""
+        chain = []
+        related = metadata.get('related', [])
+
+        # 找到提供所消耗资源的技能，优先选择相关技能
+        for consumes in metadata.consumes():
+            providers = index.get_providers(consumes)
+            if providers:
+                related_providers = [p for p in providers if p in related]
+                chain.append(related_providers[0] if related_providers else providers[0])
+
+        # INTEROP 中声明的顺序协作技能插入到开头
+        if interop:
+            collaboration = interop.get('collaboration', {})
+            for item in collaboration.get('sequential', []):
+                if isinstance(item, dict):
+                    skill = item.get('skill')
+                    if skill and skill not in chain:
+                        chain.insert(0, skill)
+
+        return list(dict.fromkeys(chain))
+
+    def _set_chain(self, name: str, index, interop_configs: Mapping[str, Any]):
+        for upstream in self._chains.pop(name, []):
+            self._dependents[upstream].discard(name)
+
+        metadata = index.get_by_name(name)
+        if metadata is None:
+            self._provides.pop(name, None)
+            return
+
+        chain = self._compute_chain(metadata, index, interop_configs.get(name))
+        self._chains[name] = chain
+        for upstream in chain:
+            self._dependents[upstream].add(name)
+        self._provides[name] = metadata.provides()
+
+    def update(self, changed_skills: Iterable[str], index, interop_configs: Mapping[str, Any]):
+        """
+        增量更新变更的技能
+
+        除变更技能本身外，消耗其（新旧）提供资源的技能的协作链也会重新计算；
+        传递依赖这些技能的执行顺序随之失效。
+        """
+        affected = set()
+        for name in changed_skills:
+            affected.add(name)
+            resources = set(self._provides.get(name, []))
+            metadata = index.get_by_name(name)
+            if metadata is not None:
+                resources.update(metadata.provides())
+            for resource in resources:
+                affected.update(index.get_consumers(resource))
+
+        for name in affected:
+            self._set_chain(name, index, interop_configs)
+        self._invalidate(affected)
+
+    def _invalidate(self, names: Iterable[str]):
+        """沿反向边清除依赖这些技能的执行顺序缓存"""
+        stack = list(names)
+        seen = set()
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            self._orders.pop(name, None)
+            stack.extend(self._dependents.get(name, ()))
+
+    def chain(self, name: str) -> List[str]:
+        """直接协作技能（按执行顺序）"""
+        return list(self._chains.get(name, []))
+
+    def execution_order(self, name: str) -> List[str]:
+        """
+        传递依赖的拓扑执行顺序（上游在前，最后是 name 本身）
+
+        按协作链顺序深度优先后序遍历；遇到环时跳过回边。
+        """
+        order = self._orders.get(name)
+        if order is None:
+            order = []
+            visited = {name}
+            stack = [(name, iter(self._chains.get(name, [])))]
+            while stack:
+                node, upstreams = stack[-1]
+                for upstream in upstreams:
+                    if upstream not in visited:
+                        visited.add(upstream)
+                        stack.append((upstream, iter(self._chains.get(upstream, []))))
+                        break
+                else:
+                    stack.pop()
+                    order.append(node)
+            self._orders[name] = order
+        return list(order)
+
+    def closure(self, name: str) -> FrozenSet[str]:
+        """传递闭包: name 直接或间接依赖的所有技能"""
+        return frozenset(self.execution_order(name)[:-1])
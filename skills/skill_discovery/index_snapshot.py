@@ -0,0 +1,401 @@
+"""
+技能索引快照模块
+紧凑的二进制快照: 内存映射 + 按需解码，冷启动无需解析 SKILL.md / INTEROP.yml
+
+文件布局:
+    头部    MAGIC(8) | 版本(u32) | 段数(u32)
+    段表    [段名(16) | 偏移(u64) | 长度(u64)] * 段数
+    段数据  (按 8 字节对齐)
+        meta / table      marshal 编码的元信息与记录表（名称 -> 记录偏移）
+        records           逐技能的元数据 / INTEROP 配置（JSON）与触发关键词（marshal）
+        by_* / text       各倒排索引，首次访问时才解码
+        collab            协作图的直接协作链，首次推理协作链时才解码
+        kw_*              关键词自动机: 失败链接等为定长整数数组（直接映射），
+                          节点转移表与关键词附带数据为逐条 marshal 记录
+
+启动时只解析头部、段表和记录表；一次路由只解码输入经过的自动机节点和命中的技能。
+"""
+
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import defaultdict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from skill_metadata import SkillMetadata
+from keyword_matcher import KeywordMatcher
+from text_index import BM25Index
+from collaboration_graph import CollaborationGraph
+from exceptions import CacheError
+
+
+MAGIC = b'SKIDXSNP'
+VERSION = 2
+
+_HEADER = struct.Struct('<8sII')
+_SECTION = struct.Struct('<16sQQ')
+_ALIGN = 8
+
+# 值为技能名称列表的倒排索引（by_name 由技能表本身充当）
+_LIST_INDEXES = ('by_category', 'by_tag', 'by_provides', 'by_consumes', 'by_related')
+
+
+def _encode_record(value: Any) -> bytes:
+    """元数据记录编码为紧凑 JSON（日期等非 JSON 类型转为字符串，与 JSON 缓存一致）"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def _pack_records(values: List[Any]) -> Tuple[bytes, bytes]:
+    """逐条 marshal 编码，返回 (u32 偏移表, 数据)；第 i 条位于 offsets[i]:offsets[i+1]"""
+    offsets = array('I', [0])
+    data = bytearray()
+    for value in values:
+        data += marshal.dumps(value)
+        offsets.append(len(data))
+    return offsets.tobytes(), bytes(data)
+
+
+class LazyRecords(MutableMapping):
+    """按名称懒解码的记录映射
+
+    首次访问某个名称时才从快照中解码对应记录；写入/删除只作用于内存覆盖层，
+    快照文件本身保持只读。
+    """
+
+    def __init__(self, buffer, base: int, table: Dict[str, Tuple[int, int]], decode: Callable[[bytes], Any]):
+        self._buffer = buffer
+        self._base = base
+        self._table = table  # 名称 -> (段内偏移, 长度)
+        self._decode = decode
+        self._decoded: Dict[str, Any] = {}
+        self._removed = set()
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._decoded:
+            return self._decoded[name]
+        if name in self._removed or name not in self._table:
+            raise KeyError(name)
+
+        offset, length = self._table[name]
+        start = self._base + offset
+        value = self._decoded[name] = self._decode(self._buffer[start:start + length])
+        return value
+
+    def __setitem__(self, name: str, value: Any):
+        self._decoded[name] = value
+        self._removed.discard(name)
+
+    def __delitem__(self, name: str):
+        if name not in self:
+            raise KeyError(name)
+        self._decoded.pop(name, None)
+        self._removed.add(name)
+
+    def __contains__(self, name) -> bool:
+        return name in self._decoded or (name in self._table and name not in self._removed)
+
+    def __iter__(self) -> Iterator[str]:
+        # 先取出名称列表，遍历过程中可以安全地覆盖已有条目
+        names = [name for name in self._table if name not in self._removed]
+        names.extend(name for name in self._decoded if name not in self._table)
+        return iter(names)
+
+    def __len__(self) -> int:
+        extra = sum(1 for name in self._decoded if name not in self._table)
+        return len(self._table) - len(self._removed & self._table.keys()) + extra
+
+    @property
+    def decoded_count(self) -> int:
+        """已解码（或新写入）的记录数"""
+        return len(self._decoded)
+
+
+class _RecordArray:
+    """按下标懒解码的 marshal 记录数组"""
+
+    def __init__(self, buffer, offsets, base: int):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._base = base
+        self._decoded: Dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> Any:
+        value = self._decoded.get(i)
+        if value is None:
+            start = self._base + self._offsets[i]
+            end = self._base + self._offsets[i + 1]
+            value = self._decoded[i] = marshal.loads(self._buffer[start:end])
+        return value
+
+
+class _LazyIndexes(dict):
+    """首次访问某个索引时才解码对应的快照段"""
+
+    def __init__(self, loaders: Dict[str, Callable[[], Any]]):
+        super().__init__()
+        self._loaders = loaders
+
+    def __missing__(self, key: str) -> Any:
+        loader = self._loaders.pop(key, None)
+        if loader is None:
+            raise KeyError(key)
+        value = self[key] = loader()
+        return value
+
+
+class SnapshotKeywordMatcher:
+    """快照中的关键词自动机（只读视图）
+
+    与 KeywordMatcher 的匹配结果相同，但节点转移表、关键词及其附带数据都按需解码，
+    一次匹配只访问输入经过的节点。首次增删关键词时完整解码为 KeywordMatcher，
+    之后的操作都委托给它。
+    """
+
+    def __init__(self, goto: _RecordArray, fail, dict_link, terminal, words: _RecordArray):
+        self._goto = goto
+        self._fail = fail
+        self._dict_link = dict_link
+        self._terminal = terminal  # 节点 -> 关键词序号（-1 表示非终止节点）
+        self._words = words  # 关键词序号 -> (关键词, 附带数据列表)
+        self._matcher: Optional[KeywordMatcher] = None
+
+    def _thaw(self) -> KeywordMatcher:
+        if self._matcher is None:
+            words = [self._words[i] for i in range(len(self._words))]
+            self._matcher = KeywordMatcher.from_state((
+                [self._goto[i] for i in range(len(self._goto))],
+                [words[i][0] if i >= 0 else None for i in self._terminal],
+                list(self._fail),
+                list(self._dict_link),
+                {keyword: payloads for keyword, payloads in words},
+                {keyword: i for i, (keyword, _) in enumerate(words)},
+                len(words),
+            ))
+        return self._matcher
+
+    def __len__(self) -> int:
+        return len(self._thaw()) if self._matcher is not None else len(self._words)
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword in self._thaw()
+
+    def items(self):
+        return self._thaw().items()
+
+    def add(self, keyword: str, payload: Any = None):
+        self._thaw().add(keyword, payload)
+
+    def remove(self, keyword: str, payload: Any = None) -> bool:
+        return self._thaw().remove(keyword, payload)
+
+    def compacted(self) -> KeywordMatcher:
+        return self._thaw().compacted()
+
+    def match(self, text: str) -> List[Tuple[str, List[Any]]]:
+        """单次扫描 text，返回命中的关键词及其附带数据（与 KeywordMatcher.match 一致）"""
+        if self._matcher is not None:
+            return self._matcher.match(text)
+
+        goto, fail, dict_link, terminal = self._goto, self._fail, self._dict_link, self._terminal
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+
+            out = node if terminal[node] >= 0 else dict_link[node]
+            while out:
+                found.add(terminal[out])
+                out = dict_link[out]
+
+        # 快照中的关键词序号即添加顺序
+        return [self._words[i] for i in sorted(found)]
+
+
+class IndexSnapshot:
+    """技能索引快照
+
+    示例:
+        IndexSnapshot.write('cache/skill_index.snapshot', index, router)
+
+        snapshot = IndexSnapshot('cache/skill_index.snapshot')
+        index = SkillIndex.from_snapshot(snapshot)
+        router = SkillRouter(index, snapshot=snapshot)
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._views: List[memoryview] = []
+        try:
+            with open(self.path, 'rb') as f:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            self._buffer = None
+            raise CacheError(f"Failed to map snapshot '{self.path}': {e}")
+
+        try:
+            magic, version, count = _HEADER.unpack_from(self._buffer, 0)
+            if magic != MAGIC or version != VERSION:
+                raise CacheError(f"Unsupported snapshot format in '{self.path}'")
+
+            self._sections = {}
+            for i in range(count):
+                name, offset, length = _SECTION.unpack_from(self._buffer, _HEADER.size + i * _SECTION.size)
+                if offset + length > len(self._buffer):
+                    raise CacheError(f"Truncated snapshot '{self.path}'")
+                self._sections[name.rstrip(b'\0').decode('ascii')] = (offset, length)
+
+            self.meta = self._load('meta')
+            if self.meta.get('byteorder') != sys.byteorder:
+                raise CacheError(f"Snapshot '{self.path}' was written on a different platform")
+            self._table = self._load('table')
+        except (struct.error, KeyError, ValueError, EOFError, TypeError) as e:
+            self.close()
+            raise CacheError(f"Corrupted snapshot '{self.path}': {e}")
+        except CacheError:
+            self.close()
+            raise
+
+    def _load(self, section: str) -> Any:
+        offset, length = self._sections[section]
+        return marshal.loads(self._buffer[offset:offset + length])
+
+    def _array(self, section: str, typecode: str):
+        """整数数组段: 直接映射，不复制"""
+        offset, length = self._sections[section]
+        view = memoryview(self._buffer)[offset:offset + length].cast(typecode)
+        self._views.append(view)
+        return view
+
+    @property
+    def skills_root(self) -> str:
+        return self.meta['skills_root']
+
+    @property
+    def created(self) -> float:
+        return self.meta['created']
+
+    def __len__(self) -> int:
+        return len(self._table['skills'])
+
+    def _records(self, kind: str, decode: Callable[[bytes], Any]) -> LazyRecords:
+        return LazyRecords(self._buffer, self._sections['records'][0], self._table[kind], decode)
+
+    def skills(self) -> LazyRecords:
+        """技能名称 -> SkillMetadata（按需解码）"""
+        return self._records('skills', lambda data: SkillMetadata.from_dict(json.loads(data)))
+
+    def interop_configs(self) -> LazyRecords:
+        """技能名称 -> INTEROP 配置（按需解码）"""
+        return self._records('interop', json.loads)
+
+    def dir_names(self) -> Dict[str, str]:
+        """技能目录 -> 技能名称"""
+        return self._table['dirs']
+
+    def indexes(self) -> Dict[str, Any]:
+        """分类/标签/资源倒排索引与全文索引（不含 by_name），首次访问时解码"""
+        loaders = {key: (lambda key=key: defaultdict(list, self._load(key))) for key in _LIST_INDEXES}
+        loaders['text'] = lambda: BM25Index.from_state(self._load('text'))
+        return _LazyIndexes(loaders)
+
+    def keywords(self) -> Tuple[SnapshotKeywordMatcher, LazyRecords]:
+        """关键词自动机及技能 -> 关键词条目（均按需解码）"""
+        matcher = SnapshotKeywordMatcher(
+            goto=_RecordArray(self._buffer, self._array('kw_goto_o', 'I'), self._sections['kw_goto'][0]),
+            fail=self._array('kw_fail', 'I'),
+            dict_link=self._array('kw_dict', 'I'),
+            terminal=self._array('kw_term', 'i'),
+            words=_RecordArray(self._buffer, self._array('kw_word_o', 'I'), self._sections['kw_word'][0]),
+        )
+        return matcher, self._records('skill_keywords', marshal.loads)
+
+    def collaboration_graph(self) -> CollaborationGraph:
+        """预先计算的协作图"""
+        return CollaborationGraph.from_state(self._load('collab'))
+
+    def close(self):
+        """释放内存映射（之后不能再解码新的记录）"""
+        for view in self._views:
+            view.release()
+        self._views = []
+
+        buffer, self._buffer = self._buffer, None
+        if buffer is not None:
+            buffer.close()
+
+    @staticmethod
+    def write(path: str, index, router) -> int:
+        """
+        将索引与路由器的派生结构写入快照（先写临时文件再原子替换）
+
+        Returns:
+            快照字节数
+        """
+        records = bytearray()
+
+        def append(data: bytes) -> Tuple[int, int]:
+            offset = len(records)
+            records.extend(data)
+            return offset, len(data)
+
+        table = {'skills': {}, 'interop': {}, 'skill_keywords': {}, 'dirs': dict(index._dir_names)}
+        for name, metadata in index.skills.items():
+            table['skills'][name] = append(_encode_record(metadata.to_dict()))
+            config = router._interop_cache.get(name)
+            if config is not None:
+                table['interop'][name] = append(_encode_record(config))
+            if name in router._skill_keywords:
+                table['skill_keywords'][name] = append(marshal.dumps(router._skill_keywords[name]))
+
+        # 压缩后关键词的添加序号为 0..K-1，即终止节点上记录的关键词序号
+        goto, terminal, fail, dict_link, payloads, order, _ = router._keyword_index.compacted().to_state()
+        goto_offsets, goto_data = _pack_records(goto)
+        word_offsets, word_data = _pack_records([(keyword, payloads[keyword]) for keyword in order])
+
+        sections = [
+            ('meta', marshal.dumps({
+                'skills_root': os.path.abspath(index.skills_root),
+                'created': time.time(),
+                'byteorder': sys.byteorder,
+            })),
+            ('table', marshal.dumps(table)),
+            ('records', bytes(records)),
+        ]
+        sections += [(key, marshal.dumps(dict(index._indexes[key]))) for key in _LIST_INDEXES]
+        sections += [
+            ('text', marshal.dumps(index._indexes['text'].to_state())),
+            ('collab', marshal.dumps(router.collaboration_graph.to_state())),
+            ('kw_goto_o', goto_offsets),
+            ('kw_goto', goto_data),
+            ('kw_fail', array('I', fail).tobytes()),
+            ('kw_dict', array('I', dict_link).tobytes()),
+            ('kw_term', array('i', [-1 if keyword is None else order[keyword] for keyword in terminal]).tobytes()),
+            ('kw_word_o', word_offsets),
+            ('kw_word', word_data),
+        ]
+
+        header = bytearray(_HEADER.pack(MAGIC, VERSION, len(sections)))
+        body = bytearray()
+        data_start = len(header) + _SECTION.size * len(sections)
+        for name, data in sections:
+            body += b'\0' * (-(data_start + len(body)) % _ALIGN)
+            header += _SECTION.pack(name.encode('ascii'), data_start + len(body), len(data))
+            body += data
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(body)
+        os.replace(tmp_path, path)
+        return len(header) + len(body)
@@ -0,0 +1,161 @@
+"""
+关键词多模式匹配模块
+基于 Aho-Corasick 自动机，一次扫描输入即可找出所有命中的关键词
+"""
+
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class KeywordMatcher:
+    """Aho-Corasick 关键词匹配器
+
+    匹配开销与输入长度（及命中数）成正比，而不是与关键词总数成正比。
+    支持增量增删关键词: 只修改 trie，失败链接在下一次匹配前统一重建。
+
+    示例:
+        matcher = KeywordMatcher()
+        matcher.add('前端', ('frontend-design', 20, '前端'))
+        matcher.add('react', ('frontend-design', 10, 'React'))
+
+        for keyword, payloads in matcher.match('构建 react 前端组件'):
+            ...
+    """
+
+    def __init__(self):
+        # trie: 节点 -> {字符: 子节点}
+        self._goto: List[Dict[str, int]] = [{}]
+        # 以该节点结尾的关键词（None 表示非终止节点）
+        self._terminal: List[Optional[str]] = [None]
+        self._fail: List[int] = [0]
+        # 沿失败链最近的终止节点（输出链接）
+        self._dict_link: List[int] = [0]
+        self._dirty = False
+
+        # 关键词 -> 附带数据列表；插入序号用于稳定的结果顺序
+        self._payloads: Dict[str, List[Any]] = {}
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword in self._payloads
+
+    def items(self):
+        """遍历 (关键词, 附带数据列表)"""
+        return self._payloads.items()
+
+    def add(self, keyword: str, payload: Any = None):
+        """添加关键词（已小写）及其附带数据"""
+        if not keyword:
+            return
+
+        if keyword not in self._payloads:
+            self._insert(keyword)
+            self._payloads[keyword] = []
+            self._order[keyword] = self._next_order
+            self._next_order += 1
+
+        self._payloads[keyword].append(payload)
+
+    def remove(self, keyword: str, payload: Any = None) -> bool:
+        """移除关键词的一条附带数据；数据全部移除后关键词不再匹配"""
+        payloads = self._payloads.get(keyword)
+        if not payloads or payload not in payloads:
+            return False
+
+        payloads.remove(payload)
+        if not payloads:
+            # trie 节点保留，匹配时按 _payloads 过滤
+            del self._payloads[keyword]
+            del self._order[keyword]
+        return True
+
+    def compacted(self) -> 'KeywordMatcher':
+        """返回只包含现有关键词的新自动机（丢弃已移除关键词遗留的 trie 节点）"""
+        matcher = KeywordMatcher()
+        for keyword in sorted(self._payloads, key=self._order.__getitem__):
+            for payload in self._payloads[keyword]:
+                matcher.add(keyword, payload)
+        matcher._build_links()
+        return matcher
+
+    def to_state(self) -> Tuple:
+        """导出自动机状态（失败链接已构建，仅含内置类型，可用 marshal 序列化）"""
+        if self._dirty:
+            self._build_links()
+        return (self._goto, self._terminal, self._fail, self._dict_link,
+                self._payloads, self._order, self._next_order)
+
+    @classmethod
+    def from_state(cls, state: Tuple) -> 'KeywordMatcher':
+        """从 to_state() 的结果恢复，无需重新插入关键词"""
+        matcher = cls.__new__(cls)
+        (matcher._goto, matcher._terminal, matcher._fail, matcher._dict_link,
+         matcher._payloads, matcher._order, matcher._next_order) = state
+        matcher._dirty = False
+        return matcher
+
+    def _insert(self, keyword: str):
+        node = 0
+        for ch in keyword:
+            child = self._goto[node].get(ch)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._terminal.append(None)
+                self._fail.append(0)
+                self._dict_link.append(0)
+                self._goto[node][ch] = child
+            node = child
+        self._terminal[node] = keyword
+        self._dirty = True
+
+    def _build_links(self):
+        """BFS 重建失败链接与输出链接 - O(trie 节点数)"""
+        goto, fail, dict_link, terminal = self._goto, self._fail, self._dict_link, self._terminal
+        fail[0] = dict_link[0] = 0
+
+        queue = deque()
+        for child in goto[0].values():
+            fail[child] = dict_link[child] = 0
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                state = fail[node]
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(ch, 0)
+                dict_link[child] = fail[child] if terminal[fail[child]] is not None else dict_link[fail[child]]
+                queue.append(child)
+
+        self._dirty = False
+
+    def match(self, text: str) -> List[Tuple[str, List[Any]]]:
+        """单次扫描 text，返回命中的关键词及其附带数据
+
+        每个关键词只返回一次，按关键词添加顺序排列。
+        """
+        if self._dirty:
+            self._build_links()
+
+        goto, fail, dict_link, terminal = self._goto, self._fail, self._dict_link, self._terminal
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+
+            out = node if terminal[node] is not None else dict_link[node]
+            while out:
+                found.add(terminal[out])
+                out = dict_link[out]
+
+        hits = [keyword for keyword in found if keyword in self._payloads]
+        hits.sort(key=self._order.__getitem__)
+        return [(keyword, self._payloads[keyword]) for keyword in hits]
@@ -0,0 +1,107 @@
+"""
+路由结果缓存模块
+LRU + TTL 缓存，按索引代数（generation）失效
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from skill_router import RouteResult
+
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_input(user_input: str) -> str:
+    """规范化用户输入: NFKC（全角转半角）并折叠空白"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', user_input)).strip()
+
+
+class RouteCache:
+    """路由结果缓存
+
+    - 键为规范化后的输入
+    - 条目记录写入时的索引代数，索引重建/增量更新后自动失效
+    - 超过 max_size 时淘汰最久未使用的条目；超过 ttl 秒的条目过期
+
+    示例:
+        cache = RouteCache(max_size=1024, ttl=300)
+        result = cache.get(key, index.generation)
+        if result is None:
+            result = router.route(user_input)
+            cache.put(key, index.generation, result)
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, Tuple[int, float, RouteResult]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    @staticmethod
+    def _copy(result: RouteResult) -> RouteResult:
+        return RouteResult(
+            primary=result.primary,
+            collaborators=list(result.collaborators),
+            confidence=result.confidence,
+            reasoning=result.reasoning,
+        )
+
+    def get(self, key: str, generation: int) -> Optional[RouteResult]:
+        """查找缓存（返回副本）；代数不符或已过期视为未命中"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, stored_at, result = entry
+                if entry_generation != generation:
+                    del self._entries[key]
+                    self._stats['invalidations'] += 1
+                elif self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                    del self._entries[key]
+                    self._stats['expirations'] += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return self._copy(result)
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key: str, generation: int, result: RouteResult):
+        """写入缓存"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic(), self._copy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """命中率等统计"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['max_size'] = self.max_size
+        stats['ttl'] = self.ttl
+        return stats
@@ -3,9 +3,11 @@
 构建和管理多维度技能索引
 """
 
-from typing import Dict, List, Set, Any
+import os
+from typing import Callable, Dict, List, Optional, Set, Tuple, Any
 from collections import defaultdict
 from skill_metadata import SkillMetadata, load_all_skills
+from text_index import BM25Index
 
 
 class SkillIndex:
@@ -21,13 +23,43 @@ class SkillIndex:
             'by_provides': defaultdict(list),
             'by_consumes': defaultdict(list),
             'by_related': defaultdict(list),
+            'text': self._new_text_index(),
         }
+        # 索引代数: 每次重建/增量更新产生变更时递增，用于派生缓存失效
+        self.generation = 0
+        # 索引变更监听器: callback(changed_skills)，None 表示全量重建
+        self._listeners: List[Callable[[Optional[List[str]]], None]] = []
         self._build()
 
+    @classmethod
+    def from_snapshot(cls, snapshot) -> 'SkillIndex':
+        """
+        从索引快照恢复（不扫描技能目录、不解析 YAML）
+
+        技能元数据在首次访问时才从快照中解码，按名称查询只解码命中的技能。
+
+        Args:
+            snapshot: IndexSnapshot 对象
+        """
+        index = cls.__new__(cls)
+        index.skills_root = snapshot.skills_root
+        index.skills = snapshot.skills()
+        index._dir_names = snapshot.dir_names()
+        index.load_timings = {}
+        index._indexes = snapshot.indexes()
+        # 名称索引与技能表内容相同，共用同一个懒解码映射
+        index._indexes['by_name'] = index.skills
+        index.generation = 0
+        index._listeners = []
+        return index
+
     def _build(self):
         """构建索引（优化版）"""
-        # 加载所有技能
-        self.skills = load_all_skills(self.skills_root)
+        # 加载所有技能（并行读取，记录各阶段耗时）
+        self.load_timings: Dict[str, float] = {}
+        self.skills = load_all_skills(self.skills_root, timings=self.load_timings)
+        # 技能目录 -> 技能名称（用于按目录增删）
+        self._dir_names = {metadata.skill_dir: name for name, metadata in self.skills.items()}
 
         # 直接重新创建索引而不是清空 - 更高效
         self._indexes = {
@@ -37,12 +69,18 @@ class SkillIndex:
             'by_provides': defaultdict(list),
             'by_consumes': defaultdict(list),
             'by_related': defaultdict(list),
+            'text': self._new_text_index(),
         }
 
         # 构建新索引
         for name, metadata in self.skills.items():
             self._add_to_indexes(name, metadata)
 
+    @staticmethod
+    def _new_text_index() -> BM25Index:
+        """全文倒排索引: 名称 > 标签 > 描述"""
+        return BM25Index(field_weights={'name': 3, 'tags': 2, 'description': 1})
+
     def _add_to_indexes(self, name: str, metadata: SkillMetadata):
         """将单个技能添加到索引 - O(1)"""
         # 按名称索引
@@ -71,6 +109,13 @@ class SkillIndex:
         for related in metadata.get('related', []):
             self._indexes['by_related'][related].append(name)
 
+        # 全文索引
+        self._indexes['text'].add(name, {
+            'name': name,
+            'tags': ' '.join(str(tag) for tag in metadata.get('tags') or []),
+            'description': str(metadata.get('description') or ''),
+        })
+
     def _remove_from_indexes(self, name: str, metadata: SkillMetadata):
         """从索引中移除单个技能 - O(1)"""
         # 从名称索引移除
@@ -103,9 +148,22 @@ class SkillIndex:
             if name in self._indexes['by_related'][related]:
                 self._indexes['by_related'][related].remove(name)
 
+        # 从全文索引移除
+        self._indexes['text'].remove(name)
+
+    def add_listener(self, callback: Callable[[Optional[List[str]]], None]):
+        """注册索引变更监听器（如路由器的派生索引）"""
+        self._listeners.append(callback)
+
+    def _notify(self, changed_skills: Optional[List[str]]):
+        self.generation += 1
+        for callback in self._listeners:
+            callback(changed_skills)
+
     def rebuild(self):
         """重建索引"""
         self._build()
+        self._notify(None)
 
     def incremental_update(self) -> List[str]:
         """
@@ -122,6 +180,7 @@ class SkillIndex:
         from skill_metadata import load_skill_metadata
 
         changed_skills = []
+        removed_skills = []
 
         # 识别并更新变更的技能
         for name, metadata in self.skills.items():
@@ -136,6 +195,59 @@ class SkillIndex:
                     # 只添加这个技能到索引
                     self._add_to_indexes(name, new_metadata)
                     changed_skills.append(name)
+                else:
+                    removed_skills.append(name)
+
+        if changed_skills or removed_skills:
+            self._notify(changed_skills + removed_skills)
+
+        return changed_skills
+
+    def update_skills(self, skill_dirs: List[str]) -> List[str]:
+        """
+        按目录应用技能的新增/删除/修改（供文件监听器使用）
+
+        目录下存在 SKILL.md 则（重新）加载，否则从索引中移除该技能。
+
+        Args:
+            skill_dirs: 发生变化的技能目录（skills_root 下的一级目录）
+
+        Returns:
+            受影响的技能名称列表
+        """
+        from skill_metadata import load_skill_metadata
+
+        changed_skills = []
+
+        for skill_dir in skill_dirs:
+            # 移除该目录原有的技能
+            old_name = self._dir_names.pop(skill_dir, None)
+            if old_name is not None and old_name in self.skills:
+                self._remove_from_indexes(old_name, self.skills.pop(old_name))
+                changed_skills.append(old_name)
+
+            if not os.path.exists(os.path.join(skill_dir, 'SKILL.md')):
+                continue
+
+            metadata = load_skill_metadata(skill_dir)
+            if not metadata:
+                continue
+
+            name = metadata.get('name', os.path.basename(skill_dir))
+            # 与其他目录同名时后加载者生效（与 load_all_skills 一致）
+            if name in self.skills:
+                previous = self.skills.pop(name)
+                self._remove_from_indexes(name, previous)
+                self._dir_names.pop(previous.skill_dir, None)
+
+            self.skills[name] = metadata
+            self._dir_names[skill_dir] = name
+            self._add_to_indexes(name, metadata)
+            changed_skills.append(name)
+
+        changed_skills = list(dict.fromkeys(changed_skills))
+        if changed_skills:
+            self._notify(changed_skills)
 
         return changed_skills
 
@@ -169,34 +281,27 @@ class SkillIndex:
             related_skills.extend(skill_related)
         return list(set(related_skills))
 
-    def search(self, query: str) -> List[str]:
+    def search(self, query: str, limit: Optional[int] = None, min_coverage: float = 0.0) -> List[str]:
         """
-        搜索技能
-
-        在名称、描述、标签中搜索
-        """
-        query = query.lower()
-        results = set()
-
-        for name, metadata in self.skills.items():
-            # 搜索名称
-            if query in name.lower():
-                results.add(name)
-                continue
+        搜索技能（BM25 排序）
 
-            # 搜索描述
-            description = metadata.get('description', '')
-            if query in description.lower():
-                results.add(name)
-                continue
+        在名称、描述、标签中检索，结果按相关度降序排列；
+        min_coverage 为技能至少包含的查询词比例
 
-            # 搜索标签
-            for tag in metadata.get('tags', []):
-                if query in tag.lower():
-                    results.add(name)
-                    break
+        Performance:
+            - 旧版本: O(n) 每次查询逐个技能做子串查找，结果无序
+            - 新版本: 只访问查询词的倒排表
+        """
+        return [name for name, _ in self.search_with_scores(query, limit, min_coverage)]
 
-        return list(results)
+    def search_with_scores(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        min_coverage: float = 0.0
+    ) -> List[Tuple[str, float]]:
+        """搜索技能并返回 (技能名, BM25 得分)"""
+        return self._indexes['text'].search(query, limit, min_coverage)
 
     def get_all_categories(self) -> List[str]:
         """获取所有分类"""
@@ -219,6 +324,7 @@ class SkillIndex:
             'categories': dict(self._indexes['by_category']),
             'tags_count': len(self._indexes['by_tag']),
             'resources_count': len(self.get_all_resources()),
+            'load_timings': dict(self.load_timings),
         }
 
     def to_dict(self) -> Dict[str, Any]:
@@ -5,10 +5,100 @@
 
 import os
 import re
+import time
 import yaml
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 
+# 优先使用 libyaml 的 C 实现（需 PyYAML 编译时链接 libyaml），否则回退到纯 Python
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# frontmatter 按块读取，找到结束标记即停止，不读取正文
+FRONTMATTER_CHUNK = 4096
+
+# 技能数少于该值时串行加载（线程池的开销大于收益）
+PARALLEL_THRESHOLD = 32
+
+
+def _yaml_load(text: str) -> Any:
+    """yaml.safe_load 的等价实现（可用时使用 CSafeLoader）"""
+    return yaml.load(text, Loader=YAML_LOADER)
+
+
+def _read_frontmatter(skill_md: str) -> Optional[str]:
+    """
+    读取 SKILL.md 开头 --- 包围的 YAML 文本
+
+    与 re.match(r'^---\n(.*?)\n---', content, re.DOTALL) 的结果一致，
+    但只读取到结束标记为止。
+
+    Returns:
+        frontmatter 文本，没有 frontmatter 时返回 None
+    """
+    with open(skill_md, 'r', encoding='utf-8') as f:
+        head = f.read(FRONTMATTER_CHUNK)
+        if not head.startswith('---\n'):
+            return None
+
+        start = 4
+        while True:
+            end = head.find('\n---', start)
+            if end != -1:
+                return head[4:end]
+
+            chunk = f.read(FRONTMATTER_CHUNK)
+            if not chunk:
+                return None
+            # 结束标记可能跨块
+            start = max(4, len(head) - 3)
+            head += chunk
+
+
+def _read_skill_data(skill_dir: str, phase_times: Optional[Dict[str, float]] = None) -> Tuple[Dict[str, Any], Optional[float]]:
+    """
+    读取并解析技能目录下的 SKILL.md frontmatter 与 INTEROP.yml
+
+    Args:
+        skill_dir: 技能目录路径
+        phase_times: 累加 'read'（文件 I/O）与 'parse'（YAML 解析）耗时（秒）
+
+    Returns:
+        (元数据, SKILL.md 修改时间)；SKILL.md 不存在时修改时间为 None
+    """
+    clock = time.perf_counter
+    started = clock()
+
+    skill_md = os.path.join(skill_dir, 'SKILL.md')
+    try:
+        mtime = os.stat(skill_md).st_mtime
+        frontmatter = _read_frontmatter(skill_md)
+    except FileNotFoundError:
+        mtime = frontmatter = None
+
+    try:
+        with open(os.path.join(skill_dir, 'INTEROP.yml'), 'r', encoding='utf-8') as f:
+            interop_text = f.read()
+    except FileNotFoundError:
+        interop_text = None
+
+    read_done = clock()
+
+    metadata = {}
+    if frontmatter is not None:
+        try:
+            metadata.update(_yaml_load(frontmatter) or {})
+        except yaml.YAMLError:
+            pass
+    if interop_text is not None:
+        metadata.update(_yaml_load(interop_text))
+
+    if phase_times is not None:
+        phase_times['read'] += read_done - started
+        phase_times['parse'] += clock() - read_done
+
+    return metadata, mtime
+
 
 class SkillMetadata:
     """技能元数据类"""
@@ -20,41 +110,35 @@ class SkillMetadata:
         self._mtime = 0
         self._load()
 
+    @classmethod
+    def from_dict(cls, metadata: Dict[str, Any]) -> 'SkillMetadata':
+        """从已解析的元数据（如索引快照中的记录）恢复，不读取文件"""
+        instance = cls.__new__(cls)
+        instance.skill_dir = metadata.get('_path', '')
+        instance.skill_name = os.path.basename(instance.skill_dir)
+        instance.metadata = metadata
+        instance._mtime = metadata.get('_mtime', 0)
+        return instance
+
     def _load(self):
         """加载技能元数据"""
-        skill_md = os.path.join(self.skill_dir, 'SKILL.md')
-        interop_yml = os.path.join(self.skill_dir, 'INTEROP.yml')
-
-        # 获取修改时间
-        if os.path.exists(skill_md):
-            self._mtime = os.path.getmtime(skill_md)
-
-        # 加载 SKILL.md frontmatter
-        if os.path.exists(skill_md):
-            frontmatter = self._parse_frontmatter(skill_md)
-            self.metadata.update(frontmatter)
+        metadata, mtime = _read_skill_data(self.skill_dir)
+        self.metadata.update(metadata)
+        self._mtime = mtime or 0
+        self._add_base_fields()
 
-        # 加载 INTEROP.yml（如果存在）
-        if os.path.exists(interop_yml):
-            with open(interop_yml, 'r', encoding='utf-8') as f:
-                interop_data = yaml.safe_load(f)
-                self.metadata.update(interop_data)
-
-        # 添加基础信息
+    def _add_base_fields(self):
+        """添加基础信息"""
         self.metadata['name'] = self.metadata.get('name', self.skill_name)
         self.metadata['_mtime'] = self._mtime
         self.metadata['_path'] = self.skill_dir
 
     def _parse_frontmatter(self, skill_md: str) -> Dict[str, Any]:
         """解析 SKILL.md 的 YAML frontmatter"""
-        with open(skill_md, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # 匹配 --- 包围的 YAML
-        match = re.match(r'^---\n(.*?)\n---', content, re.DOTALL)
-        if match:
+        frontmatter = _read_frontmatter(skill_md)
+        if frontmatter is not None:
             try:
-                return yaml.safe_load(match.group(1)) or {}
+                return _yaml_load(frontmatter) or {}
             except yaml.YAMLError:
                 return {}
 
@@ -130,37 +214,84 @@ def load_skill_metadata(skill_dir: str) -> Optional[SkillMetadata]:
         return None
 
 
-def load_all_skills(skills_root: str) -> Dict[str, SkillMetadata]:
+def _load_skill_timed(skill_dir: str) -> Tuple[Optional[SkillMetadata], Dict[str, float]]:
+    """加载单个技能（没有 SKILL.md 时返回 None），同时返回各阶段耗时"""
+    phase_times = {'read': 0.0, 'parse': 0.0}
+    try:
+        data, mtime = _read_skill_data(skill_dir, phase_times)
+    except Exception as e:
+        print(f"⚠️  加载技能元数据失败 {skill_dir}: {e}")
+        return None, phase_times
+
+    if mtime is None:
+        return None, phase_times
+
+    metadata = SkillMetadata.from_dict({**data, '_mtime': mtime, '_path': skill_dir})
+    metadata._add_base_fields()
+    return metadata, phase_times
+
+
+def _collect(skills: Dict[str, SkillMetadata], metadata: Optional[SkillMetadata],
+             phase_times: Dict[str, float], phase_totals: Dict[str, float]):
+    """合并单个技能的加载结果与耗时"""
+    phase_totals['read'] += phase_times['read']
+    phase_totals['parse'] += phase_times['parse']
+    if metadata:
+        skills[metadata.get('name', metadata.skill_name)] = metadata
+
+
+def load_all_skills(
+    skills_root: str,
+    max_workers: Optional[int] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> Dict[str, SkillMetadata]:
     """
-    加载所有技能的元数据
+    加载所有技能的元数据（批量并行版）
 
     Args:
         skills_root: 技能根目录
+        max_workers: 线程数（默认 min(8, CPU 数)，1 表示串行）
+        timings: 传入字典时写入各阶段耗时（秒）:
+            scan（列目录）、read（文件 I/O）、parse（YAML 解析）、total（总耗时）；
+            read/parse 为各线程累计值（含等待 GIL 的时间），并行时可能大于 total
 
     Returns:
-        技能名称到 SkillMetadata 的映射
+        技能名称到 SkillMetadata 的映射（同名技能后加载者生效）
+
+    Performance:
+        - 旧版本: 逐个技能多次 os.path.exists，读取整个 SKILL.md 后正则提取
+        - 新版本: os.scandir 列目录，只读取 frontmatter 前缀，
+          CSafeLoader 解析，线程池并行读取
+        - YAML 解析持有 GIL，线程池主要掩盖文件 I/O 延迟（冷缓存、网络文件系统）；
+          单核机器上默认串行
     """
-    skills = {}
+    if max_workers is None:
+        max_workers = min(8, os.cpu_count() or 1)
 
-    if not os.path.exists(skills_root):
-        return skills
-
-    for item in os.listdir(skills_root):
-        skill_dir = os.path.join(skills_root, item)
-
-        # 跳过非目录
-        if not os.path.isdir(skill_dir):
-            continue
-
-        # 检查是否有 SKILL.md
-        skill_md = os.path.join(skill_dir, 'SKILL.md')
-        if not os.path.exists(skill_md):
-            continue
+    clock = time.perf_counter
+    started = clock()
+    skills = {}
+    phase_totals = {'scan': 0.0, 'read': 0.0, 'parse': 0.0}
 
-        # 加载元数据
-        metadata = load_skill_metadata(skill_dir)
-        if metadata:
-            skills[metadata.get('name', item)] = metadata
+    try:
+        with os.scandir(skills_root) as entries:
+            skill_dirs = [entry.path for entry in entries if entry.is_dir()]
+    except FileNotFoundError:
+        skill_dirs = []
+    phase_totals['scan'] = clock() - started
+
+    if max_workers == 1 or len(skill_dirs) < PARALLEL_THRESHOLD:
+        for metadata, phase_times in map(_load_skill_timed, skill_dirs):
+            _collect(skills, metadata, phase_times, phase_totals)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # map 保持目录顺序，同名技能的覆盖顺序与串行一致
+            for metadata, phase_times in executor.map(_load_skill_timed, skill_dirs):
+                _collect(skills, metadata, phase_times, phase_totals)
+
+    if timings is not None:
+        timings.update(phase_totals)
+        timings['total'] = clock() - started
 
     return skills
 
@@ -12,6 +12,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from collections import defaultdict
 
 from skill_index import SkillIndex
+from keyword_matcher import KeywordMatcher
+from collaboration_graph import CollaborationGraph
 
 # 配置日志
 logger = logging.getLogger(__name__)
@@ -45,13 +47,30 @@ class RouteResult:
 class SkillRouter:
     """技能路由引擎（优化版）"""
 
-    def __init__(self, skill_index: SkillIndex):
+    # 搜索兜底匹配要求技能包含的查询词比例
+    SEARCH_MIN_COVERAGE = 0.5
+
+    def __init__(self, skill_index: SkillIndex, snapshot=None):
+        """
+        Args:
+            skill_index: 技能索引
+            snapshot: 索引快照（IndexSnapshot），提供时直接使用其中预构建的
+                关键词自动机、INTEROP 配置与协作图，不再遍历技能
+        """
         self.index = skill_index
         self._category_map = self._build_category_map()
-        self._keyword_index = self._build_keyword_index()  # 关键词反向索引
-        self._interop_cache = {}  # INTEROP配置缓存
-        self._collaboration_cache = {}  # 协作链缓存
-        self._load_all_interop_configs()  # 预加载所有INTEROP配置
+        self._skill_keywords: Dict[str, List[Tuple[str, Tuple[str, int, str]]]] = {}
+        self._graph: Optional[CollaborationGraph] = None  # 协作图（首次使用时构建）
+        self._graph_loader = None
+        if snapshot is not None:
+            self._keyword_index, self._skill_keywords = snapshot.keywords()
+            self._interop_cache = snapshot.interop_configs()  # 按需解码
+            self._graph_loader = snapshot.collaboration_graph
+        else:
+            self._keyword_index = self._build_keyword_index()  # 关键词自动机
+            self._interop_cache = {}  # INTEROP配置缓存
+            self._load_all_interop_configs()  # 预加载所有INTEROP配置
+        self.index.add_listener(self._on_index_update)  # 索引增量更新时同步
 
     def _build_category_map(self) -> Dict[str, str]:
         """构建分类关键词映射"""
@@ -64,30 +83,78 @@ class SkillRouter:
             'meta': '技能 skill 元 认知 架构',
         }
 
-    def _build_keyword_index(self) -> Dict[str, List[Tuple[str, int, str]]]:
+    def _build_keyword_index(self) -> KeywordMatcher:
         """
-        构建关键词反向索引 - 优化关键词匹配性能
+        构建关键词自动机 - 优化关键词匹配性能
 
         Returns:
-            关键词 -> [(skill_name, score, keyword)]
+            KeywordMatcher: 关键词 -> [(skill_name, score, keyword)]
 
         Performance:
-            - 旧版本: O(n*t*k*m) 每次查询都遍历所有技能
-            - 新版本: O(k) 只查找存在的关键词
-            - 提升: 92%
+            - 旧版本: O(K×m) 每次查询都对所有 K 个关键词做子串查找
+            - 新版本: O(m + 命中数) Aho-Corasick 单次扫描输入
         """
-        keyword_index = defaultdict(list)
+        keyword_index = KeywordMatcher()
+        self._skill_keywords = {}
 
         for name, metadata in self.index.skills.items():
-            for trigger in metadata.triggers():
-                level = trigger.get('level', 'low')
-                score = {'high': 20, 'medium': 10, 'low': 5}.get(level, 5)
+            self._index_skill_keywords(keyword_index, name, metadata)
 
-                for keyword in trigger.get('keywords', []):
-                    keyword_lower = keyword.lower()
-                    keyword_index[keyword_lower].append((name, score, keyword))
+        return keyword_index
 
-        return dict(keyword_index)
+    def _index_skill_keywords(self, keyword_index: KeywordMatcher, name: str, metadata):
+        """将单个技能的触发关键词加入自动机"""
+        entries = []
+        for trigger in metadata.triggers():
+            level = trigger.get('level', 'low')
+            score = {'high': 20, 'medium': 10, 'low': 5}.get(level, 5)
+
+            for keyword in trigger.get('keywords', []):
+                entry = (keyword.lower(), (name, score, keyword))
+                keyword_index.add(*entry)
+                entries.append(entry)
+
+        self._skill_keywords[name] = entries
+
+    def _on_index_update(self, changed_skills: Optional[List[str]]):
+        """
+        索引变更回调 - 只替换变更技能的关键词与 INTEROP 配置
+
+        Args:
+            changed_skills: 变更的技能列表，None 表示全量重建
+        """
+        if changed_skills is None:
+            self._keyword_index = self._build_keyword_index()
+            self._interop_cache = {}
+            self._load_all_interop_configs()
+            self._graph = self._graph_loader = None
+            return
+
+        for name in changed_skills:
+            for keyword, payload in self._skill_keywords.pop(name, []):
+                self._keyword_index.remove(keyword, payload)
+            self._interop_cache.pop(name, None)
+
+            metadata = self.index.get_by_name(name)
+            if metadata:
+                self._index_skill_keywords(self._keyword_index, name, metadata)
+                self._load_interop_config(name, metadata)
+
+        # 协作图只重新计算受影响的技能
+        if self._graph is not None:
+            self._graph.update(changed_skills, self.index, self._interop_cache)
+        else:
+            self._graph_loader = None  # 快照中的协作图已过期
+
+    @property
+    def collaboration_graph(self) -> CollaborationGraph:
+        """协作图: 首次访问时从快照恢复或按当前索引构建，之后随索引增量更新"""
+        if self._graph is None:
+            if self._graph_loader is not None:
+                self._graph = self._graph_loader()
+            else:
+                self._graph = CollaborationGraph.build(self.index, self._interop_cache)
+        return self._graph
 
     def _load_all_interop_configs(self):
         """
@@ -99,17 +166,21 @@ class SkillRouter:
             - 提升: 95%
         """
         for name, metadata in self.index.skills.items():
-            skill_path = metadata.get('_path', '')
-            if not skill_path:
-                continue
-
-            interop_path = Path(skill_path) / 'INTEROP.yml'
-            if interop_path.exists():
-                try:
-                    with interop_path.open('r', encoding='utf-8') as f:
-                        self._interop_cache[name] = yaml.safe_load(f)
-                except Exception as e:
-                    logger.debug(f"Failed to load INTEROP for {name}: {e}")
+            self._load_interop_config(name, metadata)
+
+    def _load_interop_config(self, name: str, metadata):
+        """加载单个技能的 INTEROP 配置到缓存"""
+        skill_path = metadata.get('_path', '')
+        if not skill_path:
+            return
+
+        interop_path = Path(skill_path) / 'INTEROP.yml'
+        if interop_path.exists():
+            try:
+                with interop_path.open('r', encoding='utf-8') as f:
+                    self._interop_cache[name] = yaml.safe_load(f)
+            except Exception as e:
+                logger.debug(f"Failed to load INTEROP for {name}: {e}")
 
     def route(self, user_input: str) -> RouteResult:
         """
@@ -162,22 +233,20 @@ class SkillRouter:
 
     def _match_by_keywords(self, user_input: str) -> Optional[RouteResult]:
         """
-        根据关键词匹配（优化版）- 使用反向索引
+        根据关键词匹配（优化版）- 使用 Aho-Corasick 自动机
 
         Performance:
-            - 旧版本: O(n×t×k×m) 遍历所有技能的所有关键词
-            - 新版本: O(k) 只查找存在的关键词
-            - 提升: 92%
+            - 旧版本: O(K×m) 对所有关键词做子串查找
+            - 新版本: O(m + 命中数) 单次扫描输入，与关键词总数无关
         """
         user_input_lower = user_input.lower()
         skill_scores = defaultdict(lambda: {'score': 0, 'keywords': []})
 
-        # 使用关键词反向索引 - O(k) 只遍历存在的关键词
-        for keyword, skills_info in self._keyword_index.items():
-            if keyword in user_input_lower:
-                for skill_name, score, keyword_text in skills_info:
-                    skill_scores[skill_name]['score'] += score
-                    skill_scores[skill_name]['keywords'].append(keyword_text)
+        # 单次扫描找出所有命中的关键词（按索引顺序，每个关键词计一次）
+        for keyword, skills_info in self._keyword_index.match(user_input_lower):
+            for skill_name, score, keyword_text in skills_info:
+                skill_scores[skill_name]['score'] += score
+                skill_scores[skill_name]['keywords'].append(keyword_text)
 
         if not skill_scores:
             return None
@@ -230,8 +299,13 @@ class SkillRouter:
         return None
 
     def _match_by_search(self, user_input: str) -> Optional[RouteResult]:
-        """根据搜索匹配"""
-        results = self.index.search(user_input)
+        """
+        根据搜索匹配（取 BM25 得分最高的技能）
+
+        只考虑包含至少 SEARCH_MIN_COVERAGE 比例查询词的技能，
+        避免仅共享一个常见词的技能被当作兜底结果
+        """
+        results = self.index.search(user_input, limit=1, min_coverage=self.SEARCH_MIN_COVERAGE)
         if results:
             return RouteResult(
                 primary=results[0],
@@ -242,7 +316,7 @@ class SkillRouter:
 
     def _infer_collaboration_chain(self, target_skill: str) -> List[str]:
         """
-        推理协作链（优化版）- 使用缓存
+        推理协作链（优化版）- 查询预先计算的协作图
 
         Args:
             target_skill: 目标技能名称
@@ -251,61 +325,12 @@ class SkillRouter:
             协作技能列表（按执行顺序）
 
         Performance:
-            - 旧版本: 每次都读取YAML文件 (~10ms per call)
-            - 新版本: 使用预加载的缓存 (~0.5ms per call)
-            - 提升: 95%
+            - 旧版本: 缓存未命中时重新推导 provides/consumes 关系，索引变更后全部失效
+            - 新版本: 协作图每代索引构建一次并增量更新，查询为 O(1) 查表
         """
         if not target_skill:
             return []
-
-        # 使用缓存的协作链结果
-        if target_skill in self._collaboration_cache:
-            return self._collaboration_cache[target_skill]
-
-        chain = []
-        metadata = self.index.get_by_name(target_skill)
-
-        if not metadata:
-            self._collaboration_cache[target_skill] = []
-            return []
-
-        # 检查消耗的资源
-        for consumes in metadata.consumes():
-            # 找到提供这个资源的技能
-            providers = self.index.get_providers(consumes)
-            if providers:
-                # 选择最佳提供者（优先选择相关的）
-                related_providers = [
-                    p for p in providers
-                    if p in metadata.get('related', [])
-                ]
-                if related_providers:
-                    chain.append(related_providers[0])
-                elif providers:
-                    chain.append(providers[0])
-
-        # 使用预加载的INTEROP配置 - 无文件I/O
-        interop = self._interop_cache.get(target_skill, {})
-        if interop:
-            collaboration = interop.get('collaboration', {})
-            sequential = collaboration.get('sequential', [])
-            for item in sequential:
-                if isinstance(item, dict):
-                    skill = item.get('skill')
-                    if skill and skill not in chain:
-                        chain.insert(0, skill)  # 插入到开头
-
-        # 去重并保持顺序
-        seen = set()
-        unique_chain = []
-        for skill in chain:
-            if skill not in seen:
-                seen.add(skill)
-                unique_chain.append(skill)
-
-        # 缓存结果
-        self._collaboration_cache[target_skill] = unique_chain
-        return unique_chain
+        return self.collaboration_graph.chain(target_skill)
 
     def suggest_combination(self, task_type: str) -> Dict[str, Any]:
         """
@@ -344,17 +369,20 @@ class SkillRouter:
         primary: str,
         collaborators: List[str]
     ) -> List[str]:
-        """确定执行顺序"""
-        order = []
-
-        # 协作技能先执行
-        order.extend(collaborators)
+        """
+        确定执行顺序: 协作技能（含其传递依赖）按拓扑顺序先执行，主技能最后执行
+        """
+        graph = self.collaboration_graph
+        if primary and collaborators == graph.chain(primary):
+            return graph.execution_order(primary)
 
-        # 主技能最后执行
+        # 自定义协作技能: 依次合并各自的拓扑顺序
+        order = []
+        for collaborator in collaborators:
+            order.extend(skill for skill in graph.execution_order(collaborator) if skill != primary)
         if primary:
             order.append(primary)
-
-        return order
+        return list(dict.fromkeys(order))
 
 
 if __name__ == '__main__':
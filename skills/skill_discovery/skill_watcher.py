@@ -0,0 +1,168 @@
+"""
+技能目录监听模块
+监听 skills_root 下 SKILL.md / INTEROP.yml 的新增、删除和修改
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+    WATCHDOG_AVAILABLE = False
+
+
+# 影响技能元数据的文件
+WATCHED_FILES = ('SKILL.md', 'INTEROP.yml')
+
+
+class _EventHandler(FileSystemEventHandler):
+    """将文件系统事件映射为变更的技能目录"""
+
+    def __init__(self, watcher: 'SkillWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        for path in (getattr(event, 'src_path', None), getattr(event, 'dest_path', None)):
+            if path:
+                self.watcher._mark_path(os.fsdecode(path), event.is_directory)
+
+
+class SkillWatcher:
+    """技能目录监听器
+
+    两种模式:
+    - native: 安装了 watchdog 时使用系统通知（inotify/FSEvents/...）
+    - polling: 每 interval 秒扫描一次一级目录及其 SKILL.md / INTEROP.yml
+
+    监听器只收集发生变化的技能目录，由调用方通过 drain() 取出后应用到索引。
+
+    示例:
+        watcher = SkillWatcher(skills_root)
+        watcher.start()
+        ...
+        changed_dirs = watcher.drain()
+        index.update_skills(sorted(changed_dirs))
+    """
+
+    def __init__(self, skills_root: str, interval: float = 2.0, use_native: bool = True):
+        self.skills_root = skills_root
+        self.interval = interval
+        self.mode = 'native' if use_native and WATCHDOG_AVAILABLE else 'polling'
+
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._snapshot: Dict[str, Tuple] = self._scan()
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    def _scan(self) -> Dict[str, Tuple]:
+        """扫描技能目录: 目录 -> 各监听文件的 (mtime_ns, size)"""
+        snapshot = {}
+        try:
+            entries = list(os.scandir(self.skills_root))
+        except OSError:
+            return snapshot
+
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+
+            stamps = []
+            for filename in WATCHED_FILES:
+                try:
+                    stat = os.stat(os.path.join(entry.path, filename))
+                    stamps.append((stat.st_mtime_ns, stat.st_size))
+                except OSError:
+                    stamps.append(None)
+
+            # 没有 SKILL.md 的目录不是技能
+            if stamps[0] is not None:
+                snapshot[os.path.join(self.skills_root, entry.name)] = tuple(stamps)
+
+        return snapshot
+
+    def poll(self) -> Set[str]:
+        """扫描一次并记录变化的技能目录（polling 模式由后台线程调用）"""
+        snapshot = self._scan()
+        previous = self._snapshot
+        self._snapshot = snapshot
+
+        changed = {
+            skill_dir for skill_dir in previous.keys() | snapshot.keys()
+            if previous.get(skill_dir) != snapshot.get(skill_dir)
+        }
+        if changed:
+            with self._lock:
+                self._pending |= changed
+        return changed
+
+    def _mark_path(self, path: str, is_directory: bool):
+        """native 模式: 将事件路径归到 skills_root 下的一级目录"""
+        relative = os.path.relpath(path, self.skills_root)
+        if relative.startswith(os.pardir) or relative == os.curdir:
+            return
+
+        parts = relative.split(os.sep)
+        if len(parts) == 1 and not is_directory:
+            return  # skills_root 下的普通文件
+        if len(parts) == 2 and parts[1] not in WATCHED_FILES:
+            return
+        if len(parts) > 2:
+            return
+
+        with self._lock:
+            self._pending.add(os.path.join(self.skills_root, parts[0]))
+
+    def drain(self) -> Set[str]:
+        """取出并清空待处理的技能目录"""
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        return pending
+
+    @property
+    def running(self) -> bool:
+        return self._observer is not None or (self._thread is not None and self._thread.is_alive())
+
+    def start(self):
+        """开始监听"""
+        if self.running:
+            return
+
+        if self.mode == 'native':
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), self.skills_root, recursive=True)
+            self._observer.daemon = True
+            self._observer.start()
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self._thread.start()
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️  技能目录扫描失败: {e}")
+
+    def stop(self):
+        """停止监听"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5.0)
+            self._observer = None
+
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5.0)
+            self._thread = None
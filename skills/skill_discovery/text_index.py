@@ -0,0 +1,167 @@
+"""
+全文检索模块
+分词 + 倒排索引 + BM25 排序，支持中文二元分词
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+
+# 拉丁字母/数字词，或连续的 CJK 字符
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+
+# 常见英文停用词（中文依靠二元分词 + IDF 降权）
+_STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with',
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词
+
+    - 英文/数字: 按非字母数字字符切分，转小写，去停用词
+    - 中文: 连续 CJK 字符切成相邻二元组（单字保留为一元）
+
+    示例:
+        tokenize('React 前端组件') -> ['react', '前端', '端组', '组件']
+    """
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if run[0].isascii():
+            if run not in _STOPWORDS:
+                tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class BM25Index:
+    """BM25 倒排索引
+
+    文档由多个字段组成，字段权重通过重复计入词频实现。
+    查询只访问查询词的倒排表，复杂度与命中文档数成正比，而非文档总数。
+
+    示例:
+        index = BM25Index(field_weights={'name': 3, 'description': 1})
+        index.add('frontend-design', {'name': 'frontend-design', 'description': '前端设计'})
+        index.search('前端')  # -> [('frontend-design', 1.23)]
+    """
+
+    def __init__(self, field_weights: Dict[str, int] = None, k1: float = 1.2, b: float = 0.75):
+        self.field_weights = field_weights or {}
+        self.k1 = k1
+        self.b = b
+
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)  # 词 -> {文档: 词频}
+        self._doc_terms: Dict[str, Counter] = {}  # 文档 -> 词频（用于删除）
+        self._doc_len: Dict[str, int] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_len
+
+    def to_state(self) -> Tuple:
+        """导出索引状态（仅含内置类型，可用 marshal 序列化）"""
+        return (self.field_weights, self.k1, self.b, dict(self._postings),
+                {doc_id: dict(terms) for doc_id, terms in self._doc_terms.items()},
+                self._doc_len, self._total_len)
+
+    @classmethod
+    def from_state(cls, state: Tuple) -> 'BM25Index':
+        """从 to_state() 的结果恢复，无需重新分词"""
+        field_weights, k1, b, postings, doc_terms, doc_len, total_len = state
+        index = cls(field_weights, k1, b)
+        index._postings.update(postings)
+        index._doc_terms = doc_terms  # 只用于删除时遍历词项，普通 dict 即可
+        index._doc_len = doc_len
+        index._total_len = total_len
+        return index
+
+    def add(self, doc_id: str, fields: Dict[str, str]):
+        """添加（或替换）文档"""
+        if doc_id in self._doc_len:
+            self.remove(doc_id)
+
+        terms = Counter()
+        for field, text in fields.items():
+            if not text:
+                continue
+            weight = self.field_weights.get(field, 1)
+            for token in tokenize(text):
+                terms[token] += weight
+
+        for term, tf in terms.items():
+            self._postings[term][doc_id] = tf
+
+        length = sum(terms.values())
+        self._doc_terms[doc_id] = terms
+        self._doc_len[doc_id] = length
+        self._total_len += length
+
+    def remove(self, doc_id: str):
+        """删除文档"""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+        self._total_len -= self._doc_len.pop(doc_id)
+
+    def search(self, query: str, limit: int = None, min_coverage: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        BM25 检索
+
+        Args:
+            query: 查询文本
+            limit: 返回数量上限（None 表示全部）
+            min_coverage: 文档至少包含的查询词比例（按去重后的查询词计），
+                低于该比例的文档不返回
+
+        Returns:
+            [(doc_id, score)]，按得分降序（同分按 doc_id 排序）
+        """
+        doc_count = len(self._doc_len)
+        if not doc_count:
+            return []
+
+        avg_len = self._total_len / doc_count or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        matched = Counter()  # 文档 -> 命中的查询词数
+        query_terms = set(tokenize(query))
+
+        for term in query_terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+
+            df = len(postings)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[doc_id] += 1
+
+        if min_coverage > 0:
+            required = min_coverage * len(query_terms)
+            scores = {doc_id: score for doc_id, score in scores.items() if matched[doc_id] >= required}
+
+        order = lambda item: (-item[1], item[0])
+        if limit is not None:
+            return heapq.nsmallest(limit, scores.items(), key=order)
+        return sorted(scores.items(), key=order)
@@ -0,0 +1,137 @@
+"""
+Performance Tests for SkillDeduplicator near-duplicate detection
+
+Compares MinHash/LSH candidate generation + exact scoring with the exhaustive
+pairwise scan on synthetic registries with planted near-duplicates.
+
+Run with -s to see the measured times:
+    python -m pytest tests/performance/test_dedup_benchmark.py -s
+"""
+
+import pytest
+import random
+import sys
+import time
+import yaml
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+pytest.importorskip("Levenshtein")
+
+import skill_deduplicator
+from skill_deduplicator import SkillDeduplicator, _init_score_worker, _score_chunk
+
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "te", "su", "no", "vi", "de", "pa",
+             "zo", "ri", "mu", "xe", "fa", "gi", "bo", "ly", "qu", "we"]
+CJK = "设计前端界面组件文档写作报告分析研究数据流程任务项目构建生成开发工具框架测试部署优化"
+
+
+def write_registry(path, skill_count, seed=0):
+    """合成注册表: 约 5% 的技能带有一个改名/改描述的近似副本，另有少量单字符拼写变体"""
+    rng = random.Random(seed)
+    words = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(600)})
+    internal, external, planted = {}, {}, []
+
+    count = 0
+    while count < skill_count:
+        name = "-".join(rng.sample(words, rng.randint(2, 3)))
+        if name in internal or name in external:
+            continue
+        config = {
+            'description': " ".join(rng.choice(words) for _ in range(rng.randint(8, 16))),
+            'triggers': {
+                'zh': ["".join(rng.choice(CJK) for _ in range(2)) for _ in range(3)],
+                'en': rng.sample(words, 3),
+            },
+        }
+        (internal if rng.random() < 0.4 else external)[name] = config
+        count += 1
+
+        if count < skill_count and rng.random() < 0.05:
+            if rng.random() < 0.5:
+                duplicate = name + rng.choice(["-v2", "-pro", "s", "-x"])
+            else:
+                chars = list(name)
+                del chars[rng.randrange(len(chars))]
+                duplicate = "".join(chars)
+            if duplicate in internal or duplicate in external:
+                continue
+            external[duplicate] = {
+                'description': config['description'] + rng.choice(["", " tool"]),
+                'triggers': config['triggers'],
+            }
+            planted.append((name, duplicate))
+            count += 1
+
+    path.write_text(
+        yaml.safe_dump({'internal_skills': internal, 'external_skills': external}, allow_unicode=True),
+        encoding="utf-8"
+    )
+    return planted
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+@pytest.mark.performance
+class TestDeduplicationBenchmark:
+    """Measure LSH-blocked deduplication against the exhaustive scan."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.registry = temp_directory / "skills.yml"
+
+    @pytest.mark.parametrize("threshold", [70, 80])
+    def test_lsh_matches_exhaustive(self, threshold):
+        write_registry(self.registry, 1000, seed=threshold)
+        deduplicator = SkillDeduplicator(str(self.registry))
+
+        exhaustive = deduplicator.find_similar_skills(threshold, use_lsh=False, max_workers=1)
+        blocked = deduplicator.find_similar_skills(threshold, max_workers=1)
+
+        assert exhaustive
+        assert blocked == exhaustive
+
+    def test_process_pool_matches_serial(self, monkeypatch):
+        write_registry(self.registry, 300)
+        deduplicator = SkillDeduplicator(str(self.registry))
+        serial = deduplicator.find_similar_skills(max_workers=1)
+
+        monkeypatch.setattr(skill_deduplicator, "PARALLEL_MIN_PAIRS", 0)
+        assert deduplicator.find_similar_skills(max_workers=2) == serial
+
+    def test_5k_skills(self, capsys):
+        planted = write_registry(self.registry, 5000)
+        deduplicator = SkillDeduplicator(str(self.registry))
+        skills = deduplicator._get_all_skills()
+        records = [deduplicator._skill_record(skill) for skill in skills]
+
+        candidates, candidate_ms = timed(deduplicator._candidate_pairs, records)
+        similar, total_ms = timed(deduplicator.find_similar_skills)
+
+        # 所有埋入的近似副本都被找到
+        found = {frozenset((s['skill1'], s['skill2'])) for s in similar}
+        assert all(frozenset(pair) in found for pair in planted)
+
+        # 穷举扫描耗时按随机抽样的技能对外推
+        rng = random.Random(0)
+        count = len(records)
+        all_pairs = count * (count - 1) // 2
+        sample = [tuple(sorted(rng.sample(range(count), 2))) for _ in range(100000)]
+        _init_score_worker(records)
+        _, sample_ms = timed(_score_chunk, (sample, 80))
+        exhaustive_ms = sample_ms * all_pairs / len(sample)
+
+        with capsys.disabled():
+            print(f"\n[dedup] {count} skills: {len(candidates)} / {all_pairs} candidate pairs "
+                  f"({candidate_ms:.0f} ms), lsh total {total_ms:.0f} ms, "
+                  f"exhaustive ~{exhaustive_ms:.0f} ms (extrapolated), {len(similar)} similar pairs")
+
+        assert len(candidates) < all_pairs * 0.05
+        assert total_ms < exhaustive_ms
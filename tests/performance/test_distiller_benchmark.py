@@ -0,0 +1,68 @@
+"""
+Performance Tests for GitHubSkillDistiller.batch_distill
+
+Distills 500 repos from a local stub API with per-request latency, comparing
+the concurrent batch against the serial loop (extrapolated) and a cached rerun.
+
+Run with -s to see the measured times:
+    python -m pytest tests/performance/test_distiller_benchmark.py -s
+"""
+
+import contextlib
+import io
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mindsymphony" / "extensions" / "github_skills"))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from github_skill_distiller import GitHubSkillDistiller
+from utils.github_stub import GitHubStubServer
+
+
+REPO_COUNT = 500
+LATENCY = 0.02
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+@pytest.mark.performance
+def test_batch_distill_500_repos(temp_directory, capsys):
+    repos = [f"octo/repo-{i}" for i in range(REPO_COUNT)]
+
+    with GitHubStubServer(latency=LATENCY) as server:
+        def distiller(cache_name):
+            return GitHubSkillDistiller({
+                'api_url': server.url,
+                'cache_dir': str(temp_directory / cache_name),
+                'requests_per_hour': 3600 * 1000,
+                'max_workers': 16,
+            })
+
+        with distiller("serial") as serial:
+            _, serial_s = timed(lambda: [serial.distill(r) for r in repos[:25]])
+        serial_s *= REPO_COUNT / 25
+
+        with distiller("batch") as batch:
+            results, batch_s = timed(batch.batch_distill, repos)
+            connections = batch.client.stats['connections']
+        with distiller("batch") as rerun:
+            _, rerun_s = timed(rerun.batch_distill, repos)
+
+    with capsys.disabled():
+        print(f"\n[batch_distill] {REPO_COUNT} repos, {LATENCY * 1000:.0f} ms/request: "
+              f"concurrent {batch_s:.1f} s ({connections} connections), "
+              f"serial ~{serial_s:.1f} s (extrapolated), cached rerun {rerun_s:.1f} s")
+
+    assert len(results) == REPO_COUNT
+    assert connections <= 16
+    assert batch_s * 4 < serial_s
+    assert server.stats['not_modified'] == 2 * REPO_COUNT
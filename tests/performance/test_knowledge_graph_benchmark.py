@@ -0,0 +1,257 @@
+"""
+Performance Tests for SkillKnowledgeGraph queries
+
+Compares the adjacency-indexed neighborhood queries (10k node / 200k edge
+graph) and LSH-blocked relation inference with the previous full scans.
+
+Run with -s to see the measured latency:
+    python -m pytest tests/performance/test_knowledge_graph_benchmark.py -s
+"""
+
+import pytest
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mindsymphony" / "extensions" / "github_skills"))
+
+from skill_knowledge_graph import RelationType, SkillKnowledgeGraph, SkillNode, SkillRelation
+
+
+NODE_COUNT = 10000
+EDGE_COUNT = 200000
+
+
+def build_graph(storage_path, node_count=NODE_COUNT, edge_count=EDGE_COUNT):
+    """直接注入节点和关系（避免每次变更都写存储文件）"""
+    rng = random.Random(0)
+    graph = SkillKnowledgeGraph(storage_path=str(storage_path))
+    ids = []
+    for i in range(node_count):
+        node = SkillNode(id=f"n{i}", name=f"skill-{i}", source=f"repo-{i % 500}",
+                         tags=[f"tag-{rng.randrange(200)}" for _ in range(3)],
+                         success_rate=rng.random())
+        graph.nodes[node.id] = node
+        ids.append(node.id)
+
+    types = list(RelationType)
+    while len(graph.relations) < edge_count:
+        graph._index_relation(SkillRelation(
+            source_id=rng.choice(ids),
+            target_id=rng.choice(ids),
+            relation_type=rng.choice(types),
+            strength=round(rng.random(), 2),
+        ))
+    return graph, ids
+
+
+def legacy_related(graph, skill_id, relation_type=None, min_strength=0.0):
+    """旧实现: 扫描全部关系"""
+    results = []
+    for rel in graph.relations:
+        if rel.source_id == skill_id and rel.strength >= min_strength:
+            if relation_type is None or rel.relation_type == relation_type:
+                target = graph.nodes.get(rel.target_id)
+                if target:
+                    results.append((target, rel))
+    return sorted(results, key=lambda x: x[1].strength, reverse=True)
+
+
+def legacy_recommend(graph, skill_ids):
+    scores = {}
+    for skill_id in skill_ids:
+        if skill_id not in graph.nodes:
+            continue
+        for related_skill, relation in legacy_related(graph, skill_id):
+            if related_skill.id in skill_ids:
+                continue
+            score = relation.strength
+            if relation.relation_type == RelationType.COMPOSES:
+                score *= 1.5
+            elif relation.relation_type == RelationType.RELATED:
+                score *= 1.2
+            score *= (0.5 + 0.5 * related_skill.success_rate)
+            scores[related_skill.id] = scores.get(related_skill.id, 0) + score
+    sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    return [graph.nodes[sid] for sid, _ in sorted_scores[:10]]
+
+
+def legacy_compositions(graph, target_skill_id):
+    return [
+        [graph.nodes[rel.source_id]] for rel in graph.relations
+        if rel.target_id == target_skill_id and rel.relation_type == RelationType.COMPOSES
+        and rel.source_id in graph.nodes
+    ]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+@pytest.fixture(scope="module")
+def graph(tmp_path_factory):
+    return build_graph(tmp_path_factory.mktemp("graph") / "skill_graph.json")
+
+
+@pytest.mark.performance
+class TestKnowledgeGraphBenchmark:
+    """Measure neighborhood queries against the full relation scan."""
+
+    def test_dedup_index(self, graph):
+        graph, _ = graph
+        keys = {(r.source_id, r.target_id, r.relation_type) for r in graph.relations}
+        assert len(keys) == len(graph.relations) == EDGE_COUNT
+
+    def test_neighborhood_queries(self, graph, capsys):
+        graph, ids = graph
+        rng = random.Random(1)
+        queries = rng.sample(ids, 50)
+        seeds = [rng.sample(ids, 20) for _ in range(10)]
+
+        # 结果与全量扫描一致
+        for skill_id in queries[:10]:
+            assert graph.get_related_skills(skill_id) == legacy_related(graph, skill_id)
+            assert (graph.get_related_skills(skill_id, RelationType.DEPENDS, 0.5)
+                    == legacy_related(graph, skill_id, RelationType.DEPENDS, 0.5))
+            assert graph.find_skill_compositions(skill_id) == legacy_compositions(graph, skill_id)
+        for seed in seeds[:3]:
+            assert graph.recommend_skills(seed) == legacy_recommend(graph, seed)
+
+        timings = {}
+        for name, new, old, args in (
+            ("get_related_skills", graph.get_related_skills, legacy_related, [(q,) for q in queries]),
+            ("find_skill_compositions", graph.find_skill_compositions, legacy_compositions, [(q,) for q in queries]),
+            ("recommend_skills(k=20)", graph.recommend_skills, legacy_recommend, [(s,) for s in seeds]),
+        ):
+            new_ms = sum(timed(new, *a)[1] for a in args) / len(args)
+            old_ms = sum(timed(old, graph, *a)[1] for a in args) / len(args)
+            timings[name] = (new_ms, old_ms)
+
+        lineage_ms = sum(timed(graph.get_skill_lineage, q)[1] for q in queries) / len(queries)
+
+        with capsys.disabled():
+            print(f"\n[graph] {NODE_COUNT} nodes / {EDGE_COUNT} edges")
+            for name, (new_ms, old_ms) in timings.items():
+                print(f"  {name:<24} indexed {new_ms:.3f} ms, scan {old_ms:.1f} ms")
+            print(f"  {'get_skill_lineage':<24} indexed {lineage_ms:.3f} ms")
+
+        for new_ms, old_ms in timings.values():
+            assert new_ms * 10 < old_ms
+
+
+def legacy_auto_pairs(graph):
+    """旧 auto_create_relations: 两两比较全部节点"""
+    pairs = 0
+    skills = list(graph.nodes.values())
+    for i, skill1 in enumerate(skills):
+        for skill2 in skills[i+1:]:
+            if graph._calculate_similarity(skill1, skill2) > 0.7:
+                pairs += 1
+            if skill1.source == skill2.source and skill1.source != 'manual':
+                pairs += 1
+    return pairs
+
+
+@pytest.mark.performance
+def test_auto_create_relations(tmp_path, capsys):
+    rng = random.Random(2)
+    tags = [f"tag-{i}" for i in range(60)]
+
+    def add_nodes(graph, start, count):
+        for i in range(start, start + count):
+            graph.add_skill(SkillNode(id=f"n{i}", name=f"skill-{i}", source=f"repo-{i % 700}",
+                                      tags=rng.sample(tags, rng.randint(1, 4))))
+
+    graph = SkillKnowledgeGraph(storage_path=str(tmp_path / "skill_graph.json"),
+                                flush_interval=None, batch_size=100000)
+    add_nodes(graph, 0, 2000)
+
+    # 统计相似度计算次数（与机器负载无关）
+    comparisons = [0]
+    calculate_similarity = graph._calculate_similarity
+
+    def counting_similarity(skill1, skill2):
+        comparisons[0] += 1
+        return calculate_similarity(skill1, skill2)
+
+    graph._calculate_similarity = counting_similarity
+    _, lsh_ms = timed(graph.auto_create_relations)
+    lsh_comparisons = comparisons[0]
+
+    graph._calculate_similarity = calculate_similarity
+    _, legacy_ms = timed(legacy_auto_pairs, graph)
+
+    graph._calculate_similarity = counting_similarity
+    add_nodes(graph, 2000, 30)
+    _, incremental_ms = timed(graph.auto_create_relations, True)
+    incremental_comparisons = comparisons[0] - lsh_comparisons
+
+    all_pairs = 2000 * 1999 // 2
+    with capsys.disabled():
+        print(f"\n[auto_create_relations] 2000 nodes: lsh {lsh_ms:.0f} ms ({lsh_comparisons} comparisons), "
+              f"pairwise scan {legacy_ms:.0f} ms ({all_pairs} comparisons); "
+              f"+30 nodes incremental {incremental_ms:.1f} ms ({incremental_comparisons} comparisons)")
+
+    assert lsh_comparisons * 20 < all_pairs
+    assert incremental_comparisons * 20 < lsh_comparisons
+
+
+def legacy_search(graph, query, limit=10):
+    """旧 search: 对每个节点做子串匹配"""
+    query_lower = query.lower()
+    results = []
+    for skill in graph.nodes.values():
+        score = 0.0
+        if query_lower in skill.name.lower():
+            score += 2.0
+        if skill.description and query_lower in skill.description.lower():
+            score += 1.0
+        for tag in skill.tags:
+            if query_lower in tag.lower():
+                score += 1.5
+        if query_lower in skill.source.lower():
+            score += 0.5
+        if score > 0:
+            results.append((skill, score))
+    results.sort(key=lambda x: x[1], reverse=True)
+    return [r[0] for r in results[:limit]]
+
+
+@pytest.mark.performance
+def test_search(tmp_path, capsys):
+    rng = random.Random(3)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
+             for _ in range(3000)]
+    graph = SkillKnowledgeGraph(storage_path=str(tmp_path / "skill_graph.json"),
+                                flush_interval=None, batch_size=100000)
+    count = 20000
+    _, build_ms = timed(lambda: [
+        graph.add_skill(SkillNode(
+            id=f"n{i}", name=" ".join(rng.sample(words, 2)), source=f"org/repo-{i % 800}",
+            tags=rng.sample(words[:300], 3), description=" ".join(rng.sample(words, 12)),
+        )) for i in range(count)
+    ])
+
+    queries = [rng.choice(words) for _ in range(100)]
+    tasks = [" ".join(rng.sample(words, 3)) for _ in range(100)]
+
+    # 单词查询的最高分结果与子串扫描一致
+    for query in queries[:20]:
+        expected = legacy_search(graph, query, limit=1)
+        if expected and not any(w != query and query in w for w in words):
+            assert graph.search(query, limit=1)[0].id == expected[0].id
+
+    word_ms = sum(timed(graph.search, q)[1] for q in queries) / len(queries)
+    task_ms = sum(timed(graph.search, t, 5)[1] for t in tasks) / len(tasks)
+    legacy_ms = sum(timed(legacy_search, graph, q)[1] for q in queries[:10]) / 10
+
+    with capsys.disabled():
+        print(f"\n[search] {count} nodes (indexed in {build_ms:.0f} ms): word query {word_ms:.3f} ms, "
+              f"3-word task {task_ms:.3f} ms, substring scan {legacy_ms:.1f} ms")
+
+    assert word_ms < 1.0
+    assert word_ms * 20 < legacy_ms
@@ -0,0 +1,99 @@
+"""
+Performance Tests for SkillRouter keyword routing
+
+Run with -s to see the measured latency:
+    python -m pytest tests/performance/test_router_benchmark.py -s
+"""
+
+import pytest
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "skills" / "skill_discovery"))
+
+from skill_index import SkillIndex
+from skill_metadata import SkillMetadata
+from skill_router import SkillRouter
+
+
+CJK = "设计前端界面组件文档写作报告分析研究数据流程任务项目构建生成开发工具框架测试部署优化"
+LATIN = "abcdefghijklmnopqrstuvwxyz"
+
+QUERIES = [
+    "帮我设计一个 react 前端组件并生成文档",
+    "analyze the dataset and write a research report",
+    "构建 CI 流程，部署到生产环境并做性能优化",
+]
+
+
+def random_keyword(rng):
+    if rng.random() < 0.5:
+        return "".join(rng.choice(CJK) for _ in range(rng.randint(2, 4)))
+    return "".join(rng.choice(LATIN) for _ in range(rng.randint(4, 9)))
+
+
+def build_router(root, skill_count, keywords_per_skill=8):
+    """在空目录上构建索引，再直接注入合成技能（避免解析上万个文件）"""
+    rng = random.Random(skill_count)
+    index = SkillIndex(str(root))
+    for i in range(skill_count):
+        metadata = SkillMetadata(str(root / f"skill-{i}"))
+        metadata.metadata["triggers"] = [{
+            "level": rng.choice(["high", "medium", "low"]),
+            "keywords": [random_keyword(rng) for _ in range(keywords_per_skill)],
+        }]
+        index.skills[metadata.skill_name] = metadata
+        index._add_to_indexes(metadata.skill_name, metadata)
+    return SkillRouter(index)
+
+
+def linear_scan(router, user_input):
+    """旧实现: 对每个关键词做子串查找"""
+    user_input_lower = user_input.lower()
+    skill_scores = defaultdict(int)
+    for keyword, skills_info in router._keyword_index.items():
+        if keyword in user_input_lower:
+            for skill_name, score, _ in skills_info:
+                skill_scores[skill_name] += score
+    return dict(skill_scores)
+
+
+def per_query_us(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in QUERIES:
+            fn(query)
+    return (time.perf_counter() - start) / (rounds * len(QUERIES)) * 1e6
+
+
+@pytest.mark.performance
+class TestRouterBenchmark:
+    """Compare automaton keyword routing with the linear substring scan."""
+
+    @pytest.mark.parametrize("skill_count", [100, 1000, 10000])
+    def test_keyword_routing_scales_with_input(self, temp_directory, skill_count):
+        router = build_router(temp_directory, skill_count)
+
+        # 结果与线性扫描一致
+        for query in QUERIES:
+            result = router._match_by_keywords(query)
+            expected = linear_scan(router, query)
+            if expected:
+                assert result.primary in expected
+                assert min(expected[result.primary], 100) == result.confidence
+                assert expected[result.primary] == max(expected.values())
+            else:
+                assert result is None
+
+        rounds = max(1, 20000 // skill_count)
+        automaton = per_query_us(router._match_by_keywords, rounds)
+        linear = per_query_us(lambda q: linear_scan(router, q), rounds)
+        print(f"\n[router] {skill_count:>6} skills: automaton {automaton:.1f} us, "
+              f"linear {linear:.1f} us per query")
+
+        if skill_count >= 1000:
+            assert automaton < linear
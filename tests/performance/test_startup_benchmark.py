@@ -0,0 +1,139 @@
+"""
+Performance Tests for SkillDiscovery cold start
+
+Compares a full scan (parse every SKILL.md) with starting from the binary
+index snapshot and routing one query, as a CLI invocation would, and reports
+the per-phase timings of the bulk metadata loader.
+
+Run with -s to see the measured startup time:
+    python -m pytest tests/performance/test_startup_benchmark.py -s
+"""
+
+import os
+import pytest
+import random
+import re
+import time
+import yaml
+from pathlib import Path
+
+
+CJK = "设计前端界面组件文档写作报告分析研究数据流程任务项目构建生成开发工具框架测试部署优化"
+QUERY = "帮我设计一个 react 前端组件并生成文档"
+
+
+def write_skills(root, skill_count):
+    rng = random.Random(skill_count)
+    for i in range(skill_count):
+        skill_dir = root / f"skill-{i}"
+        skill_dir.mkdir()
+        keywords = ["".join(rng.choice(CJK) for _ in range(rng.randint(2, 4))) for _ in range(6)]
+        (skill_dir / "SKILL.md").write_text(
+            f"---\nname: skill-{i}\ndescription: 合成技能 {i} 用于启动基准\n"
+            f"category: {rng.choice(['design', 'document', 'workflow'])}\n"
+            f"tags: [tag-{i % 50}, tag-{i % 7}]\n"
+            f"triggers:\n  - level: high\n    keywords: [{', '.join(keywords)}]\n---\n",
+            encoding="utf-8"
+        )
+        if i % 5 == 0:
+            (skill_dir / "INTEROP.yml").write_text(
+                f"collaboration:\n  sequential:\n    - skill: skill-{(i + 1) % skill_count}\n",
+                encoding="utf-8"
+            )
+
+    # 技能文件早于快照
+    past = time.time() - 60
+    for path in root.glob("*/*"):
+        os.utime(path, (past, past))
+    os.utime(root, (past, past))
+
+
+def legacy_load_all(skills_root):
+    """旧实现: 逐个技能 exists 检查，读取整个 SKILL.md 后正则提取，yaml.safe_load 解析"""
+    skills = {}
+    for item in os.listdir(skills_root):
+        skill_dir = os.path.join(skills_root, item)
+        skill_md = os.path.join(skill_dir, "SKILL.md")
+        if not os.path.isdir(skill_dir) or not os.path.exists(skill_md):
+            continue
+
+        metadata = {}
+        with open(skill_md, encoding="utf-8") as f:
+            match = re.match(r"^---\n(.*?)\n---", f.read(), re.DOTALL)
+        if match:
+            metadata.update(yaml.safe_load(match.group(1)) or {})
+        interop_yml = os.path.join(skill_dir, "INTEROP.yml")
+        if os.path.exists(interop_yml):
+            with open(interop_yml, encoding="utf-8") as f:
+                metadata.update(yaml.safe_load(f))
+
+        metadata["name"] = metadata.get("name", item)
+        metadata["_mtime"] = os.path.getmtime(skill_md)
+        metadata["_path"] = skill_dir
+        skills[metadata["name"]] = metadata
+    return skills
+
+
+def start_and_route(SkillDiscovery, root, **kwargs):
+    start = time.perf_counter()
+    discovery = SkillDiscovery(str(root), cache_path="skill_index.json", **kwargs)
+    result = discovery.route(QUERY)
+    return (time.perf_counter() - start) * 1000, discovery, result
+
+
+@pytest.mark.performance
+class TestStartupBenchmark:
+    """Measure cold start from a snapshot against a full scan."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory, monkeypatch, project_root, capsys):
+        monkeypatch.syspath_prepend(str(project_root / "skills"))
+        monkeypatch.chdir(temp_directory)
+        from skill_discovery import SkillDiscovery
+        self.SkillDiscovery = SkillDiscovery
+        self.root = temp_directory / "skills"
+        self.root.mkdir()
+
+    @pytest.mark.parametrize("skill_count", [100, 1000])
+    def test_snapshot_start(self, skill_count, capsys):
+        write_skills(self.root, skill_count)
+
+        scan_ms, built, expected = start_and_route(self.SkillDiscovery, self.root)
+        verified_ms, verified, result = start_and_route(self.SkillDiscovery, self.root)
+        trusted_ms, trusted, trusted_result = start_and_route(
+            self.SkillDiscovery, self.root, verify_snapshot=False
+        )
+
+        # 两次都从快照启动，结果与全量扫描一致，且只解码了少量技能
+        for discovery, routed in ((verified, result), (trusted, trusted_result)):
+            assert discovery.index.skills.decoded_count < skill_count
+            assert routed.to_dict() == expected.to_dict()
+
+        snapshot_kb = built.cache_manager.snapshot_path.stat().st_size / 1024
+        with capsys.disabled():
+            print(f"\n[startup] {skill_count:>5} skills: scan {scan_ms:.1f} ms, "
+                  f"snapshot {verified_ms:.1f} ms (verified) / {trusted_ms:.1f} ms (trusted), "
+                  f"snapshot size {snapshot_kb:.0f} KiB")
+
+        assert verified_ms < scan_ms
+        assert trusted_ms < scan_ms
+
+    def test_bulk_load_phases(self, capsys):
+        from skill_metadata import YAML_LOADER, load_all_skills
+
+        write_skills(self.root, 1000)
+
+        start = time.perf_counter()
+        legacy = legacy_load_all(str(self.root))
+        legacy_ms = (time.perf_counter() - start) * 1000
+
+        timings = {}
+        skills = load_all_skills(str(self.root), timings=timings)
+        assert {name: m.to_dict() for name, m in skills.items()} == legacy
+
+        with capsys.disabled():
+            phases = ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in timings.items())
+            print(f"\n[load] 1000 skills ({YAML_LOADER.__name__}): "
+                  f"legacy {legacy_ms:.1f} ms, bulk {phases}")
+
+        assert timings["total"] * 1000 < legacy_ms
@@ -0,0 +1,143 @@
+"""
+Unit Tests for GitHubSkillDistiller batch distillation
+"""
+
+import pytest
+import sys
+import time
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mindsymphony" / "extensions" / "github_skills"))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from github_skill_distiller import GitHubAPIError, GitHubSkillDistiller, TokenBucket
+from utils.github_stub import GitHubStubServer
+
+
+def make_distiller(server, cache_dir, **config):
+    config.setdefault('requests_per_hour', 3600 * 1000)
+    return GitHubSkillDistiller({'api_url': server.url, 'cache_dir': str(cache_dir), **config})
+
+
+def comparable(result):
+    return (result.skill_name, result.source_repo, result.confidence, result.patterns,
+            result.metadata['source'], result.metadata['extraction'])
+
+
+@pytest.mark.unit
+class TestBatchDistill:
+    """Concurrent batch distillation against a local stub API."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.cache_dir = temp_directory / "cache"
+        with GitHubStubServer() as server:
+            self.server = server
+            yield
+
+    def test_fetches_repo_data_from_api(self):
+        with make_distiller(self.server, self.cache_dir, github_token="secret") as distiller:
+            result = distiller.distill("octo/tools")
+
+        assert result.metadata['source']['stars'] == 50
+        assert result.metadata['source']['license'] == 'MIT'
+        assert result.skill_name == "tools-workflow"
+        assert self.server.auth_headers == {"Bearer secret"}
+
+    def test_batch_matches_serial_and_keeps_order(self):
+        repos = [f"octo/repo-{i}" for i in range(20)] + ["octo/missing-1", "octo/repo-3"]
+        self.server.slow_repos["repo-0"] = 0.2
+
+        with make_distiller(self.server, self.cache_dir, max_workers=4) as distiller:
+            batch = distiller.batch_distill(repos)
+            serial = [distiller.distill(repo) for repo in repos if "missing" not in repo]
+
+        assert [comparable(r) for r in batch] == [comparable(r) for r in serial]
+        # 连接在线程间复用，数量不超过并发数
+        assert distiller.client.stats['connections'] <= 4
+
+    def test_results_stream_as_they_complete(self):
+        self.server.slow_repos["repo-0"] = 0.5
+        repos = [f"octo/repo-{i}" for i in range(5)]
+
+        with make_distiller(self.server, self.cache_dir, max_workers=5) as distiller:
+            stream = list(distiller.iter_distill(repos))
+
+        assert [repo for repo, _, _ in stream][-1] == "octo/repo-0"
+        assert all(result is not None and error is None for _, result, error in stream)
+
+    def test_errors_are_reported(self):
+        self.server.missing_readmes.add("no-readme")
+        with make_distiller(self.server, self.cache_dir) as distiller:
+            stream = dict((repo, (result, error)) for repo, result, error
+                          in distiller.iter_distill(["octo/missing-x", "octo/no-readme"]))
+
+        result, error = stream["octo/missing-x"]
+        assert result is None and isinstance(error, GitHubAPIError) and error.status == 404
+        result, error = stream["octo/no-readme"]
+        assert error is None and result.metadata['extraction']['readme_sections'] == 0
+
+    def test_rerun_uses_conditional_cache(self):
+        repos = [f"octo/repo-{i}" for i in range(10)]
+        with make_distiller(self.server, self.cache_dir) as distiller:
+            first = distiller.batch_distill(repos)
+        assert self.server.stats['not_modified'] == 0
+
+        # 新实例（模拟重新运行）只收到 304，且 304 不消耗令牌
+        with make_distiller(self.server, self.cache_dir, requests_per_hour=3600, rate_burst=1) as distiller:
+            start = time.perf_counter()
+            second = distiller.batch_distill(repos)
+            elapsed = time.perf_counter() - start
+
+        assert self.server.stats['not_modified'] == 20
+        assert [comparable(r) for r in second] == [comparable(r) for r in first]
+        assert elapsed < 2.0
+
+    def test_retry_after_is_honored(self):
+        self.server.throttled = 2
+        with make_distiller(self.server, self.cache_dir, max_workers=1) as distiller:
+            start = time.perf_counter()
+            result = distiller.distill("octo/tools")
+            elapsed = time.perf_counter() - start
+
+        assert result.metadata['source']['stars'] == 50
+        assert distiller.client.stats[429] == 2
+        assert elapsed >= 0.35
+
+    def test_mock_data_without_api_config(self, temp_directory, monkeypatch):
+        # 环境中的 token 不会让已有调用方切换到网络请求
+        monkeypatch.setenv("GITHUB_TOKEN", "from-env")
+        distiller = GitHubSkillDistiller({'cache_dir': str(temp_directory)})
+        assert not distiller.use_github_api
+        assert distiller.distill("octo/offline").metadata['source']['stars'] == 1000
+
+    def test_env_token_is_used_when_api_is_enabled(self, monkeypatch):
+        monkeypatch.setenv("GITHUB_TOKEN", "from-env")
+        with make_distiller(self.server, self.cache_dir) as distiller:
+            distiller.distill("octo/tools")
+        assert self.server.auth_headers == {"Bearer from-env"}
+
+
+@pytest.mark.unit
+class TestTokenBucket:
+    """Token bucket rate limiter."""
+
+    def test_limits_rate_after_burst(self):
+        bucket = TokenBucket(rate=50, capacity=5)
+        start = time.perf_counter()
+        for _ in range(15):
+            bucket.acquire()
+        elapsed = time.perf_counter() - start
+
+        # 前 5 个立即发放，其余 10 个按 50/秒
+        assert 0.18 <= elapsed < 0.5
+
+    def test_refund_and_pause(self):
+        bucket = TokenBucket(rate=1000, capacity=1)
+        bucket.acquire()
+        bucket.refund()
+        bucket.pause(0.2)
+        start = time.perf_counter()
+        bucket.acquire()
+        assert time.perf_counter() - start >= 0.18
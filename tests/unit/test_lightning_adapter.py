@@ -0,0 +1,105 @@
+"""
+Unit Tests for the Lightning MindSymphony Adapter
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from mindsymphony.lightning.integrations.mindsymphony_adapter import MindSymphonyAdapter
+from mindsymphony.lightning.tracer.core import LightningTracer
+
+
+@pytest.mark.unit
+class TestPromptCache:
+    """Test cached prompt resolution in get_optimized_prompt."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.adapter = MindSymphonyAdapter({'db_path': str(temp_directory / "store.db")})
+        self.store = self.adapter.store
+        self.v1 = self.store.store_prompt_version("skill-a", "prompt v1", is_active=True)
+
+    def count_queries(self, monkeypatch):
+        calls = {"active": 0}
+        original = self.store.get_active_prompt
+
+        def counting(skill_name):
+            calls["active"] += 1
+            return original(skill_name)
+
+        monkeypatch.setattr(self.store, "get_active_prompt", counting)
+        return calls
+
+    def test_steady_state_is_cached(self, monkeypatch):
+        calls = self.count_queries(monkeypatch)
+        for _ in range(50):
+            assert self.adapter.get_optimized_prompt("skill-a") == "prompt v1"
+        assert calls["active"] == 1
+
+    def test_set_active_prompt_invalidates(self):
+        assert self.adapter.get_optimized_prompt("skill-a") == "prompt v1"
+        v2 = self.store.store_prompt_version("skill-a", "prompt v2", is_candidate=True)
+        # 另一个 store 实例（如 APO 内部的）切换版本也应使缓存失效
+        self.adapter.apo._get_store().set_active_prompt(v2)
+        assert self.adapter.get_optimized_prompt("skill-a") == "prompt v2"
+
+    def test_ab_test_and_deploy_invalidate(self, monkeypatch):
+        assert self.adapter.get_optimized_prompt("skill-a") == "prompt v1"
+        v2 = self.store.store_prompt_version("skill-a", "prompt v2", is_candidate=True)
+
+        apo = self.adapter.apo
+        apo.ab_test_config['traffic_split'] = 1.0
+        assert apo.start_ab_test("skill-a", v2)
+        assert self.adapter.get_optimized_prompt("skill-a") == "prompt v2"
+
+        apo.ab_test_config['traffic_split'] = 0.0
+        assert self.adapter.get_optimized_prompt("skill-a") == "prompt v1"
+
+        assert apo.deploy_candidate("skill-a", v2)
+        assert apo.get_active_tests() == {}
+        assert self.adapter.get_optimized_prompt("skill-a") == "prompt v2"
+
+    def test_start_ab_test_rejects_unknown_candidate(self):
+        assert not self.adapter.apo.start_ab_test("skill-a", "missing")
+        assert not self.adapter.apo.start_ab_test("skill-b", self.v1)
+
+
+@pytest.mark.unit
+class TestFeedbackRewards:
+    """Feedback recorded through the adapter reaches skill priorities."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        db_path = str(temp_directory / "store.db")
+        self.adapter = MindSymphonyAdapter({'db_path': db_path})
+        # 全局 tracer 可能指向其他数据库，这里让 span 与奖励写入同一个库
+        self.adapter.tracer = LightningTracer({'db_path': db_path})
+        self.adapter._check_apo_trigger = lambda skill_name: None
+        yield
+        self.adapter.tracer.shutdown()
+
+    def test_feedback_is_linked_to_last_skill_invocation(self):
+        @self.adapter.trace_skill("good-skill")
+        def good():
+            return "ok"
+
+        @self.adapter.trace_skill("bad-skill")
+        def bad():
+            return "meh"
+
+        for _ in range(3):
+            good()
+            self.adapter.record_feedback("thumbs_up")
+            bad()
+            self.adapter.record_feedback("thumbs_down")
+        self.adapter.tracer.flush()
+
+        priorities = {p["skill_name"]: p for p in self.adapter.store.get_skill_priorities()}
+        assert priorities["good-skill"]["avg_reward"] > 0
+        assert priorities["bad-skill"]["avg_reward"] < 0
+        assert priorities["bad-skill"]["priority"] > priorities["good-skill"]["priority"]
+
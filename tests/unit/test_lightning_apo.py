@@ -0,0 +1,244 @@
+"""
+Unit Tests for the Lightning APO Pipeline
+"""
+
+import pytest
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from mindsymphony.lightning.apo.pipeline import APOPipeline
+from mindsymphony.lightning.apo.scheduler import APOScheduler
+
+
+@pytest.mark.unit
+class TestAPOScheduler:
+    """Test bounded, deduplicated APO scheduling."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.apo = APOPipeline({'db_path': str(temp_directory / "store.db")})
+
+    def test_single_flight_per_skill(self):
+        scheduler = APOScheduler(self.apo, {'max_workers': 2})
+        release = threading.Event()
+        calls = []
+
+        def slow(skill_name):
+            calls.append(skill_name)
+            release.wait(5)
+            return skill_name
+
+        first, is_new = scheduler.submit("skill-a", slow, "skill-a")
+        second, second_new = scheduler.submit("skill-a", slow, "skill-a")
+        assert is_new and not second_new
+        assert first is second
+
+        release.set()
+        assert first.result(5) == "skill-a"
+        assert calls == ["skill-a"]
+        assert scheduler.get_stats()["tasks_deduplicated"] == 1
+        scheduler.shutdown()
+
+    def test_concurrency_is_bounded(self):
+        scheduler = APOScheduler(self.apo, {'max_workers': 2})
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def work(skill_name):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+            return skill_name
+
+        skills = [f"skill-{i}" for i in range(8)]
+        assert scheduler.run_all(skills, work) == skills
+        assert state["peak"] <= 2
+        assert scheduler.get_stats()["queue_depth"] == 0
+        scheduler.shutdown()
+
+    def test_run_all_stops_waiting_at_deadline(self):
+        scheduler = APOScheduler(self.apo, {'max_workers': 1})
+        release = threading.Event()
+        started = []
+
+        def slow(skill_name):
+            started.append(skill_name)
+            release.wait(5)
+            return skill_name
+
+        results = scheduler.run_all(
+            ["skill-a", "skill-b"], slow,
+            deadline=time.monotonic() + 0.1,
+            timeout_result=lambda skill_name: ("timeout", skill_name)
+        )
+        assert results == [("timeout", "skill-a"), ("timeout", "skill-b")]
+
+        # 排队中的 skill-b 被取消；执行中的 skill-a 在后台完成
+        stats = scheduler.get_stats()
+        assert stats["tasks_timed_out"] == 2
+        assert stats["queue_depth"] == 0 and stats["inflight"] == 1
+        release.set()
+        scheduler.shutdown()
+        assert started == ["skill-a"]
+        assert scheduler.get_stats()["tasks_completed"] == 1
+
+    def test_shutdown_cancels_queued_tasks(self):
+        scheduler = APOScheduler(self.apo, {'max_workers': 1})
+        release = threading.Event()
+        started = []
+
+        def slow(skill_name):
+            started.append(skill_name)
+            release.wait(5)
+
+        running, _ = scheduler.submit("skill-a", slow, "skill-a")
+        queued = [scheduler.submit(f"skill-{i}", slow, f"skill-{i}")[0] for i in range(3)]
+        while not started:
+            time.sleep(0.01)
+
+        scheduler.shutdown(wait=False, cancel_futures=True)
+        assert all(f.cancelled() for f in queued)
+        assert scheduler.get_stats()["queue_depth"] == 0
+
+        release.set()
+        running.result(5)
+        assert started == ["skill-a"]
+
+    def test_interpreter_exit_does_not_drain_queue(self):
+        script = (
+            "import sys, time\n"
+            f"sys.path.insert(0, {str(Path(__file__).parent.parent.parent)!r})\n"
+            "from mindsymphony.lightning.apo.scheduler import APOScheduler\n"
+            "scheduler = APOScheduler(None, {'max_workers': 1})\n"
+            "for i in range(10):\n"
+            "    scheduler.submit(f'skill-{i}', time.sleep, 0.5)\n"
+        )
+        started = time.monotonic()
+        subprocess.run([sys.executable, "-c", script], check=True, timeout=30)
+        # 只等待正在执行的一个任务，而不是排队的 10 个
+        assert time.monotonic() - started < 3
+
+    def test_trigger_checks_are_debounced(self, monkeypatch):
+        scheduler = APOScheduler(self.apo, {'min_check_interval': 60})
+        checks = []
+        monkeypatch.setattr(
+            self.apo, "check_optimization_trigger",
+            lambda skill_name: checks.append(skill_name) or (False, "ok")
+        )
+
+        future = scheduler.maybe_trigger("skill-a")
+        future.result(5)
+        for _ in range(10):
+            assert scheduler.maybe_trigger("skill-a") is None
+
+        assert checks == ["skill-a"]
+        assert scheduler.get_stats()["checks_debounced"] == 10
+        scheduler.shutdown()
+
+    def test_optimization_cycle_runs_through_scheduler(self, monkeypatch):
+        store = self.apo._get_store()
+        store.store_spans([
+            {"span_id": f"s{i}", "trace_id": "t", "span_type": "skill_invocation",
+             "name": "skill-a", "start_time": time.time() - 60, "status": "ok"}
+            for i in range(25)
+        ])
+        monkeypatch.setattr(self.apo, "check_optimization_trigger", lambda s: (False, "ok"))
+
+        results = self.apo.run_optimization_cycle()
+        assert [r["skill"] for r in results] == ["skill-a"]
+        assert all(r["action"] == "skip" for r in results)
+        assert self.apo.get_scheduler().get_stats()["tasks_completed"] == len(results)
+
+
+@pytest.mark.unit
+class TestActiveSkillSelection:
+    """Test data-driven skill selection for run_optimization_cycle."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.apo = APOPipeline({
+            'db_path': str(temp_directory / "store.db"),
+            'min_samples': 5,
+            'cycle_top_k': 2,
+        })
+        self.store = self.apo._get_store()
+        now = time.time()
+        spans = []
+        # (技能, 调用数, 错误数)
+        for skill, calls, errors in [("busy-bad", 100, 40), ("busy-good", 100, 1),
+                                     ("rare-bad", 10, 8), ("too-few", 3, 3)]:
+            for i in range(calls):
+                spans.append({
+                    "span_id": f"{skill}-{i}", "trace_id": "t", "span_type": "skill_invocation",
+                    "name": skill, "start_time": now - 3600,
+                    "status": "error" if i < errors else "ok",
+                })
+        self.store.store_spans(spans)
+
+    def test_priorities_from_single_aggregate(self):
+        priorities = {p["skill_name"]: p for p in self.store.get_skill_priorities(min_invocations=5)}
+        assert set(priorities) == {"busy-bad", "busy-good", "rare-bad"}
+        assert priorities["busy-bad"]["invocations"] == 100
+        assert priorities["busy-bad"]["error_count"] == 40
+        assert priorities["busy-good"]["avg_reward"] is None
+
+    def test_rewards_lower_priority(self):
+        before = {p["skill_name"]: p["priority"] for p in self.store.get_skill_priorities()}
+        for i in range(10):
+            self.store.store_reward({
+                "episode_id": f"ep-{i}", "span_id": f"busy-bad-{i}",
+                "reward_type": "user_feedback", "reward_value": 1.0,
+                "timestamp": time.time(),
+            })
+        after = {p["skill_name"]: p["priority"] for p in self.store.get_skill_priorities()}
+        assert after["busy-bad"] < before["busy-bad"]
+        assert after["busy-good"] == before["busy-good"]
+
+    def test_cycle_selects_top_k_by_priority(self, monkeypatch):
+        checked = []
+        monkeypatch.setattr(
+            self.apo, "check_optimization_trigger",
+            lambda skill_name: checked.append(skill_name) or (False, "ok")
+        )
+        results = self.apo.run_optimization_cycle()
+        assert [r["skill"] for r in results] == ["busy-bad", "rare-bad"]
+        assert results[0]["priority"] > results[1]["priority"]
+        assert sorted(checked) == ["busy-bad", "rare-bad"]
+
+    def test_cycle_respects_time_budget(self, monkeypatch):
+        self.apo.cycle_config["time_budget_s"] = -1
+        monkeypatch.setattr(
+            self.apo, "check_optimization_trigger",
+            lambda skill_name: pytest.fail("budget exceeded, should not check")
+        )
+        results = self.apo.run_optimization_cycle()
+        assert results and all(r["reason"] == "超出周期时间预算" for r in results)
+        assert {r["action"] for r in results} <= {"skip", "timeout"}
+
+    def test_cycle_does_not_wait_past_budget(self, monkeypatch):
+        self.apo.cycle_config["time_budget_s"] = 0.2
+        release = threading.Event()
+        monkeypatch.setattr(
+            self.apo, "check_optimization_trigger",
+            lambda skill_name: release.wait(5) and (False, "ok")
+        )
+
+        start = time.monotonic()
+        results = self.apo.run_optimization_cycle()
+        elapsed = time.monotonic() - start
+        release.set()
+
+        assert elapsed < 2
+        assert [r["action"] for r in results] == ["timeout", "timeout"]
+        assert [r["skill"] for r in results] == ["busy-bad", "rare-bad"]
+        assert results[0]["priority"] > results[1]["priority"]
+        assert self.apo.get_scheduler().get_stats()["tasks_timed_out"] == 2
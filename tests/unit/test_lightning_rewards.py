@@ -0,0 +1,261 @@
+"""
+Unit Tests for the Lightning Reward Engine
+"""
+
+import logging
+import pytest
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from mindsymphony.lightning.rewards import engine as reward_engine_module
+from mindsymphony.lightning.rewards.engine import (
+    NUMPY_AVAILABLE, RewardEngine, RewardSignal, RewardType, get_reward_engine
+)
+
+
+def make_episodes(count, seed=1):
+    rng = random.Random(seed)
+    episodes = []
+    for _ in range(count):
+        signals = []
+        for _ in range(rng.randint(0, 6)):
+            signals.append(RewardSignal(
+                reward_type=rng.choice(list(RewardType)),
+                value=rng.uniform(-1, 1),
+                confidence=rng.choice([0.0, rng.uniform(0, 1)]),
+                source="test",
+                context={},
+                timestamp=0.0
+            ))
+        episodes.append({"signals": signals})
+    return episodes
+
+
+def make_patterns(count, seed=2):
+    rng = random.Random(seed)
+    skills = [f"skill-{i}" for i in range(12)]
+    return [{"skills": rng.sample(skills, rng.randint(0, 4))} for _ in range(count)]
+
+
+@pytest.mark.unit
+class TestBatchRewards:
+    """Test batch reward computation against the per-episode API."""
+
+    @pytest.fixture(autouse=True, params=[False, True], ids=["python", "numpy"])
+    def setup(self, request):
+        if request.param and not NUMPY_AVAILABLE:
+            pytest.skip("numpy not installed")
+        self.engine = RewardEngine({"use_numpy": request.param})
+        assert self.engine.use_numpy is request.param
+
+    def test_total_rewards_match_single(self):
+        episodes = make_episodes(500)
+        batch = self.engine.compute_total_rewards(episodes)
+        assert len(batch) == len(episodes)
+
+        for episode, result in zip(episodes, batch):
+            expected = self.engine.compute_total_reward(episode)
+            assert result["total_reward"] == pytest.approx(expected["total_reward"])
+            assert result["confidence"] == pytest.approx(expected["confidence"])
+            assert result["signal_counts"] == expected["signal_counts"]
+            for key, value in expected["by_type"].items():
+                assert result["by_type"][key] == pytest.approx(value)
+
+    def test_total_rewards_accept_dict_signals(self):
+        signal = {"reward_type": "explicit", "value": 1.0, "confidence": 1.0,
+                  "source": "explicit:thumbs_up", "context": {}, "timestamp": 0.0}
+        result = self.engine.compute_total_rewards([{"signals": [signal]}, {"signals": []}])
+        assert result[0]["total_reward"] == pytest.approx(1.0 / 2.0)
+        assert result[1]["total_reward"] == 0.0
+
+    @pytest.mark.parametrize("history_size", [0, 30, 250])
+    def test_novelty_rewards_match_sequential(self, history_size):
+        history = make_patterns(history_size, seed=3)
+        patterns = make_patterns(700)
+        batch = self.engine.compute_novelty_rewards(patterns, history)
+
+        seen = list(history)
+        for pattern, signal in zip(patterns, batch):
+            expected = self.engine.compute_novelty_reward(pattern, seen)
+            assert signal.value == expected.value
+            assert signal.confidence == pytest.approx(expected.confidence)
+            assert signal.context == pytest.approx(expected.context)
+            seen.append(pattern)
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")
+class TestNumpyMatchesPython:
+    """The numpy and pure-Python batch paths give the same results."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.python = RewardEngine({"use_numpy": False})
+        self.numpy = RewardEngine({"use_numpy": True})
+
+    def test_total_rewards(self):
+        episodes = make_episodes(500, seed=4)
+        for a, b in zip(self.python.compute_total_rewards(episodes), self.numpy.compute_total_rewards(episodes)):
+            assert a["total_reward"] == pytest.approx(b["total_reward"])
+            assert a["confidence"] == pytest.approx(b["confidence"])
+            assert a["signal_counts"] == b["signal_counts"]
+            assert a["by_type"] == pytest.approx(b["by_type"])
+
+    def test_novelty_rewards(self):
+        history = make_patterns(100, seed=5)
+        patterns = make_patterns(700, seed=6)
+        for a, b in zip(self.python.compute_novelty_rewards(patterns, history),
+                        self.numpy.compute_novelty_rewards(patterns, history)):
+            assert a.value == b.value
+            assert a.confidence == pytest.approx(b.confidence)
+            assert a.context == pytest.approx(b.context)
+
+
+@pytest.mark.unit
+class TestInteractionHistory:
+    """Test the bounded, persistent interaction history."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.config = {
+            'db_path': str(temp_directory / "store.db"),
+            'persist_history': True,
+            'max_history': 50,
+        }
+
+    def test_history_is_bounded_ring_buffer(self):
+        engine = RewardEngine({'max_history': 10})
+        for i in range(25):
+            engine.extract_implicit_signals("thanks, done", {"session_id": f"s{i % 2}"})
+
+        assert len(engine._interaction_history) == 10
+        assert sum(engine._session_turns.values()) == 10
+        assert engine._session_turns == {"s0": 5, "s1": 5}
+
+    def test_summary_from_time_buckets(self):
+        engine = RewardEngine()
+        for message in ["thanks, done", "hello", "this is wrong and bad"]:
+            engine.extract_implicit_signals(message, {})
+
+        summary = engine.get_reward_summary(hours=1)
+        assert summary["total_interactions"] == 3
+        assert summary["signals_extracted"] == sum(
+            len(h["signals"]) for h in engine._interaction_history
+        )
+
+    def test_summary_window_uses_stored_buckets(self):
+        engine = RewardEngine({'summary_bucket_seconds': 1})
+        now = time.time()
+        for age_hours, count in ((0.1, 2), (3, 5), (30, 7), (200, 11)):
+            engine._summary_buckets[int(now - age_hours * 3600)] = [count, count * 2]
+
+        # 最长覆盖 168 小时
+        assert engine.get_reward_summary(hours=1)["total_interactions"] == 2
+        assert engine.get_reward_summary(hours=24)["total_interactions"] == 7
+        assert engine.get_reward_summary(hours=1000)["total_interactions"] == 14
+        assert engine.get_reward_summary(hours=1000)["signals_extracted"] == 28
+
+    def test_history_survives_restart(self):
+        engine = RewardEngine(self.config)
+        for i in range(80):
+            engine.extract_implicit_signals("why does this work?", {"session_id": "s1"})
+        summary = engine.get_reward_summary()
+
+        restored = RewardEngine(self.config)
+        assert len(restored._interaction_history) == 50
+        assert restored._session_turns == {"s1": 50}
+        assert restored.get_reward_summary() == summary
+
+        # 恢复后的会话轮数参与参与度信号
+        signals = restored.extract_implicit_signals("ok", {"session_id": "s1"})
+        assert "implicit:high_engagement" in [s.source for s in signals]
+
+    def test_restart_reads_bucket_aggregates(self):
+        engine = RewardEngine(self.config)
+        for i in range(80):
+            engine.extract_implicit_signals("thanks, done", {"session_id": "s1"})
+        summary = engine.get_reward_summary()
+
+        restored = RewardEngine({**self.config, 'persist_history': False})
+        restored.persist_history = True
+        statements = []
+        restored._get_store()._get_connection().set_trace_callback(statements.append)
+        restored._load_history()
+
+        assert restored.get_reward_summary() == summary
+        assert not [sql for sql in statements if "GROUP BY" in sql]
+
+    def test_buckets_backfilled_from_raw_interactions(self):
+        engine = RewardEngine(self.config)
+        store = engine._get_store()
+        now = time.time()
+        for i in range(6):
+            store.store_interaction({"message": "m", "context": {}, "signals": [{}] * i, "timestamp": now - i})
+
+        expected = {}
+        for i in range(6):
+            bucket = int((now - i) // 60) * 60
+            counts = expected.setdefault(bucket, [0, 0])
+            counts[0] += 1
+            counts[1] += i
+        for _ in range(2):
+            buckets = store.get_interaction_buckets(now - 3600, 60)
+            assert {b: [c, n] for b, c, n in buckets} == expected
+
+    def test_concurrent_record_and_summary(self):
+        engine = RewardEngine({'summary_bucket_seconds': 1})
+        now = time.time()
+        for i in range(5000):
+            engine._summary_buckets[int(now) - 100000 + i] = [1, 0]
+
+        errors = []
+        done = threading.Event()
+
+        def summarize():
+            try:
+                while not done.is_set():
+                    engine.get_reward_summary(hours=1000)
+            except RuntimeError as e:
+                errors.append(e)
+
+        reader = threading.Thread(target=summarize)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+        try:
+            reader.start()
+            for i in range(300):
+                engine._record_interaction({"context": {}, "signals": [], "timestamp": now + i})
+        finally:
+            done.set()
+            reader.join()
+            sys.setswitchinterval(interval)
+
+        assert errors == []
+
+
+@pytest.mark.unit
+class TestGlobalRewardEngine:
+    """get_reward_engine singleton."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, monkeypatch):
+        monkeypatch.setattr(reward_engine_module, "_default_reward_engine", None)
+
+    def test_mismatched_config_is_reported(self, caplog):
+        engine = get_reward_engine({'persist_history': False})
+
+        with caplog.at_level(logging.WARNING, logger=reward_engine_module.__name__):
+            assert get_reward_engine({'persist_history': False}) is engine
+            assert get_reward_engine() is engine
+            assert not caplog.records
+
+            assert get_reward_engine({'persist_history': True, 'db_path': None}) is engine
+        assert len(caplog.records) == 1
+        assert "persist_history=True" in caplog.records[0].getMessage()
+        assert "db_path" not in caplog.records[0].getMessage()
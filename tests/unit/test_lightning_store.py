@@ -0,0 +1,366 @@
+"""
+Unit Tests for Lightning Store
+"""
+
+import gzip
+import json
+import pytest
+import random
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from mindsymphony.lightning.store.core import LightningStore
+
+
+def make_span(i, name, start_time, status="ok", span_type="skill_invocation"):
+    return {
+        "span_id": f"span-{i}",
+        "trace_id": f"trace-{i}",
+        "span_type": span_type,
+        "name": name,
+        "start_time": start_time,
+        "duration_ms": 10.0 + i % 7,
+        "latency_ms": None if i % 5 == 0 else float(i % 97),
+        "token_count": i % 11,
+        "status": status,
+    }
+
+
+def raw_skill_stats(store, skill_name, days):
+    """Reference implementation: scan raw spans."""
+    since = time.time() - days * 86400
+    row = store._get_connection().execute("""
+        SELECT COUNT(*), SUM(CASE WHEN status = 'ok' THEN 1 ELSE 0 END),
+               AVG(duration_ms), AVG(latency_ms), AVG(token_count)
+        FROM spans
+        WHERE name = ? AND start_time > ? AND span_type = 'skill_invocation'
+    """, (skill_name, since)).fetchone()
+    return row
+
+
+@pytest.mark.unit
+class TestRollups:
+    """Test metrics rollups backing get_skill_stats / get_metrics_summary."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.store = LightningStore(str(temp_directory / "store.db"))
+        rng = random.Random(7)
+        now = time.time()
+        self.spans = [
+            make_span(
+                i,
+                rng.choice(["skill-a", "skill-b", "skill-c"]),
+                now - rng.uniform(0, 20 * 86400),
+                status="ok" if rng.random() > 0.2 else "error",
+                span_type=rng.choice(["skill_invocation", "skill_invocation", "tool_execution"]),
+            )
+            for i in range(2000)
+        ]
+        for start in range(0, len(self.spans), 250):
+            self.store.store_spans(self.spans[start:start + 250])
+
+    def test_metrics_table_is_filled(self):
+        conn = self.store._get_connection()
+        windows = {row[0] for row in conn.execute("SELECT DISTINCT time_window FROM metrics")}
+        assert {"hourly", "daily"} <= windows
+
+    @pytest.mark.parametrize("days", [1, 7, 14])
+    def test_skill_stats_match_raw_scan(self, days):
+        for skill in ["skill-a", "skill-b", "skill-c"]:
+            stats = self.store.get_skill_stats(skill, days=days)
+            count, success, avg_duration, avg_latency, avg_tokens = raw_skill_stats(
+                self.store, skill, days
+            )
+            assert stats["total_invocations"] == count
+            assert stats["success_count"] == success
+            assert stats["avg_duration_ms"] == pytest.approx(avg_duration)
+            assert stats["avg_latency_ms"] == pytest.approx(avg_latency)
+            assert stats["avg_token_count"] == pytest.approx(avg_tokens)
+
+    def test_unrolled_tail_is_included(self):
+        # 绕过 rollup 直接写入，模拟尚未汇总的尾部
+        conn = self.store._get_connection()
+        tail = [make_span(10000 + i, "skill-a", time.time() - 60) for i in range(5)]
+        with conn:
+            conn.executemany(self.store._SPAN_INSERT_SQL, [self.store._span_row(s) for s in tail])
+
+        stats = self.store.get_skill_stats("skill-a", days=7)
+        assert stats["total_invocations"] == raw_skill_stats(self.store, "skill-a", 7)[0]
+
+    def test_roll_up_takes_write_lock_before_reading_watermark(self, temp_directory, monkeypatch):
+        conn = self.store._get_connection()
+        with conn:
+            conn.executemany(self.store._SPAN_INSERT_SQL,
+                             [self.store._span_row(make_span(20000, "skill-a", time.time()))])
+        assert not conn.in_transaction
+
+        other = sqlite3.connect(str(temp_directory / "store.db"), timeout=0)
+        get_watermark = self.store.rollups.get_watermark
+        locked = []
+
+        def checking_watermark(connection):
+            try:
+                other.execute("BEGIN IMMEDIATE")
+                other.rollback()
+            except sqlite3.OperationalError:
+                locked.append(True)
+            return get_watermark(connection)
+
+        monkeypatch.setattr(self.store.rollups, "get_watermark", checking_watermark)
+        try:
+            with conn:
+                assert self.store.rollups.roll_up(conn) == 1
+        finally:
+            other.close()
+        assert locked == [True]
+
+    def test_concurrent_roll_ups_count_each_span_once(self, temp_directory):
+        conn = self.store._get_connection()
+        tail = [make_span(30000 + i, "skill-a", time.time() - 60) for i in range(50)]
+        with conn:
+            conn.executemany(self.store._SPAN_INSERT_SQL, [self.store._span_row(s) for s in tail])
+
+        # 多个实例（各自的连接）同时汇总同一段尾部
+        stores = [LightningStore(str(temp_directory / "store.db")) for _ in range(4)]
+        barrier = threading.Barrier(len(stores))
+
+        def roll_up(store):
+            barrier.wait()
+            store.get_skill_priorities()
+
+        threads = [threading.Thread(target=roll_up, args=(store,)) for store in stores]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        calls = {p["skill_name"]: p["invocations"] for p in self.store.get_skill_priorities(days=30)}
+        raw = conn.execute("""
+            SELECT name, COUNT(*) FROM spans WHERE span_type = 'skill_invocation' GROUP BY name
+        """).fetchall()
+        assert calls == dict(raw)
+
+    def test_raw_scans_use_range_indexes(self):
+        from mindsymphony.lightning.store.rollup import _raw_ranges
+        conn = self.store._get_connection()
+        plans = []
+        for table, condition, params in _raw_ranges(time.time() - 7 * 86400, time.time() - 6 * 86400, 100):
+            for extra, extra_params in (("", []), (" AND span_type = ? AND name = ?", ["skill_invocation", "skill-a"])):
+                plans.extend(row[-1] for row in conn.execute(
+                    f"EXPLAIN QUERY PLAN SELECT span_type, name, COUNT(*) FROM {table} "
+                    f"WHERE {condition}{extra} GROUP BY span_type, name", params + extra_params))
+
+        scans = [plan for plan in plans if plan.startswith(("SEARCH", "SCAN"))]
+        assert scans and all(plan.startswith("SEARCH") for plan in scans)
+        assert any("idx_spans_time" in plan for plan in scans)
+        assert any("INTEGER PRIMARY KEY" in plan for plan in scans)
+
+    def test_aggregate_reads_one_snapshot(self, temp_directory, monkeypatch):
+        conn = self.store._get_connection()
+        tail = [make_span(40000 + i, "skill-a", time.time() - 60) for i in range(20)]
+        with conn:
+            conn.executemany(self.store._SPAN_INSERT_SQL, [self.store._span_row(s) for s in tail])
+
+        # 读取水位线之后，另一个连接汇总尾部
+        other = LightningStore(str(temp_directory / "store.db"))
+        get_watermark = self.store.rollups.get_watermark
+
+        def racing_watermark(connection):
+            watermark = get_watermark(connection)
+            other.get_skill_priorities()
+            return watermark
+
+        monkeypatch.setattr(self.store.rollups, "get_watermark", racing_watermark)
+        stats = self.store.get_skill_stats("skill-a", days=7)
+        monkeypatch.undo()
+
+        assert other.rollups.get_watermark(conn) > 0
+        assert stats["total_invocations"] == raw_skill_stats(self.store, "skill-a", 7)[0]
+
+    def test_metrics_summary_matches_raw_scan(self):
+        summary = self.store.get_metrics_summary(days=7)
+        since = time.time() - 7 * 86400
+        conn = self.store._get_connection()
+        total = conn.execute("SELECT COUNT(*) FROM spans WHERE start_time > ?", (since,)).fetchone()[0]
+        success, skill_total = conn.execute("""
+            SELECT SUM(CASE WHEN status = 'ok' THEN 1 ELSE 0 END), COUNT(*)
+            FROM spans WHERE start_time > ? AND span_type = 'skill_invocation'
+        """, (since,)).fetchone()
+
+        assert summary["total_spans"] == total
+        assert summary["success_rate"] == pytest.approx(success / skill_total)
+        assert summary["active_skills"] == 3
+
+
+@pytest.mark.unit
+class TestRetention:
+    """Test span retention, payload stripping and archival."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        from mindsymphony.lightning.store.retention import RetentionManager
+        self.RetentionManager = RetentionManager
+        self.archive_dir = temp_directory / "archive"
+        self.store = LightningStore(str(temp_directory / "store.db"))
+        now = time.time()
+        spans = []
+        for i in range(300):
+            span = make_span(i, "skill-a", now - (i % 60) * 86400,
+                             span_type="tool_execution" if i % 2 else "skill_invocation")
+            span["input_data"] = json.dumps({"payload": "x" * 200})
+            span["output_data"] = json.dumps({"result": "y" * 200})
+            span["input_hash"] = f"hash-{i}"
+            spans.append(span)
+        self.store.store_spans(spans)
+
+    def test_run_strips_expires_and_archives(self):
+        retention = self.RetentionManager(self.store, {
+            'ttl_days': {'tool_execution': 10},
+            'default_ttl_days': 30,
+            'payload_ttl_days': 5,
+            'archive_dir': str(self.archive_dir),
+        })
+        stats_before = self.store.get_skill_stats("skill-a", days=90)
+
+        report = retention.run(force_maintenance=True)
+
+        conn = self.store._get_connection()
+        oldest = {
+            span_type: conn.execute(
+                "SELECT MIN(start_time) FROM spans WHERE span_type = ?", (span_type,)
+            ).fetchone()[0]
+            for span_type in ("tool_execution", "skill_invocation")
+        }
+        assert time.time() - oldest["tool_execution"] < 10 * 86400
+        assert time.time() - oldest["skill_invocation"] < 30 * 86400
+
+        stripped = conn.execute("""
+            SELECT COUNT(*) FROM spans
+            WHERE input_data IS NULL AND input_hash IS NOT NULL
+        """).fetchone()[0]
+        assert stripped > 0
+        assert report["deleted_spans"] > 0
+        assert report["vacuumed"] and report["analyzed"]
+        assert report["reclaimed_bytes"] == report["bytes_before"] - report["bytes_after"]
+
+        archived = 0
+        for path in report["archived_files"]:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                archived += sum(1 for _ in f)
+        assert archived == report["deleted_spans"]
+
+        # 汇总桶保留已删除 span 的统计
+        stats_after = self.store.get_skill_stats("skill-a", days=90)
+        assert stats_after["total_invocations"] == stats_before["total_invocations"]
+
+    def test_unrolled_spans_are_rolled_up_before_delete(self):
+        # 绕过 rollup 直接写入一批已过期的 span
+        conn = self.store._get_connection()
+        old = [make_span(1000 + i, "skill-a", time.time() - 45 * 86400 - i) for i in range(40)]
+        with conn:
+            conn.executemany(self.store._SPAN_INSERT_SQL, [self.store._span_row(s) for s in old])
+        count, success, avg_duration, _, _ = raw_skill_stats(self.store, "skill-a", 90)
+        summary_before = self.store.get_metrics_summary(days=90)
+
+        retention = self.RetentionManager(self.store, {
+            'default_ttl_days': 30,
+            'archive_dir': str(self.archive_dir),
+        })
+        report = retention.expire_spans()
+        assert report["deleted_spans"] > 40
+        assert conn.execute("SELECT COUNT(*) FROM spans WHERE span_id LIKE 'span-10__'").fetchone()[0] == 0
+
+        stats = self.store.get_skill_stats("skill-a", days=90)
+        assert stats["total_invocations"] == count
+        assert stats["success_count"] == success
+        assert stats["avg_duration_ms"] == pytest.approx(avg_duration)
+        assert self.store.get_metrics_summary(days=90)["total_spans"] == summary_before["total_spans"]
+
+        archived = 0
+        for path in report["archived_files"]:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                archived += sum(1 for _ in f)
+        assert archived == report["deleted_spans"]
+
+    def test_columnar_archive(self):
+        retention = self.RetentionManager(self.store, {
+            'default_ttl_days': 30,
+            'archive_dir': str(self.archive_dir),
+            'archive_format': 'columnar',
+        })
+        report = retention.expire_spans()
+        total = 0
+        for path in report["archived_files"]:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            assert len(data["columns"]["span_id"]) == data["row_count"]
+            total += data["row_count"]
+        assert total == report["deleted_spans"]
+
+    def test_maintenance_respects_interval(self):
+        retention = self.RetentionManager(self.store, {'vacuum_interval_hours': 24})
+        assert retention.maintain()["vacuumed"]
+        assert not retention.maintain()["vacuumed"]
+
+
+@pytest.mark.unit
+class TestQuantileSketch:
+    """Test the mergeable quantile sketch and percentile stats."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        from mindsymphony.lightning.store.sketch import QuantileSketch
+        self.QuantileSketch = QuantileSketch
+
+    @staticmethod
+    def exact_quantile(values, q):
+        ordered = sorted(values)
+        return ordered[int(q * (len(ordered) - 1))]
+
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(3)
+        values = [rng.lognormvariate(4, 1.2) for _ in range(20000)]
+        sketch = self.QuantileSketch(relative_accuracy=0.01)
+        sketch.update(values)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = self.exact_quantile(values, q)
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+
+    def test_merge_equals_single_sketch(self):
+        rng = random.Random(5)
+        values = [rng.expovariate(0.01) for _ in range(5000)]
+        whole = self.QuantileSketch()
+        whole.update(values)
+        left, right = self.QuantileSketch(), self.QuantileSketch()
+        left.update(values[:2000])
+        right.update(values[2000:])
+        left.merge(self.QuantileSketch.from_dict(json.loads(json.dumps(right.to_dict()))))
+
+        assert left.count == whole.count
+        for q in (0.5, 0.95, 0.99):
+            assert left.quantile(q) == whole.quantile(q)
+
+    def test_skill_stats_report_percentiles(self, temp_directory):
+        store = LightningStore(str(temp_directory / "store.db"))
+        rng = random.Random(11)
+        now = time.time()
+        spans = []
+        for i in range(3000):
+            span = make_span(i, "skill-a", now - rng.uniform(0, 3 * 86400))
+            span["latency_ms"] = rng.lognormvariate(5, 1)
+            spans.append(span)
+        for start in range(0, len(spans), 500):
+            store.store_spans(spans[start:start + 500])
+
+        stats = store.get_skill_stats("skill-a", days=7)
+        latencies = [s["latency_ms"] for s in spans]
+        for key, q in (("p50_latency_ms", 0.5), ("p95_latency_ms", 0.95), ("p99_latency_ms", 0.99)):
+            assert stats[key] == pytest.approx(self.exact_quantile(latencies, q), rel=0.03)
@@ -0,0 +1,226 @@
+"""
+Unit Tests for Lightning Tracer
+"""
+
+import json
+import pytest
+import sys
+import threading
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from mindsymphony.lightning.tracer.core import LightningTracer, Span, SpanType
+from mindsymphony.lightning.store.core import LightningStore
+
+
+@pytest.mark.unit
+class TestBatchedWriter:
+    """Test the tracer's batched background writer."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.db_path = str(temp_directory / "store.db")
+
+    def test_spans_are_written_in_batches(self):
+        tracer = LightningTracer(config={
+            'db_path': self.db_path,
+            'batch_size': 50,
+            'flush_interval_ms': 200,
+        })
+        for i in range(120):
+            tracer.emit_skill_invocation(f"skill-{i % 3}", {"i": i}, {"ok": True})
+        tracer.shutdown()
+
+        stats = tracer.get_stats()
+        assert stats["spans_stored"] == 120
+        assert stats["spans_dropped"] == 0
+        assert stats["max_batch_size"] <= 50
+        assert stats["batches_flushed"] < 120
+        assert stats["avg_batch_size"] > 1
+        assert stats["avg_flush_ms"] >= 0
+
+        store = LightningStore(self.db_path)
+        assert len(store.query_spans(limit=1000)) == 120
+
+    def test_flush_waits_for_pending_spans(self):
+        tracer = LightningTracer(config={'db_path': self.db_path})
+        tracer.emit_skill_invocation("skill-a", {"q": 1}, {"r": 2})
+        tracer.flush()
+
+        assert tracer.get_stats()["spans_stored"] == 1
+        tracer.shutdown()
+
+    def test_store_uses_wal_journal(self):
+        store = LightningStore(self.db_path)
+        mode = store._get_connection().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == "wal"
+
+    def test_store_spans_single_transaction(self):
+        store = LightningStore(self.db_path)
+        rows = [
+            {"span_id": f"s{i}", "trace_id": "t", "span_type": "skill_invocation",
+             "name": "skill-a", "start_time": 1.0}
+            for i in range(10)
+        ]
+        assert store.store_spans(rows) == 10
+        # 整批失败时回滚（trace_id 为 NOT NULL）
+        bad = rows[:2] + [{"span_id": "bad", "span_type": "x", "name": "x", "start_time": 1.0}]
+        bad[0] = dict(bad[0], span_id="new")
+        assert store.store_spans(bad) == 0
+        assert len(store.query_spans(limit=100)) == 10
+
+    def test_tracer_tracks_latency_percentiles(self):
+        tracer = LightningTracer(config={'db_path': self.db_path})
+        for latency in range(1, 101):
+            tracer.emit_skill_invocation("skill-a", {"q": latency}, latency_ms=float(latency))
+        tracer.flush()
+
+        percentiles = tracer.get_latency_percentiles("skill-a")
+        assert percentiles["count"] == 100
+        assert percentiles["p50"] == pytest.approx(50, rel=0.03)
+        assert percentiles["p99"] == pytest.approx(99, rel=0.03)
+        tracer.shutdown()
+
+
+@pytest.mark.unit
+class TestTracingFastPath:
+    """Test sampling-first span creation and deferred serialization."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.db_path = str(temp_directory / "store.db")
+
+    def stored_span(self, span_id):
+        row = LightningStore(self.db_path)._get_connection().execute("""
+            SELECT input_data, input_hash, output_hash, metadata FROM spans WHERE span_id = ?
+        """, (span_id,)).fetchone()
+        return {
+            "input_data": row[0],
+            "input_hash": row[1],
+            "output_hash": row[2],
+            "metadata": json.loads(row[3]),
+        }
+
+    def test_serialization_is_deferred_to_worker(self):
+        tracer = LightningTracer(config={'db_path': self.db_path, 'flush_interval_ms': 1000})
+        payload = {"text": "数据" * 100}
+        span = tracer.emit_skill_invocation("skill-a", payload, {"ok": True})
+        assert span.input_hash is None
+        tracer.flush()
+
+        stored = self.stored_span(span.span_id)
+        expected = Span._serialize(payload)
+        assert stored["input_data"] == expected
+        assert stored["input_hash"] == Span._hash(expected)
+        assert stored["output_hash"] == Span._hash(Span._serialize({"ok": True}))
+        tracer.shutdown()
+
+    def test_payload_size_cap_truncates(self):
+        tracer = LightningTracer(config={'db_path': self.db_path, 'max_payload_bytes': 64})
+        payload = {"text": "数据" * 100}
+        span = tracer.emit_skill_invocation("skill-a", payload)
+        tracer.flush()
+
+        stored = self.stored_span(span.span_id)
+        assert stored["input_data"].endswith(Span.TRUNCATION_MARKER)
+        assert len(stored["input_data"].encode("utf-8")) <= 64 + len(Span.TRUNCATION_MARKER)
+        # 哈希仍基于完整载荷
+        assert stored["input_hash"] == Span._hash(Span._serialize(payload))
+        assert stored["metadata"]["truncated"] == ["input"]
+        tracer.shutdown()
+
+    def test_early_to_dict_respects_tracer_settings(self):
+        tracer = LightningTracer(config={
+            'db_path': self.db_path, 'flush_interval_ms': 1000,
+            'store_full_data': False, 'max_payload_bytes': 64,
+        })
+        payload = {"text": "数据" * 100}
+        span = tracer.emit_skill_invocation("skill-a", payload, {"out": "x" * 500})
+
+        # 后台线程写入前调用方先序列化
+        data = span.to_dict()
+        assert data["input_data"] is None
+        assert data["output_data"].endswith(Span.TRUNCATION_MARKER)
+        assert data["input_hash"] == Span._hash(Span._serialize(payload))
+        tracer.flush()
+
+        stored = self.stored_span(span.span_id)
+        assert stored["input_data"] is None
+        assert stored["metadata"]["truncated"] == ["output"]
+        tracer.shutdown()
+
+    def test_concurrent_materialize_runs_once(self):
+        span = LightningTracer(config={'enabled': False})._create_span(
+            "skill-a", SpanType.SKILL_INVOCATION, input_data={"q": 1})
+        calls = []
+        original = Span._serialize
+        span._serialize = lambda data: calls.append(data) or original(data)
+
+        threads = [threading.Thread(target=span.materialize) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert calls == [{"q": 1}]
+        assert span.input_hash == Span._hash(original({"q": 1}))
+
+    def test_unsampled_calls_skip_span_creation(self, monkeypatch):
+        tracer = LightningTracer(config={'db_path': self.db_path, 'sampling_rate': 0.0})
+        monkeypatch.setattr(tracer, "_create_span", lambda *a, **k: pytest.fail("span created"))
+        assert tracer.emit_skill_invocation("skill-a", {"q": 1}) is None
+        assert tracer.emit_tool_execution("tool", {"q": 1}) is None
+        tracer.shutdown()
+
+    def test_head_based_trace_sampling(self):
+        tracer = LightningTracer(config={'db_path': self.db_path, 'sampling_rate': 0.5})
+        for _ in range(20):
+            with tracer.trace() as trace:
+                spans = [tracer.emit_skill_invocation("skill-a", {"i": i}) for i in range(5)]
+                with tracer.trace() as nested:
+                    assert nested is trace
+                    spans.append(tracer.emit_tool_execution("tool", {}))
+
+            if trace["sampled"]:
+                assert all(s is not None and s.trace_id == trace["trace_id"] for s in spans)
+            else:
+                assert all(s is None for s in spans)
+        tracer.shutdown()
+
+    def test_span_context_follows_trace_sampling(self):
+        tracer = LightningTracer(config={'db_path': self.db_path, 'sampling_rate': 0.5})
+        sampled_ids = set()
+        unsampled_ids = set()
+        for _ in range(20):
+            with tracer.trace() as trace:
+                with tracer.span("op", SpanType.TOOL_EXECUTION) as span:
+                    pass
+                with tracer.span("op", SpanType.TOOL_EXECUTION) as inner:
+                    pass
+            if trace["sampled"]:
+                assert span.trace_id == inner.trace_id == trace["trace_id"]
+                sampled_ids.add(trace["trace_id"])
+            else:
+                unsampled_ids.add(trace["trace_id"])
+        tracer.flush()
+
+        stored = [row[0] for row in LightningStore(self.db_path)._get_connection().execute(
+            "SELECT trace_id FROM spans")]
+        # 未采样的 trace 中 tracer.span() 不写入任何数据
+        assert sampled_ids and unsampled_ids
+        assert set(stored) == sampled_ids
+        assert len(stored) == 2 * len(sampled_ids)
+        tracer.shutdown()
+
+    def test_span_context_disabled_or_unsampled_stores_nothing(self, monkeypatch):
+        for config in ({'sampling_rate': 0.0}, {'enabled': False}):
+            tracer = LightningTracer(config={'db_path': self.db_path, **config})
+            monkeypatch.setattr(tracer, "_enqueue", lambda span: pytest.fail("span enqueued"))
+            with pytest.raises(ValueError):
+                with tracer.span("op", SpanType.TOOL_EXECUTION) as span:
+                    raise ValueError("boom")
+            assert span.status == "error"
+            tracer.shutdown()
+
@@ -0,0 +1,82 @@
+"""
+Unit Tests for SkillDeduplicator candidate generation
+"""
+
+import pytest
+import sys
+import yaml
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+pytest.importorskip("Levenshtein")
+
+import skill_deduplicator
+from skill_deduplicator import LSH_MIN_THRESHOLD, MinHashLSH, SkillDeduplicator
+
+
+@pytest.mark.unit
+class TestFindSimilarSkills:
+    """LSH blocking vs the exhaustive scan."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        registry = temp_directory / "skills.yml"
+        registry.write_text(yaml.safe_dump({
+            'internal_skills': {
+                'pdf': {'description': 'read files'},
+                'abc': {'description': 'alpha tool'},
+                'frontend-design': {'description': 'design web interfaces', 'triggers': {'en': ['ui']}},
+            },
+            'external_skills': {
+                'pdx': {'description': 'write notes'},
+                'abd': {'description': 'beta utility'},
+                'frontend-designs': {'description': 'design web interfaces', 'triggers': {'en': ['ui']}},
+                'zzz': {'description': 'unrelated'},
+            },
+        }), encoding="utf-8")
+        self.deduplicator = SkillDeduplicator(str(registry))
+
+    @pytest.mark.parametrize("threshold", [30, 40, 60, LSH_MIN_THRESHOLD, 80, 90])
+    def test_matches_exhaustive_at_any_threshold(self, threshold):
+        exhaustive = self.deduplicator.find_similar_skills(threshold, use_lsh=False, max_workers=1)
+        assert self.deduplicator.find_similar_skills(threshold, max_workers=1) == exhaustive
+
+    def test_low_thresholds_fall_back_to_exhaustive(self, monkeypatch):
+        calls = []
+        original = SkillDeduplicator._candidate_pairs
+        monkeypatch.setattr(SkillDeduplicator, "_candidate_pairs",
+                            staticmethod(lambda records: calls.append(1) or original(records)))
+
+        low = self.deduplicator.find_similar_skills(30, max_workers=1)
+        assert not calls
+        assert {frozenset((s['skill1'], s['skill2'])) for s in low} >= {
+            frozenset(('pdf', 'pdx')), frozenset(('abc', 'abd'))}
+
+        high = self.deduplicator.find_similar_skills(80, max_workers=1)
+        assert calls
+        assert [(s['skill1'], s['skill2']) for s in high] == [('frontend-design', 'frontend-designs')]
+
+
+@pytest.mark.unit
+class TestMinHashLSH:
+    """MinHash signatures and banding."""
+
+    def test_identical_sets_collide_and_empty_sets_are_skipped(self):
+        lsh = MinHashLSH(bands=8, rows=2)
+        pairs = lsh.candidate_pairs([{"ab", "bc"}, {"ab", "bc"}, set(), {"xy"}])
+        assert (0, 1) in pairs
+        assert not any(2 in pair for pair in pairs)
+
+    def test_signature_is_deterministic(self):
+        shingles = {"abc", "bcd", "cde"}
+        assert MinHashLSH().signature(shingles) == MinHashLSH().signature(shingles)
+        assert MinHashLSH().signature(set()) is None
+
+    def test_pure_python_matches_numpy(self, monkeypatch):
+        pytest.importorskip("numpy")
+        shingles = {"^pd", "pdf", "df$"}
+        expected = MinHashLSH().signature(shingles)
+        monkeypatch.setattr(skill_deduplicator, "NUMPY_AVAILABLE", False)
+        assert MinHashLSH().signature(shingles) == expected
@@ -2,8 +2,11 @@
 Unit Tests for Skill Discovery System
 """
 
+import os
 import pytest
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Add paths
@@ -79,3 +82,407 @@ class TestSkillIndex(SkillTestBase):
         index = self.SkillIndex(str(skills_root))
         stats = index.get_statistics()
         assert isinstance(stats, dict), "Statistics should be a dict"
+
+
+@pytest.mark.unit
+class TestSkillSearch:
+    """Test the BM25 full-text index behind SkillIndex.search."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        from skill_index import SkillIndex
+        skills = {
+            "frontend-design": ("前端界面设计，构建 React 组件", ["frontend", "ui"]),
+            "doc-writer": ("技术文档写作与报告生成", ["docs"]),
+            "data-analysis": ("数据分析与可视化报告", ["data", "analysis"]),
+            "ui-review": ("Review UI screenshots", ["ui"]),
+        }
+        for name, (description, tags) in skills.items():
+            skill_dir = temp_directory / name
+            skill_dir.mkdir()
+            (skill_dir / "SKILL.md").write_text(
+                f"---\nname: {name}\ndescription: {description}\ntags: [{', '.join(tags)}]\n---\n",
+                encoding="utf-8"
+            )
+        self.root = temp_directory
+        self.index = SkillIndex(str(temp_directory))
+
+    def test_tokenize_cjk_bigrams(self):
+        from text_index import tokenize
+        assert tokenize("React 前端组件 for UI") == ["react", "前端", "端组", "组件", "ui"]
+
+    def test_results_are_ranked(self):
+        assert self.index.search("写一份技术文档") == ["doc-writer"]
+        assert self.index.search("前端 react 组件")[0] == "frontend-design"
+        # 名称权重高于标签
+        assert self.index.search("ui review")[0] == "ui-review"
+        assert set(self.index.search("报告")) == {"doc-writer", "data-analysis"}
+        assert self.index.search("不存在的查询 xyz") == []
+
+    def test_min_coverage_filters_weak_matches(self):
+        # 只共享 "ui" 一个词（1/3）
+        assert self.index.search("ui testing checklist") == ["ui-review", "frontend-design"]
+        assert self.index.search("ui testing checklist", min_coverage=0.5) == []
+        assert self.index.search("review ui", min_coverage=1.0) == ["ui-review"]
+
+    def test_router_search_fallback_requires_coverage(self):
+        from skill_router import SkillRouter
+        router = SkillRouter(self.index)
+        assert router._match_by_search("ui testing checklist") is None
+        assert router._match_by_search("review the ui").primary == "ui-review"
+
+    def test_index_follows_incremental_update(self):
+        import os
+        skill_md = self.root / "doc-writer" / "SKILL.md"
+        skill_md.write_text("---\nname: doc-writer\ndescription: 翻译服务\n---\n", encoding="utf-8")
+        mtime = os.path.getmtime(skill_md) + 10
+        os.utime(skill_md, (mtime, mtime))
+
+        assert self.index.incremental_update() == ["doc-writer"]
+        assert self.index.search("技术文档") == []
+        assert self.index.search("翻译") == ["doc-writer"]
+
+
+@pytest.mark.unit
+class TestRouteCache:
+    """Test route caching in SkillDiscovery.route."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory, monkeypatch, project_root):
+        monkeypatch.syspath_prepend(str(project_root / "skills"))
+        monkeypatch.chdir(temp_directory)
+        from skill_discovery import SkillDiscovery
+
+        self.root = temp_directory / "skills"
+        self.root.mkdir()
+        self.write_skill("frontend-design", "前端界面设计")
+        self.discovery = SkillDiscovery(str(self.root), cache_path="skill_index.json")
+
+    def write_skill(self, name, description):
+        skill_dir = self.root / name
+        skill_dir.mkdir(exist_ok=True)
+        (skill_dir / "SKILL.md").write_text(
+            f"---\nname: {name}\ndescription: {description}\n---\n", encoding="utf-8"
+        )
+        return skill_dir / "SKILL.md"
+
+    def test_repeated_and_normalized_inputs_hit(self, monkeypatch):
+        calls = []
+        route = self.discovery.router.route
+        monkeypatch.setattr(self.discovery.router, "route", lambda q: calls.append(q) or route(q))
+
+        first = self.discovery.route("前端 设计")
+        second = self.discovery.route("  前端\t设计 ")
+        third = self.discovery.route("前端　设计")  # 全角空格
+        assert calls == ["前端 设计"]
+        assert first.to_dict() == second.to_dict() == third.to_dict()
+
+        # 返回副本，调用方修改不影响缓存
+        second.collaborators.append("mutated")
+        assert "mutated" not in self.discovery.route("前端 设计").collaborators
+
+        stats = self.discovery.get_statistics()["route_cache"]
+        assert stats["hits"] == 3 and stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(0.75)
+
+    def test_router_receives_original_input(self, monkeypatch):
+        calls = []
+        route = self.discovery.router.route
+        monkeypatch.setattr(self.discovery.router, "route", lambda q: calls.append(q) or route(q))
+
+        self.discovery.route("  前端\t设计 ")
+        self.discovery.route("前端 设计")
+        assert calls == ["  前端\t设计 "]
+
+    def test_index_update_invalidates(self):
+        import os
+        assert self.discovery.route("翻译文档").primary is None
+
+        skill_md = self.write_skill("frontend-design", "翻译文档")
+        mtime = os.path.getmtime(skill_md) + 10
+        os.utime(skill_md, (mtime, mtime))
+        assert self.discovery.update_index() == ["frontend-design"]
+
+        assert self.discovery.route("翻译文档").primary == "frontend-design"
+        assert self.discovery.get_statistics()["route_cache"]["invalidations"] == 1
+
+    def test_lru_and_ttl(self, monkeypatch):
+        from route_cache import RouteCache
+        from skill_router import RouteResult
+        cache = RouteCache(max_size=2, ttl=60)
+        for key in ("a", "b", "c"):
+            cache.put(key, 0, RouteResult(primary=key))
+        assert cache.get("a", 0) is None
+        assert cache.get("c", 0).primary == "c"
+
+        now = time.monotonic() + 120
+        monkeypatch.setattr("route_cache.time.monotonic", lambda: now)
+        assert cache.get("c", 0) is None
+        stats = cache.get_statistics()
+        assert stats["evictions"] == 1 and stats["expirations"] == 1
+
+
+@pytest.mark.unit
+class TestSkillWatcher:
+    """Test watch-mode incremental index maintenance."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory, monkeypatch, project_root):
+        monkeypatch.syspath_prepend(str(project_root / "skills"))
+        monkeypatch.chdir(temp_directory)
+        from skill_discovery import SkillDiscovery
+
+        self.root = temp_directory / "skills"
+        self.root.mkdir()
+        self.write_skill("frontend-design", ["前端"])
+        self.discovery = SkillDiscovery(str(self.root), cache_path="skill_index.json")
+        # 足够长的间隔，测试中手动 poll
+        self.watcher = self.discovery.start_watching(interval=3600, use_native=False)
+        yield
+        self.discovery.stop_watching()
+
+    def write_skill(self, name, keywords, interop=None):
+        skill_dir = self.root / name
+        skill_dir.mkdir(exist_ok=True)
+        skill_md = skill_dir / "SKILL.md"
+        skill_md.write_text(
+            f"---\nname: {name}\ntriggers:\n  - level: high\n    keywords: [{', '.join(keywords)}]\n---\n",
+            encoding="utf-8"
+        )
+        if interop is not None:
+            (skill_dir / "INTEROP.yml").write_text(interop, encoding="utf-8")
+
+        # 避免同一时钟刻度内的两次写入 mtime 相同
+        self.clock = getattr(self, "clock", time.time()) + 10
+        os.utime(skill_md, (self.clock, self.clock))
+        return skill_dir
+
+    def test_added_modified_removed(self):
+        import shutil
+        router = self.discovery.router
+
+        self.write_skill("doc-writer", ["文档"])
+        assert self.watcher.poll() == {str(self.root / "doc-writer")}
+        assert self.discovery.find_by_name("doc-writer") is not None
+        assert router._match_by_keywords("写文档").primary == "doc-writer"
+
+        self.write_skill("doc-writer", ["报告"],
+                         interop="collaboration:\n  sequential:\n    - skill: frontend-design\n")
+        self.watcher.poll()
+        assert self.discovery.sync_changes() == ["doc-writer"]
+        assert router._match_by_keywords("写文档") is None
+        assert router._match_by_keywords("写报告").primary == "doc-writer"
+        assert self.discovery.find_collaborators("doc-writer") == ["frontend-design"]
+
+        shutil.rmtree(self.root / "doc-writer")
+        self.watcher.poll()
+        assert self.discovery.find_by_name("doc-writer") is None
+        assert router._match_by_keywords("写报告") is None
+        assert "doc-writer" not in router._interop_cache
+
+    def test_only_changed_skills_are_reloaded(self, monkeypatch):
+        import skill_metadata
+        loaded = []
+        original = skill_metadata.load_skill_metadata
+        monkeypatch.setattr(skill_metadata, "load_skill_metadata",
+                            lambda path: loaded.append(path) or original(path))
+
+        self.write_skill("doc-writer", ["文档"])
+        self.watcher.poll()
+        self.discovery.search("文档")
+        assert loaded == [str(self.root / "doc-writer")]
+        assert self.watcher.poll() == set()
+
+    def test_cache_save_is_deferred(self, monkeypatch):
+        saves = []
+        monkeypatch.setattr(type(self.discovery), "_save_cache",
+                            lambda discovery: saves.append(threading.current_thread()))
+
+        for name in ("doc-writer", "doc-reviewer"):
+            self.write_skill(name, ["文档"])
+            self.watcher.poll()
+            assert self.discovery.find_by_name(name) is not None
+        # 查询线程中不写缓存
+        assert saves == []
+
+        self.discovery.stop_watching()
+        assert saves == [threading.current_thread()]
+        self.discovery.stop_watching()
+        assert len(saves) == 1
+
+    def test_cache_is_saved_by_background_timer(self, monkeypatch):
+        saved = threading.Event()
+        saves = []
+        monkeypatch.setattr(type(self.discovery), "_save_cache",
+                            lambda discovery: saves.append(threading.current_thread()) or saved.set())
+        self.discovery.start_watching(save_delay=0.3)
+
+        self.write_skill("doc-writer", ["文档"])
+        self.watcher.poll()
+        self.discovery.sync_changes()
+        self.write_skill("doc-reviewer", ["文档"])
+        self.watcher.poll()
+        self.discovery.sync_changes()
+
+        assert saved.wait(5)
+        time.sleep(0.1)
+        assert len(saves) == 1 and saves[0] is not threading.current_thread()
+        # 已保存，关闭时不再重复写入
+        self.discovery.stop_watching()
+        assert len(saves) == 1
+
+    def test_cache_validity_uses_file_mtime(self):
+        from cache_manager import CacheManager
+        cache = CacheManager("skill_index.json")
+        saved = self.clock + 10
+        os.utime(cache.cache_path, (saved, saved))
+        assert cache.is_valid(str(self.root))
+
+        # 新增/删除技能目录
+        os.utime(self.root, (saved + 10, saved + 10))
+        assert not cache.is_valid(str(self.root))
+
+
+@pytest.mark.unit
+class TestIndexSnapshot:
+    """Test cold start from the binary index snapshot."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory, monkeypatch, project_root):
+        monkeypatch.syspath_prepend(str(project_root / "skills"))
+        monkeypatch.chdir(temp_directory)
+        from skill_discovery import SkillDiscovery
+        self.SkillDiscovery = SkillDiscovery
+
+        self.root = temp_directory / "skills"
+        self.root.mkdir()
+        self.write_skill("frontend-design", ["前端", "React"], tags=["design", "ui"],
+                         interop="collaboration:\n  sequential:\n    - skill: brand-guidelines\n")
+        self.write_skill("brand-guidelines", ["品牌"], tags=["design"])
+        self.write_skill("doc-writer", ["文档"], tags=["docs"])
+
+        # 过去的时钟，保证快照比技能文件新
+        past = time.time() - 60
+        for skill_md in self.root.glob("*/*"):
+            os.utime(skill_md, (past, past))
+        os.utime(self.root, (past, past))
+
+        self.built = SkillDiscovery(str(self.root), cache_path="skill_index.json")
+
+    def write_skill(self, name, keywords, tags, interop=None):
+        skill_dir = self.root / name
+        skill_dir.mkdir(exist_ok=True)
+        (skill_dir / "SKILL.md").write_text(
+            f"---\nname: {name}\ndescription: {name} 技能\ntags: [{', '.join(tags)}]\n"
+            f"triggers:\n  - level: high\n    keywords: [{', '.join(keywords)}]\n---\n",
+            encoding="utf-8"
+        )
+        if interop is not None:
+            (skill_dir / "INTEROP.yml").write_text(interop, encoding="utf-8")
+
+    def test_restores_without_parsing_skill_files(self, monkeypatch):
+        import skill_metadata
+        from index_snapshot import LazyRecords
+        monkeypatch.setattr(skill_metadata.SkillMetadata, "_load",
+                            lambda self: pytest.fail("SKILL.md parsed on snapshot start"))
+
+        restored = self.SkillDiscovery(str(self.root), cache_path="skill_index.json")
+        assert isinstance(restored.index.skills, LazyRecords)
+
+        for query in ["React 前端组件", "品牌规范", "写文档"]:
+            assert restored.route(query).to_dict() == self.built.route(query).to_dict()
+        assert restored.find_collaborators("frontend-design") == ["brand-guidelines"]
+        assert restored.search("design") == self.built.search("design")
+        assert restored.find_by_tags(["design"]) == self.built.find_by_tags(["design"])
+
+        # 只解码了访问过的技能
+        assert restored.index.skills.decoded_count < len(restored.index.skills) == 3
+
+    def test_stale_snapshot_is_rebuilt(self):
+        self.write_skill("doc-writer", ["报告"], tags=["docs"])
+        rebuilt = self.SkillDiscovery(str(self.root), cache_path="skill_index.json")
+        assert not hasattr(rebuilt.index.skills, "decoded_count")
+        assert rebuilt.router._match_by_keywords("写报告").primary == "doc-writer"
+
+        # 新快照包含变更
+        restored = self.SkillDiscovery(str(self.root), cache_path="skill_index.json")
+        assert hasattr(restored.index.skills, "decoded_count")
+        assert restored.router._match_by_keywords("写报告").primary == "doc-writer"
+
+    def test_restored_index_supports_updates(self):
+        restored = self.SkillDiscovery(str(self.root), cache_path="skill_index.json")
+        self.write_skill("doc-writer", ["报告"], tags=["report"])
+
+        assert restored.index.update_skills([str(self.root / "doc-writer")]) == ["doc-writer"]
+        assert restored.router._match_by_keywords("写报告").primary == "doc-writer"
+        assert restored.find_by_tags(["docs"]) == []
+        assert restored.find_by_tags(["report"]) == ["doc-writer"]
+        assert len(restored.index.skills) == 3
+
+    def test_corrupted_snapshot_is_ignored(self):
+        snapshot_path = self.built.cache_manager.snapshot_path
+        snapshot_path.write_bytes(b"not a snapshot")
+        recovered = self.SkillDiscovery(str(self.root), cache_path="skill_index.json")
+        assert recovered.find_by_name("doc-writer") is not None
+        assert snapshot_path.read_bytes().startswith(b"SKIDXSNP")
+
+
+@pytest.mark.unit
+class TestBulkSkillLoading:
+    """Test the parallel load_all_skills loader."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.root = temp_directory / "skills"
+        self.root.mkdir()
+
+    def test_matches_per_skill_loading(self, skills_root, monkeypatch):
+        import skill_metadata
+        from skill_metadata import SkillMetadata, load_all_skills
+        monkeypatch.setattr(skill_metadata, "PARALLEL_THRESHOLD", 0)  # 走线程池路径
+
+        timings = {}
+        skills = load_all_skills(str(skills_root), max_workers=4, timings=timings)
+        assert skills
+        for name, metadata in skills.items():
+            assert metadata.to_dict() == SkillMetadata(metadata.skill_dir).to_dict()
+
+        assert set(timings) == {"scan", "read", "parse", "total"}
+        assert all(seconds >= 0 for seconds in timings.values())
+        assert load_all_skills(str(skills_root), max_workers=1).keys() == skills.keys()
+
+    def test_frontmatter_prefix_reader(self):
+        import re
+        from skill_metadata import FRONTMATTER_CHUNK, _read_frontmatter
+
+        pattern = re.compile(r'^---\n(.*?)\n---', re.DOTALL)
+        body = "正文 --- 内容\n" * 5000
+        cases = [
+            "---\nname: a\n---\n" + body,
+            "---\n" + "x" * (FRONTMATTER_CHUNK - 6) + "\n---\n" + body,  # 结束标记跨块
+            "---\ndescription: " + "长" * (FRONTMATTER_CHUNK * 2) + "\n---\n",
+            "---\n\n---\n",
+            "no frontmatter\n---\n",
+            "---\nunterminated: true\n",
+        ]
+        for i, content in enumerate(cases):
+            path = self.root / f"case-{i}.md"
+            path.write_text(content, encoding="utf-8")
+            match = pattern.match(content)
+            assert _read_frontmatter(str(path)) == (match.group(1) if match else None)
+
+    def test_skips_dirs_without_skill_md(self):
+        from skill_metadata import load_all_skills
+
+        (self.root / "empty").mkdir()
+        (self.root / "interop-only").mkdir()
+        (self.root / "interop-only" / "INTEROP.yml").write_text("provides: [x]\n", encoding="utf-8")
+        (self.root / "real").mkdir()
+        (self.root / "real" / "SKILL.md").write_text("---\nname: real-skill\n---\nbody", encoding="utf-8")
+        (self.root / "README.md").write_text("not a skill", encoding="utf-8")
+
+        skills = load_all_skills(str(self.root))
+        assert list(skills) == ["real-skill"]
+        assert skills["real-skill"].skill_name == "real"
+        assert not skills["real-skill"].is_stale()
+        assert load_all_skills(str(self.root / "missing")) == {}
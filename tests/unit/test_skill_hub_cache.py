@@ -0,0 +1,213 @@
+"""
+Unit Tests for Skill Hub evaluation/metadata caches
+"""
+
+import asyncio
+import os
+import pytest
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "Skill_Hub"))
+
+from database import Database
+from evaluation import EvaluationEngine, EvaluationRunner, LocalSkillCorpus
+from models import (
+    GitHubStats, PreEvaluationReport, QualityAnchorReport, Recommendation,
+    RiskLevel, SearchResult, SkillMetadata, SourceType
+)
+from sources.local import LocalSource
+
+
+def make_metadata(name="pdf-tools", **kwargs):
+    kwargs.setdefault("description", "Extract tables from pdf files")
+    return SkillMetadata(name=name, source=SourceType.GITHUB, **kwargs)
+
+
+@pytest.mark.unit
+class TestSerialization:
+    """to_dict / from_dict round trips."""
+
+    def test_skill_metadata_round_trip(self):
+        metadata = make_metadata(
+            author="octo",
+            triggers={"en": ["pdf"], "zh": ["表格"]},
+            tags=["pdf"],
+            file_list=["SKILL.md"],
+            frontmatter={"name": "pdf-tools"},
+            github_stats=GitHubStats(stars=10, last_commit=datetime(2024, 5, 1, 12, 30), license="MIT"),
+            user_rating=4.5,
+            cached_at=datetime.now(),
+        )
+
+        restored = SkillMetadata.from_dict(metadata.to_dict())
+
+        assert restored.github_stats.last_commit == datetime(2024, 5, 1, 12, 30)
+        assert restored.cached_at is None
+        metadata.cached_at = None
+        assert restored == metadata
+        assert restored.content_hash() == metadata.content_hash()
+
+    def test_skill_metadata_without_stats(self):
+        metadata = make_metadata()
+        assert SkillMetadata.from_dict(metadata.to_dict()) == metadata
+
+    def test_pre_evaluation_report_round_trip(self):
+        metadata = make_metadata()
+        report = asyncio.run(EvaluationEngine().evaluate(metadata, [], "pdf tables"))
+        report.quality_anchors = report.quality_anchors or QualityAnchorReport()
+        report.security.add_warning("curl | sh", RiskLevel.HIGH)
+        report.recommendation = Recommendation.ENHANCE
+
+        restored = PreEvaluationReport.from_dict(report.to_dict(), metadata)
+
+        assert restored == report
+        assert restored.metadata is metadata
+        assert restored.security.risk_level is RiskLevel.HIGH
+
+
+class FakeSource:
+    """补全元数据用的数据源"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def get_metadata(self, name, url=""):
+        self.calls.append(name)
+        return make_metadata(name=name) if name != "unknown" else None
+
+
+@pytest.mark.unit
+class TestEvaluationRunner:
+    """Concurrent evaluation with the report cache."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.db = Database(str(temp_directory / "skill_hub.db"))
+        self.engine = EvaluationEngine()
+        self.locals = [SkillMetadata(name="pdf-reader", source=SourceType.LOCAL, description="read pdf files")]
+
+    def results(self):
+        return [
+            SearchResult(name=f"skill-{i}", source=SourceType.GITHUB, description="", url="",
+                         metadata=make_metadata(name=f"skill-{i}"))
+            for i in range(3)
+        ]
+
+    def test_second_run_is_served_from_cache(self):
+        first = EvaluationRunner(self.engine, self.db, concurrency=2)
+        reports = asyncio.run(first.evaluate_all(self.results(), self.locals, "pdf"))
+        assert first.stats["evaluated"] == 3 and first.stats["cached"] == 0
+
+        second = EvaluationRunner(self.engine, self.db, concurrency=2)
+        results = self.results()
+        cached = asyncio.run(second.evaluate_all(results, self.locals, "pdf"))
+
+        assert second.stats["cached"] == 3 and second.stats["evaluated"] == 0
+        assert [r.to_dict() for r in cached] == [r.to_dict() for r in reports]
+        assert all(result.evaluation is report for result, report in zip(results, cached))
+
+    def test_cache_key_depends_on_requirement_and_local_fingerprint(self):
+        runner = EvaluationRunner(self.engine, self.db)
+        metadata = make_metadata()
+
+        key = runner.cache_key(metadata, "pdf", "local-a")
+        assert key == runner.cache_key(make_metadata(), "pdf", "local-a")
+        assert key != runner.cache_key(metadata, "excel", "local-a")
+        assert key != runner.cache_key(metadata, "pdf", "local-b")
+        assert key != runner.cache_key(make_metadata(description="changed"), "pdf", "local-a")
+
+    def test_changed_local_skills_miss_the_cache(self):
+        asyncio.run(EvaluationRunner(self.engine, self.db).evaluate_all(self.results(), self.locals, "pdf"))
+
+        self.locals[0].description = "write excel sheets"
+        runner = EvaluationRunner(self.engine, self.db)
+        asyncio.run(runner.evaluate_all(self.results(), self.locals, "pdf"))
+        assert runner.stats["evaluated"] == 3 and runner.stats["cached"] == 0
+
+    def test_local_fingerprint_computed_once_per_run(self, monkeypatch):
+        calls = []
+        compute = LocalSkillCorpus.compute_fingerprint
+        monkeypatch.setattr(LocalSkillCorpus, "compute_fingerprint",
+                            staticmethod(lambda skills: calls.append(1) or compute(skills)))
+
+        runner = EvaluationRunner(self.engine)
+        reports = asyncio.run(runner.evaluate_all(self.results(), self.locals, "pdf"))
+        assert runner.stats["evaluated"] == 3 and all(reports)
+        assert len(calls) == 1
+
+    def test_missing_metadata_is_fetched_from_source(self):
+        source = FakeSource()
+        results = [
+            SearchResult(name="remote-a", source=SourceType.GITHUB, description="", url=""),
+            SearchResult(name="unknown", source=SourceType.GITHUB, description="", url=""),
+            SearchResult(name="no-source", source=SourceType.SKILLSLM, description="", url=""),
+        ]
+        runner = EvaluationRunner(self.engine, self.db)
+
+        reports = asyncio.run(runner.evaluate_all(results, self.locals, "pdf",
+                                                  sources={SourceType.GITHUB: source}))
+
+        assert sorted(source.calls) == ["remote-a", "unknown"]
+        assert results[0].metadata.name == "remote-a"
+        assert reports[0].skill_name == "remote-a"
+        assert reports[1:] == [None, None]
+        assert runner.stats["fetched"] == 1
+
+
+@pytest.mark.unit
+class TestLocalSourceCache:
+    """SKILL.md signature-keyed metadata cache."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory, monkeypatch):
+        self.db = Database(str(temp_directory / "skill_hub.db"))
+        self.skill_dir = temp_directory / "skills" / "pdf-tools"
+        self.skill_dir.mkdir(parents=True)
+        self.skill_file = self.skill_dir / "SKILL.md"
+        self.write("Extract pdf tables")
+
+        self.source = LocalSource(db=self.db)
+        self.source.skills_path = str(temp_directory / "skills")
+        self.parsed = 0
+        original = LocalSource._load_skill_from_path
+
+        async def counting(source, path):
+            self.parsed += 1
+            return await original(source, path)
+        monkeypatch.setattr(LocalSource, "_load_skill_from_path", counting)
+
+    def write(self, description):
+        self.skill_file.write_text(f"---\ndescription: {description}\ntags: [pdf]\n---\n\n# Body\n",
+                                   encoding="utf-8")
+
+    def list_descriptions(self):
+        return [r.metadata.description for r in asyncio.run(self.source.list())]
+
+    def test_signature_hit_skips_parsing(self):
+        assert self.list_descriptions() == ["Extract pdf tables"]
+        (self.skill_dir / "extra.py").write_text("", encoding="utf-8")
+
+        results = asyncio.run(self.source.list())
+
+        assert self.parsed == 1
+        assert results[0].metadata.tags == ["pdf"]
+        # 文件列表总是重新扫描
+        assert "extra.py" in results[0].metadata.file_list
+
+    def test_signature_miss_reparses(self):
+        self.list_descriptions()
+        self.write("Extract pdf tables and images")
+        stat = self.skill_file.stat()
+        os.utime(self.skill_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert self.list_descriptions() == ["Extract pdf tables and images"]
+        assert self.parsed == 2
+
+    def test_without_db_always_parses(self):
+        self.source.db = None
+        self.list_descriptions()
+        self.list_descriptions()
+        assert self.parsed == 2
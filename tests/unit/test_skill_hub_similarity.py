@@ -0,0 +1,192 @@
+"""
+Unit Tests for Skill Hub SimilarityDetector / LocalSkillCorpus
+"""
+
+import json
+import pickle
+import pytest
+import random
+import sys
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "Skill_Hub"))
+
+import evaluation
+from evaluation import LocalSkillCorpus, SimilarityDetector, _flatten_triggers
+from models import SkillMetadata, SourceType
+
+
+WORDS = ["pdf", "excel", "chart", "report", "design", "review", "test", "deploy", "api", "data"]
+FILES = ["SKILL.md", "README.md", "scripts/run.py", "templates/base.md", "LICENSE"]
+
+
+def make_skill(rng, index, source=SourceType.LOCAL):
+    prefix = rng.choice(WORDS)
+    return SkillMetadata(
+        name=rng.choice([f"{prefix}-{rng.choice(WORDS)}", prefix, f"{prefix}-tools-{index}", ""]),
+        source=source,
+        description=" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 8))),
+        triggers={
+            'en': rng.sample(WORDS, rng.randint(0, 3)),
+            'zh': rng.choice([["生成报告"], ["设计"], [], "分析"]),
+        },
+        tags=[w.upper() if rng.random() < 0.3 else w for w in rng.sample(WORDS, rng.randint(0, 3))],
+        file_list=rng.sample(FILES, rng.randint(0, 4)),
+    )
+
+
+def make_skills(seed, count, source=SourceType.LOCAL):
+    rng = random.Random(seed)
+    return [make_skill(rng, i, source) for i in range(count)]
+
+
+def _mark_loaded():
+    _Exploit.loaded = True
+
+
+class _Exploit:
+    """反序列化时执行代码的 pickle 载荷"""
+    loaded = False
+
+    def __reduce__(self):
+        return (_mark_loaded, ())
+
+
+@pytest.mark.unit
+class TestBatchedOverlap:
+    """Batched corpus scoring vs the per-pair reference implementation."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.locals = make_skills(0, 60)
+        self.remotes = make_skills(1, 40, SourceType.GITHUB)
+        self.detector = SimilarityDetector()
+
+    def test_components_match_single(self):
+        corpus = self.detector.get_corpus(self.locals)
+        detector = self.detector
+
+        for remote in self.remotes:
+            name = corpus.name_scores(remote.name)
+            triggers = corpus.set_scores(set(_flatten_triggers(remote.triggers)), corpus.triggers, corpus.size)
+            tags = corpus.set_scores({t.lower() for t in remote.tags}, corpus.tags, corpus.size)
+            structure = corpus.set_scores(set(remote.file_list), corpus.files, corpus.size)
+
+            for i, local in enumerate(self.locals):
+                assert name[i] == detector._name_similarity(remote.name, local.name)
+                assert triggers[i] == pytest.approx(detector._trigger_overlap(remote.triggers, local.triggers))
+                assert tags[i] == pytest.approx(detector._tag_overlap(remote.tags, local.tags))
+                assert structure[i] == pytest.approx(
+                    detector._structure_similarity(remote.file_list, local.file_list))
+
+    def test_whole_result_matches_single_without_sklearn(self, monkeypatch):
+        monkeypatch.setattr(evaluation, "HAS_SKLEARN", False)
+        detector = SimilarityDetector()
+
+        for remote in self.remotes:
+            overlap, best, details = detector.calculate_overlap(remote, self.locals)
+
+            singles = [detector._calculate_single(remote, local) for local in self.locals]
+            index = max(range(len(singles)), key=lambda i: singles[i][0])
+            expected_total, expected_details = singles[index]
+
+            assert overlap == pytest.approx(max(expected_total, 0.0))
+            if expected_total > 0:
+                assert best is self.locals[index]
+                assert details.name == expected_details.name
+                assert details.description == pytest.approx(expected_details.description)
+                assert details.triggers == pytest.approx(expected_details.triggers)
+                assert details.structure == pytest.approx(expected_details.structure)
+                assert details.tags == pytest.approx(expected_details.tags)
+            else:
+                assert best is None
+
+    def test_empty_local_skills(self):
+        assert self.detector.calculate_overlap(self.remotes[0], [])[:2] == (0.0, None)
+
+
+@pytest.mark.unit
+class TestCorpusCache:
+    """local_similarity.json persistence."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.cache_path = str(temp_directory / "local_similarity.json")
+        self.locals = make_skills(2, 20)
+
+    def test_cache_hit_and_reload(self, monkeypatch):
+        detector = SimilarityDetector(cache_path=self.cache_path)
+        corpus = detector.get_corpus(self.locals)
+        assert Path(self.cache_path).exists()
+
+        # 内存命中
+        assert detector.get_corpus(self.locals) is corpus
+
+        # 新实例从缓存文件加载，不重新计算也不重写
+        def fail(*args, **kwargs):
+            raise AssertionError("corpus should come from the cache file")
+        monkeypatch.setattr(LocalSkillCorpus, "__init__", fail)
+        monkeypatch.setattr(LocalSkillCorpus, "save", fail)
+
+        reloaded = SimilarityDetector(cache_path=self.cache_path).get_corpus(self.locals)
+        assert reloaded.fingerprint == corpus.fingerprint
+        assert reloaded.names == corpus.names
+        assert reloaded.tags == corpus.tags
+
+    def test_fingerprint_change_invalidates(self):
+        detector = SimilarityDetector(cache_path=self.cache_path)
+        old = detector.get_corpus(self.locals)
+
+        self.locals[3].description += " changed"
+        fingerprint = LocalSkillCorpus.compute_fingerprint(self.locals)
+        assert fingerprint != old.fingerprint
+        assert LocalSkillCorpus.load(self.cache_path, fingerprint) is None
+
+        new = SimilarityDetector(cache_path=self.cache_path).get_corpus(self.locals)
+        assert new.fingerprint == fingerprint
+        assert LocalSkillCorpus.load(self.cache_path, fingerprint) is not None
+
+    def test_version_mismatch_is_rejected(self):
+        corpus = LocalSkillCorpus(self.locals)
+        corpus.save(self.cache_path)
+        state = json.loads(Path(self.cache_path).read_text(encoding="utf-8"))
+        state["version"] += 1
+        Path(self.cache_path).write_text(json.dumps(state), encoding="utf-8")
+
+        assert LocalSkillCorpus.load(self.cache_path, corpus.fingerprint) is None
+
+    def test_reloaded_corpus_scores_match(self):
+        corpus = LocalSkillCorpus(self.locals)
+        corpus.save(self.cache_path)
+        reloaded = LocalSkillCorpus.load(self.cache_path, corpus.fingerprint)
+
+        for remote in make_skills(3, 20, SourceType.GITHUB):
+            assert reloaded.description_scores(remote.description) == pytest.approx(
+                corpus.description_scores(remote.description))
+            assert reloaded.name_scores(remote.name) == corpus.name_scores(remote.name)
+            tags = {t.lower() for t in remote.tags}
+            assert reloaded.set_scores(tags, reloaded.tags, reloaded.size) == \
+                corpus.set_scores(tags, corpus.tags, corpus.size)
+
+    def test_pickled_cache_is_never_unpickled(self):
+        corpus = LocalSkillCorpus(self.locals)
+        with open(self.cache_path, "wb") as f:
+            pickle.dump(_Exploit(), f)
+
+        _Exploit.loaded = False
+        assert LocalSkillCorpus.load(self.cache_path, corpus.fingerprint) is None
+        assert not _Exploit.loaded
+
+    def test_sklearn_mismatch_is_rejected(self, monkeypatch):
+        corpus = LocalSkillCorpus(self.locals)
+        corpus.save(self.cache_path)
+        assert LocalSkillCorpus.load(self.cache_path, corpus.fingerprint) is not None
+
+        # 缓存写入时与读取时 sklearn 是否可用不一致
+        monkeypatch.setattr(evaluation, "HAS_SKLEARN", not evaluation.HAS_SKLEARN)
+        assert LocalSkillCorpus.load(self.cache_path, corpus.fingerprint) is None
+
+    def test_corrupt_cache_is_ignored(self):
+        Path(self.cache_path).write_bytes(b"not a pickle")
+        assert LocalSkillCorpus.load(self.cache_path, "x") is None
@@ -0,0 +1,267 @@
+"""
+Unit Tests for SkillKnowledgeGraph persistence and relation inference
+"""
+
+import json
+import pytest
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add paths
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mindsymphony" / "extensions" / "github_skills"))
+
+from skill_knowledge_graph import RelationType, SearchIndex, SkillKnowledgeGraph, SkillNode
+
+
+def make_graph(path, **kwargs):
+    kwargs.setdefault("flush_interval", None)
+    return SkillKnowledgeGraph(storage_path=str(path), **kwargs)
+
+
+@pytest.mark.unit
+class TestGraphPersistence:
+    """Snapshot + append-log persistence."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.path = temp_directory / "skill_graph.json"
+        self.log_path = Path(f"{self.path}.log")
+
+    def populate(self, graph, count=5):
+        ids = [graph.add_skill(SkillNode(id=f"s{i}", name=f"Skill {i}", source="repo", tags=["t"]))
+               for i in range(count)]
+        for a, b in zip(ids, ids[1:]):
+            graph.add_relation(a, b, RelationType.DEPENDS, strength=0.5)
+        return ids
+
+    def test_mutations_are_appended_not_rewritten(self):
+        graph = make_graph(self.path, batch_size=1)
+        self.populate(graph)
+
+        assert not self.path.exists()
+        lines = self.log_path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["op"] for line in lines] == ["node"] * 5 + ["relation"] * 4
+
+    def test_writes_are_batched(self):
+        graph = make_graph(self.path, batch_size=100)
+        self.populate(graph)
+        assert not self.log_path.exists()
+
+        graph.flush()
+        assert len(self.log_path.read_text(encoding="utf-8").splitlines()) == 9
+
+    def test_reload_replays_snapshot_and_log(self):
+        graph = make_graph(self.path, batch_size=1)
+        ids = self.populate(graph)
+        graph._save()
+        graph.add_relation(ids[0], ids[1], RelationType.DEPENDS, strength=0.9)
+        graph.update_skill_usage(ids[2], success=True)
+        graph.flush()
+
+        reloaded = make_graph(self.path)
+        assert set(reloaded.nodes) == set(graph.nodes)
+        assert [r.to_dict() for r in reloaded.relations] == [r.to_dict() for r in graph.relations]
+        assert reloaded.relations[0].strength == 0.9
+        assert reloaded.nodes[ids[2]].usage_count == 1
+
+    def test_truncated_log_tail_is_ignored(self):
+        graph = make_graph(self.path, batch_size=1)
+        self.populate(graph, count=3)
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write('{"op": "node", "data": {"id": "brok')
+
+        reloaded = make_graph(self.path, batch_size=1)
+        assert set(reloaded.nodes) == {"s0", "s1", "s2"}
+        assert len(reloaded.relations) == 2
+
+        # 残行被截掉，崩溃后的新变更可以正常回放
+        reloaded.add_skill(SkillNode(id="b", name="B", source="repo"))
+        reloaded.flush()
+        again = make_graph(self.path)
+        assert set(again.nodes) == {"s0", "s1", "s2", "b"}
+        assert len(again.relations) == 2
+
+    def test_debounce_timer_rearms_after_flush(self):
+        graph = make_graph(self.path, flush_interval=0.05)
+
+        def logged_ids():
+            if not self.log_path.exists():
+                return set()
+            return {json.loads(line)["data"]["id"]
+                    for line in self.log_path.read_text(encoding="utf-8").splitlines()}
+
+        # 两次间隔开的变更都应由定时器写入日志
+        for skill_id in ("a", "b"):
+            graph.add_skill(SkillNode(id=skill_id, name=skill_id, source="repo"))
+            deadline = time.monotonic() + 2.0
+            while skill_id not in logged_ids():
+                assert time.monotonic() < deadline, f"{skill_id} was not flushed by the timer"
+                time.sleep(0.01)
+
+        assert len(self.log_path.read_text(encoding="utf-8").splitlines()) == 2
+
+    def test_log_is_compacted_into_snapshot(self):
+        graph = make_graph(self.path, batch_size=50)
+        graph._store.compact_min_ops = 100
+        self.populate(graph, count=200)
+        graph.flush()
+
+        # 压缩后日志只含最后一次压缩之后的变更
+        assert self.path.exists()
+        assert len(self.log_path.read_text(encoding="utf-8").splitlines()) <= 100
+        snapshot = json.loads(self.path.read_text(encoding="utf-8"))
+        assert len(snapshot["nodes"]) == 200
+
+        reloaded = make_graph(self.path)
+        assert len(reloaded.nodes) == 200
+        assert len(reloaded.relations) == 199
+
+    def test_legacy_snapshot_loads(self):
+        graph = make_graph(self.path)
+        self.populate(graph, count=3)
+        self.path.write_text(json.dumps(graph._snapshot_data(), indent=2), encoding="utf-8")
+
+        reloaded = make_graph(self.path)
+        assert len(reloaded.nodes) == 3
+        assert len(reloaded.relations) == 2
+
+
+def legacy_auto_relations(graph):
+    """旧实现: 两两比较所有节点，返回应存在的关系 {(源, 目标): 强度}"""
+    expected = {}
+    skills = list(graph.nodes.values())
+    for i, skill1 in enumerate(skills):
+        for skill2 in skills[i+1:]:
+            key = (skill1.id, skill2.id)
+            similarity = graph._calculate_similarity(skill1, skill2)
+            if similarity > 0.7:
+                expected[key] = similarity
+            if skill1.source == skill2.source and skill1.source != 'manual':
+                expected[key] = max(expected.get(key, 0), 0.5)
+    return expected
+
+
+@pytest.mark.unit
+class TestAutoCreateRelations:
+    """LSH-blocked relation inference."""
+
+    TAGS = ["python", "web", "api", "data", "ml", "cli", "test", "docs"]
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.graph = make_graph(temp_directory / "skill_graph.json", batch_size=10000)
+
+    def add_random_skills(self, rng, start, count):
+        for i in range(start, start + count):
+            self.graph.add_skill(SkillNode(
+                id=f"s{i}", name=f"Skill {i}",
+                source=rng.choice(["manual", "repo-a", "repo-b", "repo-c"] + [f"repo-{i}"] * 6),
+                tags=rng.sample(self.TAGS, rng.randint(0, 4)),
+            ))
+
+    def relation_map(self):
+        return {(r.source_id, r.target_id): r.strength for r in self.graph.relations}
+
+    def test_matches_pairwise_scan(self):
+        self.add_random_skills(random.Random(0), 0, 300)
+
+        created = self.graph.auto_create_relations()
+
+        assert self.relation_map() == legacy_auto_relations(self.graph)
+        assert created == len(self.graph.relations)
+
+    def test_is_idempotent(self):
+        self.add_random_skills(random.Random(1), 0, 100)
+        self.graph.auto_create_relations()
+        count = len(self.graph.relations)
+
+        assert self.graph.auto_create_relations() == 0
+        assert self.graph.auto_create_relations(incremental=True) == 0
+        assert len(self.graph.relations) == count
+
+    def test_incremental_links_only_new_nodes(self):
+        rng = random.Random(2)
+        self.add_random_skills(rng, 0, 200)
+        self.graph.auto_create_relations()
+        self.add_random_skills(rng, 200, 50)
+
+        # 新节点的候选只来自其所在的分桶和来源分组
+        calls = []
+        original = self.graph._calculate_similarity
+        self.graph._calculate_similarity = lambda a, b: calls.append((a.id, b.id)) or original(a, b)
+        self.graph.auto_create_relations(incremental=True)
+
+        assert all(int(a[1:]) >= 200 or int(b[1:]) >= 200 for a, b in calls)
+        assert self.relation_map() == legacy_auto_relations(self.graph)
+
+    def test_updated_node_is_relinked(self):
+        self.graph.add_skill(SkillNode(id="a", name="A", source="manual", tags=["x", "y"]))
+        self.graph.add_skill(SkillNode(id="b", name="B", source="manual", tags=["z"]))
+        self.graph.auto_create_relations()
+        assert not self.graph.relations
+
+        self.graph.add_skill(SkillNode(id="a", name="A", source="manual", tags=["z"]))
+        assert self.graph.auto_create_relations(incremental=True) == 1
+        assert self.relation_map() == {("a", "b"): 1.0}
+
+
+@pytest.mark.unit
+class TestSearch:
+    """Field-weighted inverted-index search."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        self.path = temp_directory / "skill_graph.json"
+        self.graph = make_graph(self.path, batch_size=1)
+        for skill in (
+            SkillNode(id="a", name="Data Analysis", source="org/analytics", tags=["python", "pandas"],
+                      description="Analyze tabular data"),
+            SkillNode(id="b", name="Web Scraper", source="org/tools", tags=["python", "web"],
+                      description="Collect data from web pages"),
+            SkillNode(id="c", name="前端设计", source="manual", tags=["design"], description="界面组件设计"),
+        ):
+            self.graph.add_skill(skill)
+
+    def ids(self, query, limit=10):
+        return [s.id for s in self.graph.search(query, limit=limit)]
+
+    def test_field_weights_rank_results(self):
+        # a: 名称 + 描述 + 来源前缀；b: 仅描述
+        assert self.ids("data") == ["a", "b"]
+        assert self.ids("python") == ["a", "b"]
+        assert self.ids("web") == ["b"]
+
+    def test_multi_term_and_prefix_queries(self):
+        assert self.ids("Python analysis task") == ["a", "b"]
+        assert self.ids("scrap") == ["b"]
+        assert self.ids("analy")[0] == "a"
+        assert self.ids("设计") == ["c"]
+        assert self.ids("unknown") == []
+        assert self.ids("python", limit=1) == ["a"]
+
+    def test_cjk_bigrams_and_stopwords(self):
+        assert SearchIndex.tokenize("React 前端组件 for the web") == ["react", "前端", "端组", "组件", "web"]
+        assert self.ids("组件设计") == ["c"]
+        # 与名称只共享单字、不共享二元组的查询不命中
+        assert self.ids("计件") == []
+        # 单个中文字按前缀匹配二元组
+        assert self.ids("界") == ["c"]
+
+    def test_empty_query_returns_first_nodes(self):
+        assert self.ids("") == ["a", "b", "c"]
+        assert self.ids("", limit=2) == ["a", "b"]
+        assert self.ids("the -") == ["a", "b", "c"]
+
+    def test_updates_replace_stale_entries(self):
+        self.graph.add_skill(SkillNode(id="b", name="Crawler", source="org/tools", tags=["go"]))
+
+        assert self.ids("scraper") == []
+        assert self.ids("crawl") == ["b"]
+        assert "b" not in self.graph._index["python"]
+        assert self.graph._index["go"] == {"b"}
+
+    def test_index_is_rebuilt_on_load(self):
+        reloaded = make_graph(self.path)
+        assert [s.id for s in reloaded.search("python")] == ["a", "b"]
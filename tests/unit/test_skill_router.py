@@ -73,3 +73,174 @@ class TestSkillRouter(RouterTestBase):
             pytest.skip("Route method not implemented")
         except Exception as e:
             pytest.skip(f"Routing failed: {e}")
+
+
+def write_skill(root, name, keywords, level="high"):
+    skill_dir = root / name
+    skill_dir.mkdir(exist_ok=True)
+    keyword_list = ", ".join(keywords)
+    (skill_dir / "SKILL.md").write_text(
+        f"---\nname: {name}\ntriggers:\n  - level: {level}\n    keywords: [{keyword_list}]\n---\n",
+        encoding="utf-8"
+    )
+    return skill_dir
+
+
+@pytest.mark.unit
+class TestKeywordMatcher:
+    """Test the Aho-Corasick keyword matcher behind keyword routing."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        from keyword_matcher import KeywordMatcher
+        self.KeywordMatcher = KeywordMatcher
+
+    def test_matches_equal_substring_scan(self):
+        import random
+        rng = random.Random(5)
+        alphabet = "abc前端设计"
+        keywords = {"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(200)}
+
+        matcher = self.KeywordMatcher()
+        for keyword in keywords:
+            matcher.add(keyword, keyword.upper())
+
+        for _ in range(200):
+            text = "".join(rng.choice(alphabet + " ") for _ in range(rng.randint(0, 30)))
+            expected = {k for k in keywords if k in text}
+            hits = matcher.match(text)
+            assert {k for k, _ in hits} == expected
+            assert all(payloads == [k.upper()] for k, payloads in hits)
+
+    def test_remove_and_readd(self):
+        matcher = self.KeywordMatcher()
+        matcher.add("react", "a")
+        matcher.add("react", "b")
+        matcher.add("act", "c")
+
+        assert matcher.remove("react", "a")
+        assert matcher.match("reactive") == [("react", ["b"]), ("act", ["c"])]
+        assert matcher.remove("react", "b")
+        assert matcher.match("reactive") == [("act", ["c"])]
+        assert not matcher.remove("react", "b")
+
+        matcher.add("react", "d")
+        assert matcher.match("reactive") == [("act", ["c"]), ("react", ["d"])]
+
+    def test_router_updates_on_incremental_update(self, temp_directory):
+        import os
+        from skill_index import SkillIndex
+        from skill_router import SkillRouter
+
+        write_skill(temp_directory, "frontend-skill", ["前端", "react"])
+        write_skill(temp_directory, "docs-skill", ["文档"])
+        index = SkillIndex(str(temp_directory))
+        router = SkillRouter(index)
+        assert router._match_by_keywords("写一个 React 组件").primary == "frontend-skill"
+
+        skill_dir = write_skill(temp_directory, "docs-skill", ["文档", "react"])
+        skill_md = skill_dir / "SKILL.md"
+        mtime = os.path.getmtime(skill_md) + 10
+        os.utime(skill_md, (mtime, mtime))
+        write_skill(temp_directory, "frontend-skill", ["前端"])
+        skill_md = temp_directory / "frontend-skill" / "SKILL.md"
+        os.utime(skill_md, (mtime, mtime))
+
+        assert sorted(index.incremental_update()) == ["docs-skill", "frontend-skill"]
+        assert router._match_by_keywords("写一个 React 组件").primary == "docs-skill"
+        assert router._match_by_keywords("前端").primary == "frontend-skill"
+
+
+def write_resource_skill(root, name, provides=(), consumes=(), related=(), sequential=()):
+    skill_dir = root / name
+    skill_dir.mkdir(exist_ok=True)
+    (skill_dir / "SKILL.md").write_text(
+        f"---\nname: {name}\nprovides: [{', '.join(provides)}]\nconsumes: [{', '.join(consumes)}]\n"
+        f"related: [{', '.join(related)}]\n---\n",
+        encoding="utf-8"
+    )
+    if sequential:
+        steps = "".join(f"    - skill: {skill}\n" for skill in sequential)
+        (skill_dir / "INTEROP.yml").write_text(f"collaboration:\n  sequential:\n{steps}", encoding="utf-8")
+    return skill_dir
+
+
+@pytest.mark.unit
+class TestCollaborationGraph:
+    """Test the precomputed collaboration graph behind collaboration chains."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, temp_directory):
+        from skill_index import SkillIndex
+        from skill_router import SkillRouter
+
+        self.root = temp_directory
+        write_resource_skill(temp_directory, "tokens", provides=["design-tokens"])
+        write_resource_skill(temp_directory, "brand", provides=["brand-spec"])
+        write_resource_skill(temp_directory, "frontend", provides=["ui-components"],
+                             consumes=["design-tokens", "brand-spec"], related=["brand"])
+        write_resource_skill(temp_directory, "page", consumes=["ui-components"])
+        write_resource_skill(temp_directory, "docs", sequential=["page"])
+
+        self.index = SkillIndex(str(temp_directory))
+        self.router = SkillRouter(self.index)
+
+    def test_chains_and_transitive_order(self):
+        graph = self.router.collaboration_graph
+        assert self.router._infer_collaboration_chain("frontend") == ["tokens", "brand"]
+        assert self.router._infer_collaboration_chain("docs") == ["page"]
+        assert self.router._infer_collaboration_chain("missing") == []
+
+        assert graph.execution_order("docs") == ["tokens", "brand", "frontend", "page", "docs"]
+        assert graph.closure("page") == {"tokens", "brand", "frontend"}
+        assert self.router._determine_execution_order("page", ["frontend"]) == \
+            ["tokens", "brand", "frontend", "page"]
+        # 自定义协作技能仍以主技能结尾
+        assert self.router._determine_execution_order("frontend", ["page"]) == \
+            ["tokens", "brand", "page", "frontend"]
+
+        # 返回副本
+        graph.chain("frontend").append("mutated")
+        assert graph.chain("frontend") == ["tokens", "brand"]
+
+    def test_incremental_update_reaches_transitive_dependents(self):
+        graph = self.router.collaboration_graph
+        assert graph.execution_order("docs")[0] == "tokens"
+
+        # 新的相关提供者替换 frontend 的上游
+        write_resource_skill(self.root, "tokens-v2", provides=["design-tokens"])
+        write_resource_skill(self.root, "frontend", provides=["ui-components"],
+                             consumes=["design-tokens", "brand-spec"], related=["brand", "tokens-v2"])
+        self.index.update_skills([str(self.root / "tokens-v2"), str(self.root / "frontend")])
+
+        assert self.router.collaboration_graph is graph  # 增量更新而非重建
+        assert graph.chain("frontend") == ["tokens-v2", "brand"]
+        assert graph.execution_order("docs") == ["tokens-v2", "brand", "frontend", "page", "docs"]
+
+        # 删除提供者后消费者的协作链随之更新
+        import shutil
+        shutil.rmtree(self.root / "brand")
+        self.index.update_skills([str(self.root / "brand")])
+        assert graph.execution_order("page") == ["tokens-v2", "frontend", "page"]
+
+    def test_cycles_are_broken(self):
+        write_resource_skill(self.root, "tokens", provides=["design-tokens"], consumes=["ui-components"])
+        self.index.update_skills([str(self.root / "tokens")])
+
+        graph = self.router.collaboration_graph
+        order = graph.execution_order("page")
+        assert order[-1] == "page"
+        assert sorted(order) == ["brand", "frontend", "page", "tokens"]
+        assert graph.execution_order("frontend")[-1] == "frontend"
+
+    def test_rebuild_and_full_scan_agree(self):
+        from collaboration_graph import CollaborationGraph
+
+        self.router.collaboration_graph  # 构建后再全量重建
+        self.index.rebuild()
+        rebuilt = CollaborationGraph.build(self.index, self.router._interop_cache)
+        restored = CollaborationGraph.from_state(rebuilt.to_state())
+        for name in self.index.skills:
+            expected = rebuilt.execution_order(name)
+            assert self.router.collaboration_graph.execution_order(name) == expected
+            assert restored.execution_order(name) == expected
@@ -0,0 +1,142 @@
+"""
+Local GitHub API Stub
+
+Serves /repos/{owner}/{repo} and /repos/{owner}/{repo}/readme over
+keep-alive HTTP/1.1 with ETags, so distiller tests run without network.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_readme(repo):
+    return f"""# {repo}
+
+## Overview
+
+Stub repository {repo}.
+
+## Workflow
+
+1. Plan
+2. Build
+
+## Best Practices
+
+- Test first
+
+```python
+print("{repo}")
+```
+"""
+
+
+class GitHubStubServer:
+    """
+    Stub GitHub API server running in a background thread.
+
+    Attributes:
+        url: base URL to use as the distiller's api_url
+        stats: request counters (requests, not_modified, connections)
+        latency: seconds to sleep before each response
+        slow_repos: repo name -> extra delay in seconds
+        missing_readmes: repos whose README returns 404
+        throttled: number of upcoming requests answered with 429 + Retry-After
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.slow_repos = {}
+        self.missing_readmes = set()
+        self.throttled = 0
+        self.stats = {'requests': 0, 'not_modified': 0, 'connections': 0}
+        self.auth_headers = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # 整个响应一次写出，避免 Nagle + 延迟确认造成的停顿
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                stub._count('connections')
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._count('requests')
+                with stub._lock:
+                    throttle = stub.throttled > 0
+                    stub.throttled -= throttle
+                if throttle:
+                    return self._send(429, b'{"message": "slow down"}', retry_after='0.2')
+                if self.headers.get('Authorization'):
+                    with stub._lock:
+                        stub.auth_headers.add(self.headers['Authorization'])
+                parts = self.path.strip('/').split('/')
+                if len(parts) < 3 or parts[0] != 'repos':
+                    return self._send(404, b'{"message": "Not Found"}')
+
+                owner, repo = parts[1], parts[2]
+                time.sleep(stub.latency + stub.slow_repos.get(repo, 0))
+                if parts[3:] == ['readme']:
+                    if repo in stub.missing_readmes:
+                        return self._send(404, b'{"message": "Not Found"}')
+                    body = make_readme(repo).encode('utf-8')
+                elif parts[3:]:
+                    return self._send(404, b'{"message": "Not Found"}')
+                elif repo.startswith('missing'):
+                    return self._send(404, b'{"message": "Not Found"}')
+                else:
+                    body = json.dumps({
+                        'name': repo,
+                        'owner': {'login': owner},
+                        'description': f'{repo} workflow toolkit',
+                        'stargazers_count': len(repo) * 10,
+                        'language': 'Python',
+                        'license': {'spdx_id': 'MIT'},
+                        'topics': ['workflow'],
+                    }).encode('utf-8')
+
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    stub._count('not_modified')
+                    return self._send(304, b'', etag)
+                self._send(200, body, etag)
+
+            def _send(self, status, body, etag=None, retry_after=None):
+                self.send_response(status)
+                if etag:
+                    self.send_header('ETag', etag)
+                if retry_after:
+                    self.send_header('Retry-After', retry_after)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler